@@ -1,363 +1,447 @@
 # -*- coding: utf-8 -*-
-from typing import Any, Dict, Optional
-
-from flask import Flask, render_template, request
-
-from calculator import CalcInput, run_calculation
-from calculator.constants import DEFAULT_FIXED_CONTRIB, DEFAULT_PATENT_COST, MONTH_KEYS
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from flask import (
+    Flask,
+    Response,
+    jsonify,
+    abort,
+    g,
+    make_response,
+    redirect,
+    render_template,
+    request,
+    send_from_directory,
+    stream_with_context,
+    url_for,
+)
+from jinja2 import FileSystemBytecodeCache
+from jinja2.utils import htmlsafe_json_dumps
+from markupsafe import Markup
+
+import assets
+
+from calculator import CalcInput
+from calculator.cache import DEFAULT_CACHE_SIZE, CalculationCache, canonical_input
+from calculator.calc_data import build_calc_data
+from calculator.constants import MONTH_KEYS
+from calculator.inputs import FORM_FIELDS, InputError, ParsedRow, parse_calc_input, parse_row
+from calculator.metrics import CONTENT_TYPE, ENGINE_STAGE_SECONDS, REGISTRY, CounterCallback, GaugeCallback
+from calculator.permalink import build_fingerprint, canonical_query, etag_for, parse_query
+from calculator.sensitivity import Axis, sensitivity_grid
+from calculator.stream import calculate_records, read_records
 from calculator.utils import format_number
 
 app = Flask(__name__)
+# Compiled templates persist across worker restarts; the cache is keyed on the
+# template source, so an edited template is recompiled. ``None`` picks a
+# private directory under the system temp dir.
+app.jinja_options = {
+    **app.jinja_options,
+    "bytecode_cache": FileSystemBytecodeCache(os.environ.get("JINJA_BYTECODE_CACHE_DIR") or None),
+}
+
+calculation_cache = CalculationCache(
+    maxsize=int(os.environ.get("CALC_CACHE_SIZE", DEFAULT_CACHE_SIZE)),
+    ttl=float(os.environ["CALC_CACHE_TTL"]) if os.environ.get("CALC_CACHE_TTL") else None,
+)
+# Permalink pages only change with the rule set or a deploy, and both change their ETag.
+PERMALINK_MAX_AGE = int(os.environ.get("PERMALINK_MAX_AGE", 3600))
+FRAGMENT_CACHE_SIZE = int(os.environ.get("FRAGMENT_CACHE_SIZE", 512))
+# Built assets have content-hashed names, so browsers may keep them forever.
+ASSET_MAX_AGE = 365 * 24 * 3600
+ASSET_DIR = assets.DIST_DIR
+asset_manifest = assets.load_manifest(ASSET_DIR)
+TEMPLATE_DIR = Path(app.root_path) / (app.template_folder or "templates")
+# Computed once per process: a deploy with new templates or bundles gets new ETags.
+build_id = build_fingerprint(asset_manifest, TEMPLATE_DIR)
+
+REQUESTS = REGISTRY.counter("http_requests_total", "HTTP-запросы по маршруту, методу и статусу.", ("endpoint", "method", "status"))
+REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds", "Время до готового ответа (без отдачи потокового тела).", ("endpoint",)
+)
+RENDER_SECONDS = REGISTRY.histogram("template_render_seconds", "Время рендеринга шаблонов.", ("template",))
+
+
+@app.before_request
+def _start_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def _record_request(response):
+    # ``endpoint`` is ``None`` for unmatched URLs; one label keeps them from multiplying series.
+    endpoint = request.endpoint or "unmatched"
+    start = g.get("request_start")
+    if start is not None:
+        REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint)
+    REQUESTS.inc(endpoint, request.method, str(response.status_code))
+    # Cache counts live in this worker; a scrape may be answered by another one.
+    REGISTRY.publish()
+    return response
+
+
+def _render(template: str, **context: Any) -> str:
+    start = time.perf_counter()
+    html = render_template(template, **context)
+    RENDER_SECONDS.observe(time.perf_counter() - start, template)
+    return html
+
+
+@app.template_global()
+def asset_urls(bundle: str) -> List[str]:
+    """URLs to link for ``bundle``: the built file, or its sources when there is no build."""
+    if bundle in asset_manifest and not app.jinja_env.auto_reload:
+        return [url_for("asset", filename=asset_manifest[bundle])]
+    return [url_for("static", filename=source) for source in assets.BUNDLES[bundle]]
+
+
+@app.route("/assets/<path:filename>")
+def asset(filename: str):
+    """A built bundle, precompressed to the best encoding the client accepts.
+
+    Any hashed file in ``ASSET_DIR`` is served, not only the current
+    manifest's: HTML rendered before a deploy still links the previous build.
+    """
+    if not assets.is_hashed_name(filename) or not (ASSET_DIR / filename).is_file():
+        abort(404)
+    mimetype = "text/css" if filename.endswith(".css") else "text/javascript"
+    for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+        if request.accept_encodings[encoding] and (ASSET_DIR / f"{filename}{suffix}").is_file():
+            response = send_from_directory(ASSET_DIR, f"{filename}{suffix}", mimetype=mimetype, max_age=ASSET_MAX_AGE)
+            response.content_encoding = encoding
+            break
+    else:
+        response = send_from_directory(ASSET_DIR, filename, mimetype=mimetype, max_age=ASSET_MAX_AGE)
+    response.vary.add("Accept-Encoding")
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+class FragmentCache:
+    """Thread-safe LRU of rendered HTML fragments."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_render(self, key: Hashable, render: Callable[[], Any]) -> Any:
+        if app.jinja_env.auto_reload:
+            # Templates may change under the debug server; never serve stale HTML.
+            return render()
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+        # Rendered outside the lock: a concurrent miss only renders twice.
+        value = render()
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+
+FRAGMENT_SLOTS = ("form_html", "results_html", "calc_data_html")
+form_fragments = FragmentCache(FRAGMENT_CACHE_SIZE)
+result_fragments = FragmentCache(FRAGMENT_CACHE_SIZE)
+# The page chrome around the fragments and the blank page: one entry each per deploy.
+page_fragments = FragmentCache(2)
+
+
+def _cache_stats() -> Dict[str, Tuple[int, int, int]]:
+    """``(hits, misses, entries)`` of every cache, by name."""
+    info = calculation_cache.info()
+    stats = {"calculation": (info.hits, info.misses, info.size)}
+    for name, cache in (("form", form_fragments), ("results", result_fragments), ("page", page_fragments)):
+        stats[name] = (cache.hits, cache.misses, len(cache))
+    return stats
+
+
+def _cache_metric(index: int) -> Callable[[], Dict[Tuple[str, ...], float]]:
+    return lambda: {(name,): values[index] for name, values in _cache_stats().items()}
+
+
+def _cache_hit_ratio() -> Dict[Tuple[str, ...], float]:
+    # From the counters as scraped, so with several workers it covers all of them.
+    hits = REGISTRY.values("cache_hits_total")
+    misses = REGISTRY.values("cache_misses_total")
+    ratios = {}
+    for labels, hit in hits.items():
+        total = hit + misses.get(labels, 0.0)
+        ratios[labels] = hit / total if total else 0.0
+    return ratios
+
+
+REGISTRY.register(CounterCallback("cache_hits_total", "Попадания в кэш.", ("cache",), _cache_metric(0)))
+REGISTRY.register(CounterCallback("cache_misses_total", "Промахи кэша.", ("cache",), _cache_metric(1)))
+REGISTRY.register(GaugeCallback("cache_entries", "Записей в кэше.", ("cache",), _cache_metric(2)))
+REGISTRY.register(
+    GaugeCallback("cache_hit_ratio", "Доля попаданий в кэш с запуска сервера.", ("cache",), _cache_hit_ratio, shared=False)
+)
+
+
+def _shell() -> List[str]:
+    """``index.html`` split around its fragment slots: static text only."""
+
+    def render() -> List[str]:
+        markers = {slot: Markup(f"<!--{slot}-->") for slot in FRAGMENT_SLOTS}
+        html = _render("index.html", **markers)
+        parts = []
+        for slot in FRAGMENT_SLOTS:
+            head, html = html.split(markers[slot], 1)
+            parts.append(head)
+        parts.append(html)
+        return parts
+
+    return page_fragments.get_or_render("shell", render)
+
+
+@dataclass
+class PageInput:
+    """What the page shows: the form as entered and, if valid, the input to calculate."""
+
+    form_data: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    # Input name -> message shown next to that input.
+    field_errors: Dict[str, str] = field(default_factory=dict)
+    calc_input: Optional[CalcInput] = None
 
 
-def _safe_number(value: Optional[float], default: float = 0.0) -> float:
-    if value is None:
-        return default
-    try:
-        return float(value)
-    except (TypeError, ValueError):
-        return default
-
-
-def build_base_payload(components: Dict[str, Any], calc_input: Optional[CalcInput]) -> Dict[str, Any]:
-    if not components or not calc_input:
-        return {}
-
-    def normalize_share(value: Optional[float], fallback: float) -> float:
-        share = fallback if value is None else value
-        if share > 1.0:
-            share = share / 100.0
-        if share < 0.0:
-            share = 0.0
-        return min(share, 1.0)
-
-    rent_share = normalize_share(getattr(calc_input, "vat_share_rent", None), 1.0)
-    other_share = normalize_share(getattr(calc_input, "vat_share_other", None), 1.0)
-    cogs_share = normalize_share(getattr(calc_input, "vat_share_cogs", None), getattr(calc_input, "vat_purchases_percent", 0.0))
-
-    return {
-        "period_label": None,
-        "revenue_gross": _safe_number(getattr(calc_input, "revenue", 0.0)),
-        "cost_of_goods_gross": _safe_number(components.get("cost_of_goods")),
-        "rent": _safe_number(components.get("rent")),
-        "other_expenses": _safe_number(components.get("other_expenses")),
-        "fot": _safe_number(components.get("annual_fot")),
-        "annualFot": _safe_number(components.get("annual_fot")),
-        "payroll": _safe_number(components.get("annual_fot")),
-        "has_employees": bool(components.get("has_employees")),
-        "hasEmployees": bool(components.get("has_employees")),
-        "employees": _safe_number(getattr(calc_input, "employees", 0.0)),
-        "employeesCount": _safe_number(getattr(calc_input, "employees", 0.0)),
-        "insurance_standard": _safe_number(components.get("insurance_standard")),
-        "fixed_contrib": _safe_number(components.get("fixed_contrib")),
-        "patent_cost_year": _safe_number(getattr(calc_input, "patent_cost_year", 0.0)),
-        "patent_pvd_period": _safe_number(getattr(calc_input, "patent_pvd_period", 0.0)),
-        "share_with_vat": _safe_number(components.get("vat_purchases_percent")),
-        "vat_purchases_percent": _safe_number(components.get("vat_purchases_percent")),
-        "vat_share_cogs": _safe_number(cogs_share),
-        "vat_share_rent": _safe_number(rent_share),
-        "vat_share_other": _safe_number(other_share),
-        "transition_mode": components.get("transition_mode") or "none",
-        "stock_extra": _safe_number(components.get("stock_extra")),
-        "stock_expense_amount": _safe_number(components.get("stock_expense_amount")),
-        "accumulated_vat_credit": _safe_number(components.get("accumulated_vat_credit")),
-        "owner_extra_income": _safe_number(components.get("owner_extra_income")),
-        "owner_extra_income_base": _safe_number(components.get("owner_extra_income_base")),
-        "owner_extra_profit": _safe_number(components.get("owner_extra_profit")),
-        "owner_extra_profit_base": _safe_number(components.get("owner_extra_profit_base")),
-    }
-
-
-def build_regime_payload(title: str, payload: Dict[str, Any], components: Dict[str, Any]) -> Dict[str, Any]:
-    summary = {
-        "revenue": _safe_number(payload.get("revenue")),
-        "expenses": _safe_number(payload.get("expenses")),
-        "tax": _safe_number(payload.get("tax")),
-        "vat": _safe_number(payload.get("vat")),
-        "insurance": _safe_number(payload.get("insurance")),
-        "total_burden": _safe_number(payload.get("total_burden")),
-        "burden_percent": _safe_number(payload.get("burden_percent")),
-        "net_profit": _safe_number(payload.get("net_profit")),
-        "price_uplift_percent": _safe_number(payload.get("price_uplift_percent")),
-        "price_uplift_multiplier": _safe_number(payload.get("price_uplift_multiplier")),
-        "gross_margin_needed_percent": _safe_number(payload.get("gross_margin_needed_percent")),
-        "gross_margin_current_percent": _safe_number(payload.get("gross_margin_current_percent")),
-        "gross_margin_delta_pp": _safe_number(payload.get("gross_margin_delta_pp")),
-        "cogs_share_current_percent": _safe_number(payload.get("cogs_share_current_percent")),
-        "cogs_share_after_uplift_percent": _safe_number(payload.get("cogs_share_after_uplift_percent")),
-        "price_uplift_unattainable": bool(payload.get("price_uplift_unattainable")),
-    }
-
-    taxes = {
-        "usn_tax": summary["tax"],
-        "usn_tax_before_reduction": _safe_number(payload.get("tax_initial")),
-        "usn_reduction": _safe_number(payload.get("tax_reduction")),
-        "usn_reduction_limit": _safe_number(payload.get("tax_reduction_limit")),
-        "vat_to_pay": summary["vat"],
-        "vat_charged": _safe_number(payload.get("vat_charged")),
-        "vat_deductible": _safe_number(payload.get("vat_deductible")),
-        "vat_extra_credit": _safe_number(payload.get("vat_extra_credit")),
-    }
-
-    insurance = {
-        "insurance_total": summary["insurance"],
-        "insurance_standard": _safe_number(components.get("insurance_standard")),
-        "owner_extra": _safe_number(payload.get("owner_extra")),
-        "owner_extra_base": _safe_number(payload.get("owner_extra_base")),
-        "fixed_contrib": _safe_number(payload.get("fixed_contrib")),
-    }
-
-    details_keys = (
-        "owner_extra",
-        "owner_extra_base",
-        "usn_regular_tax",
-        "usn_min_tax",
-        "tax_initial",
-        "tax_reduction",
-        "tax_reduction_limit",
-        "tax_reduction_base",
-        "fixed_contrib",
-        "fixed_contrib_reduction",
-        "ndfl_base",
-        "ndfl_tax",
-        "income_without_vat",
-        "expenses_without_vat",
-        "ausn_tax_base",
-        "vat_charged",
-        "vat_deductible",
-        "vat_extra_credit",
-        "vat_payable",
-        "vat_refund",
-        "cogs_no_vat",
-        "rent_no_vat",
-        "other_no_vat",
-        "vat_deductible_cogs",
-        "vat_deductible_rent",
-        "vat_deductible_other",
-        "net_profit_accounting",
-        "net_profit_cash",
-        "total_payments",
-        "tax_before_deduction",
-        "tax_deduction",
-        "tax_deduction_limit",
-        "tax_payable",
-        "deductible_contrib",
-        "contrib_self",
-        "contrib_workers",
-        "contrib_self_extra",
-        "contrib_self_extra_base",
-        "price_uplift_percent",
-        "price_uplift_multiplier",
-        "gross_margin_current_percent",
-        "gross_margin_needed_percent",
-        "gross_margin_delta_pp",
-        "cogs_share_current_percent",
-        "cogs_share_after_uplift_percent",
-        "target_profit_patent",
-        "has_employees_patent_limit",
-        "patent_cost_year",
-        "patent_pvd_period",
-        "patent_pvd_used",
-        "patent_pvd_auto",
+def _page_input(row: ParsedRow) -> PageInput:
+    values = row.values
+    form_data = {name: values[name] for name in FORM_FIELDS}
+    for key, value in zip(MONTH_KEYS, values["purchases_month_percents"]):
+        form_data[f"purchases_{key}"] = value
+    error = row.message
+    return PageInput(
+        form_data=form_data,
+        error=error,
+        field_errors=row.errors,
+        calc_input=None if error else row.calc_input(),
     )
 
-    details = {key: _safe_number(payload.get(key)) for key in details_keys}
-    details["price_uplift_unattainable"] = bool(payload.get("price_uplift_unattainable"))
-
-    return {
-        "id": payload.get("regime_id"),
-        "title": title,
-        "available": True,
-        "summary": summary,
-        "taxes": taxes,
-        "insurance": insurance,
-        "profit": {"net_profit": summary["net_profit"]},
-        "burden": {
-            "total_tax_burden": summary["total_burden"],
-            "burden_percent": summary["burden_percent"],
-        },
-        "details": details,
-    }
-
-
-def build_calc_data(summary, components: Dict[str, Any], calc_input: Optional[CalcInput]) -> Dict[str, Any]:
-    if not summary or not summary.results:
-        return {}
-
-    base_payload = build_base_payload(components, calc_input)
-    regimes: Dict[str, Any] = {}
-    order = []
-
-    for title, payload, ok in summary.results:
-        if not ok or not payload:
-            continue
-        regime_id = payload.get("regime_id")
-        if not regime_id:
-            continue
-        order.append(regime_id)
-        regimes[regime_id] = build_regime_payload(title, payload, components)
-
-    return {
-        "base": base_payload,
-        "regimes": regimes,
-        "order": order,
-    }
+
+def _calc_data_json(calc_data: Dict[str, Any]) -> Markup:
+    # Compact separators and raw UTF-8 titles; still safe inside <script>.
+    return htmlsafe_json_dumps(calc_data, separators=(",", ":"), ensure_ascii=False)
+
+
+def _result_fragments(calc_input: Optional[CalcInput]) -> Tuple[str, str]:
+    """Results and ``calc-data`` HTML; cached per canonical input, so a hit skips the calculation."""
+    if calc_input is None:
+        return result_fragments.get_or_render(
+            None,
+            lambda: (
+                _render("partials/_results.html", results=None, top_results=None),
+                _render("partials/_calc_data.html", calc_data_json=_calc_data_json({})),
+            ),
+        )
+    query = canonical_query(calc_input)
+
+    def render() -> Tuple[str, str]:
+        # Rendered from the canonical input so equal keys always give equal HTML.
+        canonical = canonical_input(calc_input)
+        summary = calculation_cache.calculate(canonical)
+        results_html = _render(
+            "partials/_results.html",
+            results=summary.results,
+            top_results=summary.top_results,
+            components=summary.components,
+            format_number=format_number,
+            permalink=f"{url_for('result_page')}?{query}",
+        )
+        with ENGINE_STAGE_SECONDS.time("calc_data"):
+            calc_data = build_calc_data(summary, summary.components, canonical)
+        return results_html, _render("partials/_calc_data.html", calc_data_json=_calc_data_json(calc_data))
+
+    return result_fragments.get_or_render(query, render)
+
+
+def _render_page(page: PageInput) -> str:
+    form_html = form_fragments.get_or_render(
+        (page.error, tuple(page.form_data.items()), tuple(sorted(page.field_errors.items()))),
+        lambda: _render(
+            "partials/_form.html", form_data=page.form_data, error=page.error, field_errors=page.field_errors
+        ),
+    )
+    results_html, calc_data_html = _result_fragments(page.calc_input)
+    head, after_form, after_results, tail = _shell()
+    return "".join((head, form_html, after_form, results_html, after_results, calc_data_html, tail))
+
+
+def _blank_page() -> str:
+    return page_fragments.get_or_render("blank", lambda: _render_page(PageInput()))
 
 
 @app.route("/", methods=["GET", "POST"])
 def index():
-    results = None
-    error = None
-    form_data = {}
-    top_results = None
-    components = {}
-    fixed_contrib = DEFAULT_FIXED_CONTRIB
-    patent_cost_year = DEFAULT_PATENT_COST
-    patent_pvd_period = 0.0
-    calc_data = {}
-    calc_input: Optional[CalcInput] = None
+    if request.method == "GET":
+        return _blank_page()
+    page = _page_input(parse_row(request.form))
+    try:
+        return _render_page(page)
+    except Exception as exc:
+        page = PageInput(error=f"Произошла ошибка при расчёте: {exc}")
+    return _render_page(page)
 
-    if request.method == "POST":
-        try:
-            # Базовые данные из формы
-            revenue = float(request.form.get("revenue", 0) or 0)
-            cost_percent = float(request.form.get("cost_percent", 0) or 0)
-            vat_purchases_percent = float(request.form.get("vat_purchases_percent", 0) or 0)
-            rent = float(request.form.get("rent", 0) or 0)
-            fixed_contrib = float(request.form.get("fixed_contrib", DEFAULT_FIXED_CONTRIB) or 0)
-            patent_cost_year = float(request.form.get("patent_cost_year", DEFAULT_PATENT_COST) or DEFAULT_PATENT_COST)
-            patent_pvd_period = float(request.form.get("patent_pvd_period", 0) or 0)
-
-            employees = int(request.form.get("employees", 0) or 0)
-            salary = float(request.form.get("salary", 0) or 0)
-
-            fot_mode = request.form.get("fot_mode", "staff")
-            fot_annual = float(request.form.get("fot_annual", 0) or 0)
-
-            other_mode = request.form.get("other_mode", "percent")
-            other_percent = float(request.form.get("other_percent", 0) or 0)
-            other_amount = float(request.form.get("other_amount", 0) or 0)
-
-            transition_mode = request.form.get("transition_mode", "none")
-            if transition_mode not in {"none", "vat", "stock"}:
-                transition_mode = "none"
-
-            accumulated_vat_credit = float(request.form.get("accumulated_vat_credit", 0) or 0)
-            stock_expense_amount = float(request.form.get("stock_expense_amount", 0) or 0)
-
-            purchases_month_percents = []
-            for key in MONTH_KEYS:
-                raw = request.form.get(f"purchases_{key}", "").strip()
-                value = float(raw) if raw else 0.0
-                purchases_month_percents.append(value)
-
-            # Валидация входных значений
-            if (
-                revenue < 0
-                or cost_percent < 0
-                or vat_purchases_percent < 0
-                or rent < 0
-                or employees < 0
-                or salary < 0
-                or other_percent < 0
-                or other_amount < 0
-                or fot_annual < 0
-                or accumulated_vat_credit < 0
-                or stock_expense_amount < 0
-                or fixed_contrib < 0
-                or patent_cost_year < 0
-                or patent_pvd_period < 0
-                or any(p < 0 for p in purchases_month_percents)
-            ):
-                error = "Все значения должны быть неотрицательными"
-            elif revenue == 0:
-                error = "Выручка должна быть больше нуля"
-            else:
-                calc_input = CalcInput(
-                    revenue=revenue,
-                    cost_percent=cost_percent,
-                    vat_purchases_percent=vat_purchases_percent,
-                    rent=rent,
-                    fixed_contrib=fixed_contrib,
-                    employees=employees,
-                    salary=salary,
-                    fot_mode=fot_mode,
-                    fot_annual=fot_annual,
-                    other_mode=other_mode,
-                    other_percent=other_percent,
-                    other_amount=other_amount,
-                    transition_mode=transition_mode,
-                    accumulated_vat_credit=accumulated_vat_credit,
-                    stock_expense_amount=stock_expense_amount,
-                    patent_cost_year=patent_cost_year,
-                    purchases_month_percents=purchases_month_percents,
-                    patent_pvd_period=patent_pvd_period,
-                )
-
-                calc_input = CalcInput(
-                    revenue=revenue,
-                    cost_percent=cost_percent,
-                    vat_purchases_percent=vat_purchases_percent,
-                    rent=rent,
-                    fixed_contrib=fixed_contrib,
-                    employees=employees,
-                    salary=salary,
-                    fot_mode=fot_mode,
-                    fot_annual=fot_annual,
-                    other_mode=other_mode,
-                    other_percent=other_percent,
-                    other_amount=other_amount,
-                    transition_mode=transition_mode,
-                    accumulated_vat_credit=accumulated_vat_credit,
-                    stock_expense_amount=stock_expense_amount,
-                    patent_cost_year=patent_cost_year,
-                    purchases_month_percents=purchases_month_percents,
-                    patent_pvd_period=patent_pvd_period,
-                )
-
-                summary = run_calculation(calc_input)
-                results = summary.results
-                top_results = summary.top_results
-                components = summary.components
-                calc_data = build_calc_data(summary, components, calc_input)
-
-            form_data = {
-                "revenue": revenue,
-                "cost_percent": cost_percent,
-                "vat_purchases_percent": vat_purchases_percent,
-                "rent": rent,
-                "fixed_contrib": fixed_contrib,
-                "patent_cost_year": patent_cost_year,
-                "patent_pvd_period": patent_pvd_period,
-                "employees": employees,
-                "salary": salary,
-                "fot_mode": fot_mode,
-                "fot_annual": fot_annual,
-                "other_mode": other_mode,
-                "other_percent": other_percent,
-                "other_amount": other_amount,
-                "transition_mode": transition_mode,
-                "accumulated_vat_credit": accumulated_vat_credit,
-                "stock_expense_amount": stock_expense_amount,
-            }
-            for key, value in zip(MONTH_KEYS, purchases_month_percents):
-                form_data[f"purchases_{key}"] = value
-
-        except ValueError:
-            error = "Пожалуйста, введите корректные числовые значения"
-        except Exception as exc:
-            error = f"Произошла ошибка при расчёте: {exc}"
-
-    return render_template(
-        "index.html",
-        results=results,
-        error=error,
-        form_data=form_data,
-        format_number=format_number,
-        top_results=top_results,
-        components=components,
-        calc_data=calc_data,
+
+@app.route("/calc", methods=["GET"])
+def result_page():
+    """Results for an input encoded in the query string, cacheable by browsers and proxies.
+
+    Non-canonical queries redirect to the canonical one, so every input has a
+    single URL; ``If-None-Match`` is answered before anything is calculated.
+    """
+    try:
+        values = parse_query(request.args.to_dict())
+    except InputError as exc:
+        return _render_page(PageInput(error=str(exc))), 400
+
+    query = canonical_query(CalcInput(**values))
+    if request.query_string.decode("utf-8") != query:
+        return redirect(f"{url_for('result_page')}?{query}", code=301)
+
+    etag = etag_for(query, build_id)
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = make_response(_render_page(_page_input(ParsedRow(values, {}))))
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = PERMALINK_MAX_AGE
+    return response
+
+
+@app.route("/api/v1/calculate", methods=["POST"])
+def calculate():
+    """``calc_data`` of the form route for a JSON object of ``CalcInput`` fields.
+
+    Missing fields take the form defaults; ``purchases_month_percents`` is a
+    list of 12 numbers. Invalid input answers 400 with ``{"error": ...,
+    "fields": {field: message}}``.
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify(error="Ожидался JSON-объект"), 400
+    try:
+        calc_input = parse_calc_input(payload)
+    except InputError as exc:
+        return jsonify(error=str(exc), fields=exc.fields), 400
+    summary = calculation_cache.calculate(calc_input)
+    with ENGINE_STAGE_SECONDS.time("calc_data"):
+        calc_data = build_calc_data(summary, summary.components, calc_input)
+    return jsonify(calc_data)
+
+
+@app.route("/api/v1/calculate/batch", methods=["POST"])
+def calculate_batch():
+    """Stream one NDJSON result line per record of an NDJSON or JSON-array body.
+
+    Records are read and calculated in chunks while the response is being
+    sent; an invalid record gets ``{"row", "error", "fields"}`` in its place.
+    """
+    results = calculate_records(read_records(request.stream))
+    lines = (json.dumps(result, ensure_ascii=False) + "\n" for result in results)
+    return Response(stream_with_context(lines), mimetype="application/x-ndjson")
+
+
+@app.route("/api/v1/sensitivity", methods=["POST"])
+def sensitivity():
+    """Best regime over a grid: ``{"input": {...}, "x": {...}, "y": {...}}``.
+
+    Axes are ``{"field", "start", "stop", "steps"}``; ``x`` defaults to
+    ``revenue`` and ``y`` to ``cost_percent``.
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify(error="Ожидался JSON-объект"), 400
+    try:
+        x = Axis.from_dict(payload.get("x") or {}, "revenue")
+        y = Axis.from_dict(payload.get("y") or {}, "cost_percent")
+        raw = dict(payload.get("input") or {})
+        # The axis fields are overridden cell by cell; validate the base with their start values.
+        raw.update({x.field: x.start, y.field: y.start})
+        grid = sensitivity_grid(parse_calc_input(raw), x, y)
+    except InputError as exc:
+        return jsonify(error=str(exc)), 400
+    return jsonify(grid.to_dict())
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Counters and latency histograms of this process in the Prometheus text format."""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+
+# A typical profile for ``warm_up``: staff payroll, VAT purchases, a patent.
+WARM_UP_FORM = {
+    "revenue": "12000000",
+    "cost_percent": "40",
+    "vat_purchases_percent": "60",
+    "rent": "600000",
+    "employees": "3",
+    "salary": "50000",
+    "fot_mode": "staff",
+    "other_mode": "percent",
+    "other_percent": "5",
+    "patent_pvd_period": "6000000",
+}
+
+
+def warm_up() -> None:
+    """Serve the blank page, a calculation and a batch once in this process.
+
+    Templates get compiled, the engine and batch kernels generated and the
+    shell cached, so the first real request pays none of it. Under a
+    preloading server this runs in the master and workers inherit the result.
+    The warm-up requests are then dropped from the metrics and cache counts,
+    so they start from real traffic.
+    """
+    client = app.test_client()
+    responses = (
+        client.get("/"),
+        client.post("/", data=WARM_UP_FORM),
+        client.post("/api/v1/calculate/batch", data=json.dumps([WARM_UP_FORM])),
     )
+    for response in responses:
+        if response.status_code != 200:
+            raise RuntimeError(f"Прогрев не удался: {response.request.path} -> {response.status}")
+    # Reading the streamed body is what runs the batch.
+    record = json.loads(responses[-1].get_data())
+    if record["error"]:
+        raise RuntimeError(f"Прогрев не удался: {record['error']}")
+    REGISTRY.reset()
+    for cache in (calculation_cache, form_fragments, result_fragments, page_fragments):
+        cache.reset_stats()
+    REGISTRY.publish()
 
 
 if __name__ == "__main__":
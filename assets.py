@@ -0,0 +1,137 @@
+"""Static asset build: ``python3 assets.py``.
+
+Scripts are concatenated into one bundle and ``main.css`` is minified; each
+output gets a content hash in its name plus ``.gz`` (and ``.br`` when the
+``brotli`` package is installed) siblings. ``manifest.json`` maps a bundle
+name to its hashed file so templates can link it and the server can mark it
+immutable. The files of the previous build are kept, so pages rendered
+before a deploy (cached permalinks, open tabs, responses during a rolling
+restart) still load their scripts and styles.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import brotli
+except ImportError:  # optional: gzip alone is enough for every browser
+    brotli = None
+
+ROOT = Path(__file__).resolve().parent
+STATIC_DIR = ROOT / "static"
+DIST_DIR = STATIC_DIR / "dist"
+MANIFEST_NAME = "manifest.json"
+HASH_LENGTH = 12
+HASHED_NAME = re.compile(rf"[\w-]+\.[0-9a-f]{{{HASH_LENGTH}}}\.(?:css|js)")
+COMPRESSED_SUFFIXES = (".gz", ".br")
+
+# Bundle name -> sources relative to ``static/``, in load order. Templates
+# link these one by one when no build is present.
+BUNDLES: Dict[str, List[str]] = {
+    "main.css": ["css/main.css"],
+    "app.js": [
+        "js/calc-data.js",
+        "js/explanations/format.js",
+        "js/explanations/builders/ausn.js",
+        "js/explanations/builders/usn-income.js",
+        "js/explanations/builders/usn-dr.js",
+        "js/explanations/builders/osno.js",
+        "js/explanations/builders/patent.js",
+        "js/explanations/index.js",
+        "js/table/details-toggle.js",
+        "js/table/regimes-sort.js",
+        "js/form/transition-mode.js",
+        "js/form/purchases-coefs.js",
+        "js/form/other-expenses-toggle.js",
+        "js/form/fot-mode.js",
+        "js/top-results.js",
+        "js/app.js",
+    ],
+}
+
+
+def minify_css(text: str) -> str:
+    text = re.sub(r"/\*.*?\*/", "", text, flags=re.S)
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"\s*([{};,>])\s*", r"\1", text)
+    text = re.sub(r":\s+", ":", text)
+    return text.replace(";}", "}").strip() + "\n"
+
+
+def bundle_text(name: str, static_dir: Path = STATIC_DIR) -> str:
+    parts = [(static_dir / source).read_text(encoding="utf-8") for source in BUNDLES[name]]
+    if name.endswith(".css"):
+        return minify_css("\n".join(parts))
+    # Every script is a self-contained IIFE, so plain concatenation keeps its
+    # scope. Template literals carry significant whitespace into the
+    # explanations, so scripts are not minified; compression removes the rest.
+    return "\n;\n".join(part.rstrip() for part in parts) + "\n"
+
+
+def hashed_name(name: str, content: bytes) -> str:
+    stem, dot, suffix = name.rpartition(".")
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    return f"{stem}.{digest}{dot}{suffix}"
+
+
+def is_hashed_name(filename: str) -> bool:
+    """Whether ``filename`` looks like a built bundle (``app.<hash>.js``)."""
+    return HASHED_NAME.fullmatch(filename) is not None
+
+
+def build(static_dir: Path = STATIC_DIR, dist_dir: Optional[Path] = None) -> Dict[str, str]:
+    """Write every bundle with its compressed variants and the manifest; return the manifest.
+
+    Files of the previous manifest stay; older generations are deleted.
+    """
+    dist_dir = dist_dir or static_dir / "dist"
+    dist_dir.mkdir(parents=True, exist_ok=True)
+    previous = load_manifest(dist_dir)
+    manifest: Dict[str, str] = {}
+    written = {MANIFEST_NAME}
+    for filename in previous.values():
+        written.add(filename)
+        written.update(f"{filename}{suffix}" for suffix in COMPRESSED_SUFFIXES)
+    for name in BUNDLES:
+        content = bundle_text(name, static_dir).encode("utf-8")
+        filename = hashed_name(name, content)
+        manifest[name] = filename
+        variants = {filename: content, f"{filename}.gz": gzip.compress(content, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants[f"{filename}.br"] = brotli.compress(content, quality=11)
+        for variant, data in variants.items():
+            (dist_dir / variant).write_bytes(data)
+        written.update(variants)
+    for stale in dist_dir.iterdir():
+        if stale.is_file() and stale.name not in written:
+            stale.unlink()
+    (dist_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    return manifest
+
+
+def load_manifest(dist_dir: Path = DIST_DIR) -> Dict[str, str]:
+    """Manifest of the last build, or ``{}`` when assets were never built."""
+    try:
+        return json.loads((dist_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+
+
+def main() -> int:
+    manifest = build()
+    for name, filename in manifest.items():
+        print(f"{name} -> {DIST_DIR.relative_to(ROOT) / filename}")
+    if brotli is None:
+        print("brotli не установлен: собраны только .gz-версии", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Throughput of ``ParallelCalculator`` against the serial loop.
+
+    python benchmarks/parallel_batch.py --rows 20000 --workers 1 2 4 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from calculator import CalcInput, run_calculation  # noqa: E402
+from calculator.constants import DEFAULT_FIXED_CONTRIB  # noqa: E402
+from calculator.parallel import DEFAULT_CHUNK_SIZE, ParallelCalculator  # noqa: E402
+
+
+def random_profiles(count: int, seed: int = 1) -> List[CalcInput]:
+    rng = random.Random(seed)
+    return [
+        CalcInput(
+            revenue=rng.uniform(500_000, 150_000_000),
+            cost_percent=rng.uniform(0, 90),
+            vat_purchases_percent=rng.uniform(0, 100),
+            rent=rng.choice([0.0, 300_000, 2_000_000]),
+            fixed_contrib=DEFAULT_FIXED_CONTRIB,
+            employees=rng.choice([0, 2, 5, 12]),
+            salary=rng.choice([0.0, 45_000, 90_000]),
+            fot_mode="staff",
+            fot_annual=0.0,
+            other_mode=rng.choice(["percent", "amount"]),
+            other_percent=rng.uniform(0, 15),
+            other_amount=rng.choice([0.0, 400_000]),
+            transition_mode=rng.choice(["none", "vat", "stock"]),
+            accumulated_vat_credit=rng.choice([0.0, 1_000_000]),
+            stock_expense_amount=rng.choice([0.0, 800_000]),
+            patent_cost_year=rng.choice([40_000, 150_000, 600_000]),
+            purchases_month_percents=[100.0] * 12,
+        )
+        for _ in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, nargs="+", default=None)
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    worker_counts = args.workers or sorted({1, 2, 4, cpus} & set(range(1, cpus + 1)) | {cpus})
+    profiles = random_profiles(args.rows)
+
+    started = time.perf_counter()
+    for data in profiles:
+        run_calculation(data)
+    serial = time.perf_counter() - started
+    print(f"CPU: {cpus}, строк: {args.rows}, размер пакета: {args.chunk_size}")
+    print(f"{'serial':>8}  {args.rows / serial:10.0f} строк/с  x1.00")
+
+    for workers in worker_counts:
+        with ParallelCalculator(workers=workers, chunk_size=args.chunk_size) as calculator:
+            # Start and warm the pool outside the measured interval.
+            list(calculator.map(profiles[: workers * args.chunk_size]))
+            started = time.perf_counter()
+            failed = sum(1 for outcome in calculator.map(profiles) if not outcome.ok)
+            elapsed = time.perf_counter() - started
+        print(f"{workers:>8}  {args.rows / elapsed:10.0f} строк/с  x{serial / elapsed:.2f}  ошибок: {failed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""Vectorized batch evaluation of all regimes over NumPy columns.
+
+The formulas come from ``calculator.formulas`` compiled to a NumPy kernel.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field, fields
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from .formulas import BACKEND_NUMPY, REGIMES, context_kernel, regimes_kernel
+from .inputs import ENUM_CHOICES, FLOAT_FIELDS, NUMBER_ERROR, SHARE_FIELDS, InputError, check_columns
+from .metrics import ENGINE_STAGE_SECONDS, REGIME_RESULTS
+from .models import CalcInput
+
+Columns = Dict[str, np.ndarray]
+
+RESULT_METRICS = (
+    "revenue",
+    "expenses",
+    "tax",
+    "vat",
+    "insurance",
+    "total_burden",
+    "burden_percent",
+    "net_profit",
+)
+
+TOP_RESULTS_LIMIT = 5
+
+# Column groups follow the input schema (``inputs.FIELDS``).
+_FLOAT_FIELDS = tuple(FLOAT_FIELDS)
+_OPTIONAL_SHARE_FIELDS = SHARE_FIELDS
+_ENUM_FIELDS = tuple(ENUM_CHOICES)
+_COLUMN_DEFAULTS = {"patent_pvd_period": 0.0}
+# Input fields that never reach the annual figures.
+_IGNORED_FIELDS = ("purchases_month_percents", "regime")
+
+
+@dataclass
+class BatchResult:
+    regimes: Tuple[str, ...]
+    metrics: Dict[str, Columns] = field(default_factory=dict)
+    available: Columns = field(default_factory=dict)
+    top_results: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return 0 if self.top_results is None else int(self.top_results.shape[0])
+
+    def column(self, regime_id: str, metric: str) -> np.ndarray:
+        return self.metrics[regime_id][metric]
+
+    def top_regime_ids(self, row: int) -> List[str]:
+        return [self.regimes[index] for index in self.top_results[row] if index >= 0]
+
+
+def columns_from_inputs(inputs: Iterable[CalcInput]) -> Columns:
+    """Transpose a sequence of ``CalcInput`` into the struct-of-arrays layout."""
+    rows = list(inputs)
+    columns: Columns = {}
+    for name in _FLOAT_FIELDS:
+        columns[name] = np.array([getattr(row, name) for row in rows], dtype=float)
+    columns["employees"] = np.array([row.employees for row in rows], dtype=np.int64)
+    for name in _OPTIONAL_SHARE_FIELDS:
+        values = [getattr(row, name) for row in rows]
+        columns[name] = np.array([np.nan if value is None else value for value in values], dtype=float)
+    for name in _ENUM_FIELDS:
+        columns[name] = np.array([getattr(row, name) for row in rows], dtype=object)
+    return columns
+
+
+def _column_size(columns: Mapping[str, object]) -> int:
+    """Row count of the broadcast columns; all scalars make a single row."""
+    try:
+        shape = np.broadcast_shapes(*(np.shape(value) for value in columns.values()))
+    except ValueError as exc:
+        raise InputError("Колонки разной длины", {name: "Колонки разной длины" for name in columns}) from exc
+    if len(shape) > 1:
+        raise InputError("Колонки должны быть одномерными", {name: "Ожидается одномерный массив" for name in columns if np.ndim(columns[name]) > 1})
+    return int(shape[0]) if shape else 1
+
+
+def _prepare_columns(columns: Mapping[str, object]) -> Tuple[Columns, int]:
+    known = {item.name for item in fields(CalcInput)}
+    unknown = sorted(set(columns) - known)
+    if unknown:
+        raise InputError(f"Неизвестные поля: {', '.join(unknown)}", {name: "Неизвестное поле" for name in unknown})
+
+    required = [
+        name
+        for name in _FLOAT_FIELDS + _ENUM_FIELDS + ("employees",)
+        if name not in columns and name not in _COLUMN_DEFAULTS
+    ]
+    if required:
+        raise InputError(f"Не заданы обязательные поля: {', '.join(required)}", {name: "Поле обязательно" for name in required})
+
+    size = _column_size(columns)
+    prepared: Columns = {}
+    try:
+        for name in _FLOAT_FIELDS:
+            default = _COLUMN_DEFAULTS.get(name)
+            value = columns.get(name, default)
+            prepared[name] = np.broadcast_to(np.asarray(value, dtype=float), (size,))
+        prepared["employees"] = np.broadcast_to(np.asarray(columns["employees"]), (size,))
+        for name in _OPTIONAL_SHARE_FIELDS:
+            value = columns.get(name)
+            # ``None`` entries become ``NaN`` under a float dtype.
+            prepared[name] = np.broadcast_to(np.asarray(np.nan if value is None else value, dtype=float), (size,))
+    except (TypeError, ValueError) as exc:
+        raise InputError(NUMBER_ERROR, {name: "Ожидаются числа"}) from exc
+    for name in _ENUM_FIELDS:
+        prepared[name] = np.broadcast_to(np.asarray(columns[name], dtype=object), (size,))
+    check_columns(prepared)
+    return prepared, size
+
+
+def build_context_columns(data: Columns) -> Columns:
+    """Array counterpart of ``engine._build_context``."""
+    return context_kernel(BACKEND_NUMPY)(data)
+
+
+def _rank_top_results(regimes: Tuple[str, ...], metrics: Dict[str, Columns], available: Columns) -> np.ndarray:
+    mask = np.stack([available[regime_id] for regime_id in regimes], axis=1)
+    burden = np.stack([metrics[regime_id]["total_burden"] for regime_id in regimes], axis=1)
+    profit = np.stack([metrics[regime_id]["net_profit"] for regime_id in regimes], axis=1)
+    burden = np.where(mask, burden, np.inf)
+    profit = np.where(mask, profit, 0.0)
+
+    # lexsort is stable, so ties keep regime order exactly like ``sorted`` does.
+    order = np.lexsort((-profit, burden), axis=1)[:, :TOP_RESULTS_LIMIT]
+    ranked_available = np.take_along_axis(mask, order, axis=1)
+    return np.where(ranked_available, order, -1)
+
+
+def _best_indices(regimes: Tuple[str, ...], metrics: Dict[str, Columns], available: Columns, metric: str) -> np.ndarray:
+    """Index of the best regime per row (``-1`` if none applies).
+
+    ``total_burden`` follows the top-5 ranking; ``net_profit`` takes the
+    highest profit, then the lower burden, then the regime order.
+    """
+    if metric == "total_burden":
+        return _rank_top_results(regimes, metrics, available)[:, 0]
+    mask = np.stack([available[regime_id] for regime_id in regimes], axis=1)
+    burden = np.stack([metrics[regime_id]["total_burden"] for regime_id in regimes], axis=1)
+    profit = np.stack([metrics[regime_id]["net_profit"] for regime_id in regimes], axis=1)
+    first = np.lexsort((np.where(mask, burden, 0.0), np.where(mask, -profit, np.inf)), axis=1)[:, 0]
+    return np.where(np.take_along_axis(mask, first[:, None], axis=1)[:, 0], first, -1)
+
+
+def run_calculation_batch(columns: Mapping[str, object]) -> BatchResult:
+    """Evaluate every regime for a struct-of-arrays input.
+
+    ``columns`` maps ``CalcInput`` field names to equally sized arrays (scalars
+    are broadcast). Missing VAT shares are passed as ``NaN`` or ``None``.
+    Unavailable rows carry ``NaN`` metrics and ``False`` in ``available``.
+    Columns are checked against the input schema; ``InputError.fields``
+    names the bad rows of each offending field.
+    """
+    start = time.perf_counter()
+    data, size = _prepare_columns({k: v for k, v in columns.items() if k not in _IGNORED_FIELDS})
+    values = regimes_kernel(BACKEND_NUMPY)(data)
+
+    regimes = tuple(REGIMES)
+    metrics: Dict[str, Columns] = {}
+    available: Columns = {}
+    availability = []
+    for regime_id in regimes:
+        mask = values[(regime_id, "available")]
+        metrics[regime_id] = {
+            metric: np.where(mask, values[(regime_id, metric)], np.nan) for metric in RESULT_METRICS
+        }
+        available[regime_id] = mask
+        count = int(np.count_nonzero(mask))
+        availability += [((regime_id, "true"), count), ((regime_id, "false"), size - count)]
+    REGIME_RESULTS.inc_many(availability)
+
+    result = BatchResult(
+        regimes=regimes,
+        metrics=metrics,
+        available=available,
+        top_results=_rank_top_results(regimes, metrics, available),
+    )
+    ENGINE_STAGE_SECONDS.observe(time.perf_counter() - start, "batch")
+    return result
@@ -0,0 +1,162 @@
+"""Exact revenue breakevens between regimes from their piecewise-linear curves."""
+
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .engine import REGIME_CALCULATORS, _build_context
+from .models import CalcInput
+from .piecewise import PiecewiseLinear, RegimeCurve, build_regime_curves
+
+METRIC_TOTAL_BURDEN = "total_burden"
+METRIC_NET_PROFIT = "net_profit"
+
+
+@dataclass
+class DominanceInterval:
+    """Revenue range ``[lo, hi]`` over which ``regime_id`` ranks first."""
+
+    lo: float
+    hi: float
+    regime_id: str
+
+
+@dataclass
+class Crossover:
+    """Revenue at which ``first`` and ``second`` give the same ``value`` of the metric.
+
+    ``first`` is the better of the two just below ``revenue``.
+    """
+
+    revenue: float
+    first: str
+    second: str
+    value: float
+
+
+@dataclass
+class Breakevens:
+    metric: str
+    lo: float
+    hi: float
+    curves: Dict[str, RegimeCurve]
+    # The winner over consecutive revenue ranges; adjacent ranges differ.
+    intervals: List[DominanceInterval] = field(default_factory=list)
+    # Every revenue at which two regimes give the same metric value.
+    crossovers: List[Crossover] = field(default_factory=list)
+
+    def best_regime(self, revenue: float) -> Optional[str]:
+        for interval in self.intervals:
+            if interval.lo <= revenue <= interval.hi:
+                return interval.regime_id
+        return None
+
+    def switch_points(self) -> List[Tuple[float, str, str]]:
+        """``(revenue, before, after)`` for each change of the leading regime."""
+        return [(left.hi, left.regime_id, right.regime_id) for left, right in zip(self.intervals, self.intervals[1:])]
+
+    def between(self, first: str, second: str) -> List[Crossover]:
+        pair = {first, second}
+        return [item for item in self.crossovers if {item.first, item.second} == pair]
+
+
+def _lead_below(difference: PiecewiseLinear, revenue: float) -> float:
+    """Value of ``difference`` just below ``revenue``, or minus the value just above at the left edge."""
+    xs = difference.xs
+    index = bisect_left(xs, revenue)
+    if index > 0:
+        return difference((xs[index - 1] + revenue) / 2.0)
+    following = [x for x in xs if x > revenue]
+    return -difference((following[0] + revenue) / 2.0) if following else 0.0
+
+
+def find_breakevens(
+    data: CalcInput,
+    lo: float,
+    hi: float,
+    *,
+    metric: str = METRIC_TOTAL_BURDEN,
+    regimes: Optional[Iterable[str]] = None,
+    scale_expenses: bool = True,
+) -> Breakevens:
+    """Crossovers and dominance intervals of the regimes for revenue in ``[lo, hi]``.
+
+    Every metric is piecewise-linear in revenue, so crossings are the roots of
+    pairwise differences, solved segment by segment without sampling. By
+    default the cost of goods and percentage-based other expenses follow
+    revenue (as for a client growing sales); ``scale_expenses=False`` keeps
+    them at the amounts implied by ``data``.
+    """
+    if metric not in (METRIC_TOTAL_BURDEN, METRIC_NET_PROFIT):
+        raise ValueError(f"Неизвестный показатель: {metric}")
+    if not 0 < lo < hi:
+        raise ValueError("Диапазон выручки должен быть положительным и непустым")
+
+    ctx, _components = _build_context(data)
+    curves = build_regime_curves(data, ctx, lo, hi, scale_expenses=scale_expenses, regimes=regimes)
+    order = {regime_id: index for index, regime_id in enumerate(REGIME_CALCULATORS)}
+    result = Breakevens(metric=metric, lo=lo, hi=hi, curves=curves)
+
+    # Every kink of every curve: between neighbouring grid points all curves
+    # are linear, so each pairwise difference is sampled once on the grid.
+    points = {lo, hi}
+    for curve in curves.values():
+        points.update(curve.net_profit.xs)
+        points.update(curve.total_burden.xs)
+    grid = sorted(points)
+    spans: Dict[str, Tuple[int, int]] = {}
+    samples: Dict[str, List[float]] = {}
+    for regime_id, curve in curves.items():
+        first_index, stop_index = bisect_left(grid, curve.lo), bisect_right(grid, curve.hi)
+        spans[regime_id] = (first_index, stop_index)
+        samples[regime_id] = getattr(curve, metric)._sample(grid[first_index:stop_index])
+
+    for first, second in combinations(curves, 2):
+        (a_start, a_stop), (b_start, b_stop) = spans[first], spans[second]
+        start, stop = max(a_start, b_start), min(a_stop, b_stop)
+        if stop - start < 2:
+            continue
+        a_values = samples[first][start - a_start : stop - a_start]
+        b_values = samples[second][start - b_start : stop - b_start]
+        difference = PiecewiseLinear(grid[start:stop], [x - y for x, y in zip(a_values, b_values)])
+        for revenue in difference.roots():
+            points.add(revenue)
+            lead = _lead_below(difference, revenue)
+            if metric == METRIC_TOTAL_BURDEN:
+                lead = -lead
+            ranked = (first, second) if lead > 0 or (lead == 0 and order[first] < order[second]) else (second, first)
+            result.crossovers.append(Crossover(revenue, ranked[0], ranked[1], getattr(curves[first], metric)(revenue)))
+    result.crossovers.sort(key=lambda item: (item.revenue, order[item.first], order[item.second]))
+
+    # Between consecutive breakpoints and crossings no curve bends and no
+    # two curves cross, so the leader at the midpoint leads on the whole range.
+    ordered = sorted(point for point in points if lo <= point <= hi)
+    middles = [(left + right) / 2.0 for left, right in zip(ordered, ordered[1:])]
+    # Same ordering as ``CalculationSummary.top_results``: lower burden first,
+    # then higher net profit; the regime order breaks exact ties.
+    keys: List[List[Tuple[float, float, int]]] = [[] for _ in middles]
+    for regime_id, curve in curves.items():
+        inside = middles[bisect_left(middles, curve.lo) : bisect_right(middles, curve.hi)]
+        offset = bisect_left(middles, curve.lo)
+        burden = curve.total_burden._sample(inside)
+        profit = curve.net_profit._sample(inside)
+        rank = order[regime_id]
+        for position, (burden_value, profit_value) in enumerate(zip(burden, profit)):
+            if metric == METRIC_NET_PROFIT:
+                keys[offset + position].append((-profit_value, burden_value, rank))
+            else:
+                keys[offset + position].append((burden_value, -profit_value, rank))
+
+    regime_ids = list(REGIME_CALCULATORS)
+    for (start, stop), ranked in zip(zip(ordered, ordered[1:]), keys):
+        if not ranked:
+            continue
+        winner = regime_ids[min(ranked)[2]]
+        if result.intervals and result.intervals[-1].regime_id == winner and result.intervals[-1].hi == start:
+            result.intervals[-1].hi = stop
+        else:
+            result.intervals.append(DominanceInterval(start, stop, winner))
+    return result
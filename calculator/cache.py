@@ -0,0 +1,183 @@
+"""Bounded memo cache for ``run_calculation`` keyed on a canonical input."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import astuple, dataclass, replace
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from .engine import REGIME_CALCULATORS, _select_regimes, run_calculation
+from .formulas import vat_shares
+from .models import CalcInput, CalcResult, CalculationSummary
+
+DEFAULT_CACHE_SIZE = 1024
+DEFAULT_CACHE_TTL: Optional[float] = None
+FLOAT_DIGITS = 6
+
+
+@dataclass(frozen=True)
+class CacheInfo:
+    hits: int
+    misses: int
+    size: int
+    maxsize: int
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def _quantize(value: float) -> float:
+    # ``+ 0.0`` folds ``-0.0`` into ``0.0`` so both hash the same.
+    return round(float(value), FLOAT_DIGITS) + 0.0
+
+
+def canonical_input(data: CalcInput) -> CalcInput:
+    """Equivalent input with normalized shares, quantized floats and unused fields dropped.
+
+    Computing on the canonical input yields the same figures as on ``data``;
+    only the echoed VAT shares in ``components`` come back normalized to 0..1.
+    """
+    other_mode = "percent" if data.other_mode == "percent" else "absolute"
+    fot_mode = "annual" if data.fot_mode == "annual" else "staff"
+    transition_mode = data.transition_mode if data.transition_mode in {"vat", "stock"} else "none"
+    shares = vat_shares(data)
+    return replace(
+        data,
+        revenue=_quantize(data.revenue),
+        cost_percent=_quantize(data.cost_percent),
+        vat_purchases_percent=_quantize(data.vat_purchases_percent),
+        rent=_quantize(data.rent),
+        fixed_contrib=_quantize(data.fixed_contrib),
+        employees=int(data.employees),
+        salary=_quantize(data.salary) if fot_mode == "staff" else 0.0,
+        fot_mode=fot_mode,
+        fot_annual=_quantize(data.fot_annual) if fot_mode == "annual" else 0.0,
+        other_mode=other_mode,
+        other_percent=_quantize(data.other_percent) if other_mode == "percent" else 0.0,
+        other_amount=_quantize(data.other_amount) if other_mode == "absolute" else 0.0,
+        transition_mode=transition_mode,
+        accumulated_vat_credit=_quantize(data.accumulated_vat_credit),
+        stock_expense_amount=_quantize(data.stock_expense_amount),
+        patent_cost_year=_quantize(data.patent_cost_year),
+        patent_pvd_period=_quantize(data.patent_pvd_period),
+        # Monthly coefficients and the selected regime do not affect the result.
+        purchases_month_percents=[],
+        vat_share_cogs=_quantize(shares["vat_share_cogs"]),
+        vat_share_rent=_quantize(shares["vat_share_rent"]),
+        vat_share_other=_quantize(shares["vat_share_other"]),
+        regime=None,
+    )
+
+
+def _key(canonical: CalcInput) -> Hashable:
+    return tuple(tuple(value) if isinstance(value, list) else value for value in astuple(canonical))
+
+
+def input_fingerprint(data: CalcInput) -> Hashable:
+    return _key(canonical_input(data))
+
+
+def copy_summary(summary: CalculationSummary) -> CalculationSummary:
+    """Copy that shares no mutable container with ``summary``."""
+    copies: Dict[int, CalcResult] = {}
+
+    def copy_payload(payload: Optional[CalcResult]) -> Optional[CalcResult]:
+        if payload is None:
+            return None
+        key = id(payload)
+        if key not in copies:
+            copies[key] = payload.copy()
+        return copies[key]
+
+    results: List[Tuple[str, Optional[CalcResult], bool]] = [
+        (title, copy_payload(payload), ok) for title, payload, ok in summary.results
+    ]
+    top_results = [(name, copy_payload(payload)) for name, payload in summary.top_results]
+    return CalculationSummary(results=results, top_results=top_results, components=dict(summary.components))
+
+
+class CalculationCache:
+    """Thread-safe LRU cache with optional TTL in front of ``run_calculation``.
+
+    Callers always receive their own copy of the cached summary, so mutating
+    it cannot leak into later hits.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = DEFAULT_CACHE_SIZE,
+        ttl: Optional[float] = DEFAULT_CACHE_TTL,
+        compute: Callable[..., CalculationSummary] = run_calculation,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if maxsize < 1:
+            raise ValueError("Размер кэша должен быть положительным")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._compute = compute
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[Optional[float], CalculationSummary]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(hits=self.hits, misses=self.misses, size=len(self._entries), maxsize=self.maxsize)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def reset_stats(self) -> None:
+        """Zero the hit and miss counts, keeping the entries."""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def calculate(
+        self,
+        data: CalcInput,
+        regimes: Optional[Iterable[str]] = None,
+        patent_targets: bool = True,
+    ) -> CalculationSummary:
+        canonical = canonical_input(data)
+        selected = tuple(_select_regimes(regimes))
+        if len(selected) == len(REGIME_CALCULATORS):
+            selected = None
+        key = (_key(canonical), selected, bool(patent_targets))
+        now = self._clock()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > now):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                cached = entry[1]
+            else:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                cached = None
+        if cached is not None:
+            return copy_summary(cached)
+
+        # Computed outside the lock: a concurrent miss on the same key only
+        # costs a duplicate calculation.
+        summary = self._compute(canonical, regimes=selected, patent_targets=patent_targets)
+        expires_at = None if self.ttl is None else now + self.ttl
+        with self._lock:
+            self._entries[key] = (expires_at, summary)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return copy_summary(summary)
@@ -0,0 +1,163 @@
+"""Compact ``calc-data`` payload: embedded in the page and returned by the JSON API.
+
+Layout::
+
+    {
+        "v": 2,
+        "base": {"revenue_gross": 8000000, "rent": 400000, ...},
+        "order": ["ausn_income", ...],
+        "titles": ["АУСН 8%", ...],
+        "metrics": {"tax": [640000, ...], ...},
+    }
+
+``metrics`` holds one column per metric with a value per regime of
+``order``. Columns that are zero for every regime and zero base fields are
+left out; readers take anything missing as 0. Money and percents are rounded
+to hundredths; the VAT shares in ``base`` are fractions 0..1 and keep six
+digits.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import fields
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .formulas import vat_shares
+from .models import (
+    SUMMARY_FIELDS,
+    UPLIFT_FIELDS,
+    AusnResult,
+    CalcInput,
+    CalcResult,
+    OsnoResult,
+    PatentResult,
+    UsnIncomeResult,
+    UsnProfitResult,
+)
+
+CALC_DATA_VERSION = 2
+PRECISION = 2
+# Shares are fractions, so hundredths would turn 0.335 into 0.34.
+SHARE_PRECISION = 6
+SHARE_FIELDS = ("vat_share_cogs", "vat_share_rent", "vat_share_other")
+RESULT_CLASSES = (AusnResult, UsnIncomeResult, UsnProfitResult, OsnoResult, PatentResult)
+
+
+def _numeric_details(cls: type) -> Tuple[str, ...]:
+    # Text details (``patent_pvd_source``) are shown by the table, not shipped.
+    types = {item.name: item.type for item in fields(cls)}
+    return tuple(name for name in cls.DETAIL_FIELDS if types[name] != "str")
+
+
+def _metric_names() -> Tuple[str, ...]:
+    names = list(SUMMARY_FIELDS)
+    for cls in RESULT_CLASSES:
+        names.extend(name for name in _numeric_details(cls) if name not in names)
+    names.extend(name for name in UPLIFT_FIELDS if name not in names)
+    return tuple(names)
+
+
+METRICS: Tuple[str, ...] = _metric_names()
+
+
+def _compact(value: Any, digits: int = PRECISION) -> Any:
+    value = float(value)
+    if not math.isfinite(value):
+        return 0
+    value = round(value, digits)
+    # ``8000000`` instead of ``8000000.0``: the payload is mostly whole roubles.
+    return int(value) if value.is_integer() else value
+
+
+_ROW_ENCODERS: Dict[type, Callable[[CalcResult], Tuple[Any, ...]]] = {}
+
+
+def _row_encoder(cls: type) -> Callable[[CalcResult], Tuple[Any, ...]]:
+    """``METRICS`` of one record as a tuple, compiled once per result class.
+
+    The class layout decides at compile time which metrics are attributes,
+    which may be ``None`` and which are always 0, so encoding a record is a
+    single tuple expression instead of a lookup per metric.
+    """
+    encoder = _ROW_ENCODERS.get(cls)
+    if encoder is None:
+        details = frozenset(_numeric_details(cls))
+        terms = []
+        for name in METRICS:
+            if name in SUMMARY_FIELDS:
+                terms.append(f"c(record.{name})")
+            elif name in details:
+                terms.append(f"c(record.{name} or 0)")
+            elif name in UPLIFT_FIELDS:
+                terms.append(f"(0 if uplift is None else c(uplift.{name} or 0))")
+            else:
+                terms.append("0")
+        source = (
+            "def encode(record):\n"
+            "    uplift = record.uplift\n"
+            f"    return ({', '.join(terms)},)\n"
+        )
+        namespace: Dict[str, Any] = {"c": _compact}
+        exec(source, namespace)
+        encoder = _ROW_ENCODERS[cls] = namespace["encode"]
+    return encoder
+
+
+def build_base(components: Dict[str, Any], calc_input: Optional[CalcInput]) -> Dict[str, Any]:
+    """Inputs and shared components the explanations start from; zeros left out."""
+    if not components or not calc_input:
+        return {}
+    values = {
+        "revenue_gross": calc_input.revenue,
+        "cost_of_goods_gross": components.get("cost_of_goods"),
+        "rent": components.get("rent"),
+        "other_expenses": components.get("other_expenses"),
+        "fot": components.get("annual_fot"),
+        "employees": calc_input.employees,
+        "insurance_standard": components.get("insurance_standard"),
+        "fixed_contrib": components.get("fixed_contrib"),
+        "patent_cost_year": calc_input.patent_cost_year,
+        "patent_pvd_period": calc_input.patent_pvd_period,
+        "vat_purchases_percent": components.get("vat_purchases_percent"),
+        **vat_shares(calc_input),
+        "stock_extra": components.get("stock_extra"),
+        "stock_expense_amount": components.get("stock_expense_amount"),
+        "accumulated_vat_credit": components.get("accumulated_vat_credit"),
+        "owner_extra_income": components.get("owner_extra_income"),
+        "owner_extra_income_base": components.get("owner_extra_income_base"),
+        "owner_extra_profit": components.get("owner_extra_profit"),
+        "owner_extra_profit_base": components.get("owner_extra_profit_base"),
+    }
+    base: Dict[str, Any] = {}
+    for name, value in values.items():
+        value = _compact(value or 0, SHARE_PRECISION if name in SHARE_FIELDS else PRECISION)
+        if value:
+            base[name] = value
+    transition_mode = components.get("transition_mode") or "none"
+    if transition_mode != "none":
+        base["transition_mode"] = transition_mode
+    return base
+
+
+def build_calc_data(summary, components: Dict[str, Any], calc_input: Optional[CalcInput]) -> Dict[str, Any]:
+    """The payload for ``summary``; ``{}`` when nothing was calculated."""
+    if not summary or not summary.results:
+        return {}
+    order: List[str] = []
+    titles: List[str] = []
+    rows: List[Tuple[Any, ...]] = []
+    for title, record, ok in summary.results:
+        if not ok or record is None:
+            continue
+        order.append(record.regime)
+        titles.append(title)
+        rows.append(_row_encoder(type(record))(record))
+    metrics = {name: list(column) for name, column in zip(METRICS, zip(*rows)) if any(column)}
+    return {
+        "v": CALC_DATA_VERSION,
+        "base": build_base(components, calc_input),
+        "order": order,
+        "titles": titles,
+        "metrics": metrics,
+    }
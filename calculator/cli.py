@@ -0,0 +1,336 @@
+"""Command-line entry point: ``python -m calculator batch``.
+
+Rows are read one at a time from CSV or JSON lines, validated with the same
+rules as the web form, calculated and written out immediately, so memory
+use does not grow with the input size.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import json
+import sys
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple, Union
+
+from .engine import REGIME_CALCULATORS, _select_regimes, run_calculation
+from .inputs import InputError, parse_calc_input
+from .models import (
+    SUMMARY_FIELDS,
+    UPLIFT_FIELDS,
+    AusnResult,
+    CalcInput,
+    CalculationSummary,
+    OsnoResult,
+    PatentResult,
+    UsnIncomeResult,
+    UsnProfitResult,
+)
+from .parallel import DEFAULT_CHUNK_SIZE, ParallelCalculator
+
+FORMAT_CSV = "csv"
+FORMAT_JSONL = "jsonl"
+FORMATS = (FORMAT_CSV, FORMAT_JSONL)
+
+DEFAULT_COLUMNS = ("net_profit", "total_burden", "burden_percent")
+TOP_LIMIT = 5
+PROGRESS_INTERVAL = 2.0
+
+# Every key a regime payload may carry, so a typo in --columns fails early.
+KNOWN_COLUMNS = frozenset(SUMMARY_FIELDS).union(
+    UPLIFT_FIELDS,
+    *(cls.DETAIL_FIELDS for cls in (AusnResult, UsnIncomeResult, UsnProfitResult, OsnoResult, PatentResult)),
+)
+
+# Row index and outcome: a summary, or the error message of a failed row.
+Outcome = Tuple[int, Optional[Dict[str, Any]], Optional[CalculationSummary], Optional[str]]
+
+
+def _guess_format(path: Optional[str], explicit: Optional[str]) -> str:
+    if explicit:
+        return explicit
+    if path and path.lower().endswith((".jsonl", ".ndjson", ".json")):
+        return FORMAT_JSONL
+    return FORMAT_CSV
+
+
+def read_rows(stream: TextIO, fmt: str) -> Iterator[Union[Dict[str, Any], InputError]]:
+    """Yield raw rows; a record that is not a valid JSON object yields an ``InputError``.
+
+    JSON input may be JSON lines or one JSON array of objects, told apart by
+    the first character like the batch endpoint does.
+    """
+    if fmt == FORMAT_CSV:
+        yield from csv.DictReader(stream)
+        return
+    # Imported here: the CSV path does not need the NumPy-backed stream module.
+    from .stream import READ_SIZE, read_text_records
+
+    yield from read_text_records(iter(lambda: stream.read(READ_SIZE), ""))
+
+
+def _parsed(rows: Iterable[Union[Dict[str, Any], InputError]]) -> Iterator[Tuple[int, Any, Any]]:
+    for index, row in enumerate(rows):
+        if isinstance(row, InputError):
+            yield index, None, row
+            continue
+        try:
+            yield index, row, parse_calc_input(row)
+        except InputError as exc:
+            yield index, row, exc
+
+
+def _calculate_serial(
+    parsed: Iterable[Tuple[int, Any, Any]],
+    regimes: Optional[Sequence[str]],
+    patent_targets: bool,
+) -> Iterator[Outcome]:
+    for index, row, item in parsed:
+        if not isinstance(item, CalcInput):
+            yield index, row, None, str(item)
+            continue
+        try:
+            yield index, row, run_calculation(item, regimes=regimes, patent_targets=patent_targets), None
+        except Exception as exc:
+            yield index, row, None, f"{type(exc).__name__}: {exc}"
+
+
+def _calculate_parallel(
+    parsed: Iterable[Tuple[int, Any, Any]],
+    calculator: ParallelCalculator,
+) -> Iterator[Outcome]:
+    # Rows in read order; invalid ones carry their error, valid ones wait
+    # for the matching outcome from the pool, which preserves order.
+    pending: Deque[Tuple[int, Any, Optional[str]]] = deque()
+
+    def valid_inputs() -> Iterator[CalcInput]:
+        for index, row, item in parsed:
+            if isinstance(item, CalcInput):
+                pending.append((index, row, None))
+                yield item
+            else:
+                pending.append((index, row, str(item)))
+
+    for outcome in calculator.map(valid_inputs()):
+        while pending[0][2] is not None:
+            index, row, error = pending.popleft()
+            yield index, row, None, error
+        index, row, _ = pending.popleft()
+        yield index, row, outcome.summary, outcome.error
+    while pending:
+        index, row, error = pending.popleft()
+        yield index, row, None, error
+
+
+class _Writer:
+    def __init__(
+        self,
+        stream: TextIO,
+        fmt: str,
+        regimes: Sequence[str],
+        columns: Sequence[str],
+        id_column: Optional[str],
+        precision: Optional[int],
+    ):
+        self.stream = stream
+        self.fmt = fmt
+        self.regimes = regimes
+        self.columns = columns
+        self.id_column = id_column
+        self.precision = precision
+        self.csv: Optional[Any] = None
+        if fmt == FORMAT_CSV:
+            header = ["row"] + ([id_column] if id_column else []) + ["error"]
+            header += [f"top_{place}" for place in range(1, TOP_LIMIT + 1)]
+            header += [f"{regime_id}.{column}" for regime_id in regimes for column in columns]
+            self.csv = csv.writer(stream, lineterminator="\n")
+            self.csv.writerow(header)
+
+    def _value(self, value: Any) -> Any:
+        if isinstance(value, float) and self.precision is not None:
+            return round(value, self.precision)
+        return value
+
+    def write(self, index: int, row: Optional[Dict[str, Any]], summary: Optional[CalculationSummary], error: Optional[str]):
+        top: List[str] = []
+        payloads: Dict[str, Any] = {}
+        if summary is not None:
+            top = [payload["regime_id"] for _title, payload in summary.top_results[:TOP_LIMIT]]
+            payloads = {payload["regime_id"]: payload for _title, payload, ok in summary.results if ok and payload}
+        key = row.get(self.id_column) if (row is not None and self.id_column) else None
+
+        if self.csv is not None:
+            line: List[Any] = [index] + ([key] if self.id_column else []) + [error or ""]
+            line += top + [""] * (TOP_LIMIT - len(top))
+            for regime_id in self.regimes:
+                payload = payloads.get(regime_id)
+                for column in self.columns:
+                    value = payload.get(column) if payload is not None else None
+                    line.append("" if value is None else self._value(value))
+            self.csv.writerow(line)
+            return
+
+        record: Dict[str, Any] = {"row": index}
+        if self.id_column:
+            record[self.id_column] = key
+        record["error"] = error
+        record["top"] = top
+        record["regimes"] = {
+            regime_id: (
+                {column: self._value(payloads[regime_id].get(column)) for column in self.columns}
+                if regime_id in payloads
+                else None
+            )
+            for regime_id in self.regimes
+            if summary is not None
+        }
+        self.stream.write(json.dumps(record, ensure_ascii=False))
+        self.stream.write("\n")
+
+
+class _Progress:
+    def __init__(self, stream: Optional[TextIO], interval: float = PROGRESS_INTERVAL):
+        self.stream = stream
+        self.interval = interval
+        self.started = time.monotonic()
+        self.last = self.started
+        self.rows = 0
+        self.errors = 0
+
+    def update(self, failed: bool) -> bool:
+        self.rows += 1
+        self.errors += failed
+        now = time.monotonic()
+        if now - self.last < self.interval:
+            return False
+        self.last = now
+        self.report()
+        return True
+
+    def report(self, final: bool = False) -> None:
+        if self.stream is None:
+            return
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        label = "Готово" if final else "Обработано"
+        self.stream.write(
+            f"{label}: {self.rows} строк, ошибок: {self.errors}, "
+            f"{self.rows / elapsed:.0f} строк/с, {elapsed:.1f} с\n"
+        )
+        self.stream.flush()
+
+
+def _split(values: Optional[str]) -> Optional[List[str]]:
+    if values is None:
+        return None
+    return [item.strip() for item in values.split(",") if item.strip()]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m calculator", description="Налоговый калькулятор")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch = commands.add_parser("batch", help="Пакетный расчёт строк из CSV или JSONL")
+    batch.add_argument("input", nargs="?", default="-", help="файл со строками; '-' или пусто — stdin")
+    batch.add_argument("-o", "--output", default="-", help="файл результата; по умолчанию stdout")
+    batch.add_argument("--input-format", choices=FORMATS, help="по умолчанию по расширению файла, иначе csv")
+    batch.add_argument("--output-format", choices=FORMATS, help="по умолчанию как у входа")
+    batch.add_argument(
+        "--columns",
+        default=",".join(DEFAULT_COLUMNS),
+        help="показатели режимов через запятую: поля CalcResult и детали (vat_charged, price_uplift_percent…)",
+    )
+    batch.add_argument("--regimes", help="режимы через запятую; по умолчанию все")
+    batch.add_argument("--id-column", help="колонка входа, которую нужно повторить в результате")
+    batch.add_argument("--no-uplift", action="store_true", help="не считать надбавку до прибыли патента")
+    batch.add_argument("--precision", type=int, default=2, help="знаков после запятой; -1 — без округления")
+    batch.add_argument("--workers", type=int, default=1, help="число процессов; 1 — в текущем процессе")
+    batch.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    batch.add_argument("--quiet", action="store_true", help="без отчёта о ходе расчёта в stderr")
+    return parser
+
+
+def run_batch(
+    rows: Iterable[Union[Dict[str, Any], InputError]],
+    output: TextIO,
+    output_format: str = FORMAT_CSV,
+    columns: Sequence[str] = DEFAULT_COLUMNS,
+    regimes: Optional[Sequence[str]] = None,
+    id_column: Optional[str] = None,
+    patent_targets: bool = True,
+    precision: Optional[int] = 2,
+    workers: int = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    progress: Optional[TextIO] = None,
+) -> Tuple[int, int]:
+    """Calculate ``rows`` and stream the results; returns ``(rows, errors)``."""
+    selected = tuple(_select_regimes(regimes))
+    unknown = sorted(set(columns) - KNOWN_COLUMNS)
+    if unknown:
+        raise ValueError(f"Неизвестные показатели: {', '.join(unknown)}")
+    requested = None if len(selected) == len(REGIME_CALCULATORS) else selected
+
+    writer = _Writer(output, output_format, selected, columns, id_column, precision)
+    tracker = _Progress(progress)
+    parsed = _parsed(rows)
+    calculator: Optional[ParallelCalculator] = None
+    if workers > 1:
+        calculator = ParallelCalculator(workers, chunk_size, regimes=requested, patent_targets=patent_targets)
+        outcomes = _calculate_parallel(parsed, calculator)
+    else:
+        outcomes = _calculate_serial(parsed, requested, patent_targets)
+    try:
+        for index, row, summary, error in outcomes:
+            writer.write(index, row, summary, error)
+            if tracker.update(error is not None):
+                output.flush()
+    finally:
+        if calculator is not None:
+            calculator.close()
+    output.flush()
+    tracker.report(final=True)
+    return tracker.rows, tracker.errors
+
+
+def _open(path: str, mode: str, default: TextIO) -> TextIO:
+    if path == "-":
+        return default
+    return open(path, mode, encoding="utf-8", newline="")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    input_format = _guess_format(None if args.input == "-" else args.input, args.input_format)
+    output_format = args.output_format or _guess_format(None if args.output == "-" else args.output, None)
+    if args.output_format is None and args.output == "-":
+        output_format = input_format
+
+    stdin = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline="") if args.input == "-" else sys.stdin
+    source = _open(args.input, "r", stdin)
+    target = _open(args.output, "w", sys.stdout)
+    try:
+        _rows, errors = run_batch(
+            read_rows(source, input_format),
+            target,
+            output_format=output_format,
+            columns=_split(args.columns) or DEFAULT_COLUMNS,
+            regimes=_split(args.regimes),
+            id_column=args.id_column,
+            patent_targets=not args.no_uplift,
+            precision=None if args.precision < 0 else args.precision,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            progress=None if args.quiet else sys.stderr,
+        )
+    except ValueError as exc:
+        parser.error(str(exc))
+    finally:
+        if source is not stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+    return 1 if errors else 0
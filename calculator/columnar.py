@@ -0,0 +1,242 @@
+"""Memory-mapped columnar files for input profiles and batch results.
+
+Layout: an 8-byte magic, a little-endian ``uint32`` header length, a UTF-8
+JSON header and the column data. Every column is a fixed-width little-endian
+array that starts on a 64-byte boundary, so a reader maps the file once and
+hands out ``numpy.memmap`` views without copying. The header lists each
+column's name, dtype, offset and shape; enum columns also store their labels.
+
+Input files hold one column per ``CalcInput`` field (``fot_mode``,
+``other_mode`` and ``transition_mode`` as ``uint8`` codes, missing VAT
+shares as ``NaN``, monthly purchases as a ``rows x 12`` block). Result files
+hold one column per regime and metric plus the availability masks and the
+top-5 ranking of ``BatchResult``.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import struct
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Sequence, Tuple, Union
+
+import numpy as np
+
+from .batch import (
+    RESULT_METRICS,
+    BatchResult,
+    Columns,
+    _ENUM_FIELDS,
+    _FLOAT_FIELDS,
+    _OPTIONAL_SHARE_FIELDS,
+    columns_from_inputs,
+)
+from .constants import MONTH_KEYS
+from .inputs import ENUM_ALIASES, ENUM_CHOICES
+from .models import CalcInput
+
+MAGIC = b"TAXCOL\x00\x01"
+VERSION = 1
+ALIGNMENT = 64
+
+KIND_INPUTS = "inputs"
+KIND_RESULTS = "results"
+
+# Codes are positions in the schema's choices; they are also written to the
+# header, so files stay readable as long as new labels are only appended.
+# Aliases (``amount`` for ``absolute``) are stored under the label itself.
+ENUM_LABELS: Dict[str, Tuple[str, ...]] = dict(ENUM_CHOICES)
+MONTHS_FIELD = "purchases_month_percents"
+
+_FLOAT = "<f8"
+_INT = "<i8"
+_CODE = "|u1"
+_BOOL = "|b1"
+_RANK = "|i1"
+
+_PREFIX = struct.Struct("<8sI")
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _encode_enum(name: str, values: Any) -> np.ndarray:
+    labels = ENUM_LABELS[name]
+    aliases = ENUM_ALIASES.get(name, {})
+    values = np.asarray(values, dtype=object)
+    codes = np.zeros(values.shape, dtype=_CODE)
+    known = np.zeros(values.shape, dtype=bool)
+    for code, label in enumerate(labels):
+        match = values == label
+        for alias, target in aliases.items():
+            if target == label:
+                match |= values == alias
+        codes[match] = code
+        known |= match
+    if not known.all():
+        bad = sorted({str(value) for value in values[~known]})
+        raise ValueError(f"Недопустимые значения {name}: {', '.join(bad)}")
+    return codes
+
+
+def _write(path: Union[str, os.PathLike], kind: str, columns: Sequence[Tuple[str, np.ndarray, Dict[str, Any]]], **meta: Any) -> None:
+    rows = int(columns[0][1].shape[0]) if columns else 0
+    entries: List[Dict[str, Any]] = []
+    offset = 0
+    for name, array, extra in columns:
+        if array.shape[0] != rows:
+            raise ValueError(f"Колонка {name}: {array.shape[0]} строк вместо {rows}")
+        entries.append({"name": name, "dtype": array.dtype.str, "shape": list(array.shape), "offset": offset, **extra})
+        offset = _align(offset + array.nbytes)
+    header = {"version": VERSION, "kind": kind, "rows": rows, "columns": entries, **meta}
+    encoded = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    data_start = _align(_PREFIX.size + len(encoded))
+
+    with open(path, "wb") as stream:
+        stream.write(_PREFIX.pack(MAGIC, len(encoded)))
+        stream.write(encoded)
+        for (_name, array, _extra), entry in zip(columns, entries):
+            stream.seek(data_start + entry["offset"])
+            stream.write(np.ascontiguousarray(array).tobytes())
+        stream.truncate(data_start + offset)
+
+
+class ColumnarFile:
+    """Read-only view of a columnar file; every column is a memmap slice."""
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        with open(path, "rb") as stream:
+            magic, length = _PREFIX.unpack(stream.read(_PREFIX.size))
+            if magic != MAGIC:
+                raise ValueError(f"{os.fspath(path)}: не колоночный файл калькулятора")
+            self.header: Dict[str, Any] = json.loads(stream.read(length).decode("utf-8"))
+        if self.header.get("version") != VERSION:
+            raise ValueError(f"{os.fspath(path)}: неподдерживаемая версия {self.header.get('version')}")
+        self.path = path
+        self.kind: str = self.header["kind"]
+        self.rows: int = self.header["rows"]
+        self._entries = {entry["name"]: entry for entry in self.header["columns"]}
+        data_start = _align(_PREFIX.size + length)
+        size = os.path.getsize(path) - data_start
+        self._data = np.memmap(path, dtype=np.uint8, mode="r", offset=data_start, shape=(size,)) if size else None
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._entries
+
+    @property
+    def names(self) -> Tuple[str, ...]:
+        return tuple(self._entries)
+
+    def labels(self, name: str) -> Tuple[str, ...]:
+        return tuple(self._entries[name]["labels"])
+
+    def column(self, name: str) -> np.ndarray:
+        entry = self._entries[name]
+        dtype = np.dtype(entry["dtype"])
+        shape = tuple(entry["shape"])
+        if self._data is None:
+            return np.empty(shape, dtype=dtype)
+        count = int(np.prod(shape))
+        start = entry["offset"]
+        return self._data[start : start + count * dtype.itemsize].view(dtype).reshape(shape)
+
+
+def write_inputs(path: Union[str, os.PathLike], inputs: Union[Iterable[CalcInput], Mapping[str, Any]]) -> None:
+    """Write profiles given as ``CalcInput`` objects or ``columns_from_inputs`` columns."""
+    if isinstance(inputs, Mapping):
+        source: Mapping[str, Any] = inputs
+        months = source.get(MONTHS_FIELD)
+    else:
+        rows = list(inputs)
+        source = columns_from_inputs(rows)
+        months = [row.purchases_month_percents for row in rows]
+
+    size = int(np.asarray(source["revenue"]).shape[0])
+    columns: List[Tuple[str, np.ndarray, Dict[str, Any]]] = []
+    for name in _FLOAT_FIELDS + _OPTIONAL_SHARE_FIELDS:
+        value = source.get(name, 0.0 if name == "patent_pvd_period" else np.nan)
+        value = np.nan if value is None else value
+        columns.append((name, np.broadcast_to(np.asarray(value, dtype=_FLOAT), (size,)), {}))
+    columns.append(("employees", np.broadcast_to(np.asarray(source["employees"], dtype=_INT), (size,)), {}))
+    for name in _ENUM_FIELDS:
+        codes = _encode_enum(name, np.broadcast_to(np.asarray(source[name], dtype=object), (size,)))
+        columns.append((name, codes, {"labels": list(ENUM_LABELS[name])}))
+
+    # Profiles without a monthly plan are stored as a row of NaN.
+    block = np.full((size, len(MONTH_KEYS)), np.nan, dtype=_FLOAT)
+    if months is not None:
+        for row, values in enumerate(months):
+            if values is not None and len(values):
+                block[row] = values
+    columns.append((MONTHS_FIELD, block, {}))
+    _write(path, KIND_INPUTS, columns)
+
+
+class InputColumns(ColumnarFile):
+    """Profiles file: ``columns()`` feeds ``run_calculation_batch`` directly."""
+
+    def decode(self, name: str) -> np.ndarray:
+        aliases = ENUM_ALIASES.get(name, {})
+        labels = np.asarray([aliases.get(label, label) for label in self.labels(name)], dtype=object)
+        return labels[self.column(name)]
+
+    def columns(self) -> Columns:
+        """Numeric columns as memmap views; only the enum columns are decoded."""
+        columns: Columns = {name: self.column(name) for name in _FLOAT_FIELDS + _OPTIONAL_SHARE_FIELDS}
+        columns["employees"] = self.column("employees")
+        for name in _ENUM_FIELDS:
+            columns[name] = self.decode(name)
+        return columns
+
+    def __iter__(self) -> Iterator[CalcInput]:
+        floats = {name: self.column(name) for name in _FLOAT_FIELDS}
+        shares = {name: self.column(name) for name in _OPTIONAL_SHARE_FIELDS}
+        enums = {name: self.decode(name) for name in _ENUM_FIELDS}
+        employees = self.column("employees")
+        months = self.column(MONTHS_FIELD)
+        for row in range(self.rows):
+            plan = months[row]
+            yield CalcInput(
+                **{name: float(values[row]) for name, values in floats.items()},
+                employees=int(employees[row]),
+                **{name: str(values[row]) for name, values in enums.items()},
+                purchases_month_percents=[] if np.isnan(plan).all() else plan.tolist(),
+                **{name: None if np.isnan(values[row]) else float(values[row]) for name, values in shares.items()},
+            )
+
+
+def read_inputs(path: Union[str, os.PathLike]) -> InputColumns:
+    reader = InputColumns(path)
+    if reader.kind != KIND_INPUTS:
+        raise ValueError(f"{os.fspath(path)}: ожидался файл профилей, а не {reader.kind}")
+    return reader
+
+
+def write_results(path: Union[str, os.PathLike], batch: BatchResult) -> None:
+    """Write a ``BatchResult``: ``{regime}.{metric}`` and ``{regime}.available`` columns."""
+    columns: List[Tuple[str, np.ndarray, Dict[str, Any]]] = []
+    for regime_id in batch.regimes:
+        for metric in RESULT_METRICS:
+            columns.append((f"{regime_id}.{metric}", np.asarray(batch.column(regime_id, metric), dtype=_FLOAT), {}))
+        columns.append((f"{regime_id}.available", np.asarray(batch.available[regime_id], dtype=_BOOL), {}))
+    if batch.top_results is not None:
+        columns.append(("top_results", np.asarray(batch.top_results, dtype=_RANK), {}))
+    _write(path, KIND_RESULTS, columns, regimes=list(batch.regimes), metrics=list(RESULT_METRICS))
+
+
+def read_results(path: Union[str, os.PathLike]) -> BatchResult:
+    """Load a results file back as a ``BatchResult`` whose arrays are memmap views."""
+    reader = ColumnarFile(path)
+    if reader.kind != KIND_RESULTS:
+        raise ValueError(f"{os.fspath(path)}: ожидался файл результатов, а не {reader.kind}")
+    regimes = tuple(reader.header["regimes"])
+    metrics = tuple(reader.header["metrics"])
+    return BatchResult(
+        regimes=regimes,
+        metrics={
+            regime_id: {metric: reader.column(f"{regime_id}.{metric}") for metric in metrics} for regime_id in regimes
+        },
+        available={regime_id: reader.column(f"{regime_id}.available") for regime_id in regimes},
+        top_results=reader.column("top_results") if "top_results" in reader else None,
+    )
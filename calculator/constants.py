@@ -15,6 +15,10 @@ MONTH_KEYS = [
     "dec",
 ]
 
+# Bump whenever a rate, limit or formula changes: it is part of the
+# permalink ETag, so result pages cached under the old rules stop matching.
+RULESET_VERSION = "2026.1"
+
 AUSN_REVENUE_LIMIT = 60_000_000
 AUSN_EMPLOYEE_LIMIT = 5
 
@@ -37,6 +41,9 @@ VAT_RATE_STANDARD = 22
 
 PROFIT_TAX_RATE = 0.25
 
+# Potential income is derived from the patent cost at this rate when not given.
+PATENT_RATE = 0.06
+
 NDFL_BRACKETS_2026 = [
     (2_400_000, 0.13),
     (5_000_000, 0.15),
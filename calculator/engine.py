@@ -1,120 +1,98 @@
 from __future__ import annotations
 
+import time
 from dataclasses import replace
-from typing import Callable, Dict, List, Optional, Tuple
-from .insurance import (
-    calculate_owner_extra_income,
-    calculate_owner_extra_profit,
-    calculate_standard_insurance,
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Type
+
+from .formulas import REGIME_RECORDS, context_kernel, record_kernel
+from .metrics import ENGINE_STAGE_SECONDS, REGIME_RESULTS, UPLIFT_PROBES, UPLIFT_SEARCHES
+from .models import (
+    AusnResult,
+    CalcInput,
+    CalcResult,
+    CalculationContext,
+    CalculationSummary,
+    OsnoResult,
+    PatentResult,
+    UpliftMetrics,
+    UsnIncomeResult,
+    UsnProfitResult,
 )
-from .models import CalcInput, CalcResult, CalculationContext, CalculationSummary
-from .regimes import ausn, osno, patent, usn_income, usn_profit
-from .utils import compute_annual_fot, compute_cost_of_goods, compute_other_expenses
+from .piecewise import RegimeCurve, build_regime_curves
 
 
 def _build_context(data: CalcInput) -> Tuple[CalculationContext, Dict[str, float]]:
-    cost_of_goods = compute_cost_of_goods(data)
-    other_expenses = compute_other_expenses(data)
-    annual_fot = compute_annual_fot(data)
-    has_employees = annual_fot > 0
-    insurance_standard = calculate_standard_insurance(annual_fot)
-
-    total_expenses_common = cost_of_goods + data.rent + other_expenses + annual_fot + insurance_standard
-    stock_extra = data.stock_expense_amount if data.transition_mode == "stock" else 0.0
-    vat_credit_to_apply = data.accumulated_vat_credit if data.transition_mode == "vat" else 0.0
-
-    expenses_without_self_contrib = (
-        cost_of_goods
-        + data.rent
-        + other_expenses
-        + annual_fot
-        + insurance_standard
-        + stock_extra
-    )
-
-    owner_extra_income, owner_extra_income_base = calculate_owner_extra_income(data.revenue)
-    owner_extra_profit, owner_extra_profit_base = calculate_owner_extra_profit(
-        data.revenue,
-        expenses_without_self_contrib,
-    )
+    ctx = CalculationContext(**context_kernel()(data))
+    return ctx, _build_components(data, ctx)
 
-    insurance_total_income = insurance_standard + owner_extra_income + data.fixed_contrib
-    insurance_total_profit = insurance_standard + owner_extra_profit + data.fixed_contrib
-
-    total_expenses_income_regime = total_expenses_common + owner_extra_income + data.fixed_contrib
-    total_expenses_profit_regime = total_expenses_common + data.fixed_contrib
-    usn_profit_expenses_for_base = total_expenses_profit_regime
-    total_expenses_ausn = cost_of_goods + data.rent + other_expenses + annual_fot
-
-    ctx = CalculationContext(
-        cost_of_goods=cost_of_goods,
-        other_expenses=other_expenses,
-        annual_fot=annual_fot,
-        has_employees=has_employees,
-        insurance_standard=insurance_standard,
-        total_expenses_common=total_expenses_common,
-        stock_extra=stock_extra,
-        vat_credit_to_apply=vat_credit_to_apply,
-        expenses_without_self_contrib=expenses_without_self_contrib,
-        owner_extra_income=owner_extra_income,
-        owner_extra_income_base=owner_extra_income_base,
-        owner_extra_profit=owner_extra_profit,
-        owner_extra_profit_base=owner_extra_profit_base,
-        insurance_total_income=insurance_total_income,
-        insurance_total_profit=insurance_total_profit,
-        total_expenses_income_regime=total_expenses_income_regime,
-        total_expenses_profit_regime=total_expenses_profit_regime,
-        usn_profit_expenses_for_base=usn_profit_expenses_for_base,
-        total_expenses_ausn=total_expenses_ausn,
-    )
 
-    components = {
-        "cost_of_goods": cost_of_goods,
+def _build_components(data: CalcInput, ctx: CalculationContext) -> Dict[str, float]:
+    return {
+        "cost_of_goods": ctx.cost_of_goods,
         "revenue": data.revenue,
         "patent_cost_year": data.patent_cost_year,
         "rent": data.rent,
-        "other_expenses": other_expenses,
-        "annual_fot": annual_fot,
-        "has_employees": has_employees,
-        "insurance_standard": insurance_standard,
+        "other_expenses": ctx.other_expenses,
+        "annual_fot": ctx.annual_fot,
+        "has_employees": ctx.has_employees,
+        "insurance_standard": ctx.insurance_standard,
         "fixed_contrib": data.fixed_contrib,
-        "owner_extra_income": owner_extra_income,
-        "owner_extra_income_base": owner_extra_income_base,
-        "owner_extra_profit": owner_extra_profit,
-        "owner_extra_profit_base": owner_extra_profit_base,
+        "owner_extra_income": ctx.owner_extra_income,
+        "owner_extra_income_base": ctx.owner_extra_income_base,
+        "owner_extra_profit": ctx.owner_extra_profit,
+        "owner_extra_profit_base": ctx.owner_extra_profit_base,
         "vat_purchases_percent": data.vat_purchases_percent,
         "vat_share_cogs": data.vat_share_cogs,
         "vat_share_rent": data.vat_share_rent if data.vat_share_rent is not None else 1.0,
         "vat_share_other": data.vat_share_other if data.vat_share_other is not None else 1.0,
         "accumulated_vat_credit": data.accumulated_vat_credit,
         "stock_expense_amount": data.stock_expense_amount,
-        "stock_extra": stock_extra,
+        "stock_extra": ctx.stock_extra,
         "transition_mode": data.transition_mode,
     }
 
-    return ctx, components
-
 
-def _wrap_result(result: CalcResult) -> Tuple[str, Dict[str, float], bool]:
-    payload = result.to_dict()
-    payload["regime_id"] = result.regime
-    return result.title, payload, result.available
+def _wrap_result(result: CalcResult) -> Tuple[str, CalcResult, bool]:
+    # The record itself is the payload: it reads like a dict, ``to_dict`` is
+    # only needed at the serialization boundary.
+    return result.title, result, result.available
 
 
 RegimeCalculator = Callable[[CalcInput, CalculationContext], Optional[CalcResult]]
 
-REGIME_CALCULATORS: Dict[str, RegimeCalculator] = {
-    "ausn_income": ausn.calculate_ausn_8,
-    "ausn_profit": ausn.calculate_ausn_20_monthly,
-    "usn_income_no_vat": usn_income.calculate_usn_income_no_vat,
-    "usn_income_vat_5": lambda d, c: usn_income.calculate_usn_income_with_vat(d, c, 5),
-    "usn_income_vat_22": lambda d, c: usn_income.calculate_usn_income_with_vat(d, c, 22),
-    "usn_profit_no_vat": usn_profit.calculate_usn_profit_no_vat,
-    "usn_profit_vat_5": lambda d, c: usn_profit.calculate_usn_profit_with_vat(d, c, 5),
-    "usn_profit_vat_22": lambda d, c: usn_profit.calculate_usn_profit_with_vat(d, c, 22),
-    "osno_ooo": osno.calculate_osno_ooo,
-    "osno_ip": osno.calculate_osno_ip,
-    "patent": patent.calculate_patent,
+# Record class and title of each regime; the figures come from ``formulas.REGIME_RECORDS``.
+RESULT_TYPES: Dict[str, Tuple[Type[CalcResult], str]] = {
+    "ausn_income": (AusnResult, "АУСН 8%"),
+    "ausn_profit": (AusnResult, "АУСН 20%"),
+    "usn_income_no_vat": (UsnIncomeResult, "УСН Доходы 6%"),
+    "usn_income_vat_5": (UsnIncomeResult, "УСН Доходы 6% + НДС 5%"),
+    "usn_income_vat_22": (UsnIncomeResult, "УСН Доходы 6% + НДС 22%"),
+    "usn_profit_no_vat": (UsnProfitResult, "УСН Д-Р 15%"),
+    "usn_profit_vat_5": (UsnProfitResult, "УСН Д-Р 15% + НДС 5%"),
+    "usn_profit_vat_22": (UsnProfitResult, "УСН Д-Р 15% + НДС 22%"),
+    "osno_ooo": (OsnoResult, "ОСНО + НДС 22% (ООО)"),
+    "osno_ip": (OsnoResult, "ОСНО + НДС 22% (ИП)"),
+    "patent": (PatentResult, "ПСН (патент)"),
+}
+
+
+def _regime_calculator(regime_id: str) -> RegimeCalculator:
+    record_class, title = RESULT_TYPES[regime_id]
+
+    def calculate(data: CalcInput, ctx: CalculationContext) -> Optional[CalcResult]:
+        values = record_kernel(regime_id)(data, ctx)
+        if not values.pop("available"):
+            return None
+        return record_class(regime=regime_id, title=title, **values)
+
+    return calculate
+
+
+REGIME_CALCULATORS: Dict[str, RegimeCalculator] = {regime_id: _regime_calculator(regime_id) for regime_id in REGIME_RECORDS}
+
+UNAVAILABLE_TITLES: Dict[str, str] = {
+    "ausn_income": "АУСН 8% (нельзя применять — превышены лимиты)",
+    "ausn_profit": "АУСН 20% (нельзя применять — превышены лимиты)",
 }
 
 
@@ -157,17 +135,72 @@ def _calculate_regime_profit(
     return result.net_profit
 
 
+UPLIFT_SOLVER_EXACT = "exact"
+UPLIFT_SOLVER_BISECT = "bisect"
+UPLIFT_MAX_MULTIPLIER = 3.0
+UPLIFT_TOLERANCE = 1.0
+
+
 def _find_multiplier_to_target(
     regime_id: str,
     calc_input: CalcInput,
     ctx: CalculationContext,
     target_profit: float,
     base_profit: float,
-    max_multiplier: float = 3.0,
+    max_multiplier: float = UPLIFT_MAX_MULTIPLIER,
+    method: str = UPLIFT_SOLVER_EXACT,
+    curve: Optional[RegimeCurve] = None,
 ) -> Optional[float]:
-    tolerance = 1.0
-    if base_profit >= target_profit - tolerance:
+    if base_profit >= target_profit - UPLIFT_TOLERANCE:
+        UPLIFT_SEARCHES.inc(method, "reached")
         return 1.0
+    if method not in (UPLIFT_SOLVER_EXACT, UPLIFT_SOLVER_BISECT):
+        raise ValueError(f"Неизвестный метод подбора: {method}")
+    multiplier = _search_multiplier_to_target(
+        regime_id, calc_input, ctx, target_profit, max_multiplier, method, curve
+    )
+    UPLIFT_SEARCHES.inc(method, "unattainable" if multiplier is None else "found")
+    return multiplier
+
+
+def _search_multiplier_to_target(
+    regime_id: str,
+    calc_input: CalcInput,
+    ctx: CalculationContext,
+    target_profit: float,
+    max_multiplier: float,
+    method: str,
+    curve: Optional[RegimeCurve],
+) -> Optional[float]:
+    if method == UPLIFT_SOLVER_BISECT:
+        return _bisect_multiplier_to_target(regime_id, calc_input, ctx, target_profit, max_multiplier)
+
+    base_revenue = calc_input.revenue
+    if base_revenue <= 0:
+        return None
+    if curve is None:
+        curves = build_regime_curves(
+            calc_input, ctx, base_revenue, base_revenue * max_multiplier, regimes=[regime_id]
+        )
+        curve = curves.get(regime_id)
+    if curve is None:
+        return None
+    # Net profit is piecewise-linear in revenue, so the crossing is solved
+    # exactly on the first segment that reaches the target.
+    revenue = curve.net_profit.first_reaching(target_profit - UPLIFT_TOLERANCE)
+    if revenue is None:
+        return None
+    return max(revenue / base_revenue, 1.0)
+
+
+def _bisect_multiplier_to_target(
+    regime_id: str,
+    calc_input: CalcInput,
+    ctx: CalculationContext,
+    target_profit: float,
+    max_multiplier: float = UPLIFT_MAX_MULTIPLIER,
+) -> Optional[float]:
+    tolerance = UPLIFT_TOLERANCE
 
     def evaluate(mult: float, cache: Dict[float, Optional[float]]) -> Optional[float]:
         if mult in cache:
@@ -187,6 +220,7 @@ def _find_multiplier_to_target(
         attempts += 1
 
     if high_profit is None or high_profit < target_profit - tolerance:
+        UPLIFT_PROBES.inc(UPLIFT_SOLVER_BISECT, amount=len(cache))
         return None
 
     for _ in range(60):
@@ -205,6 +239,7 @@ def _find_multiplier_to_target(
             low = mid
 
     final_profit = evaluate(high, cache)
+    UPLIFT_PROBES.inc(UPLIFT_SOLVER_BISECT, amount=len(cache))
     if final_profit is None or final_profit < target_profit - tolerance:
         return None
     return high
@@ -214,7 +249,17 @@ def _apply_patent_targets(
     calc_input: CalcInput,
     ctx: CalculationContext,
     available_results: Dict[str, CalcResult],
+    method: str = UPLIFT_SOLVER_EXACT,
+    regimes: Optional[Iterable[str]] = None,
 ) -> None:
+    """Fill the price-uplift metrics against the patent profit.
+
+    ``regimes`` limits the search to the given regime ids; the patent row is
+    always refreshed.
+    """
+    if method not in (UPLIFT_SOLVER_EXACT, UPLIFT_SOLVER_BISECT):
+        raise ValueError(f"Неизвестный метод подбора: {method}")
+
     patent_result = available_results.get("patent")
     if not patent_result:
         return
@@ -228,42 +273,64 @@ def _apply_patent_targets(
     gross_margin_current = (base_revenue - base_cogs) / base_revenue
     has_valid_cogs_share = base_revenue > 0 and base_cogs > 0
     cogs_share_current_percent = (base_cogs / base_revenue * 100.0) if has_valid_cogs_share else None
-    patent_metrics = {
-        "price_uplift_percent": 0.0,
-        "price_uplift_multiplier": 1.0,
-        "gross_margin_current_percent": gross_margin_current * 100.0,
-        "gross_margin_needed_percent": gross_margin_current * 100.0,
-        "gross_margin_delta_pp": 0.0,
-        "cogs_share_current_percent": cogs_share_current_percent,
-        "cogs_share_after_uplift_percent": cogs_share_current_percent,
-        "price_uplift_unattainable": False,
-        "target_profit_patent": target_profit,
-    }
-    patent_result.extra.update(patent_metrics)
+    patent_result.uplift = UpliftMetrics(
+        price_uplift_percent=0.0,
+        price_uplift_multiplier=1.0,
+        gross_margin_current_percent=gross_margin_current * 100.0,
+        gross_margin_needed_percent=gross_margin_current * 100.0,
+        gross_margin_delta_pp=0.0,
+        cogs_share_current_percent=cogs_share_current_percent,
+        cogs_share_after_uplift_percent=cogs_share_current_percent,
+        price_uplift_unattainable=False,
+        target_profit_patent=target_profit,
+    )
 
     if target_profit is None:
         return
 
-    for regime_id, result in available_results.items():
-        if regime_id == "patent":
-            continue
+    selected = {
+        regime_id: result
+        for regime_id, result in available_results.items()
+        if regime_id != "patent" and (regimes is None or regime_id in regimes)
+    }
+    curves: Dict[str, RegimeCurve] = {}
+    if method == UPLIFT_SOLVER_EXACT:
+        curves = build_regime_curves(
+            calc_input,
+            ctx,
+            base_revenue,
+            base_revenue * UPLIFT_MAX_MULTIPLIER,
+            regimes=[
+                regime_id
+                for regime_id, result in selected.items()
+                if result.net_profit < target_profit - UPLIFT_TOLERANCE
+            ],
+        )
+
+    for regime_id, result in selected.items():
         base_profit = result.net_profit
         if base_profit is None:
             continue
-        multiplier = _find_multiplier_to_target(regime_id, calc_input, ctx, target_profit, base_profit)
+        multiplier = _find_multiplier_to_target(
+            regime_id,
+            calc_input,
+            ctx,
+            target_profit,
+            base_profit,
+            method=method,
+            curve=curves.get(regime_id),
+        )
         if multiplier is None:
-            result.extra.update(
-                {
-                    "price_uplift_percent": None,
-                    "price_uplift_multiplier": None,
-                    "gross_margin_current_percent": gross_margin_current * 100.0,
-                    "gross_margin_needed_percent": None,
-                    "gross_margin_delta_pp": None,
-                    "cogs_share_current_percent": cogs_share_current_percent,
-                    "cogs_share_after_uplift_percent": None,
-                    "price_uplift_unattainable": True,
-                    "target_profit_patent": target_profit,
-                }
+            result.uplift = UpliftMetrics(
+                price_uplift_percent=None,
+                price_uplift_multiplier=None,
+                gross_margin_current_percent=gross_margin_current * 100.0,
+                gross_margin_needed_percent=None,
+                gross_margin_delta_pp=None,
+                cogs_share_current_percent=cogs_share_current_percent,
+                cogs_share_after_uplift_percent=None,
+                price_uplift_unattainable=True,
+                target_profit_patent=target_profit,
             )
             continue
 
@@ -273,72 +340,24 @@ def _apply_patent_targets(
             if (cogs_share_current_percent is not None and multiplier > 0)
             else None
         )
-        metrics = {
-            "price_uplift_percent": (multiplier - 1.0) * 100.0,
-            "price_uplift_multiplier": multiplier,
-            "gross_margin_current_percent": gross_margin_current * 100.0,
-            "gross_margin_needed_percent": gross_margin_needed * 100.0,
-            "gross_margin_delta_pp": (gross_margin_needed - gross_margin_current) * 100.0,
-            "cogs_share_current_percent": cogs_share_current_percent,
-            "cogs_share_after_uplift_percent": cogs_share_after_percent,
-            "price_uplift_unattainable": False,
-            "target_profit_patent": target_profit,
-        }
-        result.extra.update(metrics)
-
-
-def run_calculation(data: CalcInput) -> CalculationSummary:
-    ctx, components = _build_context(data)
-    summary = CalculationSummary()
-
-    rows: List[Tuple[str, Optional[CalcResult], bool]] = []
-    available_results: Dict[str, CalcResult] = {}
-
-    def add_result(result: Optional[CalcResult], title_unavailable: str) -> None:
-        if result:
-            rows.append((result.title, result, True))
-            available_results[result.regime] = result
-        else:
-            rows.append((title_unavailable, None, False))
-
-    # АУСН 8%
-    add_result(ausn.calculate_ausn_8(data, ctx), "АУСН 8% (нельзя применять — превышены лимиты)")
-
-    # АУСН 20%
-    add_result(
-        ausn.calculate_ausn_20_monthly(data, ctx),
-        "АУСН 20% (нельзя применять — превышены лимиты)",
-    )
-
-    # УСН Доходы 6% без НДС
-    add_result(usn_income.calculate_usn_income_no_vat(data, ctx), "")
-
-    # УСН Доходы 6% + НДС 5%
-    add_result(usn_income.calculate_usn_income_with_vat(data, ctx, 5), "")
-
-    # УСН Доходы 6% + НДС 22%
-    add_result(usn_income.calculate_usn_income_with_vat(data, ctx, 22), "")
-
-    # УСН Д-Р 15% без НДС
-    add_result(usn_profit.calculate_usn_profit_no_vat(data, ctx), "")
-
-    # УСН Д-Р 15% + НДС 5%
-    add_result(usn_profit.calculate_usn_profit_with_vat(data, ctx, 5), "")
-
-    # УСН Д-Р 15% + НДС 22%
-    add_result(usn_profit.calculate_usn_profit_with_vat(data, ctx, 22), "")
-
-    # ОСНО + НДС 22% (ООО)
-    add_result(osno.calculate_osno_ooo(data, ctx), "")
-
-    # ОСНО + НДС 22% (ИП)
-    add_result(osno.calculate_osno_ip(data, ctx), "")
-
-    # ПСН (патент)
-    add_result(patent.calculate_patent(data, ctx), "")
+        result.uplift = UpliftMetrics(
+            price_uplift_percent=(multiplier - 1.0) * 100.0,
+            price_uplift_multiplier=multiplier,
+            gross_margin_current_percent=gross_margin_current * 100.0,
+            gross_margin_needed_percent=gross_margin_needed * 100.0,
+            gross_margin_delta_pp=(gross_margin_needed - gross_margin_current) * 100.0,
+            cogs_share_current_percent=cogs_share_current_percent,
+            cogs_share_after_uplift_percent=cogs_share_after_percent,
+            price_uplift_unattainable=False,
+            target_profit_patent=target_profit,
+        )
 
-    _apply_patent_targets(data, ctx, available_results)
 
+def _summarize(
+    rows: List[Tuple[str, Optional[CalcResult], bool]],
+    components: Dict[str, float],
+) -> CalculationSummary:
+    summary = CalculationSummary()
     summary.components = components
 
     for title, result, ok in rows:
@@ -348,12 +367,78 @@ def run_calculation(data: CalcInput) -> CalculationSummary:
             message = title or "Режим недоступен"
             summary.results.append((message, None, False))
 
-    available: List[Tuple[str, Dict[str, float]]] = [
+    available: List[Tuple[str, CalcResult]] = [
         (name, payload) for name, payload, ok in summary.results if ok and payload
     ]
     summary.top_results = sorted(
         available,
-        key=lambda item: (item[1]["total_burden"], -item[1]["net_profit"]),
+        key=lambda item: (item[1].total_burden, -item[1].net_profit),
     )[:5]
 
     return summary
+
+
+def _select_regimes(regimes: Optional[Iterable[str]]) -> List[str]:
+    if regimes is None:
+        return list(REGIME_CALCULATORS)
+    requested = set(regimes)
+    unknown = sorted(requested - set(REGIME_CALCULATORS))
+    if unknown:
+        raise ValueError(f"Неизвестные режимы: {', '.join(unknown)}")
+    return [regime_id for regime_id in REGIME_CALCULATORS if regime_id in requested]
+
+
+def run_calculation(
+    data: CalcInput,
+    regimes: Optional[Iterable[str]] = None,
+    patent_targets: bool = True,
+) -> CalculationSummary:
+    """Calculate the requested regimes (all of them by default).
+
+    Results keep the ``REGIME_CALCULATORS`` order whatever order ``regimes``
+    is given in. With ``patent_targets`` the price-uplift search against the
+    patent profit runs for the requested regimes; the patent itself is then
+    calculated even when it is not requested.
+    """
+    start = time.perf_counter()
+    ctx, components = _build_context(data)
+    context_done = time.perf_counter()
+
+    rows: List[Tuple[str, Optional[CalcResult], bool]] = []
+    available_results: Dict[str, CalcResult] = {}
+    availability: List[Tuple[Tuple[str, str], int]] = []
+
+    for regime_id in _select_regimes(regimes):
+        result = REGIME_CALCULATORS[regime_id](data, ctx)
+        if result:
+            rows.append((result.title, result, True))
+            available_results[regime_id] = result
+            availability.append(((regime_id, "true"), 1))
+        else:
+            rows.append((UNAVAILABLE_TITLES.get(regime_id, ""), None, False))
+            availability.append(((regime_id, "false"), 1))
+    regimes_done = time.perf_counter()
+
+    if patent_targets:
+        targets = dict(available_results)
+        if "patent" not in targets:
+            patent_result = REGIME_CALCULATORS["patent"](data, ctx)
+            if patent_result:
+                targets["patent"] = patent_result
+        _apply_patent_targets(data, ctx, targets)
+    targets_done = time.perf_counter()
+
+    summary = _summarize(rows, components)
+    done = time.perf_counter()
+    # Two lock acquisitions per calculation, whatever the number of regimes.
+    REGIME_RESULTS.inc_many(availability)
+    stages = [
+        (("context",), context_done - start),
+        (("regimes",), regimes_done - context_done),
+        (("summarize",), done - targets_done),
+        (("total",), done - start),
+    ]
+    if patent_targets:
+        stages.append((("patent_targets",), targets_done - regimes_done))
+    ENGINE_STAGE_SECONDS.observe_many(stages)
+    return summary
@@ -0,0 +1,800 @@
+"""Declarative formula specification of the context and every regime.
+
+Formulas are written as an expression graph over ``CalcInput`` fields
+and constants and compiled into either a scalar closure (``CalcInput`` in,
+floats out) or a NumPy kernel (columns in, arrays out). Nodes are
+hash-consed, so a subexpression written twice - ``vat_charged`` at 22%, the
+OSNO expense breakdown, the common expense sums - is one node and the
+compiled code evaluates it once per call.
+
+This is the only place the rules are written down: ``run_calculation``
+builds its result records from the scalar closures, the batch paths use the
+NumPy kernels and ``calculator.piecewise`` compiles the same graph over
+piecewise-linear functions of revenue.
+"""
+
+from __future__ import annotations
+
+import operator
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Mapping, Optional, Tuple, Union
+
+from .constants import (
+    AUSN_EMPLOYEE_LIMIT,
+    AUSN_INCOME_RATE,
+    AUSN_PROFIT_MIN_RATE,
+    AUSN_PROFIT_RATE,
+    AUSN_REVENUE_LIMIT,
+    INSURANCE_RATE_ON_FOT,
+    NDFL_BRACKETS_2026,
+    PATENT_RATE,
+    PROFIT_TAX_RATE,
+    THRESHOLD_1_PERCENT,
+    USN_INCOME_RATE,
+    USN_PROFIT_MIN_RATE,
+    USN_PROFIT_RATE,
+    USN_REDUCTION_LIMIT,
+    VAT_RATE_REDUCED,
+    VAT_RATE_STANDARD,
+)
+from .models import SUMMARY_FIELDS, CalcInput
+
+BACKEND_SCALAR = "scalar"
+BACKEND_NUMPY = "numpy"
+BACKEND_PIECEWISE = "piecewise"
+
+Operand = Union["Expr", float, int, str]
+
+
+class Expr:
+    """Interned expression node; build them with ``var``, ``const`` and operators."""
+
+    __slots__ = ("op", "args")
+    _interned: Dict[Tuple[Hashable, ...], "Expr"] = {}
+
+    def __new__(cls, op: str, *args: Hashable) -> "Expr":
+        key = (op,) + args
+        node = cls._interned.get(key)
+        if node is None:
+            node = object.__new__(cls)
+            node.op = op
+            node.args = args
+            cls._interned[key] = node
+        return node
+
+    def __repr__(self) -> str:
+        return f"Expr({self.op}, {', '.join(map(repr, self.args))})"
+
+    def __add__(self, other: Operand) -> "Expr":
+        return _apply("add", self, other)
+
+    def __radd__(self, other: Operand) -> "Expr":
+        return _apply("add", other, self)
+
+    def __sub__(self, other: Operand) -> "Expr":
+        return _apply("sub", self, other)
+
+    def __rsub__(self, other: Operand) -> "Expr":
+        return _apply("sub", other, self)
+
+    def __mul__(self, other: Operand) -> "Expr":
+        return _apply("mul", self, other)
+
+    def __rmul__(self, other: Operand) -> "Expr":
+        return _apply("mul", other, self)
+
+    def __truediv__(self, other: Operand) -> "Expr":
+        return _apply("div", self, other)
+
+    def __rtruediv__(self, other: Operand) -> "Expr":
+        return _apply("div", other, self)
+
+    def __neg__(self) -> "Expr":
+        return _apply("neg", self)
+
+    def __lt__(self, other: Operand) -> "Expr":
+        return _apply("lt", self, other)
+
+    def __le__(self, other: Operand) -> "Expr":
+        return _apply("le", self, other)
+
+    def __gt__(self, other: Operand) -> "Expr":
+        return _apply("gt", self, other)
+
+    def __ge__(self, other: Operand) -> "Expr":
+        return _apply("ge", self, other)
+
+    def __and__(self, other: Operand) -> "Expr":
+        return _apply("and", self, other)
+
+
+def var(name: str) -> Expr:
+    return Expr("var", name)
+
+
+def const(value: Union[float, int, str]) -> Expr:
+    # The type is part of the key so ``1``, ``1.0`` and ``True`` stay distinct.
+    return Expr("const", type(value).__name__, value)
+
+
+def eq(left: Operand, right: Operand) -> Expr:
+    return _apply("eq", left, right)
+
+
+def maximum(left: Operand, right: Operand) -> Expr:
+    return _apply("max", left, right)
+
+
+def minimum(left: Operand, right: Operand) -> Expr:
+    return _apply("min", left, right)
+
+
+def where(condition: Operand, if_true: Operand, if_false: Operand) -> Expr:
+    return _apply("where", condition, if_true, if_false)
+
+
+def is_missing(value: Operand) -> Expr:
+    """``None`` on the scalar backend, ``NaN`` in NumPy columns."""
+    return _apply("missing", value)
+
+
+def ratio(numerator: Operand, denominator: Operand) -> Expr:
+    """``numerator / denominator``, or ``0.0`` unless the denominator is positive."""
+    return _apply("ratio", numerator, denominator)
+
+
+_FOLDABLE: Dict[str, Callable[..., Any]] = {
+    "add": operator.add,
+    "sub": operator.sub,
+    "mul": operator.mul,
+    "div": operator.truediv,
+    "neg": operator.neg,
+    "max": max,
+    "min": min,
+}
+
+
+def _as_expr(value: Operand) -> Expr:
+    return value if isinstance(value, Expr) else const(value)
+
+
+def _apply(op: str, *operands: Operand) -> Expr:
+    args = tuple(_as_expr(value) for value in operands)
+    if op in _FOLDABLE and all(arg.op == "const" for arg in args):
+        return const(_FOLDABLE[op](*(arg.args[1] for arg in args)))
+    return Expr(op, *args)
+
+
+# --- specification -----------------------------------------------------------------------------
+
+revenue = var("revenue")
+fixed_contrib = var("fixed_contrib")
+employees = var("employees")
+rent = var("rent")
+
+
+def percent_of(base: Operand, percent: Operand) -> Expr:
+    return _as_expr(base) * percent / 100.0
+
+
+def vat_charged(amount: Operand, vat_rate: float) -> Expr:
+    if vat_rate <= 0:
+        return const(0.0)
+    return _as_expr(amount) * vat_rate / (100 + vat_rate)
+
+
+def burden_percent(total_burden: Expr) -> Expr:
+    # One guarded division shared by every regime instead of one per regime.
+    return total_burden * ratio(100.0, revenue)
+
+
+def one_percent_over_threshold(base: Expr) -> Expr:
+    return maximum(base - THRESHOLD_1_PERCENT, 0.0) * 0.01
+
+
+def progressive_ndfl(base: Expr, brackets: Iterable[Tuple[Optional[float], float]] = NDFL_BRACKETS_2026) -> Expr:
+    taxable = maximum(base, 0.0)
+    tax: Expr = const(0.0)
+    prev_limit = 0.0
+    for limit, rate in brackets:
+        upper = taxable if limit is None else minimum(taxable, float(limit))
+        tax = tax + maximum(upper - prev_limit, 0.0) * rate
+        if limit is None:
+            break
+        prev_limit = float(limit)
+    return tax
+
+
+def normalize_share(value: Operand, default: Operand) -> Expr:
+    share = where(is_missing(value), default, value)
+    share = where(share > 1.0, share / 100.0, share)
+    return minimum(maximum(share, 0.0), 1.0)
+
+
+# Shares of the expenses bought with VAT, as the OSNO breakdown applies them.
+VAT_SHARES: Dict[str, Expr] = {
+    "vat_share_cogs": normalize_share(var("vat_share_cogs"), var("vat_purchases_percent")),
+    "vat_share_rent": normalize_share(var("vat_share_rent"), 1.0),
+    "vat_share_other": normalize_share(var("vat_share_other"), 1.0),
+}
+
+
+def split_amount_with_vat(amount: Expr, share: Expr, vat_rate: float) -> Tuple[Expr, Expr]:
+    vat_amount = where((amount > 0.0) & (share > 0.0), vat_charged(amount * share, vat_rate), 0.0)
+    return vat_amount, maximum(amount - vat_amount, 0.0)
+
+
+def _build_context() -> Dict[str, Expr]:
+    cost_of_goods = percent_of(revenue, var("cost_percent"))
+    other_expenses = where(
+        eq(var("other_mode"), "percent"),
+        percent_of(revenue, var("other_percent")),
+        var("other_amount"),
+    )
+    annual_fot = where(eq(var("fot_mode"), "annual"), var("fot_annual"), employees * var("salary") * 12)
+    insurance_standard = annual_fot * INSURANCE_RATE_ON_FOT
+    total_expenses_ausn = cost_of_goods + rent + other_expenses + annual_fot
+    total_expenses_common = total_expenses_ausn + insurance_standard
+    stock_extra = where(eq(var("transition_mode"), "stock"), var("stock_expense_amount"), 0.0)
+    expenses_without_self_contrib = total_expenses_common + stock_extra
+    owner_extra_income = one_percent_over_threshold(revenue)
+    owner_extra_profit_base = revenue - expenses_without_self_contrib
+    owner_extra_profit = one_percent_over_threshold(owner_extra_profit_base)
+    total_expenses_profit_regime = total_expenses_common + fixed_contrib
+    return {
+        "cost_of_goods": cost_of_goods,
+        "other_expenses": other_expenses,
+        "annual_fot": annual_fot,
+        "has_employees": annual_fot > 0,
+        "insurance_standard": insurance_standard,
+        "total_expenses_common": total_expenses_common,
+        "stock_extra": stock_extra,
+        "vat_credit_to_apply": where(eq(var("transition_mode"), "vat"), var("accumulated_vat_credit"), 0.0),
+        "expenses_without_self_contrib": expenses_without_self_contrib,
+        "owner_extra_income": owner_extra_income,
+        "owner_extra_income_base": revenue,
+        "owner_extra_profit": owner_extra_profit,
+        "owner_extra_profit_base": owner_extra_profit_base,
+        "insurance_total_income": insurance_standard + owner_extra_income + fixed_contrib,
+        "insurance_total_profit": insurance_standard + owner_extra_profit + fixed_contrib,
+        "total_expenses_income_regime": total_expenses_common + owner_extra_income + fixed_contrib,
+        "total_expenses_profit_regime": total_expenses_profit_regime,
+        "usn_profit_expenses_for_base": total_expenses_profit_regime,
+        "total_expenses_ausn": total_expenses_ausn,
+    }
+
+
+CONTEXT: Dict[str, Expr] = _build_context()
+ctx = CONTEXT
+
+
+def _record(
+    expenses: Operand,
+    tax: Operand,
+    vat: Operand,
+    insurance: Operand,
+    total_burden: Expr,
+    net_profit: Expr,
+    available: Operand = True,
+    **details: Operand,
+) -> Dict[str, Expr]:
+    """Summary metrics, availability and the detail fields of one regime's record."""
+    record = {
+        "revenue": revenue,
+        "expenses": _as_expr(expenses),
+        "tax": _as_expr(tax),
+        "vat": _as_expr(vat),
+        "insurance": _as_expr(insurance),
+        "total_burden": total_burden,
+        "burden_percent": burden_percent(total_burden),
+        "net_profit": net_profit,
+        "available": _as_expr(available),
+    }
+    record.update((name, _as_expr(value)) for name, value in details.items())
+    return record
+
+
+def _ausn(tax: Expr, **details: Operand) -> Dict[str, Expr]:
+    available = (revenue <= AUSN_REVENUE_LIMIT) & (employees <= AUSN_EMPLOYEE_LIMIT)
+    expenses = ctx["total_expenses_ausn"]
+    return _record(
+        expenses,
+        tax,
+        0.0,
+        fixed_contrib,
+        tax + fixed_contrib,
+        revenue - expenses - tax - fixed_contrib,
+        available,
+        fixed_contrib=fixed_contrib,
+        **details,
+    )
+
+
+def _ausn_profit() -> Dict[str, Expr]:
+    tax_base = maximum(revenue - ctx["total_expenses_ausn"], 0.0)
+    return _ausn(maximum(tax_base * AUSN_PROFIT_RATE, revenue * AUSN_PROFIT_MIN_RATE), ausn_tax_base=tax_base)
+
+
+def _usn_vat(vat_rate: float) -> Dict[str, Expr]:
+    """VAT of a USN regime; the reduced rate allows no deductions or transition credit."""
+    charged = vat_charged(revenue, vat_rate)
+    if vat_rate == VAT_RATE_REDUCED:
+        deductible: Expr = const(0.0)
+        extra_credit: Expr = const(0.0)
+    else:
+        cost_of_goods = ctx["cost_of_goods"]
+        deductible = where(
+            cost_of_goods > 0,
+            vat_charged(percent_of(cost_of_goods, var("vat_purchases_percent")), vat_rate),
+            0.0,
+        )
+        extra_credit = ctx["vat_credit_to_apply"]
+    return {
+        "vat_to_pay": maximum(charged - deductible - extra_credit, 0.0),
+        "vat_charged": charged,
+        "vat_deductible": deductible,
+        "vat_extra_credit": extra_credit,
+    }
+
+
+def _usn_record(vat_rate: float, usn_tax: Expr, expenses: Expr, insurance: Expr, **details: Operand) -> Dict[str, Expr]:
+    if not vat_rate:
+        return _record(expenses, usn_tax, 0.0, insurance, usn_tax + insurance, revenue - expenses - usn_tax, **details)
+    vat = _usn_vat(vat_rate)
+    vat_to_pay = vat.pop("vat_to_pay")
+    return _record(
+        expenses,
+        usn_tax,
+        vat_to_pay,
+        insurance,
+        usn_tax + vat_to_pay + insurance,
+        revenue - expenses - usn_tax - vat_to_pay,
+        **details,
+        **vat,
+    )
+
+
+def _usn_income(vat_rate: float) -> Dict[str, Expr]:
+    tax_initial = revenue * USN_INCOME_RATE
+    max_reduction = tax_initial * where(ctx["has_employees"], USN_REDUCTION_LIMIT, 1.0)
+    reduction_base = ctx["insurance_standard"] + ctx["owner_extra_income"]
+    reduction_from_base = minimum(reduction_base, max_reduction)
+    reduction_from_fixed = minimum(fixed_contrib, maximum(max_reduction - reduction_from_base, 0.0))
+    tax_reduction = reduction_from_base + reduction_from_fixed
+    return _usn_record(
+        vat_rate,
+        maximum(tax_initial - tax_reduction, 0.0),
+        ctx["total_expenses_income_regime"],
+        ctx["insurance_total_income"],
+        tax_initial=tax_initial,
+        tax_reduction=tax_reduction,
+        tax_reduction_limit=max_reduction,
+        tax_reduction_base=reduction_base,
+        fixed_contrib=fixed_contrib,
+        fixed_contrib_reduction=reduction_from_fixed,
+        owner_extra=ctx["owner_extra_income"],
+        owner_extra_base=ctx["owner_extra_income_base"],
+    )
+
+
+# USN-profit tax at the regular rate; the minimum tax applies to the year only.
+usn_profit_regular_tax = maximum(revenue - ctx["usn_profit_expenses_for_base"] - ctx["stock_extra"], 0.0) * USN_PROFIT_RATE
+
+
+def _usn_profit(vat_rate: float) -> Dict[str, Expr]:
+    min_tax = revenue * USN_PROFIT_MIN_RATE
+    return _usn_record(
+        vat_rate,
+        maximum(usn_profit_regular_tax, min_tax),
+        ctx["total_expenses_profit_regime"],
+        ctx["insurance_total_profit"],
+        usn_regular_tax=usn_profit_regular_tax,
+        usn_min_tax=min_tax,
+        fixed_contrib=fixed_contrib,
+        owner_extra=ctx["owner_extra_profit"],
+        owner_extra_base=ctx["owner_extra_profit_base"],
+    )
+
+
+def _osno_base() -> Dict[str, Expr]:
+    """VAT and expense breakdown shared by both OSNO regimes, as record details."""
+    vat_rate = VAT_RATE_STANDARD
+    cogs_vat, cogs_net = split_amount_with_vat(ctx["cost_of_goods"], VAT_SHARES["vat_share_cogs"], vat_rate)
+    rent_vat, rent_net = split_amount_with_vat(rent, VAT_SHARES["vat_share_rent"], vat_rate)
+    other_vat, other_net = split_amount_with_vat(ctx["other_expenses"], VAT_SHARES["vat_share_other"], vat_rate)
+    charged = vat_charged(revenue, vat_rate)
+    deductible = cogs_vat + rent_vat + other_vat
+    vat_payable = charged - deductible - ctx["vat_credit_to_apply"]
+    expenses_without_vat = (
+        cogs_net
+        + rent_net
+        + other_net
+        + ctx["annual_fot"]
+        + ctx["insurance_standard"]
+        + maximum(ctx["stock_extra"], 0.0)
+    )
+    income_without_vat = revenue - charged
+    return {
+        "income_without_vat": income_without_vat,
+        "expenses_without_vat": expenses_without_vat,
+        "vat_charged": charged,
+        "vat_deductible": deductible,
+        "vat_extra_credit": ctx["vat_credit_to_apply"],
+        "vat_payable": vat_payable,
+        "vat_refund": maximum(-vat_payable, 0.0),
+        "cogs_no_vat": cogs_net,
+        "rent_no_vat": rent_net,
+        "other_no_vat": other_net,
+        "vat_deductible_cogs": cogs_vat,
+        "vat_deductible_rent": rent_vat,
+        "vat_deductible_other": other_vat,
+        "vat_to_pay": maximum(vat_payable, 0.0),
+        "profit_before_tax": income_without_vat - expenses_without_vat,
+    }
+
+
+def _osno_record(
+    tax: Expr, insurance: Expr, net_profit_accounting: Expr, net_profit: Expr, **details: Operand
+) -> Dict[str, Expr]:
+    base = _osno_base()
+    vat = base.pop("vat_to_pay")
+    del base["profit_before_tax"]
+    total_burden = tax + vat + insurance
+    return _record(
+        base["expenses_without_vat"],
+        tax,
+        vat,
+        insurance,
+        total_burden,
+        net_profit,
+        net_profit_accounting=net_profit_accounting,
+        net_profit_cash=net_profit,
+        total_payments=total_burden,
+        **base,
+        **details,
+    )
+
+
+def _osno_ooo() -> Dict[str, Expr]:
+    base = _osno_base()
+    profit_tax_base = base["profit_before_tax"]
+    profit_tax = maximum(profit_tax_base, 0.0) * PROFIT_TAX_RATE
+    net_profit_accounting = profit_tax_base - profit_tax
+    return _osno_record(
+        profit_tax,
+        ctx["insurance_standard"],
+        net_profit_accounting,
+        net_profit_accounting - base["vat_to_pay"],
+        profit_tax_base=profit_tax_base,
+    )
+
+
+def _osno_ip() -> Dict[str, Expr]:
+    base = _osno_base()
+    profit_before_owner_contrib = base["profit_before_tax"]
+    extra_one_percent = one_percent_over_threshold(profit_before_owner_contrib)
+    ndfl_base = maximum(profit_before_owner_contrib - fixed_contrib - extra_one_percent, 0.0)
+    ndfl_tax = progressive_ndfl(ndfl_base)
+    owner_contrib_total = fixed_contrib + extra_one_percent
+    net_profit_accounting = profit_before_owner_contrib - owner_contrib_total - ndfl_tax
+    return _osno_record(
+        ndfl_tax,
+        ctx["insurance_standard"] + owner_contrib_total,
+        net_profit_accounting,
+        net_profit_accounting - base["vat_payable"],
+        ndfl_base=ndfl_base,
+        ndfl_tax=ndfl_tax,
+        fixed_contrib=fixed_contrib,
+        owner_extra=extra_one_percent,
+        owner_extra_base=profit_before_owner_contrib,
+    )
+
+
+def _patent() -> Dict[str, Expr]:
+    expenses = ctx["total_expenses_ausn"]
+    tax_before_deduction = maximum(var("patent_cost_year"), 0.0)
+    manual_pvd = maximum(var("patent_pvd_period"), 0.0)
+    has_manual_pvd = manual_pvd > 0
+    auto_pvd = where(tax_before_deduction > 0, tax_before_deduction / PATENT_RATE, 0.0)
+    pvd_used = where(has_manual_pvd, manual_pvd, auto_pvd)
+    contrib_workers = ctx["insurance_standard"]
+    owner_extra = one_percent_over_threshold(pvd_used)
+    contrib_self = fixed_contrib + owner_extra
+    deductible_contrib = contrib_self + contrib_workers
+    has_employees_limit = (ctx["annual_fot"] > 0.0) & (employees > 0)
+    deduction_limit = tax_before_deduction * where(has_employees_limit, 0.5, 1.0)
+    tax_deduction = minimum(deductible_contrib, deduction_limit)
+    tax_payable = maximum(tax_before_deduction - tax_deduction, 0.0)
+    total_burden = tax_payable + contrib_self + contrib_workers
+    net_profit_accounting = revenue - expenses - tax_payable
+    net_profit = net_profit_accounting - contrib_self - contrib_workers
+    return _record(
+        expenses,
+        tax_payable,
+        0.0,
+        contrib_self + contrib_workers,
+        total_burden,
+        net_profit,
+        income_without_vat=revenue,
+        expenses_without_vat=expenses,
+        net_profit_accounting=net_profit_accounting,
+        net_profit_cash=net_profit,
+        tax_before_deduction=tax_before_deduction,
+        tax_deduction=tax_deduction,
+        tax_deduction_limit=deduction_limit,
+        tax_payable=tax_payable,
+        deductible_contrib=deductible_contrib,
+        contrib_self=contrib_self,
+        contrib_workers=contrib_workers,
+        contrib_self_extra=owner_extra,
+        contrib_self_extra_base=pvd_used,
+        owner_extra=owner_extra,
+        owner_extra_base=pvd_used,
+        fixed_contrib=fixed_contrib,
+        has_employees_patent_limit=where(has_employees_limit, 1, 0),
+        total_payments=total_burden,
+        patent_cost_year=var("patent_cost_year"),
+        patent_pvd_period=manual_pvd,
+        patent_pvd_used=pvd_used,
+        patent_pvd_auto=where(has_manual_pvd, 0, 1),
+        patent_pvd_source=where(has_manual_pvd, "input", "auto"),
+    )
+
+
+# Every field of every regime's record; the order of the ids is the order
+# ``run_calculation`` reports the regimes in.
+REGIME_RECORDS: Dict[str, Dict[str, Expr]] = {
+    "ausn_income": _ausn(revenue * AUSN_INCOME_RATE),
+    "ausn_profit": _ausn_profit(),
+    "usn_income_no_vat": _usn_income(0),
+    "usn_income_vat_5": _usn_income(VAT_RATE_REDUCED),
+    "usn_income_vat_22": _usn_income(VAT_RATE_STANDARD),
+    "usn_profit_no_vat": _usn_profit(0),
+    "usn_profit_vat_5": _usn_profit(VAT_RATE_REDUCED),
+    "usn_profit_vat_22": _usn_profit(VAT_RATE_STANDARD),
+    "osno_ooo": _osno_ooo(),
+    "osno_ip": _osno_ip(),
+    "patent": _patent(),
+}
+
+REGIME_OUTPUTS: Tuple[str, ...] = SUMMARY_FIELDS + ("available",)
+
+# The numeric part every backend evaluates: summary metrics and availability.
+REGIMES: Dict[str, Dict[str, Expr]] = {
+    regime_id: {metric: record[metric] for metric in REGIME_OUTPUTS} for regime_id, record in REGIME_RECORDS.items()
+}
+
+
+# --- compiler ----------------------------------------------------------------------------------
+
+_INFIX = {
+    "add": "+",
+    "sub": "-",
+    "mul": "*",
+    "div": "/",
+    "lt": "<",
+    "le": "<=",
+    "gt": ">",
+    "ge": ">=",
+    "eq": "==",
+}
+
+_SCALAR_TEMPLATES = {
+    "neg": "-{0}",
+    "and": "({0} and {1})",
+    "max": "max({0}, {1})",
+    "min": "min({0}, {1})",
+    "where": "({1} if {0} else {2})",
+    "missing": "({0} is None)",
+    "ratio": "({0} / {1} if {1} > 0 else 0.0)",
+}
+
+# Comparisons go through ``_compare``: with revenue a piecewise-linear
+# function the outcome may change inside its range, which is then split.
+_PIECEWISE_TEMPLATES = {
+    "neg": "-{0}",
+    "and": "({0} and {1})",
+    "max": "_maximum({0}, {1})",
+    "min": "_minimum({0}, {1})",
+    "where": "({1} if {0} else {2})",
+    "missing": "({0} is None)",
+    "lt": "_compare(operator.lt, {0}, {1})",
+    "le": "_compare(operator.le, {0}, {1})",
+    "gt": "_compare(operator.gt, {0}, {1})",
+    "ge": "_compare(operator.ge, {0}, {1})",
+    "eq": "_compare(operator.eq, {0}, {1})",
+}
+
+_NUMPY_TEMPLATES = {
+    "neg": "-{0}",
+    "and": "({0} & {1})",
+    "max": "np.maximum({0}, {1})",
+    "min": "np.minimum({0}, {1})",
+    "where": "np.where({0}, {1}, {2})",
+    "missing": "np.isnan({0})",
+    "ratio": "_ratio({0}, {1})",
+}
+
+
+def _numpy_ratio(numerator, denominator):
+    import numpy as np
+
+    numerator, denominator = np.broadcast_arrays(np.asarray(numerator, dtype=float), denominator)
+    out = np.zeros(numerator.shape)
+    np.divide(numerator, denominator, out=out, where=denominator > 0)
+    return out
+
+
+class Kernel:
+    """Compiled evaluator of a fixed set of named expressions.
+
+    Scalar kernels take a ``CalcInput`` (or anything with matching
+    attributes); NumPy kernels take a mapping of equally sized columns and
+    return arrays of that size, constants included. Piecewise kernels take a
+    ``CalcInput`` view whose revenue is a ``PiecewiseLinear``. Nodes compiled
+    as context are read from ``ctx`` (attributes, or keys for NumPy) instead
+    of being computed.
+    """
+
+    def __init__(
+        self, names: Tuple[Hashable, ...], backend: str, source: str, function: Callable[[Any, Any], tuple]
+    ):
+        self.names = names
+        self.backend = backend
+        self.source = source
+        self._function = function
+
+    def __call__(self, data: Any, ctx: Any = None) -> Dict[Hashable, Any]:
+        values = self._function(data, ctx)
+        if self.backend == BACKEND_NUMPY:
+            import numpy as np
+
+            size = np.shape(data["revenue"])
+            values = [value if np.shape(value) == size else np.broadcast_to(value, size) for value in values]
+        return dict(zip(self.names, values))
+
+
+def _topological(outputs: Iterable[Expr], leaves: Mapping[int, str]) -> List[Expr]:
+    order: List[Expr] = []
+    seen = set()
+    for root in outputs:
+        stack = [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if id(node) in seen:
+                continue
+            if expanded or node.op in ("var", "const") or id(node) in leaves:
+                seen.add(id(node))
+                order.append(node)
+                continue
+            stack.append((node, True))
+            stack.extend((arg, False) for arg in reversed(node.args) if id(arg) not in seen)
+    return order
+
+
+def compile_kernel(
+    outputs: Mapping[Hashable, Expr],
+    backend: str = BACKEND_SCALAR,
+    context: Optional[Mapping[str, Expr]] = None,
+) -> Kernel:
+    """Generate and compile straight-line code evaluating every node once.
+
+    The nodes of ``context`` (name -> node, like ``CONTEXT``) are not
+    computed but read from the kernel's ``ctx`` argument under their name.
+    """
+    if backend == BACKEND_SCALAR:
+        templates = _SCALAR_TEMPLATES
+        read = "{}.{}"
+    elif backend == BACKEND_NUMPY:
+        templates = _NUMPY_TEMPLATES
+        read = "{}[{!r}]"
+    elif backend == BACKEND_PIECEWISE:
+        templates = _PIECEWISE_TEMPLATES
+        read = "{}.{}"
+    else:
+        raise ValueError(f"Неизвестный backend: {backend}")
+
+    leaves: Dict[int, str] = {}
+    for name, node in (context or {}).items():
+        # Plain inputs stay reads of ``data``, and an alias keeps its first name.
+        if node.op not in ("var", "const"):
+            leaves.setdefault(id(node), name)
+
+    order = _topological(outputs.values(), leaves)
+    last_use: Dict[int, int] = {}
+    for position, node in enumerate(order):
+        if node.op not in ("var", "const") and id(node) not in leaves:
+            for arg in node.args:
+                last_use[id(arg)] = position
+    returned = {id(node) for node in outputs.values()}
+
+    names: Dict[int, str] = {}
+    lines = ["def kernel(data, ctx):"]
+    for position, node in enumerate(order):
+        if node.op == "const":
+            names[id(node)] = repr(node.args[1])
+            continue
+        if id(node) in leaves:
+            code = read.format("ctx", leaves[id(node)])
+        elif node.op == "var":
+            code = read.format("data", node.args[0])
+        else:
+            args = [names[id(arg)] for arg in node.args]
+            if node.op in templates:
+                code = templates[node.op].format(*args)
+            elif node.op in _INFIX:
+                code = f"({args[0]} {_INFIX[node.op]} {args[1]})"
+            else:
+                raise ValueError(f"Операция {node.op} недоступна в backend {backend}")
+        names[id(node)] = f"v{len(names)}"
+        lines.append(f"    {names[id(node)]} = {code}")
+        if backend == BACKEND_NUMPY and node.op != "var" and id(node) not in leaves:
+            # Drop dead temporaries so NumPy can reuse their buffers.
+            dead = [
+                names[id(arg)]
+                for arg in dict.fromkeys(node.args)
+                if arg.op != "const" and last_use[id(arg)] == position and id(arg) not in returned
+            ]
+            if dead:
+                lines.append(f"    del {', '.join(dead)}")
+    lines.append(f"    return ({', '.join(names[id(node)] for node in outputs.values())},)")
+    source = "\n".join(lines) + "\n"
+
+    namespace: Dict[str, Any] = {}
+    if backend == BACKEND_NUMPY:
+        import numpy as np
+
+        namespace.update(np=np, _ratio=_numpy_ratio)
+    elif backend == BACKEND_PIECEWISE:
+        from . import piecewise
+
+        namespace.update(
+            operator=operator,
+            _compare=piecewise.compare,
+            _maximum=piecewise.maximum,
+            _minimum=piecewise.minimum,
+        )
+    exec(compile(source, f"<formulas:{backend}>", "exec"), namespace)
+    return Kernel(tuple(outputs), backend, source, namespace["kernel"])
+
+
+def regime_outputs(regimes: Optional[Iterable[str]] = None) -> Dict[Tuple[str, str], Expr]:
+    selected = REGIMES if regimes is None else {regime_id: REGIMES[regime_id] for regime_id in regimes}
+    return {
+        (regime_id, metric): expr for regime_id, metrics in selected.items() for metric, expr in metrics.items()
+    }
+
+
+@lru_cache(maxsize=None)
+def context_kernel(backend: str = BACKEND_SCALAR) -> Kernel:
+    return compile_kernel(CONTEXT, backend)
+
+
+@lru_cache(maxsize=None)
+def regimes_kernel(backend: str = BACKEND_SCALAR) -> Kernel:
+    """All regime metrics keyed by ``(regime_id, metric)``."""
+    return compile_kernel(regime_outputs(), backend)
+
+
+@lru_cache(maxsize=None)
+def record_kernel(regime_id: str) -> Kernel:
+    """Every field of one regime's record, with the context read from ``ctx``."""
+    return compile_kernel(REGIME_RECORDS[regime_id], BACKEND_SCALAR, context=CONTEXT)
+
+
+@lru_cache(maxsize=None)
+def _vat_shares_kernel() -> Kernel:
+    return compile_kernel(VAT_SHARES, BACKEND_SCALAR)
+
+
+def vat_shares(data: CalcInput) -> Dict[str, float]:
+    """The three VAT shares of ``data`` normalized to ``0..1``, defaults filled in."""
+    return _vat_shares_kernel()(data)
+
+
+def evaluate_regimes(data: CalcInput) -> Dict[str, Dict[str, Any]]:
+    """Summary metrics of every regime through the compiled scalar closure."""
+    values = regimes_kernel(BACKEND_SCALAR)(data)
+    return {
+        regime_id: {metric: values[(regime_id, metric)] for metric in REGIME_OUTPUTS} for regime_id in REGIMES
+    }
@@ -0,0 +1,210 @@
+"""Incremental recalculation for sessions that change one field at a time."""
+
+from __future__ import annotations
+
+from dataclasses import fields, replace
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from .engine import (
+    REGIME_CALCULATORS,
+    UNAVAILABLE_TITLES,
+    UPLIFT_SOLVER_EXACT,
+    _apply_patent_targets,
+    _build_components,
+    _build_context,
+    _summarize,
+)
+from .models import CalcInput, CalcResult, CalculationContext, CalculationSummary
+
+INPUT_FIELDS: Tuple[str, ...] = tuple(item.name for item in fields(CalcInput))
+CONTEXT_FIELDS: Tuple[str, ...] = tuple(item.name for item in fields(CalculationContext))
+
+_COGS = ("revenue", "cost_percent")
+_OTHER = ("revenue", "other_mode", "other_percent", "other_amount")
+_FOT = ("fot_mode", "fot_annual", "employees", "salary")
+_COMMON = _COGS + _OTHER + _FOT + ("rent",)
+_STOCK = ("transition_mode", "stock_expense_amount")
+
+
+def _inputs(*groups: Iterable[str]) -> FrozenSet[str]:
+    return frozenset(name for group in groups for name in group)
+
+
+# CalculationContext field -> CalcInput fields it is derived from (see ``formulas.CONTEXT``).
+CONTEXT_DEPENDENCIES: Dict[str, FrozenSet[str]] = {
+    "cost_of_goods": _inputs(_COGS),
+    "other_expenses": _inputs(_OTHER),
+    "annual_fot": _inputs(_FOT),
+    "has_employees": _inputs(_FOT),
+    "insurance_standard": _inputs(_FOT),
+    "total_expenses_common": _inputs(_COMMON),
+    "stock_extra": _inputs(_STOCK),
+    "vat_credit_to_apply": _inputs(("transition_mode", "accumulated_vat_credit")),
+    "expenses_without_self_contrib": _inputs(_COMMON, _STOCK),
+    "owner_extra_income": _inputs(("revenue",)),
+    "owner_extra_income_base": _inputs(("revenue",)),
+    "owner_extra_profit": _inputs(_COMMON, _STOCK),
+    "owner_extra_profit_base": _inputs(_COMMON, _STOCK),
+    "insurance_total_income": _inputs(_FOT, ("revenue", "fixed_contrib")),
+    "insurance_total_profit": _inputs(_COMMON, _STOCK, ("fixed_contrib",)),
+    "total_expenses_income_regime": _inputs(_COMMON, ("fixed_contrib",)),
+    "total_expenses_profit_regime": _inputs(_COMMON, ("fixed_contrib",)),
+    "usn_profit_expenses_for_base": _inputs(_COMMON, ("fixed_contrib",)),
+    "total_expenses_ausn": _inputs(_COGS, _OTHER, _FOT, ("rent",)),
+}
+
+_USN_INCOME_CONTEXT = (
+    "insurance_standard",
+    "owner_extra_income",
+    "owner_extra_income_base",
+    "has_employees",
+    "insurance_total_income",
+    "total_expenses_income_regime",
+)
+_USN_PROFIT_CONTEXT = (
+    "usn_profit_expenses_for_base",
+    "stock_extra",
+    "insurance_total_profit",
+    "total_expenses_profit_regime",
+    "owner_extra_profit",
+    "owner_extra_profit_base",
+)
+_USN_VAT_INPUTS = ("vat_purchases_percent",)
+_USN_VAT_CONTEXT = ("cost_of_goods", "vat_credit_to_apply")
+_OSNO_INPUTS = (
+    "revenue",
+    "rent",
+    "vat_purchases_percent",
+    "vat_share_cogs",
+    "vat_share_rent",
+    "vat_share_other",
+)
+_OSNO_CONTEXT = (
+    "cost_of_goods",
+    "other_expenses",
+    "annual_fot",
+    "insurance_standard",
+    "stock_extra",
+    "vat_credit_to_apply",
+)
+
+# Regime id -> (CalcInput fields read directly, CalculationContext fields read).
+REGIME_DEPENDENCIES: Dict[str, Tuple[FrozenSet[str], FrozenSet[str]]] = {
+    "ausn_income": (_inputs(("revenue", "employees", "fixed_contrib")), frozenset({"total_expenses_ausn"})),
+    "ausn_profit": (_inputs(("revenue", "employees", "fixed_contrib")), frozenset({"total_expenses_ausn"})),
+    "usn_income_no_vat": (_inputs(("revenue", "fixed_contrib")), _inputs(_USN_INCOME_CONTEXT)),
+    "usn_income_vat_5": (_inputs(("revenue", "fixed_contrib")), _inputs(_USN_INCOME_CONTEXT)),
+    "usn_income_vat_22": (
+        _inputs(("revenue", "fixed_contrib"), _USN_VAT_INPUTS),
+        _inputs(_USN_INCOME_CONTEXT, _USN_VAT_CONTEXT),
+    ),
+    "usn_profit_no_vat": (_inputs(("revenue", "fixed_contrib")), _inputs(_USN_PROFIT_CONTEXT)),
+    "usn_profit_vat_5": (_inputs(("revenue", "fixed_contrib")), _inputs(_USN_PROFIT_CONTEXT)),
+    "usn_profit_vat_22": (
+        _inputs(("revenue", "fixed_contrib"), _USN_VAT_INPUTS),
+        _inputs(_USN_PROFIT_CONTEXT, _USN_VAT_CONTEXT),
+    ),
+    "osno_ooo": (_inputs(_OSNO_INPUTS), _inputs(_OSNO_CONTEXT)),
+    "osno_ip": (_inputs(_OSNO_INPUTS, ("fixed_contrib",)), _inputs(_OSNO_CONTEXT)),
+    "patent": (
+        _inputs(("revenue", "rent", "employees", "fixed_contrib", "patent_cost_year", "patent_pvd_period")),
+        _inputs(("cost_of_goods", "other_expenses", "annual_fot", "insurance_standard")),
+    ),
+}
+
+
+def changed_fields(previous: CalcInput, current: CalcInput) -> FrozenSet[str]:
+    return frozenset(name for name in INPUT_FIELDS if getattr(previous, name) != getattr(current, name))
+
+
+def invalidated_context(changed: Iterable[str]) -> FrozenSet[str]:
+    changed = set(changed)
+    return frozenset(name for name, inputs in CONTEXT_DEPENDENCIES.items() if inputs & changed)
+
+
+def invalidated_regimes(changed_inputs: Iterable[str], changed_context: Iterable[str]) -> FrozenSet[str]:
+    inputs = set(changed_inputs)
+    context = set(changed_context)
+    return frozenset(
+        regime_id
+        for regime_id, (regime_inputs, regime_context) in REGIME_DEPENDENCIES.items()
+        if regime_inputs & inputs or regime_context & context
+    )
+
+
+class CalculationSession:
+    """Keeps the last input, context and results and recomputes only what changed.
+
+    Context fields reached through ``CONTEXT_DEPENDENCIES`` are recomputed and
+    compared by value, so e.g. ``other_percent`` edits in ``amount`` mode do
+    not invalidate anything. Price-uplift targets are refreshed for the
+    recomputed regimes, or for all of them when the patent profit moves.
+    """
+
+    def __init__(self, method: str = UPLIFT_SOLVER_EXACT):
+        self.method = method
+        self.reset()
+
+    def reset(self) -> None:
+        self.data: Optional[CalcInput] = None
+        self.ctx: Optional[CalculationContext] = None
+        self.components: Dict[str, float] = {}
+        self.results: Dict[str, Optional[CalcResult]] = {}
+        self.last_recomputed: FrozenSet[str] = frozenset()
+        self.last_uplift_refreshed: FrozenSet[str] = frozenset()
+
+    def calculate(self, data: CalcInput) -> CalculationSummary:
+        if self.data is None:
+            return self._full(data)
+
+        changed = changed_fields(self.data, data)
+        ctx = self.ctx
+        changed_context: Set[str] = set()
+        candidates = invalidated_context(changed)
+        if candidates:
+            ctx, _components = _build_context(data)
+            changed_context = {name for name in candidates if getattr(ctx, name) != getattr(self.ctx, name)}
+
+        stale = invalidated_regimes(changed, changed_context)
+        previous_patent = self.results.get("patent")
+        previous_target = previous_patent.net_profit if previous_patent else None
+        for regime_id in stale:
+            self.results[regime_id] = REGIME_CALCULATORS[regime_id](data, ctx)
+
+        patent_result = self.results.get("patent")
+        target = patent_result.net_profit if patent_result else None
+        if target != previous_target:
+            refresh = frozenset(self.results)
+        else:
+            refresh = stale
+        self._remember(data, ctx)
+        self.last_recomputed = stale
+        self.last_uplift_refreshed = refresh
+        return self._finish(refresh)
+
+    def _full(self, data: CalcInput) -> CalculationSummary:
+        ctx, _components = _build_context(data)
+        self.results = {regime_id: calculator(data, ctx) for regime_id, calculator in REGIME_CALCULATORS.items()}
+        self._remember(data, ctx)
+        self.last_recomputed = frozenset(REGIME_CALCULATORS)
+        self.last_uplift_refreshed = self.last_recomputed
+        return self._finish(None)
+
+    def _remember(self, data: CalcInput, ctx: CalculationContext) -> None:
+        # Own a copy so callers may keep mutating the instance they passed in.
+        self.data = replace(data, purchases_month_percents=list(data.purchases_month_percents))
+        self.ctx = ctx
+        self.components = _build_components(data, ctx)
+
+    def _finish(self, refresh: Optional[FrozenSet[str]]) -> CalculationSummary:
+        available = {regime_id: result for regime_id, result in self.results.items() if result}
+        _apply_patent_targets(self.data, self.ctx, available, method=self.method, regimes=refresh)
+
+        # Hand out copies: later edits re-target the stored records in place.
+        rows: List[Tuple[str, Optional[CalcResult], bool]] = []
+        for regime_id, result in self.results.items():
+            if result:
+                rows.append((result.title, result.copy(), True))
+            else:
+                rows.append((UNAVAILABLE_TITLES.get(regime_id, ""), None, False))
+        return _summarize(rows, dict(self.components))
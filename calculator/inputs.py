@@ -0,0 +1,417 @@
+"""Parsing and validation of raw input rows (form posts, CSV, JSON lines, columns).
+
+``FIELDS`` declares every ``CalcInput`` field once: its type, the values of
+an absent and a blank key, bounds and allowed labels. The declaration is
+compiled into a row parser (a mapping in, values and per-field errors out)
+and a column checker (NumPy columns in, bad rows per field out), so the form,
+the JSON API, CSV/JSON lines, the NDJSON stream and the batch engine apply
+the same rules.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+from .constants import DEFAULT_FIXED_CONTRIB, DEFAULT_PATENT_COST, MONTH_KEYS
+from .models import CalcInput
+
+NUMBER_ERROR = "Пожалуйста, введите корректные числовые значения"
+NEGATIVE_ERROR = "Все значения должны быть неотрицательными"
+REVENUE_ERROR = "Выручка должна быть больше нуля"
+
+KIND_FLOAT = "float"
+KIND_INT = "int"
+KIND_ENUM = "enum"
+KIND_MONTHS = "months"
+
+TRANSITION_MODES = ("none", "vat", "stock")
+MONTHS_FIELD = "purchases_month_percents"
+MONTH_FIELDS = tuple(f"purchases_{key}" for key in MONTH_KEYS)
+
+
+@dataclass(frozen=True)
+class Field:
+    """One ``CalcInput`` field.
+
+    ``missing`` is used when the key is absent and ``blank`` when it is empty;
+    a ``blank`` of ``None`` keeps the field optional. ``zero_error`` rejects 0
+    with that message. Enum values outside ``choices`` become ``fallback`` or,
+    without one, are an error; ``aliases`` pairs other spellings with the
+    label they stand for.
+    """
+
+    name: str
+    kind: str = KIND_FLOAT
+    missing: Any = 0.0
+    blank: Any = 0.0
+    minimum: Optional[float] = 0.0
+    maximum: Optional[float] = None
+    zero_error: Optional[str] = None
+    choices: Tuple[str, ...] = ()
+    fallback: Optional[str] = None
+    aliases: Tuple[Tuple[str, str], ...] = ()
+
+
+FIELDS: Tuple[Field, ...] = (
+    Field("revenue", zero_error=REVENUE_ERROR),
+    Field("cost_percent"),
+    Field("vat_purchases_percent"),
+    Field("rent"),
+    Field("fixed_contrib", missing=DEFAULT_FIXED_CONTRIB),
+    Field("patent_cost_year", missing=DEFAULT_PATENT_COST, blank=DEFAULT_PATENT_COST),
+    Field("patent_pvd_period"),
+    Field("salary"),
+    Field("fot_annual"),
+    Field("other_percent"),
+    Field("other_amount"),
+    Field("accumulated_vat_credit"),
+    Field("stock_expense_amount"),
+    Field("employees", KIND_INT, missing=0, blank=0),
+    Field("fot_mode", KIND_ENUM, missing="staff", blank="staff", choices=("staff", "annual")),
+    # The form posts ``absolute``; older files and API clients send ``amount``.
+    Field(
+        "other_mode",
+        KIND_ENUM,
+        missing="percent",
+        blank="percent",
+        choices=("percent", "absolute"),
+        aliases=(("amount", "absolute"),),
+    ),
+    Field("transition_mode", KIND_ENUM, missing="none", blank="none", choices=TRANSITION_MODES, fallback="none"),
+    # Shares of purchases with VAT: a fraction or a percent, absent means "derive".
+    Field("vat_share_cogs", missing=None, blank=None, maximum=100.0),
+    Field("vat_share_rent", missing=None, blank=None, maximum=100.0),
+    Field("vat_share_other", missing=None, blank=None, maximum=100.0),
+    Field(MONTHS_FIELD, KIND_MONTHS),
+)
+SCHEMA: Dict[str, Field] = {item.name: item for item in FIELDS}
+
+# Field -> (value when the key is absent, value when it is blank).
+FLOAT_FIELDS: Dict[str, Tuple[float, float]] = {
+    item.name: (item.missing, item.blank) for item in FIELDS if item.kind == KIND_FLOAT and item.blank is not None
+}
+SHARE_FIELDS = tuple(item.name for item in FIELDS if item.kind == KIND_FLOAT and item.blank is None)
+ENUM_CHOICES: Dict[str, Tuple[str, ...]] = {item.name: item.choices for item in FIELDS if item.kind == KIND_ENUM}
+ENUM_ALIASES: Dict[str, Dict[str, str]] = {item.name: dict(item.aliases) for item in FIELDS if item.aliases}
+# Scalar fields of the web form (the monthly ``purchases_*`` inputs aside).
+FORM_FIELDS = tuple(FLOAT_FIELDS) + ("employees",) + tuple(ENUM_CHOICES)
+
+
+class InputError(ValueError):
+    """A row that cannot be calculated; the message is meant for the user.
+
+    ``fields`` maps each offending field to its own message.
+    """
+
+    def __init__(self, message: str, fields: Optional[Mapping[str, str]] = None):
+        super().__init__(message)
+        self.fields: Dict[str, str] = dict(fields or {})
+
+
+class FieldError(NamedTuple):
+    # Lower ranks win the form-level message: a bad number is reported
+    # before a negative one, a negative one before a zero revenue.
+    rank: int
+    summary: str
+    message: str
+
+
+_RANK_NUMBER, _RANK_CHOICE, _RANK_MINIMUM, _RANK_MAXIMUM, _RANK_ZERO = range(5)
+
+
+def _minimum_error(item: Field) -> FieldError:
+    if item.minimum == 0:
+        return FieldError(_RANK_MINIMUM, NEGATIVE_ERROR, "Значение должно быть неотрицательным")
+    message = f"Значение должно быть не меньше {item.minimum:g}"
+    return FieldError(_RANK_MINIMUM, f"{item.name}: {message}", message)
+
+
+def _maximum_error(item: Field) -> FieldError:
+    message = f"Значение должно быть не больше {item.maximum:g}"
+    return FieldError(_RANK_MAXIMUM, f"{item.name}: {message}", message)
+
+
+def _zero_error(item: Field) -> FieldError:
+    return FieldError(_RANK_ZERO, item.zero_error, "Значение должно быть больше нуля")
+
+
+def _choice_error(item: Field) -> FieldError:
+    return FieldError(
+        _RANK_CHOICE, f"Недопустимое значение {item.name}", f"Допустимые значения: {', '.join(item.choices)}"
+    )
+
+
+_NUMBER_ERROR = FieldError(_RANK_NUMBER, NUMBER_ERROR, "Ожидается число")
+_MONTHS_LENGTH_ERROR = FieldError(_RANK_NUMBER, NUMBER_ERROR, f"Ожидается {len(MONTH_KEYS)} чисел")
+
+
+def check_value(item: Field, number: float) -> Optional[FieldError]:
+    """Bounds of ``item`` for an already converted number."""
+    if not math.isfinite(number):
+        return _NUMBER_ERROR
+    if item.minimum is not None and number < item.minimum:
+        return _minimum_error(item)
+    if item.maximum is not None and number > item.maximum:
+        return _maximum_error(item)
+    if item.zero_error and number == 0:
+        return _zero_error(item)
+    return None
+
+
+def summarize(errors: Mapping[str, FieldError]) -> InputError:
+    """One ``InputError``: the highest-ranked summary plus every field message."""
+    first = min(errors.values(), key=lambda error: error.rank)
+    return InputError(first.summary, {name: error.message for name, error in errors.items()})
+
+
+def _is_blank(value: Any) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _parse_months(raw: Mapping[str, Any], values: Dict[str, Any], errors: Dict[str, FieldError]) -> None:
+    items = raw.get(MONTHS_FIELD)
+    if isinstance(items, (list, tuple)):
+        if len(items) != len(MONTH_KEYS):
+            values[MONTHS_FIELD] = items
+            errors[MONTHS_FIELD] = _MONTHS_LENGTH_ERROR
+            return
+        pairs = zip(MONTH_FIELDS, items)
+    else:
+        pairs = ((name, raw.get(name)) for name in MONTH_FIELDS)
+    months: List[Any] = []
+    for name, value in pairs:
+        if _is_blank(value):
+            months.append(0.0)
+            continue
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            error = _NUMBER_ERROR
+        else:
+            error = check_value(SCHEMA[MONTHS_FIELD], number)
+        if error is None:
+            months.append(number)
+        else:
+            months.append(value)
+            errors[name] = error
+    values[MONTHS_FIELD] = months
+
+
+_BLANK = "value is None or (isinstance(value, str) and not value.strip())"
+
+
+def _bound_checks(item: Field, const: Callable[[Any], str], finite: bool, zero: bool = True) -> List[Tuple[str, str]]:
+    """``(condition, error)`` pairs on ``number``, in rank order."""
+    checks = []
+    if finite:
+        checks.append(("number - number != 0", const(_NUMBER_ERROR)))
+    if item.minimum is not None:
+        checks.append((f"number < {item.minimum!r}", const(_minimum_error(item))))
+    if item.maximum is not None:
+        checks.append((f"number > {item.maximum!r}", const(_maximum_error(item))))
+    if zero and item.zero_error:
+        checks.append(("number == 0", const(_zero_error(item))))
+    return checks
+
+
+def _row_lines(item: Field, const: Callable[[Any], str]) -> List[str]:
+    if item.kind == KIND_MONTHS:
+        return ["    months(raw, values, errors)"]
+    name = repr(item.name)
+    lines = [f"    value = get({name}, {const(item.missing)})"]
+    if item.kind == KIND_ENUM:
+        otherwise = (
+            f"        values[{name}] = {const(item.fallback)}"
+            if item.fallback is not None
+            else f"        values[{name}] = value\n        errors[{name}] = {const(_choice_error(item))}"
+        )
+        lines += [f"    if {_BLANK}:", f"        value = {const(item.blank)}"]
+        for alias, label in item.aliases:
+            lines += [f"    elif value == {alias!r}:", f"        value = {label!r}"]
+        return lines + [
+            f"    if value in {const(item.choices)}:",
+            f"        values[{name}] = value",
+            "    else:",
+            otherwise,
+        ]
+
+    indent = "    "
+    if item.blank is None:
+        lines += [f"    if {_BLANK}:", f"        values[{name}] = None", "    else:"]
+        indent = "        "
+    else:
+        lines += [f"    if {_BLANK}:", f"        value = {const(item.blank)}"]
+    convert = "float" if item.kind == KIND_FLOAT else "int"
+    # ``inf - inf`` and ``nan - nan`` are NaN, so one comparison rejects both.
+    checks = _bound_checks(item, const, finite=item.kind == KIND_FLOAT)
+    lines += [
+        f"{indent}try:",
+        f"{indent}    number = {convert}(value)",
+        f"{indent}except (TypeError, ValueError, OverflowError):",
+        f"{indent}    values[{name}] = value",
+        f"{indent}    errors[{name}] = {const(_NUMBER_ERROR)}",
+        f"{indent}else:",
+    ]
+    keyword = "if"
+    for condition, error in checks:
+        lines += [
+            f"{indent}    {keyword} {condition}:",
+            f"{indent}        values[{name}] = value",
+            f"{indent}        errors[{name}] = {error}",
+        ]
+        keyword = "elif"
+    if checks:
+        lines += [f"{indent}    else:", f"{indent}        values[{name}] = number"]
+    else:
+        lines.append(f"{indent}    values[{name}] = number")
+    return lines
+
+
+def compile_row_parser(fields_: Tuple[Field, ...] = FIELDS) -> Callable[[Mapping[str, Any]], Tuple[Dict[str, Any], Dict[str, FieldError]]]:
+    """Straight-line parser of one raw mapping: ``(values, errors)``.
+
+    Fields with an error keep their raw value in ``values`` so a form can show
+    what was entered.
+    """
+    namespace: Dict[str, Any] = {"months": _parse_months}
+    constants: Dict[int, str] = {}
+
+    def const(value: Any) -> str:
+        if value is None or isinstance(value, (int, float, str)):
+            return repr(value)
+        key = id(value)
+        if key not in constants:
+            constants[key] = f"c{len(constants)}"
+            namespace[constants[key]] = value
+        return constants[key]
+
+    lines = ["def parse(raw):", "    get = raw.get", "    values = {}", "    errors = {}"]
+    for item in fields_:
+        lines.extend(_row_lines(item, const))
+    lines.append("    return values, errors")
+    source = "\n".join(lines) + "\n"
+    exec(compile(source, "<inputs:row>", "exec"), namespace)
+    parse = namespace["parse"]
+    parse.source = source
+    return parse
+
+
+def _unknown_labels(np: Any, values: Any, choices: Tuple[str, ...]) -> Any:
+    if values.ndim == 1 and values.strides == (0,):
+        # A broadcast scalar: one comparison stands for every row.
+        return np.full(values.shape, values[:1].tolist()[0] not in choices) if values.size else np.zeros(0, bool)
+    known = np.zeros(values.shape, dtype=bool)
+    for label in choices:
+        known |= values == label
+    return ~known
+
+
+def compile_column_checker(fields_: Tuple[Field, ...] = FIELDS) -> Callable[[Mapping[str, Any]], List[Tuple[str, FieldError, Any]]]:
+    """NumPy counterpart of the row parser: ``[(field, error, bad_rows_mask)]``.
+
+    Columns hold converted values (floats, ints, label objects, ``NaN`` for
+    an absent optional field); each field reports its highest-ranked problem.
+    Enum fields with a fallback are not checked, as unknown labels are valid.
+    ``zero_error`` is a form rule and is not applied: the engine calculates
+    a zero revenue like any other.
+    """
+    import numpy as np
+
+    namespace: Dict[str, Any] = {"np": np, "unknown_labels": _unknown_labels}
+
+    def const(value: Any) -> str:
+        name = f"c{len(namespace)}"
+        namespace[name] = value
+        return name
+
+    lines = ["def check(data):", "    bad = []"]
+    for item in fields_:
+        if item.kind == KIND_MONTHS or (item.kind == KIND_ENUM and item.fallback is not None):
+            continue
+        lines.append(f"    if {item.name!r} in data:")
+        lines.append(f"        number = data[{item.name!r}]")
+        if item.kind == KIND_ENUM:
+            labels = item.choices + tuple(alias for alias, _label in item.aliases)
+            checks = [(f"unknown_labels(np, number, {const(labels)})", const(_choice_error(item)))]
+        else:
+            checks = _bound_checks(item, const, finite=False, zero=False)
+            if item.kind == KIND_FLOAT:
+                # Optional fields are NaN when absent; only infinities are bad there.
+                finite = "np.isinf(number)" if item.blank is None else "~np.isfinite(number)"
+                checks.insert(0, (finite, const(_NUMBER_ERROR)))
+        for position, (condition, error) in enumerate(checks):
+            pad = "        " + "    " * position
+            if position:
+                lines.append(f"{pad[4:]}else:")
+            lines += [
+                f"{pad}mask = {condition}",
+                f"{pad}if mask.any():",
+                f"{pad}    bad.append(({item.name!r}, {error}, mask))",
+            ]
+    lines.append("    return bad")
+    source = "\n".join(lines) + "\n"
+    exec(compile(source, "<inputs:columns>", "exec"), namespace)
+    check = namespace["check"]
+    check.source = source
+    return check
+
+
+_parse_row = compile_row_parser()
+_check_columns: Optional[Callable[[Mapping[str, Any]], List[Tuple[str, FieldError, Any]]]] = None
+
+# Bad rows listed per field in a column error.
+MAX_REPORTED_ROWS = 5
+
+
+@dataclass
+class ParsedRow:
+    """Values of one raw row and the errors found in it."""
+
+    values: Dict[str, Any]
+    field_errors: Dict[str, FieldError]
+
+    @property
+    def errors(self) -> Dict[str, str]:
+        return {name: error.message for name, error in self.field_errors.items()}
+
+    @property
+    def message(self) -> Optional[str]:
+        """The form-level message, or ``None`` for a valid row."""
+        return summarize(self.field_errors).args[0] if self.field_errors else None
+
+    def calc_input(self) -> CalcInput:
+        if self.field_errors:
+            raise summarize(self.field_errors)
+        return CalcInput(**self.values)
+
+
+def parse_row(raw: Mapping[str, Any]) -> ParsedRow:
+    """Parse one row with the form defaults, keeping what was entered on errors."""
+    return ParsedRow(*_parse_row(raw))
+
+
+def parse_calc_input(raw: Mapping[str, Any]) -> CalcInput:
+    """Parse and validate one row with the same rules as the web form."""
+    values, errors = _parse_row(raw)
+    if errors:
+        raise summarize(errors)
+    return CalcInput(**values)
+
+
+def check_columns(columns: Mapping[str, Any]) -> None:
+    """Raise ``InputError`` naming the bad rows of every invalid column."""
+    global _check_columns
+    if _check_columns is None:
+        _check_columns = compile_column_checker()
+    bad = _check_columns(columns)
+    if not bad:
+        return
+    errors: Dict[str, FieldError] = {}
+    for name, error, mask in bad:
+        rows = mask.nonzero()[0]
+        listed = ", ".join(str(row) for row in rows[:MAX_REPORTED_ROWS].tolist())
+        more = "…" if rows.size > MAX_REPORTED_ROWS else ""
+        errors[name] = error._replace(message=f"{error.message} (строки {listed}{more})")
+    raise summarize(errors)
@@ -0,0 +1,511 @@
+"""Counters and histograms in the Prometheus text format.
+
+Each series is a few numbers behind one lock, so recording costs well under
+a microsecond and the metrics can stay on in production. ``REGISTRY`` holds
+the metrics of the engine and of the web app; ``render`` writes them for a
+scrape.
+
+Under gunicorn every worker counts on its own and a scrape reaches one
+arbitrary worker. With ``PROMETHEUS_MULTIPROC_DIR`` set, each process also
+writes its values to a memory-mapped file in that directory, and ``render``
+sums the files of all processes, so any worker answers for the whole server.
+Counters of exited workers are folded into one file by ``mark_process_dead``
+(the gunicorn ``child_exit`` hook); their gauges are dropped.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+Labels = Tuple[str, ...]
+# A stored value: ``(label values, slot)``; the slot tells the values of one
+# label set apart (a histogram bucket, its sum).
+Slot = Union[int, str]
+Entries = Dict[Tuple[Labels, Slot], float]
+
+# Seconds: from a cached fragment (tens of microseconds) to a slow batch.
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+# What happens to the values of an exited process: cumulative ones are kept
+# in the total, live ones (gauges) are dropped.
+CUMULATIVE = "cumulative"
+LIVE = "live"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+_USED = struct.Struct("<Q")
+_KEY_LENGTH = struct.Struct("<I")
+_VALUE = struct.Struct("<d")
+_INITIAL_FILE_SIZE = 64 * 1024
+
+
+def _entry_layout(key_length: int) -> Tuple[int, int]:
+    """``(value offset, entry size)`` relative to the entry start; values stay 8-byte aligned."""
+    value_offset = _KEY_LENGTH.size + key_length
+    value_offset += -value_offset % _VALUE.size
+    return value_offset, value_offset + _VALUE.size
+
+
+def _read_entries(data: bytes) -> Iterator[Tuple[str, int, float]]:
+    """``(key, value offset, value)`` of a process file's contents."""
+    if len(data) < _USED.size:
+        return
+    used = min(_USED.unpack_from(data, 0)[0], len(data))
+    position = _USED.size
+    while position < used:
+        (length,) = _KEY_LENGTH.unpack_from(data, position)
+        key = data[position + _KEY_LENGTH.size : position + _KEY_LENGTH.size + length].decode("utf-8")
+        value_offset, size = _entry_layout(length)
+        yield key, position + value_offset, _VALUE.unpack_from(data, position + value_offset)[0]
+        position += size
+
+
+class _ProcessFile:
+    """Float values of one process in a memory-mapped file.
+
+    An entry (key length, JSON key, float64) is appended once and then only
+    overwritten in place. The used length in the header is written after the
+    entry, so a reader in another process only ever sees whole entries.
+    """
+
+    def __init__(self, path: Path):
+        self._file = open(path, "a+b")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < _INITIAL_FILE_SIZE:
+            self._file.truncate(_INITIAL_FILE_SIZE)
+            size = _INITIAL_FILE_SIZE
+        self._map = mmap.mmap(self._file.fileno(), size)
+        self._used = _USED.unpack_from(self._map, 0)[0] or _USED.size
+        self._offsets = {key: offset for key, offset, _value in _read_entries(self._map[: self._used])}
+
+    def write(self, key: str, value: float) -> None:
+        offset = self._offsets.get(key)
+        if offset is None:
+            offset = self._append(key)
+        _VALUE.pack_into(self._map, offset, value)
+
+    def _append(self, key: str) -> int:
+        encoded = key.encode("utf-8")
+        value_offset, size = _entry_layout(len(encoded))
+        start, end = self._used, self._used + size
+        if end > len(self._map):
+            grown = max(2 * len(self._map), end)
+            self._map.close()
+            self._file.truncate(grown)
+            self._map = mmap.mmap(self._file.fileno(), grown)
+        _KEY_LENGTH.pack_into(self._map, start, len(encoded))
+        self._map[start + _KEY_LENGTH.size : start + _KEY_LENGTH.size + len(encoded)] = encoded
+        _VALUE.pack_into(self._map, start + value_offset, 0.0)
+        _USED.pack_into(self._map, 0, end)
+        self._used = end
+        self._offsets[key] = start + value_offset
+        return start + value_offset
+
+
+class ProcessStore:
+    """Metric values of every process under ``directory``.
+
+    Each process writes ``<pid>.db``; ``dead.json`` holds the cumulative
+    values of processes that have exited. Keys are JSON
+    ``[mode, metric, label values, slot]``.
+    """
+
+    DEAD_FILE = "dead.json"
+    LOCK_FILE = ".lock"
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._file: Optional[_ProcessFile] = None
+
+    def write(self, mode: str, metric: str, labels: Labels, slot: Slot, value: float) -> None:
+        key = json.dumps([mode, metric, list(labels), slot], ensure_ascii=False)
+        with self._lock:
+            # Opened per process: a forked worker must not write into the master's file.
+            pid = os.getpid()
+            if self._pid != pid:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                self._file = _ProcessFile(self.directory / f"{pid}.db")
+                self._pid = pid
+            self._file.write(key, value)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        # Keeps a scrape from reading a dead process twice (its file and the
+        # folded totals) or not at all.
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / self.LOCK_FILE, "a+b") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _dead(self) -> Dict[str, float]:
+        try:
+            return json.loads((self.directory / self.DEAD_FILE).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+
+    def collect(self) -> Dict[str, Entries]:
+        """Values summed over all processes, by metric name."""
+        totals: Dict[str, float] = {}
+        with self._locked():
+            totals.update(self._dead())
+            for path in sorted(self.directory.glob("*.db")):
+                for key, _offset, value in _read_entries(path.read_bytes()):
+                    totals[key] = totals.get(key, 0.0) + value
+        by_metric: Dict[str, Entries] = {}
+        for key, value in totals.items():
+            _mode, metric, labels, slot = json.loads(key)
+            by_metric.setdefault(metric, {})[(tuple(labels), slot)] = value
+        return by_metric
+
+    def mark_process_dead(self, pid: int) -> None:
+        """Fold the cumulative values of ``pid`` into the totals and drop its file."""
+        path = self.directory / f"{pid}.db"
+        with self._locked():
+            if not path.is_file():
+                return
+            dead = self._dead()
+            for key, _offset, value in _read_entries(path.read_bytes()):
+                if json.loads(key)[0] == CUMULATIVE:
+                    dead[key] = dead.get(key, 0.0) + value
+            temporary = self.directory / f"{self.DEAD_FILE}.tmp"
+            temporary.write_text(json.dumps(dead, ensure_ascii=False), encoding="utf-8")
+            os.replace(temporary, self.directory / self.DEAD_FILE)
+            path.unlink()
+
+    def wipe(self) -> None:
+        """Remove the files of an earlier run; call before any worker starts."""
+        with self._locked():
+            for path in self.directory.glob("*.db"):
+                path.unlink()
+            (self.directory / self.DEAD_FILE).unlink(missing_ok=True)
+
+
+class Metric:
+    kind = "untyped"
+    # How the values of exited processes count; ``None``: not shared, read
+    # at scrape time in the answering process.
+    mode: Optional[str] = CUMULATIVE
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.store: Optional[ProcessStore] = None
+        self._lock = threading.Lock()
+
+    def _share(self, labels: Labels, slot: Slot, value: float) -> None:
+        if self.store is not None:
+            self.store.write(self.mode, self.name, labels, slot, value)
+
+    def samples(self, entries: Optional[Entries] = None) -> Iterator[Tuple[str, Labels, Sequence[str], float]]:
+        """``(name, label names, label values, value)`` for every sample.
+
+        ``entries`` are values summed over processes; by default the values
+        of this process are used.
+        """
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """Drop recorded values; metrics read at scrape time have none."""
+
+    def render(self, entries: Optional[Entries] = None) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for name, names, values, value in self.samples(entries):
+            lines.append(f"{name}{_format_labels(names, values)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc_many(((labels, amount),))
+
+    def inc_many(self, amounts: Iterable[Tuple[Labels, float]]) -> None:
+        """Several increments under one lock acquisition."""
+        values = self._values
+        with self._lock:
+            for labels, amount in amounts:
+                value = values[labels] = values.get(labels, 0.0) + amount
+                self._share(labels, "", value)
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self, entries=None):
+        if entries is None:
+            with self._lock:
+                items = sorted(self._values.items())
+        else:
+            items = sorted((labels, value) for (labels, _slot), value in entries.items())
+        for labels, value in items:
+            yield self.name, self.labelnames, labels, value
+
+    def clear(self) -> None:
+        with self._lock:
+            for labels in self._values:
+                self._share(labels, "", 0.0)
+            self._values.clear()
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: a count per bucket (non-cumulative, last is +Inf), sum.
+        self._values: Dict[Labels, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        self.observe_many(((labels, value),))
+
+    def observe_many(self, observations: Iterable[Tuple[Labels, float]]) -> None:
+        """Several observations under one lock acquisition."""
+        buckets = self.buckets
+        values = self._values
+        with self._lock:
+            for labels, value in observations:
+                entry = values.get(labels)
+                if entry is None:
+                    entry = values[labels] = ([0] * (len(buckets) + 1), [0.0])
+                index = bisect_left(buckets, value)
+                entry[0][index] += 1
+                entry[1][0] += value
+                if self.store is not None:
+                    self._share(labels, index, entry[0][index])
+                    self._share(labels, "sum", entry[1][0])
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def count(self, *labels: str) -> int:
+        entry = self._values.get(labels)
+        return sum(entry[0]) if entry else 0
+
+    def samples(self, entries=None):
+        if entries is None:
+            with self._lock:
+                items = sorted((labels, (list(counts), total[0])) for labels, (counts, total) in self._values.items())
+        else:
+            merged: Dict[Labels, Tuple[List[float], List[float]]] = {}
+            for (labels, slot), value in entries.items():
+                counts, total = merged.setdefault(labels, ([0.0] * (len(self.buckets) + 1), [0.0]))
+                if slot == "sum":
+                    total[0] = value
+                else:
+                    counts[slot] = value
+            items = sorted((labels, (counts, total[0])) for labels, (counts, total) in merged.items())
+        names = self.labelnames + ("le",)
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", names, labels + (_format_value(bound),), cumulative
+            yield f"{self.name}_sum", self.labelnames, labels, total
+            yield f"{self.name}_count", self.labelnames, labels, cumulative
+
+    def clear(self) -> None:
+        with self._lock:
+            for labels, (counts, _total) in self._values.items():
+                for index in range(len(counts)):
+                    self._share(labels, index, 0.0)
+                self._share(labels, "sum", 0.0)
+            self._values.clear()
+
+
+class GaugeCallback(Metric):
+    """A gauge read from ``collect()`` at scrape time: ``{label values: value}``.
+
+    Shared across processes it is the sum over the live ones; with
+    ``shared=False`` it is computed by the process answering the scrape (e.g.
+    a ratio of summed counters, see ``Registry.values``).
+    """
+
+    kind = "gauge"
+    mode = LIVE
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str],
+        collect: Callable[[], Dict[Labels, float]],
+        shared: bool = True,
+    ):
+        super().__init__(name, help, labelnames)
+        self.collect = collect
+        if not shared:
+            self.mode = None
+
+    def publish(self) -> None:
+        """Write the current values of this process to the shared store."""
+        if self.store is not None and self.mode is not None:
+            for labels, value in self.collect().items():
+                self._share(labels, "", value)
+
+    def samples(self, entries=None):
+        if entries is None or self.mode is None:
+            items = sorted(self.collect().items())
+        else:
+            items = sorted((labels, value) for (labels, _slot), value in entries.items())
+        for labels, value in items:
+            yield self.name, self.labelnames, labels, value
+
+
+class CounterCallback(GaugeCallback):
+    """A counter kept elsewhere (e.g. cache hits) and read at scrape time."""
+
+    kind = "counter"
+    mode = CUMULATIVE
+
+
+class Registry:
+    """Metrics rendered together; with a ``directory`` they are summed over processes."""
+
+    def __init__(self, prefix: str = "", directory: Union[str, Path, None] = None):
+        self.prefix = prefix
+        self.store = ProcessStore(directory) if directory else None
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        metric.name = self.prefix + metric.name
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Метрика {metric.name} уже зарегистрирована")
+            self._metrics[metric.name] = metric
+        metric.store = self.store
+        return metric
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(self.prefix + name)
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def _all(self) -> List[Metric]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def publish(self) -> None:
+        """Share the callback values of this process; a no-op without a directory.
+
+        Call it after each request: a scrape may reach another process.
+        """
+        if self.store is None:
+            return
+        for metric in self._all():
+            if isinstance(metric, GaugeCallback):
+                metric.publish()
+
+    def values(self, name: str) -> Dict[Labels, float]:
+        """``{label values: value}`` of a counter or gauge, summed over processes when shared."""
+        metric = self._metrics[self.prefix + name]
+        entries = self.store.collect().get(metric.name, {}) if self.store is not None else None
+        return {labels: value for _name, _names, labels, value in metric.samples(entries)}
+
+    def reset(self) -> None:
+        """Drop the values of every metric, e.g. those recorded while warming up."""
+        for metric in self._all():
+            metric.clear()
+
+    def render(self) -> str:
+        metrics = self._all()
+        shared: Dict[str, Entries] = {}
+        if self.store is not None:
+            self.publish()
+            shared = self.store.collect()
+        lines: List[str] = []
+        for metric in metrics:
+            entries = shared.get(metric.name, {}) if self.store is not None else None
+            lines.extend(metric.render(entries))
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry(prefix="taxcalc_", directory=os.environ.get(MULTIPROC_DIR_ENV) or None)
+
+ENGINE_STAGE_SECONDS = REGISTRY.histogram(
+    "engine_stage_seconds",
+    "Время этапов run_calculation (context, regimes, patent_targets, summarize, total), пакетного расчёта (batch) и build_calc_data (calc_data).",
+    ("stage",),
+)
+REGIME_RESULTS = REGISTRY.counter(
+    "regime_results_total",
+    "Рассчитанные режимы по доступности (available=true|false).",
+    ("regime", "available"),
+)
+UPLIFT_SEARCHES = REGISTRY.counter(
+    "uplift_searches_total",
+    "Подборы наценки до прибыли патента (_find_multiplier_to_target) по методу и исходу.",
+    ("method", "outcome"),
+)
+UPLIFT_PROBES = REGISTRY.counter(
+    "uplift_probes_total",
+    "Пробные расчёты прибыли при подборе наценки бисекцией.",
+    ("method",),
+)
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+def mark_process_dead(pid: int, registry: Registry = REGISTRY) -> None:
+    """Keep the counters of an exited worker in the totals; drop its gauges."""
+    if registry.store is not None:
+        registry.store.mark_process_dead(pid)
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Tuple
+from collections.abc import Mapping
+from dataclasses import InitVar, dataclass, field, fields, replace
+from typing import Any, ClassVar, Dict, FrozenSet, Iterator, List, Optional, Tuple
 
 
 @dataclass
@@ -53,8 +54,48 @@ class CalculationContext:
     total_expenses_ausn: float
 
 
-@dataclass
-class CalcResult:
+@dataclass(slots=True)
+class UpliftMetrics:
+    price_uplift_percent: Optional[float]
+    price_uplift_multiplier: Optional[float]
+    gross_margin_current_percent: Optional[float]
+    gross_margin_needed_percent: Optional[float]
+    gross_margin_delta_pp: Optional[float]
+    cogs_share_current_percent: Optional[float]
+    cogs_share_after_uplift_percent: Optional[float]
+    price_uplift_unattainable: bool
+    target_profit_patent: Optional[float]
+
+
+SUMMARY_FIELDS: Tuple[str, ...] = (
+    "revenue",
+    "expenses",
+    "tax",
+    "vat",
+    "insurance",
+    "total_burden",
+    "burden_percent",
+    "net_profit",
+)
+UPLIFT_FIELDS: Tuple[str, ...] = tuple(item.name for item in fields(UpliftMetrics))
+_UPLIFT_FIELD_SET = frozenset(UPLIFT_FIELDS)
+
+
+@dataclass(slots=True)
+class CalcResult(Mapping):
+    """Result of one regime.
+
+    Subclasses add a fixed layout of detail fields per regime family. The
+    record reads like the former payload dict (``result["tax"]``,
+    ``result.get("vat_charged")``, ``"regime_id"``) without building one;
+    ``to_dict`` produces a real dict for serialization. Detail fields left as
+    ``None`` are treated as absent keys.
+
+    The former ``extra=`` keyword is still accepted: keys of the detail
+    layout fill their fields, any other key is kept alongside and read like
+    a detail field.
+    """
+
     regime: str
     title: str
     revenue: float
@@ -66,25 +107,260 @@ class CalcResult:
     burden_percent: float
     net_profit: float
     available: bool = True
-    extra: Dict[str, float] = field(default_factory=dict)
-
-    def to_dict(self) -> Dict[str, float]:
-        payload = {
-            "revenue": self.revenue,
-            "expenses": self.expenses,
-            "tax": self.tax,
-            "vat": self.vat,
-            "insurance": self.insurance,
-            "total_burden": self.total_burden,
-            "burden_percent": self.burden_percent,
-            "net_profit": self.net_profit,
-        }
+    uplift: Optional[UpliftMetrics] = None
+    # ``extra`` is also the read-only property set after the class body.
+    extra: InitVar[Optional[Mapping]] = None
+    _extras: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
+
+    DETAIL_FIELDS: ClassVar[Tuple[str, ...]] = ()
+    _DETAIL_FIELD_SET: ClassVar[FrozenSet[str]] = frozenset()
+
+    def __init_subclass__(cls):
+        # No ``super()`` here: ``slots=True`` rebuilds the class, which breaks
+        # the zero-argument form.
+        cls._DETAIL_FIELD_SET = frozenset(cls.DETAIL_FIELDS)
+
+    def __post_init__(self, extra: Optional[Mapping]) -> None:
+        if not extra:
+            return
+        extras = {}
+        for key, value in extra.items():
+            if key in self._DETAIL_FIELD_SET:
+                setattr(self, key, value)
+            else:
+                extras[key] = value
+        self._extras = extras or None
+
+    def __getitem__(self, key: str) -> Any:
+        if key in _SUMMARY_FIELD_SET:
+            return getattr(self, key)
+        if key in self._DETAIL_FIELD_SET:
+            value = getattr(self, key)
+            if value is None:
+                raise KeyError(key)
+            return value
+        if key in _UPLIFT_FIELD_SET and self.uplift is not None:
+            return getattr(self.uplift, key)
+        if key == "regime_id":
+            return self.regime
+        if self._extras is not None and key in self._extras:
+            return self._extras[key]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from SUMMARY_FIELDS
+        for name in self.DETAIL_FIELDS:
+            if getattr(self, name) is not None:
+                yield name
+        if self.uplift is not None:
+            yield from UPLIFT_FIELDS
+        yield "regime_id"
+        if self._extras is not None:
+            yield from self._extras
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __bool__(self) -> bool:
+        # ``Mapping`` would fall back to ``__len__``; a result is always truthy.
+        return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        payload = {name: getattr(self, name) for name in SUMMARY_FIELDS}
         payload.update(self.extra)
         return payload
 
+    def copy(self) -> "CalcResult":
+        uplift = None if self.uplift is None else replace(self.uplift)
+        return replace(self, uplift=uplift, extra=self._extras)
+
+
+def _extra(self: CalcResult) -> Dict[str, Any]:
+    """Detail and uplift figures as a dict, as the former ``extra`` field held them."""
+    payload = {name: getattr(self, name) for name in self.DETAIL_FIELDS if getattr(self, name) is not None}
+    if self.uplift is not None:
+        payload.update((name, getattr(self.uplift, name)) for name in UPLIFT_FIELDS)
+    if self._extras is not None:
+        payload.update(self._extras)
+    return payload
+
+
+# Assigned after the dataclass is built so that ``extra`` stays an init
+# keyword (the ``InitVar``) and a read-only view at the same time.
+CalcResult.extra = property(_extra)
+
+
+_SUMMARY_FIELD_SET = frozenset(SUMMARY_FIELDS)
+
+
+@dataclass(slots=True, kw_only=True)
+class AusnResult(CalcResult):
+    fixed_contrib: float
+    ausn_tax_base: Optional[float] = None
+
+    DETAIL_FIELDS: ClassVar[Tuple[str, ...]] = ("ausn_tax_base", "fixed_contrib")
+
+
+@dataclass(slots=True, kw_only=True)
+class UsnIncomeResult(CalcResult):
+    tax_initial: float
+    tax_reduction: float
+    tax_reduction_limit: float
+    tax_reduction_base: float
+    fixed_contrib: float
+    fixed_contrib_reduction: float
+    owner_extra: float
+    owner_extra_base: float
+    vat_charged: Optional[float] = None
+    vat_deductible: Optional[float] = None
+    vat_extra_credit: Optional[float] = None
+
+    DETAIL_FIELDS: ClassVar[Tuple[str, ...]] = (
+        "tax_initial",
+        "tax_reduction",
+        "tax_reduction_limit",
+        "tax_reduction_base",
+        "fixed_contrib",
+        "fixed_contrib_reduction",
+        "owner_extra",
+        "owner_extra_base",
+        "vat_charged",
+        "vat_deductible",
+        "vat_extra_credit",
+    )
+
+
+@dataclass(slots=True, kw_only=True)
+class UsnProfitResult(CalcResult):
+    usn_regular_tax: float
+    usn_min_tax: float
+    fixed_contrib: float
+    owner_extra: float
+    owner_extra_base: float
+    vat_charged: Optional[float] = None
+    vat_deductible: Optional[float] = None
+    vat_extra_credit: Optional[float] = None
+
+    DETAIL_FIELDS: ClassVar[Tuple[str, ...]] = (
+        "usn_regular_tax",
+        "usn_min_tax",
+        "fixed_contrib",
+        "owner_extra",
+        "owner_extra_base",
+        "vat_charged",
+        "vat_deductible",
+        "vat_extra_credit",
+    )
+
+
+@dataclass(slots=True, kw_only=True)
+class OsnoResult(CalcResult):
+    income_without_vat: float
+    expenses_without_vat: float
+    vat_charged: float
+    vat_deductible: float
+    vat_extra_credit: float
+    vat_payable: float
+    vat_refund: float
+    cogs_no_vat: float
+    rent_no_vat: float
+    other_no_vat: float
+    vat_deductible_cogs: float
+    vat_deductible_rent: float
+    vat_deductible_other: float
+    net_profit_accounting: float
+    net_profit_cash: float
+    total_payments: float
+    # ООО: налог на прибыль.
+    profit_tax_base: Optional[float] = None
+    # ИП: НДФЛ и взносы за себя.
+    ndfl_base: Optional[float] = None
+    ndfl_tax: Optional[float] = None
+    fixed_contrib: Optional[float] = None
+    owner_extra: Optional[float] = None
+    owner_extra_base: Optional[float] = None
+
+    DETAIL_FIELDS: ClassVar[Tuple[str, ...]] = (
+        "ndfl_base",
+        "income_without_vat",
+        "expenses_without_vat",
+        "profit_tax_base",
+        "fixed_contrib",
+        "owner_extra",
+        "owner_extra_base",
+        "vat_charged",
+        "vat_deductible",
+        "vat_extra_credit",
+        "ndfl_tax",
+        "vat_payable",
+        "vat_refund",
+        "cogs_no_vat",
+        "rent_no_vat",
+        "other_no_vat",
+        "vat_deductible_cogs",
+        "vat_deductible_rent",
+        "vat_deductible_other",
+        "net_profit_accounting",
+        "net_profit_cash",
+        "total_payments",
+    )
+
+
+@dataclass(slots=True, kw_only=True)
+class PatentResult(CalcResult):
+    income_without_vat: float
+    expenses_without_vat: float
+    net_profit_accounting: float
+    net_profit_cash: float
+    tax_before_deduction: float
+    tax_deduction: float
+    tax_deduction_limit: float
+    tax_payable: float
+    deductible_contrib: float
+    contrib_self: float
+    contrib_workers: float
+    contrib_self_extra: float
+    contrib_self_extra_base: float
+    owner_extra: float
+    owner_extra_base: float
+    fixed_contrib: float
+    has_employees_patent_limit: int
+    total_payments: float
+    patent_cost_year: float
+    patent_pvd_period: float
+    patent_pvd_used: float
+    patent_pvd_auto: int
+    patent_pvd_source: str
+
+    DETAIL_FIELDS: ClassVar[Tuple[str, ...]] = (
+        "income_without_vat",
+        "expenses_without_vat",
+        "net_profit_accounting",
+        "net_profit_cash",
+        "tax_before_deduction",
+        "tax_deduction",
+        "tax_deduction_limit",
+        "tax_payable",
+        "deductible_contrib",
+        "contrib_self",
+        "contrib_workers",
+        "contrib_self_extra",
+        "contrib_self_extra_base",
+        "owner_extra",
+        "owner_extra_base",
+        "fixed_contrib",
+        "has_employees_patent_limit",
+        "total_payments",
+        "patent_cost_year",
+        "patent_pvd_period",
+        "patent_pvd_used",
+        "patent_pvd_auto",
+        "patent_pvd_source",
+    )
+
 
 @dataclass
 class CalculationSummary:
-    results: List[Tuple[str, Dict[str, float], bool]] = field(default_factory=list)
-    top_results: List[Tuple[str, Dict[str, float]]] = field(default_factory=list)
+    results: List[Tuple[str, Optional[CalcResult], bool]] = field(default_factory=list)
+    top_results: List[Tuple[str, CalcResult]] = field(default_factory=list)
     components: Dict[str, float] = field(default_factory=dict)
@@ -0,0 +1,253 @@
+"""Monte Carlo comparison of the regimes under uncertain inputs.
+
+Samples of revenue, cost share, other-expense share, rent and payroll are
+drawn from a seeded generator up front and evaluated with
+``run_calculation_batch``, so 100k samples take one vectorized pass (or one
+pass per chunk in the multi-process mode, with identical results).
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .batch import Columns, _best_indices, run_calculation_batch
+from .engine import REGIME_CALCULATORS
+from .formulas import context_kernel
+from .models import CalcInput
+
+DEFAULT_SAMPLES = 100_000
+DEFAULT_PERCENTILES = (5.0, 25.0, 50.0, 75.0, 95.0)
+DEFAULT_CHUNK_SIZE = 25_000
+MIN_REVENUE = 1.0
+
+METRIC_TOTAL_BURDEN = "total_burden"
+METRIC_NET_PROFIT = "net_profit"
+
+NORMAL = "normal"
+LOGNORMAL = "lognormal"
+UNIFORM = "uniform"
+TRIANGULAR = "triangular"
+
+# Uncertain inputs: name -> ``CalcInput`` column it replaces. ``payroll`` is
+# the annual payroll fund whatever ``fot_mode`` the profile uses.
+UNCERTAIN_FIELDS = {
+    "revenue": "revenue",
+    "cost_percent": "cost_percent",
+    "other_percent": "other_percent",
+    "rent": "rent",
+    "payroll": "fot_annual",
+}
+
+
+@dataclass(frozen=True)
+class Distribution:
+    """A sampling law; build it with ``normal``, ``lognormal``, ``uniform`` or ``triangular``.
+
+    Samples are clipped to ``[low, high]``; amounts and shares cannot go
+    negative by default.
+    """
+
+    kind: str
+    params: Tuple[float, ...]
+    low: float = 0.0
+    high: float = np.inf
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        if self.kind == NORMAL:
+            values = rng.normal(*self.params, size=size)
+        elif self.kind == LOGNORMAL:
+            # Parametrized by the median and the sigma of the underlying normal.
+            median, sigma = self.params
+            values = median * np.exp(rng.normal(0.0, sigma, size=size))
+        elif self.kind == UNIFORM:
+            values = rng.uniform(*self.params, size=size)
+        elif self.kind == TRIANGULAR:
+            values = rng.triangular(*self.params, size=size)
+        else:
+            raise ValueError(f"Неизвестное распределение: {self.kind}")
+        return np.clip(values, self.low, self.high)
+
+
+def normal(mean: float, std: float, low: float = 0.0, high: float = np.inf) -> Distribution:
+    return Distribution(NORMAL, (mean, std), low, high)
+
+
+def lognormal(median: float, sigma: float) -> Distribution:
+    return Distribution(LOGNORMAL, (median, sigma))
+
+
+def uniform(low: float, high: float) -> Distribution:
+    return Distribution(UNIFORM, (low, high))
+
+
+def triangular(low: float, mode: float, high: float) -> Distribution:
+    return Distribution(TRIANGULAR, (low, mode, high))
+
+
+def sample_columns(
+    data: CalcInput,
+    distributions: Mapping[str, Distribution],
+    samples: int = DEFAULT_SAMPLES,
+    seed: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Batch columns: ``data`` with the uncertain fields replaced by samples.
+
+    Fields are drawn in the ``UNCERTAIN_FIELDS`` order, so a seed gives the
+    same samples whatever order ``distributions`` lists them in.
+    """
+    unknown = sorted(set(distributions) - set(UNCERTAIN_FIELDS))
+    if unknown:
+        raise ValueError(f"Неизвестные неопределённые поля: {', '.join(unknown)}")
+    if samples < 1:
+        raise ValueError("Число испытаний должно быть положительным")
+
+    columns: Dict[str, Any] = {
+        item.name: getattr(data, item.name)
+        for item in fields(CalcInput)
+        if item.name not in ("purchases_month_percents", "regime")
+    }
+    columns["fot_mode"] = "annual"
+    columns["fot_annual"] = context_kernel()(data)["annual_fot"]
+    if "other_percent" in distributions and data.other_mode != "percent":
+        raise ValueError("other_percent задаётся только при other_mode='percent'")
+
+    rng = np.random.default_rng(seed)
+    for name, column in UNCERTAIN_FIELDS.items():
+        if name in distributions:
+            columns[column] = distributions[name].sample(rng, samples)
+    # ``run_calculation`` rejects non-positive revenue; a sampled zero is one ruble.
+    columns["revenue"] = np.broadcast_to(np.maximum(np.asarray(columns["revenue"], dtype=float), MIN_REVENUE), (samples,))
+    return columns
+
+
+def _evaluate(columns: Mapping[str, Any]) -> Tuple[Dict[str, Columns], Columns]:
+    batch = run_calculation_batch(columns)
+    metrics = {
+        regime_id: {metric: batch.column(regime_id, metric) for metric in (METRIC_TOTAL_BURDEN, METRIC_NET_PROFIT)}
+        for regime_id in batch.regimes
+    }
+    return metrics, batch.available
+
+
+def _chunks(columns: Mapping[str, Any], size: int, chunk_size: int) -> List[Dict[str, Any]]:
+    return [
+        {name: value[start : start + chunk_size] if np.ndim(value) else value for name, value in columns.items()}
+        for start in range(0, size, chunk_size)
+    ]
+
+
+@dataclass
+class SimulationResult:
+    """Outcome statistics per regime; ``NaN`` for a regime that never applies.
+
+    ``availability`` is the share of samples in which the regime applies;
+    percentiles and regret are taken over those samples. ``regret`` is the
+    mean shortfall of the regime against the best regime of each sample, in
+    rubles of ``metric``.
+    """
+
+    samples: int
+    metric: str
+    regimes: Tuple[str, ...]
+    percentiles: Tuple[float, ...]
+    net_profit_percentiles: Dict[str, np.ndarray] = field(default_factory=dict)
+    net_profit_mean: Dict[str, float] = field(default_factory=dict)
+    probability_best: Dict[str, float] = field(default_factory=dict)
+    regret: Dict[str, float] = field(default_factory=dict)
+    availability: Dict[str, float] = field(default_factory=dict)
+
+    def ranking(self) -> List[str]:
+        """Regimes from the most to the least likely to be best."""
+
+        def key(regime_id: str) -> Tuple[float, float]:
+            regret = self.regret[regime_id]
+            return -self.probability_best[regime_id], np.inf if np.isnan(regret) else regret
+
+        return sorted(self.regimes, key=key)
+
+    def to_dict(self) -> Dict[str, Any]:
+        def number(value: float) -> Optional[float]:
+            return None if np.isnan(value) else round(float(value), 2)
+
+        return {
+            "samples": self.samples,
+            "metric": self.metric,
+            "percentiles": list(self.percentiles),
+            "regimes": {
+                regime_id: {
+                    "net_profit_percentiles": [number(value) for value in self.net_profit_percentiles[regime_id]],
+                    "net_profit_mean": number(self.net_profit_mean[regime_id]),
+                    "probability_best": round(self.probability_best[regime_id], 6),
+                    "regret": number(self.regret[regime_id]),
+                    "availability": round(self.availability[regime_id], 6),
+                }
+                for regime_id in self.regimes
+            },
+        }
+
+
+def simulate(
+    data: CalcInput,
+    distributions: Mapping[str, Distribution],
+    samples: int = DEFAULT_SAMPLES,
+    seed: Optional[int] = None,
+    *,
+    metric: str = METRIC_TOTAL_BURDEN,
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+    workers: int = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> SimulationResult:
+    """Draw ``samples`` profiles around ``data`` and compare the regimes.
+
+    The best regime of a sample is the first of its top-5 ranking (lowest
+    ``total_burden`` by default) or the highest net profit with
+    ``metric="net_profit"``. With ``workers > 1`` the samples are split into
+    chunks evaluated in a process pool; results do not depend on ``workers``.
+    """
+    if metric not in (METRIC_TOTAL_BURDEN, METRIC_NET_PROFIT):
+        raise ValueError(f"Неизвестный показатель: {metric}")
+    if workers < 1 or chunk_size < 1:
+        raise ValueError("Число процессов и размер пакета должны быть положительными")
+
+    columns = sample_columns(data, distributions, samples, seed)
+    if workers == 1:
+        metrics, available = _evaluate(columns)
+    else:
+        parts = _chunks(columns, samples, chunk_size)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            outcomes = list(pool.map(_evaluate, parts))
+        metrics = {
+            regime_id: {
+                name: np.concatenate([part[0][regime_id][name] for part in outcomes])
+                for name in (METRIC_TOTAL_BURDEN, METRIC_NET_PROFIT)
+            }
+            for regime_id in REGIME_CALCULATORS
+        }
+        available = {regime_id: np.concatenate([part[1][regime_id] for part in outcomes]) for regime_id in REGIME_CALCULATORS}
+
+    regimes = tuple(REGIME_CALCULATORS)
+    best = _best_indices(regimes, metrics, available, metric)
+    counts = np.bincount(best[best >= 0], minlength=len(regimes))
+    values = np.stack([metrics[regime_id][metric] for regime_id in regimes], axis=1)
+    with np.errstate(invalid="ignore"):
+        optimum = np.nanmax(values, axis=1) if metric == METRIC_NET_PROFIT else np.nanmin(values, axis=1)
+
+    result = SimulationResult(samples=samples, metric=metric, regimes=regimes, percentiles=tuple(percentiles))
+    for index, regime_id in enumerate(regimes):
+        mask = np.asarray(available[regime_id], dtype=bool)
+        result.availability[regime_id] = float(mask.mean())
+        result.probability_best[regime_id] = float(counts[index] / samples)
+        if not mask.any():
+            result.net_profit_percentiles[regime_id] = np.full(len(result.percentiles), np.nan)
+            result.net_profit_mean[regime_id] = np.nan
+            result.regret[regime_id] = np.nan
+            continue
+        profits = metrics[regime_id][METRIC_NET_PROFIT][mask]
+        result.net_profit_percentiles[regime_id] = np.percentile(profits, result.percentiles)
+        result.net_profit_mean[regime_id] = float(profits.mean())
+        result.regret[regime_id] = float(np.abs(optimum[mask] - values[mask, index]).mean())
+    return result
@@ -0,0 +1,212 @@
+"""Month-by-month evaluation of every regime on year-to-date figures.
+
+Each of the twelve periods is the profile as of that month end: revenue
+accrues evenly, purchases follow ``purchases_month_percents`` and the other
+flows (rent, payroll, contributions, patent cost) accrue evenly. All twelve
+periods go through the compiled NumPy kernel in one call, so thresholds
+and the NDFL brackets apply to running totals the way the periodic returns
+do. The USN-profit minimum tax (1% of revenue) is due for the year only:
+interim periods pay the regular rate on the running profit. Month 12 is the
+annual profile, so the year totals equal ``run_calculation``.
+
+Monthly and quarterly amounts are differences of the running totals.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Hashable, Sequence, Tuple
+
+import numpy as np
+
+from .constants import MONTH_KEYS, VAT_RATE_STANDARD
+from .engine import REGIME_CALCULATORS
+from .formulas import (
+    BACKEND_NUMPY,
+    Kernel,
+    compile_kernel,
+    context_kernel,
+    ctx,
+    percent_of,
+    regime_outputs,
+    revenue,
+    usn_profit_regular_tax,
+    var,
+    vat_charged,
+)
+from .models import CalcInput
+
+MONTHS = len(MONTH_KEYS)
+QUARTER_ENDS = (2, 5, 8, 11)
+
+PERIOD_MONTH = "month"
+PERIOD_QUARTER = "quarter"
+
+# Metrics that add up over periods; ``burden_percent`` is only meaningful
+# on the running totals.
+PERIOD_METRICS = ("revenue", "expenses", "tax", "vat", "insurance", "total_burden", "net_profit")
+CONTEXT_SERIES = {
+    "revenue": revenue,
+    "purchases": ctx["cost_of_goods"],
+    # Input VAT on the purchases bought from VAT payers, at the standard rate.
+    "purchases_vat": vat_charged(percent_of(ctx["cost_of_goods"], var("vat_purchases_percent")), VAT_RATE_STANDARD),
+    "insurance": ctx["insurance_standard"],
+    "usn_profit_regular_tax": usn_profit_regular_tax,
+}
+# Regimes whose minimum tax is assessed on the annual return only.
+ANNUAL_MINIMUM_REGIMES = ("usn_profit_no_vat", "usn_profit_vat_5", "usn_profit_vat_22")
+
+
+@lru_cache(maxsize=None)
+def _period_kernel() -> Kernel:
+    outputs: Dict[Hashable, object] = dict(regime_outputs())
+    outputs.update({("context", name): expr for name, expr in CONTEXT_SERIES.items()})
+    return compile_kernel(outputs, BACKEND_NUMPY)
+
+
+def purchase_weights(coefficients: Sequence[float]) -> np.ndarray:
+    """Share of the annual purchases falling on each month.
+
+    The coefficients only spread the annual cost of goods over the year
+    (100 is an ordinary month); a missing or all-zero plan means even months.
+    """
+    values = np.zeros(MONTHS) if not len(coefficients) else np.asarray(coefficients, dtype=float)
+    if values.shape != (MONTHS,):
+        raise ValueError(f"Ожидалось {MONTHS} коэффициентов закупок по месяцам")
+    if np.any(values < 0):
+        raise ValueError("Коэффициенты закупок должны быть неотрицательными")
+    total = values.sum()
+    if total <= 0:
+        return np.full(MONTHS, 1.0 / MONTHS)
+    return values / total
+
+
+def year_to_date_columns(data: CalcInput) -> Dict[str, object]:
+    """Kernel columns of length 12: the profile as of each month end."""
+    elapsed = np.arange(1, MONTHS + 1) / MONTHS
+    purchased = np.cumsum(purchase_weights(data.purchases_month_percents))
+    purchased[-1] = 1.0
+
+    def accrued(amount: float) -> np.ndarray:
+        return amount * elapsed
+
+    def share(value):
+        return np.nan if value is None else value
+
+    return {
+        "revenue": accrued(data.revenue),
+        # Revenue accrues evenly, so the cost share of the running totals
+        # moves with the purchases made so far.
+        "cost_percent": data.cost_percent * purchased / elapsed,
+        "vat_purchases_percent": data.vat_purchases_percent,
+        "rent": accrued(data.rent),
+        "fixed_contrib": accrued(data.fixed_contrib),
+        "employees": data.employees,
+        "salary": data.salary,
+        "fot_mode": "annual",
+        "fot_annual": accrued(context_kernel()(data)["annual_fot"]),
+        "other_mode": data.other_mode,
+        "other_percent": data.other_percent,
+        "other_amount": accrued(data.other_amount),
+        "transition_mode": data.transition_mode,
+        # The carried-over credit is available from the first return on.
+        "accumulated_vat_credit": data.accumulated_vat_credit,
+        "stock_expense_amount": accrued(data.stock_expense_amount),
+        "patent_cost_year": accrued(data.patent_cost_year),
+        "patent_pvd_period": accrued(data.patent_pvd_period),
+        "vat_share_cogs": share(data.vat_share_cogs),
+        "vat_share_rent": share(data.vat_share_rent),
+        "vat_share_other": share(data.vat_share_other),
+    }
+
+
+def _by_period(running: np.ndarray, period: str) -> np.ndarray:
+    if period == PERIOD_MONTH:
+        ends = running
+    elif period == PERIOD_QUARTER:
+        ends = running[list(QUARTER_ENDS)]
+    else:
+        raise ValueError(f"Неизвестный период: {period}")
+    return np.diff(ends, prepend=0.0)
+
+
+@dataclass
+class MonthlyResult:
+    """Running totals per regime and metric, shape ``(12,)`` each.
+
+    ``available`` follows the annual profile: a regime that is unavailable
+    for the year (e.g. AUSN over its revenue limit) is unavailable in every
+    month, and ``regimes`` lists only the available ones.
+    """
+
+    regimes: Tuple[str, ...]
+    weights: np.ndarray
+    running: Dict[str, Dict[str, np.ndarray]]
+    context: Dict[str, np.ndarray]
+    unavailable: Tuple[str, ...] = ()
+
+    def cumulative(self, regime_id: str, metric: str) -> np.ndarray:
+        return self.running[regime_id][metric]
+
+    def per_period(self, regime_id: str, metric: str, period: str = PERIOD_MONTH) -> np.ndarray:
+        """Amount accrued in each month (12 values) or quarter (4 values)."""
+        return _by_period(self.running[regime_id][metric], period)
+
+    def context_per_period(self, name: str, period: str = PERIOD_MONTH) -> np.ndarray:
+        return _by_period(self.context[name], period)
+
+    def payable(self, regime_id: str, metric: str = "tax", period: str = PERIOD_QUARTER) -> np.ndarray:
+        """Payments due per period on the running-total basis.
+
+        A period whose running total falls below what was already paid owes
+        nothing; the overpayment is offset against the following periods.
+        """
+        return _by_period(np.maximum.accumulate(np.maximum(self.running[regime_id][metric], 0.0)), period)
+
+    def annual(self, regime_id: str) -> Dict[str, float]:
+        return {metric: float(values[-1]) for metric, values in self.running[regime_id].items()}
+
+
+def _drop_interim_minimum(metrics: Dict[str, np.ndarray], regular_tax: np.ndarray) -> None:
+    # The kernel applies the minimum to every period; before month 12 only
+    # the regular tax is due, and the difference goes back to net profit.
+    excess = metrics["tax"] - regular_tax
+    excess[-1] = 0.0
+    metrics["tax"] = metrics["tax"] - excess
+    metrics["total_burden"] = metrics["total_burden"] - excess
+    metrics["net_profit"] = metrics["net_profit"] + excess
+    running_revenue = metrics["revenue"]
+    metrics["burden_percent"] = np.divide(
+        metrics["total_burden"] * 100.0,
+        running_revenue,
+        out=np.zeros_like(running_revenue),
+        where=running_revenue > 0,
+    )
+
+
+def calculate_monthly(data: CalcInput) -> MonthlyResult:
+    """Evaluate all regimes on the twelve year-to-date profiles of ``data``."""
+    weights = purchase_weights(data.purchases_month_percents)
+    values = _period_kernel()(year_to_date_columns(data))
+    context = {name: np.asarray(values[("context", name)], dtype=float) for name in CONTEXT_SERIES}
+
+    running: Dict[str, Dict[str, np.ndarray]] = {}
+    unavailable = []
+    for regime_id in REGIME_CALCULATORS:
+        if not bool(values[(regime_id, "available")][-1]):
+            unavailable.append(regime_id)
+            continue
+        running[regime_id] = {
+            metric: np.asarray(values[(regime_id, metric)], dtype=float)
+            for metric in PERIOD_METRICS + ("burden_percent",)
+        }
+        if regime_id in ANNUAL_MINIMUM_REGIMES:
+            _drop_interim_minimum(running[regime_id], context["usn_profit_regular_tax"])
+    return MonthlyResult(
+        regimes=tuple(running),
+        weights=weights,
+        running=running,
+        context=context,
+        unavailable=tuple(unavailable),
+    )
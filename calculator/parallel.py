@@ -0,0 +1,193 @@
+"""Process-pool execution of ``run_calculation`` over many input profiles."""
+
+from __future__ import annotations
+
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from itertools import islice
+from typing import Deque, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .constants import DEFAULT_FIXED_CONTRIB, DEFAULT_PATENT_COST
+from .engine import _select_regimes, run_calculation
+from .models import CalcInput, CalculationSummary
+
+DEFAULT_CHUNK_SIZE = 64
+# Chunks queued per worker: enough to keep every process busy while the
+# parent collects results in order, without materializing the whole input.
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+ChunkOutcome = List[Tuple[Optional[CalculationSummary], Optional[str]]]
+
+
+@dataclass
+class RowOutcome:
+    index: int
+    summary: Optional[CalculationSummary] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+_WARM_UP_INPUT = CalcInput(
+    revenue=12_000_000,
+    cost_percent=40,
+    vat_purchases_percent=70,
+    rent=500_000,
+    fixed_contrib=DEFAULT_FIXED_CONTRIB,
+    employees=3,
+    salary=50_000,
+    fot_mode="staff",
+    fot_annual=0.0,
+    other_mode="percent",
+    other_percent=10,
+    other_amount=0.0,
+    transition_mode="none",
+    accumulated_vat_credit=0.0,
+    stock_expense_amount=0.0,
+    patent_cost_year=DEFAULT_PATENT_COST,
+    purchases_month_percents=[100.0] * 12,
+)
+
+
+def warm_up() -> None:
+    """Import and exercise the engine once so the first real row pays no setup cost."""
+    run_calculation(_WARM_UP_INPUT)
+
+
+def _describe(exc: BaseException) -> str:
+    return f"{type(exc).__name__}: {exc}"
+
+
+def _calculate_chunk(
+    chunk: Sequence[CalcInput],
+    regimes: Optional[Tuple[str, ...]],
+    patent_targets: bool,
+) -> ChunkOutcome:
+    outcomes: ChunkOutcome = []
+    for data in chunk:
+        try:
+            outcomes.append((run_calculation(data, regimes=regimes, patent_targets=patent_targets), None))
+        except Exception as exc:
+            outcomes.append((None, _describe(exc)))
+    return outcomes
+
+
+class ParallelCalculator:
+    """Shards input profiles across a pool of warmed-up worker processes.
+
+    ``map`` yields one ``RowOutcome`` per input, in input order. A row that
+    raises is reported in ``RowOutcome.error`` and the run continues. If a
+    worker dies, the rows of the chunks that were running on the broken pool
+    are reported as failed and the rest of the run goes to a fresh pool. The
+    pool lives as long as the calculator, so reuse one instance (or the
+    context manager) for consecutive runs.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        regimes: Optional[Iterable[str]] = None,
+        patent_targets: bool = True,
+    ):
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers < 1:
+            raise ValueError("Число процессов должно быть положительным")
+        if chunk_size < 1:
+            raise ValueError("Размер пакета должен быть положительным")
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.regimes = None if regimes is None else tuple(_select_regimes(regimes))
+        self.patent_targets = patent_targets
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self) -> "ParallelCalculator":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=warm_up)
+        return self._executor
+
+    def _discard(self, pool: ProcessPoolExecutor) -> None:
+        """Drop a broken pool; the next ``_pool`` call starts a new one."""
+        if self._executor is pool:
+            self._executor = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, chunk: List[CalcInput]) -> Tuple[ProcessPoolExecutor, Future]:
+        # A pool that broke since the last chunk is replaced once; a new
+        # pool that cannot take work either fails this chunk alone.
+        for _attempt in range(2):
+            pool = self._pool()
+            try:
+                return pool, pool.submit(_calculate_chunk, chunk, self.regimes, self.patent_targets)
+            except BrokenProcessPool as exc:
+                self._discard(pool)
+                error = exc
+        failed: Future = Future()
+        failed.set_exception(error)
+        return pool, failed
+
+    def map(self, inputs: Iterable[CalcInput]) -> Iterator[RowOutcome]:
+        rows = iter(inputs)
+        pending: Deque[Tuple[int, int, ProcessPoolExecutor, Future]] = deque()
+        limit = self.workers * CHUNKS_IN_FLIGHT_PER_WORKER
+        start = 0
+
+        def submit() -> bool:
+            nonlocal start
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                return False
+            pool, future = self._submit(chunk)
+            pending.append((start, len(chunk), pool, future))
+            start += len(chunk)
+            return True
+
+        exhausted = False
+        while len(pending) < limit and not exhausted:
+            exhausted = not submit()
+
+        while pending:
+            offset, size, pool, future = pending.popleft()
+            try:
+                outcomes = future.result()
+            except BrokenProcessPool as exc:
+                # A worker died: this chunk is lost with it, later chunks
+                # go to a new pool.
+                self._discard(pool)
+                outcomes = [(None, _describe(exc))] * size
+            except Exception as exc:
+                # The chunk itself failed: report every row.
+                outcomes = [(None, _describe(exc))] * size
+            if not exhausted:
+                exhausted = not submit()
+            for position, (summary, error) in enumerate(outcomes):
+                yield RowOutcome(index=offset + position, summary=summary, error=error)
+
+
+def run_calculation_parallel(
+    inputs: Iterable[CalcInput],
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    regimes: Optional[Iterable[str]] = None,
+    patent_targets: bool = True,
+) -> List[RowOutcome]:
+    """One-off parallel run; see ``ParallelCalculator`` for the streaming form."""
+    with ParallelCalculator(workers, chunk_size, regimes=regimes, patent_targets=patent_targets) as calculator:
+        return list(calculator.map(inputs))
@@ -0,0 +1,93 @@
+"""Canonical query strings and ETags for shareable result links.
+
+Two inputs that calculate and display the same get the same query string:
+numbers are quantized like the calculation cache key, fields the result
+ignores (e.g. ``salary`` with ``fot_mode="annual"``) and fields at their
+form defaults are dropped, and the rest follow a fixed order.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Tuple
+from urllib.parse import urlencode
+
+from .cache import _quantize, canonical_input
+from .constants import MONTH_KEYS, RULESET_VERSION
+from .formulas import vat_shares
+from .inputs import FLOAT_FIELDS, MONTH_FIELDS, SHARE_FIELDS, parse_row, summarize
+from .models import CalcInput
+
+# What the form shows for a month nobody filled in.
+DEFAULT_MONTH_PERCENT = 100.0
+ENUM_DEFAULTS = {"fot_mode": "staff", "other_mode": "percent", "transition_mode": "none"}
+
+
+def _number(value: float) -> str:
+    text = f"{_quantize(value):.6f}".rstrip("0").rstrip(".")
+    return text or "0"
+
+
+def canonical_pairs(data: CalcInput) -> List[Tuple[str, str]]:
+    canonical = canonical_input(data)
+    pairs: List[Tuple[str, str]] = []
+    for name, (missing, _blank) in FLOAT_FIELDS.items():
+        value = getattr(canonical, name)
+        if name == "revenue" or _quantize(value) != _quantize(missing):
+            pairs.append((name, _number(value)))
+    if canonical.employees:
+        pairs.append(("employees", str(canonical.employees)))
+    for name, default in ENUM_DEFAULTS.items():
+        if getattr(canonical, name) != default:
+            pairs.append((name, getattr(canonical, name)))
+    defaults = {
+        "vat_share_cogs": vat_shares(replace(canonical, vat_share_cogs=None))["vat_share_cogs"],
+        "vat_share_rent": 1.0,
+        "vat_share_other": 1.0,
+    }
+    for name in SHARE_FIELDS:
+        value = getattr(canonical, name)
+        if value != _quantize(defaults[name]):
+            pairs.append((name, _number(value)))
+    months = [_quantize(value) for value in data.purchases_month_percents or [DEFAULT_MONTH_PERCENT] * len(MONTH_KEYS)]
+    if any(value != DEFAULT_MONTH_PERCENT for value in months):
+        pairs.extend((name, _number(value)) for name, value in zip(MONTH_FIELDS, months))
+    return pairs
+
+
+def canonical_query(data: CalcInput) -> str:
+    """Query string that ``parse_query`` turns back into an equivalent input."""
+    return urlencode(canonical_pairs(data))
+
+
+def parse_query(args: Mapping[str, Any]) -> Dict[str, Any]:
+    """``CalcInput`` keyword arguments from query arguments, checked like the form.
+
+    Months missing from the query are ordinary (100), as on the blank form.
+    Raises ``InputError`` with the form's message.
+    """
+    raw: Dict[str, Any] = {name: DEFAULT_MONTH_PERCENT for name in MONTH_FIELDS}
+    raw.update(args)
+    row = parse_row(raw)
+    if row.field_errors:
+        raise summarize(row.field_errors)
+    return row.values
+
+
+def build_fingerprint(manifest: Mapping[str, str], template_dir: Path) -> str:
+    """Hash of what the page bytes depend on besides the input: the asset
+    manifest (bundle URLs) and every template source."""
+    digest = hashlib.sha256(json.dumps(dict(manifest), sort_keys=True).encode("utf-8"))
+    for path in sorted(template_dir.rglob("*.html")):
+        digest.update(f"\n{path.relative_to(template_dir).as_posix()}\n".encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def etag_for(query: str, build: str = "") -> str:
+    """Strong validator for the result page of ``query`` under the current rules and ``build``."""
+    digest = hashlib.sha256(f"{RULESET_VERSION}\n{build}\n{query}".encode("utf-8")).hexdigest()
+    return digest[:32]
@@ -0,0 +1,321 @@
+"""Exact piecewise-linear representation of regime results along revenue.
+
+The curves are not written by hand: the regime graph of
+``calculator.formulas`` is compiled with the piecewise backend, which runs
+the same expressions over ``PiecewiseLinear`` values of revenue. A
+comparison whose outcome changes inside the revenue range (the AUSN revenue
+limit, say) splits the range, and each part is evaluated on its own.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .formulas import BACKEND_PIECEWISE, CONTEXT, REGIMES, Kernel, compile_kernel
+from .models import CalcInput, CalculationContext
+
+Operand = Union["PiecewiseLinear", float]
+
+
+class PiecewiseLinear:
+    """Continuous piecewise-linear function given by its breakpoints."""
+
+    __slots__ = ("xs", "ys")
+
+    def __init__(self, xs: Sequence[float], ys: Sequence[float]):
+        self.xs = list(xs)
+        self.ys = list(ys)
+
+    @classmethod
+    def linear(cls, lo: float, hi: float, intercept: float = 0.0, slope: float = 1.0) -> "PiecewiseLinear":
+        if hi <= lo:
+            return cls([lo], [intercept + slope * lo])
+        return cls([lo, hi], [intercept + slope * lo, intercept + slope * hi])
+
+    @property
+    def lo(self) -> float:
+        return self.xs[0]
+
+    @property
+    def hi(self) -> float:
+        return self.xs[-1]
+
+    def __call__(self, x: float) -> float:
+        xs, ys = self.xs, self.ys
+        if len(xs) == 1 or x <= xs[0]:
+            return ys[0] if len(xs) == 1 else self._extend(0, x)
+        if x >= xs[-1]:
+            return self._extend(len(xs) - 2, x)
+        index = bisect_right(xs, x) - 1
+        return self._extend(index, x)
+
+    def _extend(self, index: int, x: float) -> float:
+        x0, x1 = self.xs[index], self.xs[index + 1]
+        y0, y1 = self.ys[index], self.ys[index + 1]
+        return y0 + (y1 - y0) * (x - x0) / (x1 - x0)
+
+    def constant(self, value: float) -> "PiecewiseLinear":
+        """Constant function over the same domain."""
+        return PiecewiseLinear.linear(self.lo, self.hi, value, 0.0)
+
+    def _sample(self, points: Sequence[float]) -> List[float]:
+        """Values at ascending ``points`` inside the domain, in a single pass."""
+        xs, ys = self.xs, self.ys
+        if len(xs) == 1:
+            return [ys[0]] * len(points)
+        values: List[float] = []
+        index = 0
+        last = len(xs) - 2
+        for x in points:
+            while index < last and x > xs[index + 1]:
+                index += 1
+            x0, x1 = xs[index], xs[index + 1]
+            if x == x0:
+                values.append(ys[index])
+            elif x == x1:
+                values.append(ys[index + 1])
+            else:
+                y0 = ys[index]
+                values.append(y0 + (ys[index + 1] - y0) * (x - x0) / (x1 - x0))
+        return values
+
+    def _aligned(self, other: "PiecewiseLinear") -> Tuple[List[float], List[float], List[float]]:
+        if self.xs == other.xs:
+            return self.xs, self.ys, other.ys
+        xs = sorted(set(self.xs) | set(other.xs))
+        return xs, self._sample(xs), other._sample(xs)
+
+    def _merged(self, other: Operand, op: Callable[[float, float], float]) -> "PiecewiseLinear":
+        if not isinstance(other, PiecewiseLinear):
+            return PiecewiseLinear(self.xs, [op(y, other) for y in self.ys])
+        xs, left, right = self._aligned(other)
+        return PiecewiseLinear(xs, [op(a, b) for a, b in zip(left, right)])
+
+    def __add__(self, other: Operand) -> "PiecewiseLinear":
+        return self._merged(other, lambda a, b: a + b)
+
+    __radd__ = __add__
+
+    def __sub__(self, other: Operand) -> "PiecewiseLinear":
+        return self._merged(other, lambda a, b: a - b)
+
+    def __rsub__(self, other: float) -> "PiecewiseLinear":
+        return self._merged(other, lambda a, b: b - a)
+
+    def __neg__(self) -> "PiecewiseLinear":
+        return PiecewiseLinear(self.xs, [-y for y in self.ys])
+
+    def __mul__(self, factor: float) -> "PiecewiseLinear":
+        if isinstance(factor, PiecewiseLinear):
+            raise TypeError("Произведение кусочно-линейных функций не линейно")
+        return PiecewiseLinear(self.xs, [y * factor for y in self.ys])
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, divisor: float) -> "PiecewiseLinear":
+        return PiecewiseLinear(self.xs, [y / divisor for y in self.ys])
+
+    def _select(self, other: Operand, pick: Callable[[float, float], float]) -> "PiecewiseLinear":
+        if isinstance(other, PiecewiseLinear):
+            xs, left, right = self._aligned(other)
+        else:
+            xs, left, right = self.xs, self.ys, [float(other)] * len(self.xs)
+        points: List[float] = []
+        values: List[float] = []
+        for index, x in enumerate(xs):
+            if index:
+                # A kink appears wherever the two operands swap order inside a segment.
+                d0 = left[index - 1] - right[index - 1]
+                d1 = left[index] - right[index]
+                if d0 * d1 < 0:
+                    share = d0 / (d0 - d1)
+                    x0 = xs[index - 1]
+                    points.append(x0 + (x - x0) * share)
+                    values.append(left[index - 1] + (left[index] - left[index - 1]) * share)
+            points.append(x)
+            values.append(pick(left[index], right[index]))
+        return PiecewiseLinear(points, values)
+
+    def maximum(self, other: Operand) -> "PiecewiseLinear":
+        return self._select(other, max)
+
+    def minimum(self, other: Operand) -> "PiecewiseLinear":
+        return self._select(other, min)
+
+    def restrict(self, lo: float, hi: float) -> Optional["PiecewiseLinear"]:
+        lo = max(lo, self.lo)
+        hi = min(hi, self.hi)
+        if hi < lo:
+            return None
+        inner = [x for x in self.xs if lo < x < hi]
+        xs = [lo] + inner + ([hi] if hi > lo else [])
+        return PiecewiseLinear(xs, [self(x) for x in xs])
+
+    def segments(self) -> Iterable[tuple]:
+        return zip(self.xs, self.ys, self.xs[1:], self.ys[1:])
+
+    def first_reaching(self, target: float) -> Optional[float]:
+        """Smallest ``x`` in the domain where the function reaches ``target``."""
+        if self.ys[0] >= target:
+            return self.xs[0]
+        for x0, y0, x1, y1 in self.segments():
+            if y1 >= target:
+                return x0 + (x1 - x0) * (target - y0) / (y1 - y0)
+        return None
+
+    def roots(self) -> List[float]:
+        """Points where the function changes sign, in ascending order."""
+        found: List[float] = []
+        for x0, y0, x1, y1 in self.segments():
+            if y0 == 0.0:
+                if not found or found[-1] != x0:
+                    found.append(x0)
+            elif y0 * y1 < 0:
+                found.append(x0 + (x1 - x0) * y0 / (y0 - y1))
+        if self.ys[-1] == 0.0 and (not found or found[-1] != self.xs[-1]):
+            found.append(self.xs[-1])
+        return found
+
+
+@dataclass
+class RegimeCurve:
+    net_profit: PiecewiseLinear
+    total_burden: PiecewiseLinear
+
+    @property
+    def lo(self) -> float:
+        return self.net_profit.lo
+
+    @property
+    def hi(self) -> float:
+        return self.net_profit.hi
+
+
+
+
+class _Split(Exception):
+    """A comparison changes its outcome at ``at`` inside the revenue range."""
+
+    def __init__(self, at: float):
+        super().__init__(at)
+        self.at = at
+
+
+# Crossings this close to either end of the range (relative to its size) are
+# rounding noise of an earlier split, not a reason to split again.
+_SPLIT_MARGIN = 1e-9
+
+
+def compare(op: Callable[[Any, Any], bool], left: Any, right: Any) -> bool:
+    """``op(left, right)`` over the whole revenue range of a piecewise kernel."""
+    if not isinstance(left, PiecewiseLinear) and not isinstance(right, PiecewiseLinear):
+        return op(left, right)
+    difference = left - right
+    margin = _SPLIT_MARGIN * max(1.0, abs(difference.lo), abs(difference.hi))
+    for root in difference.roots():
+        if difference.lo + margin < root < difference.hi - margin:
+            raise _Split(root)
+    return op(difference((difference.lo + difference.hi) / 2.0), 0.0)
+
+
+def maximum(left: Operand, right: Operand) -> Operand:
+    if isinstance(left, PiecewiseLinear):
+        return left.maximum(right)
+    if isinstance(right, PiecewiseLinear):
+        return right.maximum(left)
+    return max(left, right)
+
+
+def minimum(left: Operand, right: Operand) -> Operand:
+    if isinstance(left, PiecewiseLinear):
+        return left.minimum(right)
+    if isinstance(right, PiecewiseLinear):
+        return right.minimum(left)
+    return min(left, right)
+
+
+def _join(parts: List[PiecewiseLinear]) -> PiecewiseLinear:
+    xs, ys = list(parts[0].xs), list(parts[0].ys)
+    for part in parts[1:]:
+        skip = 1 if part.xs[0] == xs[-1] else 0
+        xs.extend(part.xs[skip:])
+        ys.extend(part.ys[skip:])
+    return PiecewiseLinear(xs, ys)
+
+
+class _AlongRevenue:
+    """``CalcInput`` view whose revenue is a piecewise-linear function."""
+
+    __slots__ = ("_data", "revenue")
+
+    def __init__(self, data: CalcInput, revenue: PiecewiseLinear):
+        self._data = data
+        self.revenue = revenue
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._data, name)
+
+
+CURVE_METRICS = ("net_profit", "total_burden", "available")
+
+# Context entries kept at their amounts in ``ctx`` when expenses do not scale.
+FIXED_EXPENSES = ("cost_of_goods", "other_expenses")
+
+
+@lru_cache(maxsize=None)
+def _curves_kernel(regimes: Tuple[str, ...], scale_expenses: bool) -> Kernel:
+    outputs = {(regime_id, metric): REGIMES[regime_id][metric] for regime_id in regimes for metric in CURVE_METRICS}
+    context = None if scale_expenses else {name: CONTEXT[name] for name in FIXED_EXPENSES}
+    return compile_kernel(outputs, BACKEND_PIECEWISE, context=context)
+
+
+def _evaluate(
+    kernel: Kernel, data: CalcInput, ctx: CalculationContext, lo: float, hi: float
+) -> List[Tuple[PiecewiseLinear, Dict[Any, Any]]]:
+    revenue = PiecewiseLinear.linear(lo, hi)
+    try:
+        return [(revenue, kernel(_AlongRevenue(data, revenue), ctx))]
+    except _Split as split:
+        return _evaluate(kernel, data, ctx, lo, split.at) + _evaluate(kernel, data, ctx, split.at, hi)
+
+
+def build_regime_curves(
+    data: CalcInput,
+    ctx: CalculationContext,
+    lo: float,
+    hi: float,
+    *,
+    scale_expenses: bool = False,
+    regimes: Optional[Iterable[str]] = None,
+) -> Dict[str, RegimeCurve]:
+    """Net profit and total burden of every regime as functions of revenue.
+
+    With ``scale_expenses=False`` the cost of goods and other expenses stay at
+    their amounts in ``ctx`` (the price-uplift scenario); otherwise they follow
+    the percentages in ``data`` as revenue moves. A curve ends where its
+    regime stops being available (AUSN past the revenue limit); regimes that
+    are unavailable at ``lo`` are omitted.
+    """
+    wanted = tuple(REGIMES) if regimes is None else tuple(regime_id for regime_id in REGIMES if regime_id in set(regimes))
+    if not wanted:
+        return {}
+    parts = _evaluate(_curves_kernel(wanted, scale_expenses), data, ctx, lo, hi)
+
+    def along(revenue: PiecewiseLinear, value: Operand) -> PiecewiseLinear:
+        return value if isinstance(value, PiecewiseLinear) else revenue.constant(value)
+
+    curves: Dict[str, RegimeCurve] = {}
+    for regime_id in wanted:
+        net_profit: List[PiecewiseLinear] = []
+        total_burden: List[PiecewiseLinear] = []
+        for revenue, values in parts:
+            if not values[(regime_id, "available")]:
+                break
+            net_profit.append(along(revenue, values[(regime_id, "net_profit")]))
+            total_burden.append(along(revenue, values[(regime_id, "total_burden")]))
+        if net_profit:
+            curves[regime_id] = RegimeCurve(net_profit=_join(net_profit), total_burden=_join(total_burden))
+    return curves
@@ -0,0 +1,207 @@
+"""Multi-year projection with the transition VAT credit and stock carried forward.
+
+``calculate_projection`` grows revenue, purchases/other costs and payroll by
+yearly rates and evaluates every regime for each year through the NumPy
+kernel. The one-off transition amounts are no longer spent in the first year:
+a regime uses as much of the remaining VAT credit as it has VAT to pay, and
+as much of the remaining stock as its profit base absorbs; the rest moves to
+the next year.
+
+How much a year can absorb does not depend on the carryover, so the whole
+path is closed-form: the amount used up to year ``k`` is
+``min(initial, cumsum(capacity)[k])``. A projection therefore costs two
+kernel calls whatever the horizon: one for the capacities, one for the years
+of the regimes that use the carryover.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .batch import RESULT_METRICS, Columns, _rank_top_results
+from .engine import REGIME_CALCULATORS, _build_context
+from .formulas import BACKEND_NUMPY, Kernel, _osno_base, compile_kernel, ctx, maximum, regime_outputs, revenue
+from .models import CalcInput
+
+MAX_YEARS = 50
+
+# Regimes that can use each kind of carryover; the others ignore it.
+CREDIT_REGIMES = ("usn_income_vat_22", "usn_profit_vat_22", "osno_ooo", "osno_ip")
+STOCK_REGIMES = ("usn_profit_no_vat", "usn_profit_vat_5", "usn_profit_vat_22", "osno_ooo", "osno_ip")
+
+Rate = Union[float, Sequence[float]]
+
+
+def _stock_capacity() -> Dict[Hashable, object]:
+    # Profit bases before any stock write-off (the kernel runs with
+    # ``transition_mode="none"`` for the capacities).
+    usn_base = maximum(revenue - ctx["usn_profit_expenses_for_base"], 0.0)
+    osno_base = maximum(_osno_base()["profit_before_tax"], 0.0)
+    return {
+        ("stock_capacity", regime_id): osno_base if regime_id.startswith("osno") else usn_base
+        for regime_id in STOCK_REGIMES
+    }
+
+
+@lru_cache(maxsize=None)
+def _projection_kernel() -> Kernel:
+    outputs: Dict[Hashable, object] = dict(regime_outputs())
+    outputs.update(_stock_capacity())
+    return compile_kernel(outputs, BACKEND_NUMPY)
+
+
+@lru_cache(maxsize=None)
+def _carry_kernel(regimes: Tuple[str, ...]) -> Kernel:
+    return compile_kernel(regime_outputs(regimes), BACKEND_NUMPY)
+
+
+def _growth(rate: Rate, years: int, name: str) -> np.ndarray:
+    """Cumulative growth factors, ``1.0`` for the first year."""
+    rates = np.broadcast_to(np.asarray(rate, dtype=float), (years - 1,)) if np.ndim(rate) == 0 else np.asarray(rate, dtype=float)
+    if rates.shape != (years - 1,):
+        raise ValueError(f"{name}: нужен темп на каждый год после первого ({years - 1})")
+    if np.any(rates <= -100.0):
+        raise ValueError(f"{name}: темп роста должен быть больше -100%")
+    return np.concatenate(([1.0], np.cumprod(1.0 + rates / 100.0)))
+
+
+def projection_columns(
+    data: CalcInput,
+    years: int,
+    revenue_growth: Rate = 0.0,
+    cost_growth: Rate = 0.0,
+    payroll_growth: Rate = 0.0,
+) -> Dict[str, object]:
+    """Kernel columns, one row per year, without the transition amounts."""
+    base_ctx, _components = _build_context(data)
+    revenue_factor = _growth(revenue_growth, years, "revenue_growth")
+    cost_factor = _growth(cost_growth, years, "cost_growth")
+    payroll_factor = _growth(payroll_growth, years, "payroll_growth")
+    revenues = data.revenue * revenue_factor
+    cost_of_goods = base_ctx.cost_of_goods * cost_factor
+
+    def share(value):
+        return np.nan if value is None else value
+
+    return {
+        "revenue": revenues,
+        "cost_percent": np.divide(cost_of_goods * 100.0, revenues, out=np.zeros(years), where=revenues > 0),
+        "vat_purchases_percent": data.vat_purchases_percent,
+        "rent": data.rent * cost_factor,
+        "fixed_contrib": data.fixed_contrib,
+        "employees": data.employees,
+        "salary": data.salary,
+        "fot_mode": "annual",
+        "fot_annual": base_ctx.annual_fot * payroll_factor,
+        "other_mode": data.other_mode,
+        "other_percent": data.other_percent,
+        "other_amount": data.other_amount * cost_factor,
+        "transition_mode": "none",
+        "accumulated_vat_credit": 0.0,
+        "stock_expense_amount": 0.0,
+        "patent_cost_year": data.patent_cost_year,
+        "patent_pvd_period": data.patent_pvd_period,
+        "vat_share_cogs": share(data.vat_share_cogs),
+        "vat_share_rent": share(data.vat_share_rent),
+        "vat_share_other": share(data.vat_share_other),
+    }
+
+
+@dataclass
+class Projection:
+    """Yearly series per regime and metric, shape ``(years,)``.
+
+    Years in which a regime is unavailable (e.g. AUSN once revenue outgrows
+    its limit) carry ``NaN`` metrics and ``False`` in ``available``.
+    ``carryover`` is the VAT credit or stock left at the end of each year
+    (only for the regimes that use it).
+    """
+
+    years: int
+    transition_mode: str
+    regimes: Tuple[str, ...]
+    metrics: Dict[str, Columns] = field(default_factory=dict)
+    available: Columns = field(default_factory=dict)
+    carryover: Columns = field(default_factory=dict)
+    top_results: Optional[np.ndarray] = None
+
+    def column(self, regime_id: str, metric: str) -> np.ndarray:
+        return self.metrics[regime_id][metric]
+
+    def totals(self, regime_id: str) -> Dict[str, float]:
+        """Sums over the years the regime is available."""
+        return {
+            metric: float(np.nansum(values)) for metric, values in self.metrics[regime_id].items() if metric != "burden_percent"
+        }
+
+    def best_regime_ids(self) -> List[Optional[str]]:
+        return [self.regimes[index] if index >= 0 else None for index in self.top_results[:, 0]]
+
+
+def calculate_projection(
+    data: CalcInput,
+    years: int,
+    revenue_growth: Rate = 0.0,
+    cost_growth: Rate = 0.0,
+    payroll_growth: Rate = 0.0,
+) -> Projection:
+    """Project every regime over ``years`` starting from ``data``.
+
+    Growth rates are percents per year, either one rate or one per year after
+    the first. ``cost_growth`` applies to the cost of goods, rent and other
+    expenses given as an amount; payroll follows ``payroll_growth``; the
+    fixed contributions and the patent cost stay as entered.
+    """
+    if not 1 <= years <= MAX_YEARS:
+        raise ValueError(f"Горизонт прогноза должен быть от 1 до {MAX_YEARS} лет")
+
+    columns = projection_columns(data, years, revenue_growth, cost_growth, payroll_growth)
+    kernel = _projection_kernel()
+    values = kernel(columns)
+
+    mode = data.transition_mode
+    if mode == "vat":
+        initial, carry_column, carry_regimes = data.accumulated_vat_credit, "accumulated_vat_credit", CREDIT_REGIMES
+    elif mode == "stock":
+        initial, carry_column, carry_regimes = data.stock_expense_amount, "stock_expense_amount", STOCK_REGIMES
+    else:
+        initial, carry_column, carry_regimes = 0.0, "", ()
+    carry_regimes = carry_regimes if initial > 0 else ()
+
+    regimes = tuple(REGIME_CALCULATORS)
+    projection = Projection(years=years, transition_mode=mode, regimes=regimes)
+    used: Dict[str, np.ndarray] = {}
+    for regime_id in carry_regimes:
+        if mode == "vat":
+            capacity = values[(regime_id, "vat")]
+        else:
+            capacity = values[("stock_capacity", regime_id)]
+        capacity = np.where(values[(regime_id, "available")], capacity, 0.0)
+        spent = np.minimum(initial, np.cumsum(capacity))
+        used[regime_id] = np.diff(spent, prepend=0.0)
+        projection.carryover[regime_id] = initial - spent
+
+    if used:
+        # One call for every (regime, year) that spends part of the carryover;
+        # each block of ``years`` rows is read for its own regime only.
+        stacked = {
+            name: np.tile(value, len(used)) if np.ndim(value) else value for name, value in columns.items()
+        }
+        stacked["transition_mode"] = mode
+        stacked[carry_column] = np.concatenate([used[regime_id] for regime_id in used])
+        carried = _carry_kernel(tuple(used))(stacked)
+        blocks = {regime_id: slice(index * years, (index + 1) * years) for index, regime_id in enumerate(used)}
+
+    for regime_id in regimes:
+        source, rows = (carried, blocks[regime_id]) if regime_id in used else (values, slice(None))
+        mask = np.asarray(source[(regime_id, "available")][rows], dtype=bool)
+        projection.available[regime_id] = mask
+        projection.metrics[regime_id] = {
+            metric: np.where(mask, source[(regime_id, metric)][rows], np.nan) for metric in RESULT_METRICS
+        }
+    projection.top_results = _rank_top_results(regimes, projection.metrics, projection.available)
+    return projection
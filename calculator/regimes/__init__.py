@@ -1 +0,0 @@
-"""Calculator regimes modules."""
@@ -0,0 +1,132 @@
+"""Best-regime grid over two input fields, evaluated in one batch pass."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from .batch import _FLOAT_FIELDS, _OPTIONAL_SHARE_FIELDS, run_calculation_batch
+from .inputs import NUMBER_ERROR, SCHEMA, InputError, check_value
+from .models import CalcInput
+
+AXIS_FIELDS = _FLOAT_FIELDS + _OPTIONAL_SHARE_FIELDS
+# 500 x 500: keeps a single request within a few hundred megabytes.
+MAX_GRID_CELLS = 250_000
+
+
+@dataclass(frozen=True)
+class Axis:
+    field: str
+    start: float
+    stop: float
+    steps: int
+
+    def __post_init__(self) -> None:
+        if self.field not in AXIS_FIELDS:
+            raise InputError(f"Поле {self.field} нельзя использовать как ось")
+        if self.steps < 1:
+            raise InputError("Число шагов по оси должно быть положительным")
+        # The grid lies between the ends, so checking them bounds every cell.
+        for end in (self.start, self.stop):
+            error = check_value(SCHEMA[self.field], end)
+            if error:
+                raise InputError(error.summary, {self.field: error.message})
+
+    @classmethod
+    def from_dict(cls, raw: Mapping[str, Any], default_field: str) -> "Axis":
+        try:
+            return cls(
+                field=str(raw.get("field", default_field)),
+                start=float(raw["start"]),
+                stop=float(raw["stop"]),
+                steps=int(raw["steps"]),
+            )
+        except (KeyError, TypeError, ValueError) as exc:
+            if isinstance(exc, InputError):
+                raise
+            raise InputError(NUMBER_ERROR) from exc
+
+    def values(self) -> np.ndarray:
+        return np.linspace(self.start, self.stop, self.steps)
+
+
+@dataclass
+class SensitivityGrid:
+    """Per-cell winner of the top-5 ranking; matrices are ``(y.steps, x.steps)``.
+
+    ``best`` holds indices into ``regimes`` (``-1`` if no regime applies);
+    ``net_profit``, ``total_burden`` and ``burden_percent`` belong to that
+    regime and are ``NaN`` for such cells.
+    """
+
+    x: Axis
+    y: Axis
+    x_values: np.ndarray
+    y_values: np.ndarray
+    regimes: Tuple[str, ...]
+    best: np.ndarray
+    net_profit: np.ndarray
+    total_burden: np.ndarray
+    burden_percent: np.ndarray
+
+    def best_regime_ids(self) -> List[List[Optional[str]]]:
+        names = np.array(self.regimes + (None,), dtype=object)
+        return names[self.best].tolist()
+
+    def to_dict(self) -> Dict[str, Any]:
+        def matrix(values: np.ndarray) -> List[List[Optional[float]]]:
+            return np.where(np.isnan(values), None, values.round(2)).tolist()
+
+        return {
+            "x": {"field": self.x.field, "values": self.x_values.tolist()},
+            "y": {"field": self.y.field, "values": self.y_values.tolist()},
+            "regimes": list(self.regimes),
+            "best": self.best_regime_ids(),
+            "net_profit": matrix(self.net_profit),
+            "total_burden": matrix(self.total_burden),
+            "burden_percent": matrix(self.burden_percent),
+        }
+
+
+def sensitivity_grid(base: CalcInput, x: Axis, y: Axis) -> SensitivityGrid:
+    """Evaluate every regime on the ``x`` × ``y`` grid around ``base``."""
+    if x.field == y.field:
+        raise InputError("Оси должны относиться к разным полям")
+    if x.steps * y.steps > MAX_GRID_CELLS:
+        raise InputError(f"Сетка больше {MAX_GRID_CELLS} ячеек")
+
+    x_values = x.values()
+    y_values = y.values()
+    shape = (y.steps, x.steps)
+    size = x.steps * y.steps
+    columns: Dict[str, Any] = {
+        item.name: getattr(base, item.name)
+        for item in fields(CalcInput)
+        if item.name not in ("purchases_month_percents", "regime")
+    }
+    columns["revenue"] = np.full(size, base.revenue, dtype=float)
+    columns[x.field] = np.broadcast_to(x_values, shape).ravel()
+    columns[y.field] = np.broadcast_to(y_values[:, None], shape).ravel()
+
+    batch = run_calculation_batch(columns)
+    best = batch.top_results[:, 0].astype(np.int64)
+    found = best >= 0
+    rows = np.arange(size)
+
+    def winner(metric: str) -> np.ndarray:
+        stacked = np.stack([batch.column(regime_id, metric) for regime_id in batch.regimes], axis=1)
+        return np.where(found, stacked[rows, np.maximum(best, 0)], np.nan).reshape(shape)
+
+    return SensitivityGrid(
+        x=x,
+        y=y,
+        x_values=x_values,
+        y_values=y_values,
+        regimes=batch.regimes,
+        best=best.reshape(shape),
+        net_profit=winner("net_profit"),
+        total_burden=winner("total_burden"),
+        burden_percent=winner("burden_percent"),
+    )
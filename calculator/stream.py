@@ -0,0 +1,213 @@
+"""Incremental reading and chunked evaluation of record streams.
+
+``read_records`` parses a binary body of NDJSON lines or one JSON array
+without loading it whole; ``calculate_records`` validates each record with
+the form rules and evaluates the valid ones through the batch engine one
+chunk at a time. Memory stays bounded by the chunk size, whatever the
+number of records.
+"""
+
+from __future__ import annotations
+
+import codecs
+import json
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Tuple, Union
+
+import numpy as np
+
+from .batch import BatchResult, columns_from_inputs, run_calculation_batch
+from .inputs import InputError, parse_calc_input
+from .models import CalcInput
+
+READ_SIZE = 64 * 1024
+# A record that does not fit is an error rather than a reason to buffer the body.
+MAX_RECORD_SIZE = 1024 * 1024
+DEFAULT_CHUNK_SIZE = 256
+# Echoed back so callers can match results to their own keys.
+ID_FIELD = "id"
+STREAM_METRICS = ("revenue", "expenses", "tax", "vat", "insurance", "total_burden", "burden_percent", "net_profit")
+TOP_LIMIT = 5
+
+Record = Union[Dict[str, Any], InputError]
+
+
+def _text_chunks(stream: BinaryIO, read_size: int) -> Iterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    while True:
+        data = stream.read(read_size)
+        if not data:
+            tail = decoder.decode(b"", final=True)
+            if tail:
+                yield tail
+            return
+        yield decoder.decode(data)
+
+
+def _record(value: Any) -> Record:
+    return value if isinstance(value, dict) else InputError("Запись JSON должна быть объектом")
+
+
+def _ndjson(first: str, chunks: Iterator[str]) -> Iterator[Record]:
+    buffer = first
+    while True:
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield from _ndjson_line(line)
+        if len(buffer) > MAX_RECORD_SIZE:
+            yield InputError("Запись JSON слишком велика")
+            return
+        chunk = next(chunks, None)
+        if chunk is None:
+            yield from _ndjson_line(buffer)
+            return
+        buffer += chunk
+
+
+def _ndjson_line(line: str) -> Iterator[Record]:
+    if not line.strip():
+        return
+    try:
+        yield _record(json.loads(line))
+    except json.JSONDecodeError as exc:
+        yield InputError(f"Некорректный JSON: {exc.msg}")
+
+
+def _json_array(first: str, chunks: Iterator[str]) -> Iterator[Record]:
+    decoder = json.JSONDecoder()
+    buffer = first
+    position = buffer.index("[") + 1
+    expect_value = True
+    finished = False
+
+    while True:
+        # Skip separators; stop at the first token that needs decoding.
+        while position < len(buffer):
+            char = buffer[position]
+            if char.isspace():
+                position += 1
+            elif char == "," and not expect_value:
+                position += 1
+                expect_value = True
+            elif char == "]":
+                return
+            else:
+                break
+        if position < len(buffer) and expect_value:
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as exc:
+                if finished:
+                    yield InputError(f"Некорректный JSON: {exc.msg}")
+                    return
+                value, end = None, -1
+            # A number at the very end may continue in the next chunk.
+            if end >= 0 and (end < len(buffer) or finished):
+                yield _record(value)
+                buffer, position, expect_value = buffer[end:], 0, False
+                continue
+        elif position < len(buffer):
+            yield InputError("Некорректный JSON: ожидалась запятая")
+            return
+        if finished:
+            yield InputError("Некорректный JSON: массив не закрыт")
+            return
+        if len(buffer) - position > MAX_RECORD_SIZE:
+            yield InputError("Запись JSON слишком велика")
+            return
+        chunk = next(chunks, None)
+        if chunk is None:
+            finished = True
+        else:
+            buffer = buffer[position:] + chunk
+            position = 0
+
+
+def read_records(stream: BinaryIO, read_size: int = READ_SIZE) -> Iterator[Record]:
+    """Yield the objects of an NDJSON or JSON-array body as they are read.
+
+    A line or element that is not a JSON object yields an ``InputError`` in
+    its place; a malformed array ends the stream after that error, since
+    the following elements cannot be located.
+    """
+    return read_text_records(_text_chunks(stream, read_size))
+
+
+def read_text_records(chunks: Iterable[str]) -> Iterator[Record]:
+    """``read_records`` over already decoded text chunks."""
+    chunks = iter(chunks)
+    first = ""
+    for chunk in chunks:
+        first += chunk
+        if first.strip():
+            break
+    if not first.strip():
+        return
+    if first.lstrip().startswith("["):
+        yield from _json_array(first, chunks)
+    else:
+        yield from _ndjson(first, chunks)
+
+
+def _result_records(batch: BatchResult) -> Iterator[Dict[str, Any]]:
+    # Converted to Python lists per chunk: indexing NumPy arrays row by row
+    # would cost more than the engine itself.
+    names = list(batch.regimes)
+    available = {regime_id: batch.available[regime_id].tolist() for regime_id in names}
+    values = {
+        regime_id: np.stack([batch.column(regime_id, metric) for metric in STREAM_METRICS], axis=1).round(2).tolist()
+        for regime_id in names
+    }
+    top = batch.top_results[:, :TOP_LIMIT].tolist()
+    for position, ranked in enumerate(top):
+        yield {
+            "error": None,
+            "top": [names[index] for index in ranked if index >= 0],
+            "regimes": {
+                regime_id: dict(zip(STREAM_METRICS, values[regime_id][position])) if available[regime_id][position] else None
+                for regime_id in names
+            },
+        }
+
+
+def _flush(pending: List[Tuple[int, Any, Any]]) -> Iterator[Dict[str, Any]]:
+    inputs = [item for _index, _key, item in pending if isinstance(item, CalcInput)]
+    results = _result_records(run_calculation_batch(columns_from_inputs(inputs))) if inputs else iter(())
+    for index, key, item in pending:
+        record: Dict[str, Any] = {"row": index}
+        if key is not None:
+            record[ID_FIELD] = key
+        if isinstance(item, CalcInput):
+            record.update(next(results))
+        else:
+            record["error"] = str(item)
+            if item.fields:
+                record["fields"] = item.fields
+        yield record
+
+
+def calculate_records(records: Iterable[Record], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """One result per record, in input order, computed ``chunk_size`` records at a time.
+
+    A result is ``{"row", "error", "top", "regimes"}`` (plus ``"id"`` when the
+    record has one); invalid records carry only their error message and the
+    per-field ``"fields"`` messages, and
+    ``regimes`` maps unavailable regimes to ``None``. Amounts are rounded to
+    kopecks.
+    """
+    if chunk_size < 1:
+        raise ValueError("Размер пакета должен быть положительным")
+    pending: List[Tuple[int, Any, Any]] = []
+    for index, record in enumerate(records):
+        if isinstance(record, InputError):
+            pending.append((index, None, record))
+        else:
+            try:
+                item: Any = parse_calc_input(record)
+            except InputError as exc:
+                item = exc
+            pending.append((index, record.get(ID_FIELD), item))
+        if len(pending) >= chunk_size:
+            yield from _flush(pending)
+            pending = []
+    if pending:
+        yield from _flush(pending)
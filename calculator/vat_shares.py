@@ -0,0 +1,281 @@
+"""Best regime as a function of the share of VAT-paying suppliers.
+
+The shares of goods, rent and other expenses bought from VAT payers change
+the deductible VAT of OSNO and, through ``vat_purchases_percent``, of USN
+with 22% VAT. ``share_grid`` evaluates a grid over one to three shares in a
+single batch pass and refines every grid edge on which the best regime
+changes, giving points of the boundary surfaces; ``share_thresholds`` and
+``pairwise_thresholds`` solve for the switching shares along one axis.
+
+Refinement is a bisection run on all edges at once, so each of its steps is
+one batch call whatever the number of edges.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field, fields
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .batch import BatchResult, _best_indices, run_calculation_batch
+from .inputs import SHARE_FIELDS, InputError
+from .models import CalcInput
+
+METRIC_TOTAL_BURDEN = "total_burden"
+METRIC_NET_PROFIT = "net_profit"
+
+# Moves the three shares together: one supplier mix for every expense.
+ALL_SHARES = "all"
+SHARE_AXES = SHARE_FIELDS + (ALL_SHARES,)
+
+DEFAULT_STEPS = 21
+# 2**-32 of a grid step: far below any meaningful share.
+BISECTION_STEPS = 32
+MAX_GRID_CELLS = 250_000
+
+
+def _base_columns(data: CalcInput, size: int) -> Dict[str, Any]:
+    columns: Dict[str, Any] = {
+        item.name: getattr(data, item.name)
+        for item in fields(CalcInput)
+        if item.name not in ("purchases_month_percents", "regime")
+    }
+    columns["revenue"] = np.full(size, data.revenue, dtype=float)
+    return columns
+
+
+def _assign(columns: Dict[str, Any], axis: str, shares: np.ndarray) -> None:
+    targets = SHARE_FIELDS if axis == ALL_SHARES else (axis,)
+    for name in targets:
+        columns[name] = shares
+    if "vat_share_cogs" in targets:
+        # USN with VAT deducts by ``vat_purchases_percent``; keep it on the
+        # same supplier mix as the OSNO goods share.
+        columns["vat_purchases_percent"] = shares * 100.0
+
+
+def _evaluate(data: CalcInput, points: Mapping[str, np.ndarray]) -> BatchResult:
+    size = len(next(iter(points.values())))
+    columns = _base_columns(data, size)
+    # ``all`` first, so a separate axis overrides its own share.
+    for axis in sorted(points, key=lambda name: name != ALL_SHARES):
+        _assign(columns, axis, np.asarray(points[axis], dtype=float))
+    return run_calculation_batch(columns)
+
+
+def _check_axes(axes: Sequence[str]) -> None:
+    unknown = [axis for axis in axes if axis not in SHARE_AXES]
+    if unknown:
+        raise InputError(f"Неизвестные доли НДС: {', '.join(unknown)}")
+    if len(set(axes)) != len(axes) or not axes:
+        raise InputError("Оси долей НДС должны быть разными и непустыми")
+    if ALL_SHARES in axes and len(axes) > 1:
+        raise InputError("Ось all нельзя сочетать с отдельными долями")
+
+
+def _check_metric(metric: str) -> None:
+    if metric not in (METRIC_TOTAL_BURDEN, METRIC_NET_PROFIT):
+        raise InputError(f"Неизвестный показатель: {metric}")
+
+
+def _bisect(
+    data: CalcInput,
+    fixed: Mapping[str, np.ndarray],
+    axis: str,
+    lo: np.ndarray,
+    hi: np.ndarray,
+    like_lo: Callable[[BatchResult], np.ndarray],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Narrow every ``[lo, hi]`` around the point where ``like_lo`` turns false."""
+    lo = np.array(lo, dtype=float)
+    hi = np.array(hi, dtype=float)
+    for _ in range(BISECTION_STEPS):
+        middle = (lo + hi) / 2.0
+        same = like_lo(_evaluate(data, {**fixed, axis: middle}))
+        lo = np.where(same, middle, lo)
+        hi = np.where(same, hi, middle)
+    return lo, hi
+
+
+@dataclass
+class BoundarySurface:
+    """Shares at which the best regime switches from ``before`` to ``after``.
+
+    ``points`` has one row per refined grid edge along ``axis`` and one
+    column per grid axis; ``before`` wins at the lower share of ``axis``.
+    """
+
+    axis: str
+    before: Optional[str]
+    after: Optional[str]
+    points: np.ndarray
+
+
+@dataclass
+class ShareGrid:
+    """Best regime over the grid; ``best`` has one dimension per axis, ``-1`` where none applies."""
+
+    axes: Tuple[str, ...]
+    values: np.ndarray
+    metric: str
+    regimes: Tuple[str, ...]
+    best: np.ndarray
+    surfaces: List[BoundarySurface] = field(default_factory=list)
+
+    def best_regime_ids(self) -> List[Any]:
+        names = np.array(self.regimes + (None,), dtype=object)
+        return names[self.best].tolist()
+
+    def surface(self, before: str, after: str) -> List[BoundarySurface]:
+        """Switches between the two regimes in either direction."""
+        pair = {before, after}
+        return [item for item in self.surfaces if {item.before, item.after} == pair]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "axes": list(self.axes),
+            "values": self.values.tolist(),
+            "metric": self.metric,
+            "regimes": list(self.regimes),
+            "best": self.best_regime_ids(),
+            "surfaces": [
+                {
+                    "axis": item.axis,
+                    "before": item.before,
+                    "after": item.after,
+                    "points": item.points.round(6).tolist(),
+                }
+                for item in self.surfaces
+            ],
+        }
+
+
+def share_grid(
+    data: CalcInput,
+    axes: Sequence[str] = SHARE_FIELDS,
+    steps: int = DEFAULT_STEPS,
+    *,
+    metric: str = METRIC_TOTAL_BURDEN,
+) -> ShareGrid:
+    """Sweep ``axes`` over ``[0, 1]`` in ``steps`` points and locate the regime switches.
+
+    Shares that are not on an axis keep their values from ``data``. Every
+    grid edge whose two ends have different winners is bisected along its
+    axis, with the other shares held at the edge's grid values.
+    """
+    axes = tuple(axes)
+    _check_axes(axes)
+    _check_metric(metric)
+    if steps < 2:
+        raise InputError("Число шагов по оси должно быть не меньше 2")
+    if steps ** len(axes) > MAX_GRID_CELLS:
+        raise InputError(f"Сетка больше {MAX_GRID_CELLS} ячеек")
+
+    values = np.linspace(0.0, 1.0, steps)
+    shape = (steps,) * len(axes)
+    mesh = np.meshgrid(*([values] * len(axes)), indexing="ij")
+    batch = _evaluate(data, {axis: grid.ravel() for axis, grid in zip(axes, mesh)})
+    regimes = batch.regimes
+    best = _best_indices(regimes, batch.metrics, batch.available, metric).reshape(shape)
+    grid = ShareGrid(axes=axes, values=values, metric=metric, regimes=regimes, best=best)
+
+    names = regimes + (None,)
+    for position, axis in enumerate(axes):
+        lower = [slice(None)] * len(axes)
+        upper = [slice(None)] * len(axes)
+        lower[position] = slice(None, -1)
+        upper[position] = slice(1, None)
+        left, right = best[tuple(lower)], best[tuple(upper)]
+        edges = np.nonzero(left != right)
+        if not len(edges[0]):
+            continue
+        fixed = {other: values[edges[index]] for index, other in enumerate(axes) if index != position}
+        start = left[edges]
+
+        def like_lo(result: BatchResult, start: np.ndarray = start) -> np.ndarray:
+            return _best_indices(regimes, result.metrics, result.available, metric) == start
+
+        lo, hi = _bisect(data, fixed, axis, values[edges[position]], values[edges[position] + 1], like_lo)
+        ends = _evaluate(data, {**fixed, axis: hi})
+        after = _best_indices(regimes, ends.metrics, ends.available, metric)
+        switch = (lo + hi) / 2.0
+        points = np.stack([switch if index == position else values[edges[index]] for index in range(len(axes))], axis=1)
+        pairs = np.stack([start, after], axis=1)
+        for first, second in sorted({(int(a), int(b)) for a, b in pairs}):
+            rows = (pairs[:, 0] == first) & (pairs[:, 1] == second)
+            grid.surfaces.append(BoundarySurface(axis, names[first], names[second], points[rows]))
+    return grid
+
+
+@dataclass
+class ShareThreshold:
+    """Share along ``axis`` at which ``before`` gives way to ``after`` with rising share."""
+
+    axis: str
+    share: float
+    before: Optional[str]
+    after: Optional[str]
+
+
+def share_thresholds(
+    data: CalcInput,
+    axis: str = ALL_SHARES,
+    *,
+    metric: str = METRIC_TOTAL_BURDEN,
+    steps: int = 101,
+) -> List[ShareThreshold]:
+    """Every switch of the best regime as ``axis`` goes from 0 to 1, in ascending order.
+
+    Switches closer together than ``1 / (steps - 1)`` may merge into one.
+    """
+    grid = share_grid(data, (axis,), steps, metric=metric)
+    found = [
+        ShareThreshold(axis, float(point[0]), surface.before, surface.after)
+        for surface in grid.surfaces
+        for point in surface.points
+    ]
+    return sorted(found, key=lambda item: item.share)
+
+
+def pairwise_thresholds(
+    data: CalcInput,
+    first: str,
+    second: str,
+    axis: str = ALL_SHARES,
+    *,
+    metric: str = METRIC_TOTAL_BURDEN,
+    steps: int = 101,
+) -> List[float]:
+    """Shares along ``axis`` at which ``first`` and ``second`` swap order.
+
+    Unlike ``share_thresholds`` this compares two regimes whether or not
+    either of them is the overall best (e.g. OSNO against USN without VAT).
+    Shares where either regime is unavailable are skipped.
+    """
+    _check_axes((axis,))
+    _check_metric(metric)
+    if steps < 2:
+        raise InputError("Число шагов по оси должно быть не меньше 2")
+
+    def gap(result: BatchResult) -> np.ndarray:
+        try:
+            difference = result.column(first, metric) - result.column(second, metric)
+        except KeyError as exc:
+            raise InputError(f"Неизвестный режим: {exc.args[0]}") from exc
+        return difference if metric == METRIC_TOTAL_BURDEN else -difference
+
+    values = np.linspace(0.0, 1.0, steps)
+    sign = np.sign(gap(_evaluate(data, {axis: values})))
+    # Zero counts as its own sign: a touch at a grid point is a threshold too.
+    edges = np.nonzero((sign[:-1] != sign[1:]) & ~np.isnan(sign[:-1]) & ~np.isnan(sign[1:]))[0]
+    if not len(edges):
+        return []
+    start = sign[edges]
+    lo, hi = _bisect(data, {}, axis, values[edges], values[edges + 1], lambda result: np.sign(gap(result)) == start)
+    found: List[float] = []
+    for value in sorted((lo + hi) / 2.0):
+        # A touch at a grid point closes one edge and opens the next.
+        if not found or value - found[-1] > 1.0 / (steps - 1) / 2**BISECTION_STEPS * 4:
+            found.append(float(value))
+    return found
@@ -0,0 +1,45 @@
+"""gunicorn settings for ``gunicorn wsgi:app``; every value can be overridden from the environment.
+
+The app is loaded and warmed up in the master (``preload_app``), then the
+master's heap is frozen so workers share those pages instead of copying
+them on the first garbage collection. With ``PROMETHEUS_MULTIPROC_DIR`` set,
+``/metrics`` sums the values of all workers (see ``calculator.metrics``).
+"""
+
+import gc
+import os
+
+bind = f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', '5005')}"
+# ``WEB_CONCURRENCY`` is gunicorn's own convention for the worker count.
+workers = int(os.environ.get("WEB_CONCURRENCY") or os.cpu_count() or 1)
+# More than one thread switches the worker class to ``gthread``; streamed
+# batch responses then do not hold a whole process.
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+graceful_timeout = timeout
+preload_app = True
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG") or None
+
+
+def on_starting(server):
+    # Values left by an earlier run would be added to this one's.
+    from calculator.metrics import REGISTRY
+
+    if REGISTRY.store is not None:
+        REGISTRY.store.wipe()
+
+
+def when_ready(server):
+    # Runs in the master after the preloaded app is warm and before the
+    # first fork. Frozen objects are never scanned by the collector, so their
+    # pages stay shared with the workers.
+    gc.collect()
+    gc.freeze()
+    server.log.info("Прогрев завершён, заморожено объектов: %d", gc.get_freeze_count())
+
+
+def child_exit(server, worker):
+    # The worker's counters stay in the totals, its gauges go.
+    from calculator.metrics import mark_process_dead
+
+    mark_process_dead(worker.pid)
@@ -5,11 +5,16 @@ echo "Запуск калькулятора налогов для ИП"
 echo "================================================"
 echo ""
 echo "Приложение будет доступно по адресу:"
-echo "http://localhost:5005"
+echo "http://localhost:${PORT:-5005}"
 echo ""
 echo "Для остановки нажмите Ctrl+C"
 echo ""
 echo "================================================"
 echo ""
 
-python3 app.py
+python3 assets.py
+if [ "$1" = "--dev" ]; then
+    # Отладочный сервер Flask с перезагрузкой шаблонов.
+    exec python3 app.py
+fi
+exec gunicorn wsgi:app
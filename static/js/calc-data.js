@@ -0,0 +1,63 @@
+(function (global) {
+    // Reader for the compact calc-data payload (calculator/calc_data.py):
+    // metrics are columns over `order`, and any missing value means 0.
+    let cached = null;
+    let parsed = false;
+
+    function read() {
+        if (parsed) {
+            return cached;
+        }
+        parsed = true;
+        const el = document.getElementById('calc-data');
+        if (!el) {
+            return cached;
+        }
+        try {
+            const data = JSON.parse(el.textContent || '{}') || {};
+            cached = Array.isArray(data.order) ? data : null;
+        } catch (err) {
+            console.error('Не удалось распарсить calc_data JSON:', err);
+            cached = null;
+        }
+        return cached;
+    }
+
+    function number(source, key) {
+        const value = source ? source[key] : undefined;
+        return typeof value === 'number' && Number.isFinite(value) ? value : 0;
+    }
+
+    function regimeIds(data) {
+        return data ? data.order : [];
+    }
+
+    function regime(data, regimeId) {
+        const index = data ? data.order.indexOf(regimeId) : -1;
+        if (index < 0) {
+            return null;
+        }
+        const values = {};
+        const metrics = data.metrics || {};
+        Object.keys(metrics).forEach((name) => {
+            values[name] = metrics[name][index];
+        });
+        return {
+            id: regimeId,
+            title: (data.titles && data.titles[index]) || regimeId,
+            metric: (name) => number(values, name),
+        };
+    }
+
+    function base(data) {
+        return data ? data.base || {} : null;
+    }
+
+    global.CalcData = {
+        read,
+        number,
+        regimeIds,
+        regime,
+        base,
+    };
+})(window);
@@ -1,44 +1,11 @@
 (function (global) {
-    let calcDataCache = null;
-    let calcDataParsed = false;
+    const CalcData = global.CalcData;
 
     function parseNumber(value) {
         const num = parseFloat(value);
         return Number.isNaN(num) ? 0 : num;
     }
 
-    function numberOrZero(value) {
-        if (typeof value === 'number') {
-            return Number.isFinite(value) ? value : 0;
-        }
-        if (typeof value === 'string' && value.trim() !== '') {
-            const parsed = parseFloat(value);
-            return Number.isNaN(parsed) ? 0 : parsed;
-        }
-        return 0;
-    }
-
-    function getCalcData() {
-        if (calcDataParsed) {
-            return calcDataCache;
-        }
-        calcDataParsed = true;
-        const el = document.getElementById('calc-data');
-        if (!el) {
-            calcDataCache = null;
-            return calcDataCache;
-        }
-
-        try {
-            const raw = el.textContent || '{}';
-            calcDataCache = JSON.parse(raw) || {};
-        } catch (err) {
-            console.error('Не удалось распарсить calc_data JSON:', err);
-            calcDataCache = null;
-        }
-        return calcDataCache;
-    }
-
     function collectBaseDataset(table) {
         const ds = table.dataset;
         return {
@@ -88,56 +55,30 @@
         };
     }
 
-    function readNumber(source, key, fallbackValue, label, shouldWarn) {
-        if (source && Object.prototype.hasOwnProperty.call(source, key)) {
-            return numberOrZero(source[key]);
-        }
-        if (shouldWarn) {
-            console.warn(`[calc] Поле ${label} отсутствует в calc_data, используется значение из data-* атрибутов.`);
-        }
-        return fallbackValue;
-    }
-
     function buildBaseComponents(table, calcData) {
-        const fallback = collectBaseDataset(table);
-        const baseJson = calcData && calcData.base;
-        if (!baseJson || typeof baseJson !== 'object') {
-            return fallback;
+        const baseJson = CalcData.base(calcData);
+        if (!baseJson) {
+            return collectBaseDataset(table);
         }
-        const warn = true;
-
-        const patentCostYear = readNumber(baseJson, 'patent_cost_year', fallback.patentCostYear, 'base.patent_cost_year', warn);
+        const value = (key) => CalcData.number(baseJson, key);
+        const patentCostYear = value('patent_cost_year');
 
         return {
-            costOfGoods: readNumber(baseJson, 'cost_of_goods_gross', fallback.costOfGoods, 'base.cost_of_goods', warn),
-            rent: readNumber(baseJson, 'rent', fallback.rent, 'base.rent', warn),
-            otherExpenses: readNumber(baseJson, 'other_expenses', fallback.otherExpenses, 'base.other_expenses', warn),
-            annualFot: readNumber(baseJson, 'fot', fallback.annualFot, 'base.fot', warn),
-            insuranceStandard: readNumber(baseJson, 'insurance_standard', fallback.insuranceStandard, 'base.insurance_standard', warn),
-            fixedContrib: readNumber(baseJson, 'fixed_contrib', fallback.fixedContrib, 'base.fixed_contrib', warn),
+            costOfGoods: value('cost_of_goods_gross'),
+            rent: value('rent'),
+            otherExpenses: value('other_expenses'),
+            annualFot: value('fot'),
+            insuranceStandard: value('insurance_standard'),
+            fixedContrib: value('fixed_contrib'),
             patentCostYear,
             patent_cost_year: patentCostYear,
-            vatPurchasesPercent: readNumber(
-                baseJson,
-                'vat_purchases_percent',
-                fallback.vatPurchasesPercent,
-                'base.vat_purchases_percent',
-                warn,
-            ),
-            vatShareCogs: readNumber(baseJson, 'vat_share_cogs', fallback.vatShareCogs, 'base.vat_share_cogs', warn),
-            vatShareRent: readNumber(baseJson, 'vat_share_rent', fallback.vatShareRent, 'base.vat_share_rent', warn),
-            vatShareOther: readNumber(baseJson, 'vat_share_other', fallback.vatShareOther, 'base.vat_share_other', warn),
-            accumulatedVatCredit: readNumber(
-                baseJson,
-                'accumulated_vat_credit',
-                fallback.accumulatedVatCredit,
-                'base.accumulated_vat_credit',
-                warn,
-            ),
-            stockExtra: readNumber(baseJson, 'stock_extra', fallback.stockExtra, 'base.stock_extra', warn),
-            transitionMode: typeof baseJson.transition_mode === 'string'
-                ? baseJson.transition_mode
-                : (fallback.transitionMode || 'none'),
+            vatPurchasesPercent: value('vat_purchases_percent'),
+            vatShareCogs: value('vat_share_cogs'),
+            vatShareRent: value('vat_share_rent'),
+            vatShareOther: value('vat_share_other'),
+            accumulatedVatCredit: value('accumulated_vat_credit'),
+            stockExtra: value('stock_extra'),
+            transitionMode: typeof baseJson.transition_mode === 'string' ? baseJson.transition_mode : 'none',
         };
     }
 
@@ -208,232 +149,81 @@
         };
     }
 
-    function jsonToRegime(jsonRegime, fallback, regimeId) {
-        const summaryJson = jsonRegime.summary || {};
-        const taxesJson = jsonRegime.taxes || {};
-        const insuranceJson = jsonRegime.insurance || {};
-        const detailsJson = jsonRegime.details || {};
-        const burdenJson = jsonRegime.burden || {};
-        const warn = true;
-        const fallbackNetProfitAccounting = (fallback.incomeNoVat || 0) - (fallback.expensesNoVat || 0) - (fallback.tax || 0);
-        const fallbackNetProfitCash = fallback.netProfit !== undefined ? fallback.netProfit : fallbackNetProfitAccounting;
+    function jsonToRegime(entry, baseJson) {
+        const m = entry.metric;
 
         const summary = {
-            revenue: readNumber(summaryJson, 'revenue', fallback.revenue, `regime[${regimeId}].summary.revenue`, warn),
-            expenses: readNumber(summaryJson, 'expenses', fallback.expenses, `regime[${regimeId}].summary.expenses`, warn),
-            tax: readNumber(summaryJson, 'tax', fallback.tax, `regime[${regimeId}].summary.tax`, warn),
-            vat: readNumber(summaryJson, 'vat', fallback.vat, `regime[${regimeId}].summary.vat`, warn),
-            insurance: readNumber(summaryJson, 'insurance', fallback.insurance, `regime[${regimeId}].summary.insurance`, warn),
-            totalBurden: readNumber(summaryJson, 'total_burden', fallback.totalBurden, `regime[${regimeId}].summary.total_burden`, warn),
-            burdenPercent: readNumber(summaryJson, 'burden_percent', fallback.burdenPercent, `regime[${regimeId}].summary.burden_percent`, warn),
-            netProfit: readNumber(summaryJson, 'net_profit', fallback.netProfit, `regime[${regimeId}].summary.net_profit`, warn),
+            revenue: m('revenue'),
+            expenses: m('expenses'),
+            tax: m('tax'),
+            vat: m('vat'),
+            insurance: m('insurance'),
+            totalBurden: m('total_burden'),
+            burdenPercent: m('burden_percent'),
+            netProfit: m('net_profit'),
         };
 
         const taxes = {
-            usnTax: readNumber(taxesJson, 'usn_tax', fallback.tax, `regime[${regimeId}].taxes.usn_tax`, warn),
-            usnTaxBeforeReduction: readNumber(
-                taxesJson,
-                'usn_tax_before_reduction',
-                fallback.taxInitial,
-                `regime[${regimeId}].taxes.usn_tax_before_reduction`,
-                warn,
-            ),
-            usnReduction: readNumber(
-                taxesJson,
-                'usn_reduction',
-                fallback.taxReduction,
-                `regime[${regimeId}].taxes.usn_reduction`,
-                warn,
-            ),
-            usnReductionLimit: readNumber(
-                taxesJson,
-                'usn_reduction_limit',
-                fallback.taxReductionLimit,
-                `regime[${regimeId}].taxes.usn_reduction_limit`,
-                warn,
-            ),
-            vatToPay: readNumber(taxesJson, 'vat_to_pay', fallback.vat, `regime[${regimeId}].taxes.vat_to_pay`, warn),
-            vatCharged: readNumber(taxesJson, 'vat_charged', fallback.vat, `regime[${regimeId}].taxes.vat_charged`, warn),
-            vatDeductible: readNumber(
-                taxesJson,
-                'vat_deductible',
-                0,
-                `regime[${regimeId}].taxes.vat_deductible`,
-                warn,
-            ),
-            vatExtraCredit: readNumber(
-                taxesJson,
-                'vat_extra_credit',
-                0,
-                `regime[${regimeId}].taxes.vat_extra_credit`,
-                warn,
-            ),
+            usnTax: summary.tax,
+            usnTaxBeforeReduction: m('tax_initial'),
+            usnReduction: m('tax_reduction'),
+            usnReductionLimit: m('tax_reduction_limit'),
+            vatToPay: summary.vat,
+            vatCharged: m('vat_charged'),
+            vatDeductible: m('vat_deductible'),
+            vatExtraCredit: m('vat_extra_credit'),
         };
 
         const insurance = {
             insuranceTotal: summary.insurance,
-            insuranceStandard: readNumber(
-                insuranceJson,
-                'insurance_standard',
-                0,
-                `regime[${regimeId}].insurance.insurance_standard`,
-                warn,
-            ),
-            ownerExtra: readNumber(insuranceJson, 'owner_extra', fallback.ownerExtra, `regime[${regimeId}].insurance.owner_extra`, warn),
-            ownerExtraBase: readNumber(
-                insuranceJson,
-                'owner_extra_base',
-                fallback.ownerExtraBase,
-                `regime[${regimeId}].insurance.owner_extra_base`,
-                warn,
-            ),
-            fixedContrib: readNumber(
-                insuranceJson,
-                'fixed_contrib',
-                fallback.fixedContrib,
-                `regime[${regimeId}].insurance.fixed_contrib`,
-                warn,
-            ),
+            insuranceStandard: CalcData.number(baseJson, 'insurance_standard'),
+            ownerExtra: m('owner_extra'),
+            ownerExtraBase: m('owner_extra_base'),
+            fixedContrib: m('fixed_contrib'),
         };
 
         const details = {
-            ownerExtra: readNumber(detailsJson, 'owner_extra', fallback.ownerExtra, `regime[${regimeId}].details.owner_extra`, warn),
-            ownerExtraBase: readNumber(
-                detailsJson,
-                'owner_extra_base',
-                fallback.ownerExtraBase,
-                `regime[${regimeId}].details.owner_extra_base`,
-                warn,
-            ),
-            usnRegularTax: readNumber(
-                detailsJson,
-                'usn_regular_tax',
-                fallback.usnRegularTax,
-                `regime[${regimeId}].details.usn_regular_tax`,
-                warn,
-            ),
-            usnMinTax: readNumber(detailsJson, 'usn_min_tax', fallback.usnMinTax, `regime[${regimeId}].details.usn_min_tax`, warn),
-            taxInitial: readNumber(detailsJson, 'tax_initial', fallback.taxInitial, `regime[${regimeId}].details.tax_initial`, warn),
-            taxReduction: readNumber(
-                detailsJson,
-                'tax_reduction',
-                fallback.taxReduction,
-                `regime[${regimeId}].details.tax_reduction`,
-                warn,
-            ),
-            taxReductionLimit: readNumber(
-                detailsJson,
-                'tax_reduction_limit',
-                fallback.taxReductionLimit,
-                `regime[${regimeId}].details.tax_reduction_limit`,
-                warn,
-            ),
-            taxReductionBase: readNumber(
-                detailsJson,
-                'tax_reduction_base',
-                0,
-                `regime[${regimeId}].details.tax_reduction_base`,
-                warn,
-            ),
-            fixedContrib: readNumber(detailsJson, 'fixed_contrib', fallback.fixedContrib, `regime[${regimeId}].details.fixed_contrib`, warn),
-            fixedContribReduction: readNumber(
-                detailsJson,
-                'fixed_contrib_reduction',
-                fallback.fixedContribReduction,
-                `regime[${regimeId}].details.fixed_contrib_reduction`,
-                warn,
-            ),
-            ndflBase: readNumber(detailsJson, 'ndfl_base', fallback.ndflBase, `regime[${regimeId}].details.ndfl_base`, warn),
-            ndflTax: readNumber(detailsJson, 'ndfl_tax', fallback.ndflTax, `regime[${regimeId}].details.ndfl_tax`, warn),
-            incomeWithoutVat: readNumber(
-                detailsJson,
-                'income_without_vat',
-                fallback.incomeNoVat,
-                `regime[${regimeId}].details.income_without_vat`,
-                warn,
-            ),
-            expensesWithoutVat: readNumber(
-                detailsJson,
-                'expenses_without_vat',
-                fallback.expensesNoVat,
-                `regime[${regimeId}].details.expenses_without_vat`,
-                warn,
-            ),
-            ausnTaxBase: readNumber(detailsJson, 'ausn_tax_base', 0, `regime[${regimeId}].details.ausn_tax_base`, warn),
-            vatCharged: readNumber(detailsJson, 'vat_charged', fallback.vat, `regime[${regimeId}].details.vat_charged`, warn),
-            vatDeductible: readNumber(detailsJson, 'vat_deductible', 0, `regime[${regimeId}].details.vat_deductible`, warn),
-            vatExtraCredit: readNumber(detailsJson, 'vat_extra_credit', 0, `regime[${regimeId}].details.vat_extra_credit`, warn),
-            vatPayable: readNumber(detailsJson, 'vat_payable', 0, `regime[${regimeId}].details.vat_payable`, warn),
-            vatRefund: readNumber(detailsJson, 'vat_refund', 0, `regime[${regimeId}].details.vat_refund`, warn),
-            cogsNoVat: readNumber(detailsJson, 'cogs_no_vat', 0, `regime[${regimeId}].details.cogs_no_vat`, warn),
-            rentNoVat: readNumber(detailsJson, 'rent_no_vat', 0, `regime[${regimeId}].details.rent_no_vat`, warn),
-            otherNoVat: readNumber(detailsJson, 'other_no_vat', 0, `regime[${regimeId}].details.other_no_vat`, warn),
-            vatDeductibleCogs: readNumber(
-                detailsJson,
-                'vat_deductible_cogs',
-                0,
-                `regime[${regimeId}].details.vat_deductible_cogs`,
-                warn,
-            ),
-            vatDeductibleRent: readNumber(
-                detailsJson,
-                'vat_deductible_rent',
-                0,
-                `regime[${regimeId}].details.vat_deductible_rent`,
-                warn,
-            ),
-            vatDeductibleOther: readNumber(
-                detailsJson,
-                'vat_deductible_other',
-                0,
-                `regime[${regimeId}].details.vat_deductible_other`,
-                warn,
-            ),
-            netProfitAccounting: readNumber(
-                detailsJson,
-                'net_profit_accounting',
-                fallbackNetProfitAccounting,
-                `regime[${regimeId}].details.net_profit_accounting`,
-                warn,
-            ),
-            netProfitCash: readNumber(
-                detailsJson,
-                'net_profit_cash',
-                fallbackNetProfitCash,
-                `regime[${regimeId}].details.net_profit_cash`,
-                warn,
-            ),
-            totalPayments: readNumber(
-                detailsJson,
-                'total_payments',
-                fallback.totalBurden,
-                `regime[${regimeId}].details.total_payments`,
-                warn,
-            ),
+            ownerExtra: m('owner_extra'),
+            ownerExtraBase: m('owner_extra_base'),
+            usnRegularTax: m('usn_regular_tax'),
+            usnMinTax: m('usn_min_tax'),
+            taxInitial: m('tax_initial'),
+            taxReduction: m('tax_reduction'),
+            taxReductionLimit: m('tax_reduction_limit'),
+            taxReductionBase: m('tax_reduction_base'),
+            fixedContrib: m('fixed_contrib'),
+            fixedContribReduction: m('fixed_contrib_reduction'),
+            ndflBase: m('ndfl_base'),
+            ndflTax: m('ndfl_tax'),
+            incomeWithoutVat: m('income_without_vat'),
+            expensesWithoutVat: m('expenses_without_vat'),
+            ausnTaxBase: m('ausn_tax_base'),
+            vatCharged: m('vat_charged'),
+            vatDeductible: m('vat_deductible'),
+            vatExtraCredit: m('vat_extra_credit'),
+            vatPayable: m('vat_payable'),
+            vatRefund: m('vat_refund'),
+            cogsNoVat: m('cogs_no_vat'),
+            rentNoVat: m('rent_no_vat'),
+            otherNoVat: m('other_no_vat'),
+            vatDeductibleCogs: m('vat_deductible_cogs'),
+            vatDeductibleRent: m('vat_deductible_rent'),
+            vatDeductibleOther: m('vat_deductible_other'),
+            netProfitAccounting: m('net_profit_accounting'),
+            netProfitCash: m('net_profit_cash'),
+            totalPayments: m('total_payments'),
         };
 
         return {
-            id: jsonRegime.id || regimeId || fallback.regimeId || fallback.regime || '',
-            title: jsonRegime.title || fallback.regime || '',
+            id: entry.id,
+            title: entry.title,
             summary,
             taxes,
             insurance,
             profit: { netProfit: summary.netProfit },
             burden: {
-                totalTaxBurden: readNumber(
-                    burdenJson,
-                    'total_tax_burden',
-                    fallback.totalBurden,
-                    `regime[${regimeId}].burden.total_tax_burden`,
-                    warn,
-                ),
-                burdenPercent: readNumber(
-                    burdenJson,
-                    'burden_percent',
-                    fallback.burdenPercent,
-                    `regime[${regimeId}].burden.burden_percent`,
-                    warn,
-                ),
+                totalTaxBurden: summary.totalBurden,
+                burdenPercent: summary.burdenPercent,
             },
             details,
         };
@@ -443,7 +233,7 @@
         const fallback = collectRowDataset(row);
         const regimeId = row.dataset.regimeId || fallback.regimeId;
 
-        if (!calcData || !calcData.regimes) {
+        if (!calcData) {
             return datasetToRegime(fallback);
         }
         if (!regimeId) {
@@ -451,13 +241,13 @@
             return datasetToRegime(fallback);
         }
 
-        const jsonRegime = calcData.regimes[regimeId];
-        if (!jsonRegime) {
+        const entry = CalcData.regime(calcData, regimeId);
+        if (!entry) {
             console.error(`Режим с идентификатором ${regimeId} отсутствует в calc_data. Используется fallback из data-атрибутов.`);
             return datasetToRegime(fallback);
         }
 
-        return jsonToRegime(jsonRegime, fallback, regimeId);
+        return jsonToRegime(entry, CalcData.base(calcData));
     }
 
     function toggleDetails(row, baseComponents, calcData, columnCount) {
@@ -507,7 +297,7 @@
             return;
         }
 
-        const calcData = getCalcData();
+        const calcData = CalcData.read();
         const baseComponents = buildBaseComponents(table, calcData);
         const columnCount = table.querySelectorAll('thead th').length || 1;
 
@@ -3,70 +3,19 @@
     const SORT_PROFIT = 'profit';
     const STORAGE_KEY = 'topResultsSort';
     const EPSILON = 1e-9;
-    let cachedCalcData = null;
-
-    function parseNumber(value) {
-        if (typeof value === 'number') {
-            return Number.isFinite(value) ? value : NaN;
-        }
-        if (typeof value === 'string') {
-            const trimmed = value.trim();
-            if (trimmed === '') {
-                return NaN;
-            }
-            const parsed = parseFloat(trimmed.replace(',', '.'));
-            return Number.isNaN(parsed) ? NaN : parsed;
-        }
-        return NaN;
-    }
-
-    function toNumber(value) {
-        const num = parseNumber(value);
-        return Number.isFinite(num) ? num : NaN;
-    }
-
-    function getCalcData() {
-        if (cachedCalcData !== null) {
-            return cachedCalcData;
-        }
-        const script = document.getElementById('calc-data');
-        if (!script) {
-            cachedCalcData = null;
-            return cachedCalcData;
-        }
-        try {
-            cachedCalcData = JSON.parse(script.textContent || '{}') || {};
-        } catch (err) {
-            console.error('Не удалось распарсить calc_data JSON:', err);
-            cachedCalcData = null;
-        }
-        return cachedCalcData;
-    }
 
     function collectRegimes(calcData) {
-        if (!calcData || typeof calcData !== 'object') {
-            return [];
-        }
-        const regimes = calcData.regimes || {};
-        const items = [];
-        Object.keys(regimes).forEach((regimeId) => {
-            const regime = regimes[regimeId] || {};
-            const summary = regime.summary || {};
-            const burden = toNumber(summary.burden_percent ?? (regime.burden ? regime.burden.burden_percent : undefined));
-            const totalBurden = toNumber(summary.total_burden ?? (regime.burden ? regime.burden.total_tax_burden : undefined));
-            const netProfit = toNumber(summary.net_profit);
-            if (!Number.isFinite(burden) || !Number.isFinite(netProfit)) {
-                return;
-            }
-            items.push({
+        const CalcData = global.CalcData;
+        return CalcData.regimeIds(calcData).map((regimeId) => {
+            const regime = CalcData.regime(calcData, regimeId);
+            return {
                 id: regimeId,
-                title: regime.title || regime.id || regimeId,
-                burdenPercent: burden,
-                totalBurden: Number.isFinite(totalBurden) ? totalBurden : 0,
-                netProfit,
-            });
+                title: regime.title,
+                burdenPercent: regime.metric('burden_percent'),
+                totalBurden: regime.metric('total_burden'),
+                netProfit: regime.metric('net_profit'),
+            };
         });
-        return items;
     }
 
     function formatMoney(value) {
@@ -185,7 +134,7 @@
         if (!container) {
             return;
         }
-        const calcData = getCalcData();
+        const calcData = global.CalcData.read();
         const regimes = collectRegimes(calcData);
         if (!regimes.length) {
             return;
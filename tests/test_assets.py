@@ -0,0 +1,106 @@
+from pathlib import Path
+import gzip
+import json
+import shutil
+import sys
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import assets
+
+
+@pytest.fixture
+def built(tmp_path):
+    dist = tmp_path / "dist"
+    dist.mkdir()
+    (dist / "app.000000000000.js").write_text("stale")
+    return dist, assets.build(dist_dir=dist)
+
+
+def test_build_writes_hashed_bundles_and_manifest(built):
+    dist, manifest = built
+
+    assert set(manifest) == set(assets.BUNDLES)
+    assert json.loads((dist / assets.MANIFEST_NAME).read_text()) == manifest
+    assert not (dist / "app.000000000000.js").exists()
+
+    script = (dist / manifest["app.js"]).read_bytes()
+    assert manifest["app.js"] == assets.hashed_name("app.js", script)
+    assert gzip.decompress((dist / f"{manifest['app.js']}.gz").read_bytes()) == script
+    # Load order is kept: the explanation helpers come before the modules that use them.
+    text = script.decode("utf-8")
+    for first, second in zip(assets.BUNDLES["app.js"], assets.BUNDLES["app.js"][1:]):
+        first_text = (assets.STATIC_DIR / first).read_text(encoding="utf-8").rstrip()
+        second_text = (assets.STATIC_DIR / second).read_text(encoding="utf-8").rstrip()
+        assert text.index(first_text) < text.index(second_text)
+
+    # Unchanged sources give the same names, so cached copies stay valid across deploys.
+    assert assets.build(dist_dir=dist) == manifest
+
+
+def test_build_keeps_the_previous_generation(tmp_path):
+    static = tmp_path / "static"
+    shutil.copytree(assets.STATIC_DIR, static, ignore=shutil.ignore_patterns("dist"))
+    dist = tmp_path / "dist"
+    css = static / "css" / "main.css"
+
+    first = assets.build(static, dist)
+    css.write_text(css.read_text(encoding="utf-8") + "\n.one { color: red; }\n", encoding="utf-8")
+    second = assets.build(static, dist)
+    css.write_text(css.read_text(encoding="utf-8") + "\n.two { color: blue; }\n", encoding="utf-8")
+    third = assets.build(static, dist)
+
+    assert len({first["main.css"], second["main.css"], third["main.css"]}) == 3
+    assert not (dist / first["main.css"]).exists()
+    assert not (dist / f"{first['main.css']}.gz").exists()
+    assert (dist / second["main.css"]).is_file() and (dist / f"{second['main.css']}.gz").is_file()
+    assert (dist / third["main.css"]).is_file()
+    assert (dist / third["app.js"]).is_file()
+
+
+def test_minify_css_keeps_rules():
+    css = "/* note */\n.a,  .b > td {\n    color: #fff;\n    margin: 0 auto;\n}\n@media (max-width: 768px) { th, td { padding: 10px 8px; } }"
+
+    assert assets.minify_css(css) == ".a,.b>td{color:#fff;margin:0 auto}@media (max-width:768px){th,td{padding:10px 8px}}\n"
+
+
+def test_built_assets_are_linked_and_served_immutable(built, monkeypatch):
+    pytest.importorskip("flask")
+    import app as application
+
+    dist, manifest = built
+    monkeypatch.setattr(application, "ASSET_DIR", dist)
+    monkeypatch.setattr(application, "asset_manifest", manifest)
+    client = application.app.test_client()
+
+    with application.app.test_request_context():
+        assert application.asset_urls("app.js") == [f"/assets/{manifest['app.js']}"]
+
+    url = f"/assets/{manifest['app.js']}"
+    response = client.get(url, headers={"Accept-Encoding": "gzip, deflate"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.mimetype == "text/javascript"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.headers["Cache-Control"] == f"public, max-age={application.ASSET_MAX_AGE}, immutable"
+    assert gzip.decompress(response.data) == (dist / manifest["app.js"]).read_bytes()
+
+    response = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in response.headers
+    assert response.data == (dist / manifest["app.js"]).read_bytes()
+
+    assert client.get("/assets/manifest.json").status_code == 404
+    assert client.get("/assets/app.000000000000.js").status_code == 404
+    assert client.get("/assets/../assets.py").status_code == 404
+
+    # A bundle of an earlier build is still served after the manifest moved on.
+    previous = dist / "app.0123456789ab.js"
+    previous.write_text("old bundle")
+    response = client.get(f"/assets/{previous.name}", headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert response.data == b"old bundle"
+    assert response.headers["Cache-Control"] == f"public, max-age={application.ASSET_MAX_AGE}, immutable"
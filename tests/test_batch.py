@@ -0,0 +1,141 @@
+from pathlib import Path
+import random
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from calculator import CalcInput, run_calculation
+from calculator.batch import RESULT_METRICS, columns_from_inputs, run_calculation_batch
+from calculator.constants import DEFAULT_FIXED_CONTRIB, DEFAULT_PATENT_COST
+from calculator.engine import REGIME_CALCULATORS
+from calculator.inputs import InputError
+
+
+def build_input(**overrides):
+    data = {
+        "revenue": 10_000_000,
+        "cost_percent": 40,
+        "vat_purchases_percent": 70,
+        "rent": 500_000,
+        "fixed_contrib": DEFAULT_FIXED_CONTRIB,
+        "employees": 3,
+        "salary": 50_000,
+        "fot_mode": "staff",
+        "fot_annual": 0.0,
+        "other_mode": "percent",
+        "other_percent": 10,
+        "other_amount": 0.0,
+        "transition_mode": "none",
+        "accumulated_vat_credit": 0.0,
+        "stock_expense_amount": 0.0,
+        "patent_cost_year": DEFAULT_PATENT_COST,
+        "purchases_month_percents": [100.0] * 12,
+    }
+    data.update(overrides)
+    return CalcInput(**data)
+
+
+def random_inputs(count, seed=7):
+    rng = random.Random(seed)
+    inputs = []
+    for _ in range(count):
+        transition_mode = rng.choice(["none", "vat", "stock"])
+        inputs.append(
+            build_input(
+                revenue=rng.choice([250_000, 900_000, 3_000_000, 12_000_000, 58_000_000, 75_000_000, 400_000_000]),
+                cost_percent=rng.uniform(0, 95),
+                vat_purchases_percent=rng.uniform(0, 100),
+                rent=rng.choice([0.0, 120_000, 1_500_000]),
+                employees=rng.choice([0, 2, 5, 9]),
+                salary=rng.choice([0.0, 40_000, 120_000]),
+                fot_mode=rng.choice(["staff", "annual"]),
+                fot_annual=rng.choice([0.0, 2_000_000]),
+                other_mode=rng.choice(["percent", "amount"]),
+                other_percent=rng.uniform(0, 20),
+                other_amount=rng.choice([0.0, 300_000]),
+                transition_mode=transition_mode,
+                accumulated_vat_credit=rng.choice([0.0, 800_000]),
+                stock_expense_amount=rng.choice([0.0, 1_200_000]),
+                patent_cost_year=rng.choice([0.0, 60_000, 400_000]),
+                patent_pvd_period=rng.choice([0.0, 2_500_000]),
+                vat_share_cogs=rng.choice([None, 0.5, 80]),
+                vat_share_rent=rng.choice([None, 0.0, 0.3]),
+                vat_share_other=rng.choice([None, 1.0, 45]),
+            )
+        )
+    return inputs
+
+
+def test_batch_matches_scalar_path():
+    inputs = random_inputs(300)
+    batch = run_calculation_batch(columns_from_inputs(inputs))
+
+    assert batch.regimes == tuple(REGIME_CALCULATORS)
+    assert len(batch) == len(inputs)
+
+    for row, calc_input in enumerate(inputs):
+        summary = run_calculation(calc_input)
+        payloads = {payload["regime_id"]: payload for _title, payload, ok in summary.results if ok and payload}
+        for regime_id in batch.regimes:
+            available = bool(batch.available[regime_id][row])
+            assert available == (regime_id in payloads)
+            if not available:
+                assert np.isnan(batch.column(regime_id, "net_profit")[row])
+                continue
+            for metric in RESULT_METRICS:
+                expected = payloads[regime_id][metric]
+                assert batch.column(regime_id, metric)[row] == pytest.approx(expected, rel=1e-9, abs=1e-6)
+
+        expected_top = [payload["regime_id"] for _name, payload in summary.top_results]
+        assert batch.top_regime_ids(row) == expected_top
+
+
+def test_batch_broadcasts_scalars_and_accepts_missing_shares():
+    columns = columns_from_inputs([build_input(revenue=value) for value in (1_000_000, 2_000_000)])
+    columns["rent"] = 250_000.0
+    for name in ("vat_share_cogs", "vat_share_rent", "vat_share_other", "patent_pvd_period"):
+        columns.pop(name)
+
+    batch = run_calculation_batch(columns)
+    scalar = run_calculation(build_input(revenue=2_000_000, rent=250_000))
+    patent = next(payload for _title, payload, ok in scalar.results if ok and payload["regime_id"] == "patent")
+    assert batch.column("patent", "net_profit")[1] == pytest.approx(patent["net_profit"])
+
+
+def test_batch_broadcasts_scalar_revenue():
+    columns = columns_from_inputs([build_input(rent=value) for value in (0.0, 250_000.0, 500_000.0)])
+    columns["revenue"] = 2_000_000.0
+
+    batch = run_calculation_batch(columns)
+
+    assert len(batch) == 3
+    scalar = run_calculation(build_input(revenue=2_000_000, rent=250_000))
+    patent = next(payload for _title, payload, ok in scalar.results if ok and payload["regime_id"] == "patent")
+    assert batch.column("patent", "net_profit")[1] == pytest.approx(patent["net_profit"])
+
+    single = {name: values[0] for name, values in columns_from_inputs([build_input()]).items()}
+    assert len(run_calculation_batch(single)) == 1
+
+
+def test_batch_rejects_columns_of_different_length():
+    columns = columns_from_inputs([build_input(), build_input()])
+    columns["rent"] = np.array([0.0, 1.0, 2.0])
+
+    with pytest.raises(InputError, match="Колонки разной длины"):
+        run_calculation_batch(columns)
+
+
+def test_batch_rejects_unknown_and_missing_fields():
+    columns = columns_from_inputs([build_input()])
+    with pytest.raises(ValueError):
+        run_calculation_batch({**columns, "revenue_gross": columns["revenue"]})
+
+    columns.pop("fot_mode")
+    with pytest.raises(ValueError):
+        run_calculation_batch(columns)
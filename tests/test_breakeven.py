@@ -0,0 +1,121 @@
+from dataclasses import replace
+from pathlib import Path
+import random
+import sys
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from calculator import CalcInput, run_calculation
+from calculator.breakeven import METRIC_NET_PROFIT, METRIC_TOTAL_BURDEN, find_breakevens
+from calculator.constants import AUSN_REVENUE_LIMIT, DEFAULT_FIXED_CONTRIB, DEFAULT_PATENT_COST
+
+
+def make_input(**overrides) -> CalcInput:
+    data = {
+        "revenue": 6_000_000,
+        "cost_percent": 35,
+        "vat_purchases_percent": 60,
+        "rent": 400_000,
+        "fixed_contrib": DEFAULT_FIXED_CONTRIB,
+        "employees": 2,
+        "salary": 45_000,
+        "fot_mode": "staff",
+        "fot_annual": 0.0,
+        "other_mode": "percent",
+        "other_percent": 8,
+        "other_amount": 0.0,
+        "transition_mode": "none",
+        "accumulated_vat_credit": 0.0,
+        "stock_expense_amount": 0.0,
+        "patent_cost_year": DEFAULT_PATENT_COST,
+        "purchases_month_percents": [100.0] * 12,
+    }
+    data.update(overrides)
+    return CalcInput(**data)
+
+
+def random_inputs(count, seed):
+    rng = random.Random(seed)
+    return [
+        make_input(
+            cost_percent=rng.uniform(0, 90),
+            vat_purchases_percent=rng.uniform(0, 100),
+            rent=rng.choice([0.0, 300_000, 2_000_000]),
+            employees=rng.choice([0, 3, 8]),
+            salary=rng.choice([0.0, 60_000]),
+            other_mode=rng.choice(["percent", "amount"]),
+            other_percent=rng.uniform(0, 15),
+            other_amount=rng.choice([0.0, 500_000]),
+            transition_mode=rng.choice(["none", "vat", "stock"]),
+            accumulated_vat_credit=rng.choice([0.0, 1_500_000]),
+            stock_expense_amount=rng.choice([0.0, 900_000]),
+            patent_cost_year=rng.choice([30_000, 250_000, 1_200_000]),
+        )
+        for _ in range(count)
+    ]
+
+
+def scalar_leader(calc_input, revenue, metric):
+    summary = run_calculation(replace(calc_input, revenue=revenue), patent_targets=False)
+    if metric == METRIC_TOTAL_BURDEN:
+        return summary.top_results[0][1]
+    available = [payload for _title, payload, ok in summary.results if ok and payload]
+    return max(available, key=lambda payload: payload["net_profit"])
+
+
+@pytest.mark.parametrize("metric", [METRIC_TOTAL_BURDEN, METRIC_NET_PROFIT])
+@pytest.mark.parametrize("calc_input", random_inputs(8, seed=4))
+def test_intervals_match_scalar_ranking(calc_input, metric):
+    lo, hi = 300_000, 120_000_000
+    breakevens = find_breakevens(calc_input, lo, hi, metric=metric)
+    assert breakevens.intervals[0].lo == lo and breakevens.intervals[-1].hi == hi
+
+    for step in range(1, 120):
+        revenue = lo + (hi - lo) * step / 120
+        expected = scalar_leader(calc_input, revenue, metric)
+        leader = breakevens.best_regime(revenue)
+        if leader != expected["regime_id"]:
+            # Only an exact tie may be resolved differently.
+            value = getattr(breakevens.curves[leader], metric)(revenue)
+            assert value == pytest.approx(expected[metric], abs=1e-3)
+
+
+def test_crossovers_are_exact_equalities():
+    calc_input = make_input()
+    breakevens = find_breakevens(calc_input, 500_000, 90_000_000, metric=METRIC_TOTAL_BURDEN)
+    assert breakevens.crossovers
+    for crossover in breakevens.crossovers:
+        summary = run_calculation(replace(calc_input, revenue=crossover.revenue), patent_targets=False)
+        payloads = {payload["regime_id"]: payload for _title, payload, ok in summary.results if ok and payload}
+        first, second = payloads[crossover.first], payloads[crossover.second]
+        assert first["total_burden"] == pytest.approx(second["total_burden"], rel=1e-9, abs=1e-4)
+        assert crossover.value == pytest.approx(first["total_burden"], rel=1e-9, abs=1e-4)
+
+        below = run_calculation(replace(calc_input, revenue=crossover.revenue * (1 - 1e-4)), patent_targets=False)
+        below = {payload["regime_id"]: payload for _title, payload, ok in below.results if ok and payload}
+        if crossover.first in below and crossover.second in below:
+            assert below[crossover.first]["total_burden"] <= below[crossover.second]["total_burden"] + 1e-6
+
+
+def test_switch_points_and_ausn_limit():
+    calc_input = make_input(patent_cost_year=10_000_000)
+    breakevens = find_breakevens(calc_input, 1_000_000, 100_000_000, regimes=["ausn_income", "usn_income_no_vat"])
+    assert set(breakevens.curves) == {"ausn_income", "usn_income_no_vat"}
+    switches = breakevens.switch_points()
+    assert [(before, after) for _revenue, before, after in switches][-1][1] == "usn_income_no_vat"
+    assert all(revenue <= AUSN_REVENUE_LIMIT for revenue, _before, _after in switches)
+    assert breakevens.best_regime(AUSN_REVENUE_LIMIT + 1) == "usn_income_no_vat"
+    assert all({item.first, item.second} == set(breakevens.curves) for item in breakevens.between("ausn_income", "usn_income_no_vat"))
+
+
+def test_rejects_bad_arguments():
+    with pytest.raises(ValueError):
+        find_breakevens(make_input(), 0, 1_000_000)
+    with pytest.raises(ValueError):
+        find_breakevens(make_input(), 2_000_000, 1_000_000)
+    with pytest.raises(ValueError):
+        find_breakevens(make_input(), 1, 2, metric="tax")
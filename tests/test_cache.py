@@ -0,0 +1,162 @@
+from dataclasses import replace
+from pathlib import Path
+import sys
+import threading
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from calculator import CalcInput, run_calculation
+from calculator.cache import CalculationCache, canonical_input, input_fingerprint
+from calculator.constants import DEFAULT_FIXED_CONTRIB, DEFAULT_PATENT_COST
+
+
+def build_input(**overrides):
+    data = {
+        "revenue": 8_000_000,
+        "cost_percent": 35,
+        "vat_purchases_percent": 60,
+        "rent": 400_000,
+        "fixed_contrib": DEFAULT_FIXED_CONTRIB,
+        "employees": 4,
+        "salary": 45_000,
+        "fot_mode": "staff",
+        "fot_annual": 0.0,
+        "other_mode": "percent",
+        "other_percent": 12,
+        "other_amount": 0.0,
+        "transition_mode": "none",
+        "accumulated_vat_credit": 0.0,
+        "stock_expense_amount": 0.0,
+        "patent_cost_year": DEFAULT_PATENT_COST,
+        "purchases_month_percents": [100.0] * 12,
+    }
+    data.update(overrides)
+    return CalcInput(**data)
+
+
+def net_profits(summary):
+    return {payload["regime_id"]: payload["net_profit"] for _title, payload, ok in summary.results if ok and payload}
+
+
+def test_fingerprint_ignores_irrelevant_fields():
+    base = build_input()
+    assert input_fingerprint(base) == input_fingerprint(replace(base, purchases_month_percents=[50.0] * 12))
+    assert input_fingerprint(base) == input_fingerprint(replace(base, other_amount=999.0, fot_annual=5.0))
+    assert input_fingerprint(base) == input_fingerprint(replace(base, vat_share_rent=100, vat_share_other=1.0))
+    assert input_fingerprint(base) == input_fingerprint(replace(base, vat_share_cogs=0.6))
+    assert input_fingerprint(base) == input_fingerprint(replace(base, revenue=8_000_000.0000000001))
+    assert input_fingerprint(base) != input_fingerprint(replace(base, rent=400_001))
+
+
+def test_canonical_input_keeps_results():
+    data = build_input(other_mode="amount", other_amount=250_000, vat_share_rent=40, vat_share_other=None)
+    expected = net_profits(run_calculation(data))
+    actual = net_profits(run_calculation(canonical_input(data)))
+    assert actual.keys() == expected.keys()
+    for regime_id, value in expected.items():
+        assert actual[regime_id] == pytest.approx(value)
+
+
+def test_cache_counts_hits_and_misses():
+    cache = CalculationCache(maxsize=4)
+    first = cache.calculate(build_input())
+    second = cache.calculate(build_input(purchases_month_percents=[10.0] * 12))
+
+    info = cache.info()
+    assert (info.hits, info.misses, info.size) == (1, 1, 1)
+    assert info.hit_ratio == pytest.approx(0.5)
+    assert net_profits(first) == net_profits(second)
+
+
+def test_cache_returns_isolated_copies():
+    cache = CalculationCache()
+    first = cache.calculate(build_input())
+    first.results[2][1].net_profit = -1.0
+    first.results[3][1].uplift = None
+    first.components["rent"] = 0.0
+    first.top_results.clear()
+
+    second = cache.calculate(build_input())
+    assert second.results[2][1]["net_profit"] != -1.0
+    assert "price_uplift_percent" in second.results[3][1]
+    assert second.components["rent"] == pytest.approx(400_000)
+    assert second.top_results
+    # Top results keep pointing at the same payloads as ``results``.
+    top_payload = second.top_results[0][1]
+    assert any(payload is top_payload for _title, payload, _ok in second.results)
+
+
+def test_cache_evicts_least_recently_used():
+    calls = []
+
+    def compute(data, **options):
+        calls.append(data.revenue)
+        return run_calculation(data, **options)
+
+    cache = CalculationCache(maxsize=2, compute=compute)
+    cache.calculate(build_input(revenue=1_000_000))
+    cache.calculate(build_input(revenue=2_000_000))
+    cache.calculate(build_input(revenue=1_000_000))
+    cache.calculate(build_input(revenue=3_000_000))
+    cache.calculate(build_input(revenue=2_000_000))
+
+    assert calls == [1_000_000, 2_000_000, 3_000_000, 2_000_000]
+    assert len(cache) == 2
+
+
+def test_cache_expires_entries_after_ttl():
+    now = [100.0]
+    cache = CalculationCache(ttl=10.0, clock=lambda: now[0])
+    cache.calculate(build_input())
+    now[0] += 5.0
+    cache.calculate(build_input())
+    now[0] += 6.0
+    cache.calculate(build_input())
+
+    info = cache.info()
+    assert (info.hits, info.misses) == (1, 2)
+
+
+def test_cache_is_thread_safe():
+    cache = CalculationCache(maxsize=8)
+    inputs = [build_input(revenue=1_000_000 * (index % 5 + 1)) for index in range(200)]
+    errors = []
+
+    def worker(chunk):
+        try:
+            for data in chunk:
+                cache.calculate(data)
+        except Exception as exc:  # pragma: no cover - surfaced below
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker, args=(inputs[index::4],)) for index in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    info = cache.info()
+    assert not errors
+    assert info.hits + info.misses == len(inputs)
+    assert info.size == 5
+
+
+def test_cache_keys_on_regime_selection():
+    cache = CalculationCache()
+    full = cache.calculate(build_input())
+    subset = cache.calculate(build_input(), regimes=["patent", "usn_income_no_vat"], patent_targets=False)
+    same_subset = cache.calculate(build_input(), regimes=("usn_income_no_vat", "patent"), patent_targets=False)
+
+    assert len(full.results) == 11
+    assert [payload["regime_id"] for _t, payload, _ok in subset.results] == ["usn_income_no_vat", "patent"]
+    assert cache.info().hits == 1
+    assert net_profits(subset) == net_profits(same_subset)
+
+
+def test_cache_rejects_non_positive_size():
+    with pytest.raises(ValueError):
+        CalculationCache(maxsize=0)
@@ -0,0 +1,111 @@
+from pathlib import Path
+import json
+import sys
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from calculator import CalcInput, run_calculation
+from calculator.calc_data import CALC_DATA_VERSION, METRICS, _row_encoder, build_calc_data
+from calculator.constants import DEFAULT_FIXED_CONTRIB, DEFAULT_PATENT_COST
+from calculator.models import PatentResult, UsnIncomeResult
+
+
+def build_input(**overrides):
+    data = {
+        "revenue": 8_000_000,
+        "cost_percent": 35,
+        "vat_purchases_percent": 60,
+        "rent": 400_000,
+        "fixed_contrib": DEFAULT_FIXED_CONTRIB,
+        "employees": 4,
+        "salary": 45_000,
+        "fot_mode": "staff",
+        "fot_annual": 0.0,
+        "other_mode": "percent",
+        "other_percent": 12,
+        "other_amount": 0.0,
+        "transition_mode": "none",
+        "accumulated_vat_credit": 0.0,
+        "stock_expense_amount": 0.0,
+        "patent_cost_year": DEFAULT_PATENT_COST,
+        "purchases_month_percents": [100.0] * 12,
+    }
+    data.update(overrides)
+    return CalcInput(**data)
+
+
+def calc_data(data):
+    summary = run_calculation(data)
+    return summary, build_calc_data(summary, summary.components, data)
+
+
+def test_metrics_are_columns_over_the_available_regimes():
+    summary, payload = calc_data(build_input())
+    records = [record for _title, record, ok in summary.results if ok and record]
+
+    assert payload["v"] == CALC_DATA_VERSION
+    assert payload["order"] == [record.regime for record in records]
+    assert payload["titles"] == [record.title for record in records]
+    for name, column in payload["metrics"].items():
+        assert len(column) == len(records)
+        assert any(column)
+        for record, value in zip(records, column):
+            assert value == pytest.approx(record.get(name) or 0, abs=0.005)
+
+
+def test_zero_columns_base_fields_and_aliases_are_left_out():
+    _summary, payload = calc_data(build_input())
+
+    assert set(payload["metrics"]) < set(METRICS)
+    assert "patent_pvd_source" not in METRICS
+    assert "stock_extra" not in payload["base"]
+    assert "transition_mode" not in payload["base"]
+    assert payload["base"]["fot"] == 4 * 45_000 * 12
+    assert not {"annualFot", "payroll", "hasEmployees", "employeesCount", "share_with_vat"} & set(payload["base"])
+
+    _summary, payload = calc_data(build_input(transition_mode="stock", stock_expense_amount=300_000))
+    assert payload["base"]["transition_mode"] == "stock"
+    assert payload["base"]["stock_expense_amount"] == 300_000
+
+
+def test_vat_shares_keep_their_precision():
+    _summary, payload = calc_data(build_input(vat_share_cogs=33.5, vat_share_rent=0.125, vat_share_other=100 / 3))
+
+    assert payload["base"]["vat_share_cogs"] == 0.335
+    assert payload["base"]["vat_share_rent"] == 0.125
+    assert payload["base"]["vat_share_other"] == 0.333333
+    assert payload["base"]["rent"] == 400_000
+
+
+def test_encoder_is_compiled_once_per_result_class():
+    summary, _payload = calc_data(build_input())
+    patent = next(record for _title, record, ok in summary.results if ok and isinstance(record, PatentResult))
+
+    encode = _row_encoder(PatentResult)
+    assert _row_encoder(PatentResult) is encode
+    assert _row_encoder(UsnIncomeResult) is not encode
+    row = dict(zip(METRICS, encode(patent)))
+    assert row["tax_payable"] == round(patent.tax_payable, 2)
+    # Fields of other regime families are constants in the patent encoder.
+    assert row["usn_regular_tax"] == 0
+    # Whole roubles serialize without a trailing ``.0``.
+    assert isinstance(row["patent_cost_year"], int)
+
+
+def test_embedded_payload_is_compact_json():
+    pytest.importorskip("flask")
+    from app import app
+
+    response = app.test_client().post("/", data={"revenue": "8000000", "cost_percent": "35", "employees": "4", "salary": "45000"})
+    html = response.data.decode("utf-8")
+    start = html.index('<script id="calc-data" type="application/json">') + len('<script id="calc-data" type="application/json">')
+    embedded = html[start:html.index("</script>", start)]
+
+    payload = json.loads(embedded)
+    assert payload["v"] == CALC_DATA_VERSION
+    assert ", " not in embedded and ": " not in embedded
+    assert payload["titles"][0] in embedded
@@ -0,0 +1,120 @@
+import csv
+import io
+import json
+from pathlib import Path
+import sys
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from calculator import CalcInput, run_calculation
+from calculator.cli import FORMAT_CSV, FORMAT_JSONL, main, read_rows, run_batch
+from calculator.inputs import NEGATIVE_ERROR, NUMBER_ERROR, REVENUE_ERROR, InputError, parse_calc_input
+
+ROWS = [
+    {"id": "a", "revenue": "12000000", "cost_percent": "40", "vat_purchases_percent": "70", "employees": "3", "salary": "50000"},
+    {"id": "b", "revenue": "abc"},
+    {"id": "c", "revenue": "0"},
+    {"id": "d", "revenue": "75000000", "cost_percent": "60", "rent": "-1"},
+    {"id": "e", "revenue": "3000000", "cost_percent": "10", "transition_mode": "vat", "accumulated_vat_credit": "50000"},
+]
+
+
+def to_csv(rows):
+    names = sorted({name for row in rows for name in row})
+    stream = io.StringIO()
+    writer = csv.DictWriter(stream, fieldnames=names)
+    writer.writeheader()
+    writer.writerows(rows)
+    stream.seek(0)
+    return stream
+
+
+def test_parse_calc_input_applies_form_rules():
+    data = parse_calc_input(ROWS[0])
+    assert isinstance(data, CalcInput)
+    assert data.revenue == 12_000_000.0
+    assert data.patent_cost_year > 0 and data.fixed_contrib > 0
+    assert data.purchases_month_percents == [0.0] * 12
+
+    for row, message in ((ROWS[1], NUMBER_ERROR), (ROWS[2], REVENUE_ERROR), (ROWS[3], NEGATIVE_ERROR)):
+        with pytest.raises(InputError, match=message):
+            parse_calc_input(row)
+    with pytest.raises(InputError):
+        parse_calc_input({"revenue": 1, "purchases_month_percents": [1, 2]})
+
+
+def test_csv_batch_matches_run_calculation():
+    output = io.StringIO()
+    rows, errors = run_batch(
+        read_rows(to_csv(ROWS), FORMAT_CSV),
+        output,
+        columns=("net_profit", "vat_charged", "price_uplift_percent"),
+        regimes=("usn_income_vat_5", "patent"),
+        id_column="id",
+        precision=None,
+    )
+    assert (rows, errors) == (5, 3)
+
+    result = list(csv.DictReader(io.StringIO(output.getvalue())))
+    assert [line["id"] for line in result] == ["a", "b", "c", "d", "e"]
+    assert [line["error"] for line in result] == ["", NUMBER_ERROR, REVENUE_ERROR, NEGATIVE_ERROR, ""]
+
+    summary = run_calculation(parse_calc_input(ROWS[0]), regimes=("usn_income_vat_5", "patent"))
+    payload = summary.results[0][1]
+    assert float(result[0]["usn_income_vat_5.net_profit"]) == payload["net_profit"]
+    assert float(result[0]["usn_income_vat_5.vat_charged"]) == payload["vat_charged"]
+    assert result[0]["top_1"] == summary.top_results[0][1]["regime_id"]
+    assert result[0]["patent.vat_charged"] == ""
+    assert result[1]["usn_income_vat_5.net_profit"] == ""
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_jsonl_batch_keeps_row_order(workers):
+    lines = [json.dumps(row) for row in ROWS] + ["", "{broken", "[1]"]
+    output = io.StringIO()
+    rows, errors = run_batch(
+        read_rows(io.StringIO("\n".join(lines)), FORMAT_JSONL),
+        output,
+        output_format=FORMAT_JSONL,
+        workers=workers,
+        chunk_size=1,
+    )
+    assert (rows, errors) == (7, 5)
+
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [record["row"] for record in records] == list(range(7))
+    assert [record["error"] is None for record in records] == [True, False, False, False, True, False, False]
+    assert len(records[0]["top"]) == 5
+    assert set(records[4]["regimes"]["osno_ooo"]) == {"net_profit", "total_burden", "burden_percent"}
+
+
+def test_unknown_column_is_rejected():
+    with pytest.raises(ValueError, match="vat_chargd"):
+        run_batch([], io.StringIO(), columns=("net_profit", "vat_chargd"))
+
+
+def test_main_reports_progress_on_stderr(tmp_path, capsys):
+    source = tmp_path / "rows.jsonl"
+    source.write_text("\n".join(json.dumps(row) for row in ROWS[:1]), encoding="utf-8")
+    target = tmp_path / "out.csv"
+
+    assert main(["batch", str(source), "-o", str(target), "--regimes", "patent"]) == 0
+    header, line = target.read_text(encoding="utf-8").splitlines()
+    assert header.endswith("patent.burden_percent")
+    assert line.startswith("0,,patent,")
+    assert "1 строк" in capsys.readouterr().err
+
+
+def test_json_array_file_is_read_as_records(tmp_path):
+    source = tmp_path / "rows.json"
+    source.write_text(json.dumps([ROWS[0], ROWS[4]], indent=2), encoding="utf-8")
+    target = tmp_path / "out.jsonl"
+
+    assert main(["batch", str(source), "-o", str(target), "--regimes", "patent", "--quiet"]) == 0
+    records = [json.loads(line) for line in target.read_text(encoding="utf-8").splitlines()]
+    assert [record["row"] for record in records] == [0, 1]
+    assert [record["error"] for record in records] == [None, None]
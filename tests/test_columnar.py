@@ -0,0 +1,110 @@
+from pathlib import Path
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from calculator import CalcInput
+from calculator.batch import columns_from_inputs, run_calculation_batch
+from calculator.columnar import ALIGNMENT, read_inputs, read_results, write_inputs, write_results
+from calculator.constants import DEFAULT_FIXED_CONTRIB, DEFAULT_PATENT_COST
+
+
+def build_input(**overrides):
+    data = {
+        "revenue": 10_000_000,
+        "cost_percent": 40,
+        "vat_purchases_percent": 70,
+        "rent": 500_000,
+        "fixed_contrib": DEFAULT_FIXED_CONTRIB,
+        "employees": 3,
+        "salary": 50_000,
+        "fot_mode": "staff",
+        "fot_annual": 0.0,
+        "other_mode": "percent",
+        "other_percent": 10,
+        "other_amount": 0.0,
+        "transition_mode": "none",
+        "accumulated_vat_credit": 0.0,
+        "stock_expense_amount": 0.0,
+        "patent_cost_year": DEFAULT_PATENT_COST,
+        "purchases_month_percents": [100.0] * 12,
+    }
+    data.update(overrides)
+    return CalcInput(**data)
+
+
+INPUTS = [
+    build_input(),
+    build_input(revenue=75_000_000, fot_mode="annual", fot_annual=3_000_000, vat_share_cogs=80.0),
+    build_input(other_mode="absolute", other_amount=250_000, transition_mode="stock", purchases_month_percents=[]),
+    build_input(transition_mode="vat", accumulated_vat_credit=400_000, vat_share_rent=0.0, patent_pvd_period=1.5e6),
+]
+
+
+def test_inputs_round_trip_zero_copy(tmp_path):
+    path = tmp_path / "profiles.col"
+    write_inputs(path, INPUTS)
+
+    reader = read_inputs(path)
+    assert reader.rows == len(INPUTS)
+    assert [entry["name"] for entry in reader.header["columns"]][:2] == ["revenue", "cost_percent"]
+    assert reader.labels("transition_mode") == ("none", "vat", "stock")
+    assert reader.column("transition_mode").tolist() == [0, 0, 2, 1]
+    assert reader.column("fot_mode").dtype == np.uint8
+
+    revenue = reader.column("revenue")
+    assert isinstance(revenue, np.memmap)
+    assert not revenue.flags.writeable
+    assert all(entry["offset"] % ALIGNMENT == 0 for entry in reader.header["columns"])
+
+    assert list(reader) == INPUTS
+
+
+def test_form_profile_round_trips(tmp_path):
+    from calculator.inputs import parse_calc_input
+
+    form = {"revenue": "6000000", "cost_percent": "30", "other_mode": "absolute", "other_amount": "120000"}
+    profile = parse_calc_input(form)
+    write_inputs(tmp_path / "form.col", [profile, build_input(other_mode="amount", other_amount=5.0)])
+
+    reader = read_inputs(tmp_path / "form.col")
+    assert reader.labels("other_mode") == ("percent", "absolute")
+    assert reader.column("other_mode").tolist() == [1, 1]
+    # The older ``amount`` spelling is stored as the form's label.
+    assert [row.other_mode for row in reader] == ["absolute", "absolute"]
+    assert list(reader)[0] == profile
+
+
+def test_batch_over_mapped_inputs_and_results(tmp_path):
+    write_inputs(tmp_path / "profiles.col", columns_from_inputs(INPUTS))
+    batch = run_calculation_batch(read_inputs(tmp_path / "profiles.col").columns())
+    expected = run_calculation_batch(columns_from_inputs(INPUTS))
+
+    write_results(tmp_path / "results.col", batch)
+    loaded = read_results(tmp_path / "results.col")
+    assert loaded.regimes == expected.regimes
+    for regime_id in expected.regimes:
+        assert np.array_equal(loaded.available[regime_id], expected.available[regime_id])
+        for metric, values in expected.metrics[regime_id].items():
+            assert isinstance(loaded.column(regime_id, metric), np.memmap)
+            np.testing.assert_array_equal(loaded.column(regime_id, metric), values)
+    assert loaded.top_regime_ids(1) == expected.top_regime_ids(1)
+
+
+def test_reader_rejects_foreign_files(tmp_path):
+    path = tmp_path / "profiles.csv"
+    path.write_bytes(b"revenue,cost_percent\n1,2\n")
+    with pytest.raises(ValueError):
+        read_inputs(path)
+
+    write_inputs(tmp_path / "profiles.col", INPUTS)
+    with pytest.raises(ValueError):
+        read_results(tmp_path / "profiles.col")
+    with pytest.raises(ValueError, match="fot_mode"):
+        write_inputs(tmp_path / "bad.col", [build_input(fot_mode="weekly")])
@@ -0,0 +1,204 @@
+from dataclasses import fields
+from pathlib import Path
+import random
+import sys
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from calculator import CalcInput
+from calculator.constants import AUSN_REVENUE_LIMIT, DEFAULT_FIXED_CONTRIB
+from calculator.engine import REGIME_CALCULATORS, _build_context
+from calculator.formulas import (
+    BACKEND_NUMPY,
+    BACKEND_PIECEWISE,
+    CONTEXT,
+    REGIME_OUTPUTS,
+    REGIME_RECORDS,
+    REGIMES,
+    compile_kernel,
+    context_kernel,
+    evaluate_regimes,
+    maximum,
+    record_kernel,
+    regimes_kernel,
+    revenue,
+    var,
+    vat_charged,
+)
+from calculator.models import CalculationContext, SUMMARY_FIELDS
+
+
+def random_inputs(count, seed):
+    rng = random.Random(seed)
+    return [
+        CalcInput(
+            revenue=rng.choice([0.0, 250_000, 3_000_000, 12_000_000, 58_000_000, 75_000_000, 400_000_000]),
+            cost_percent=rng.uniform(0, 95),
+            vat_purchases_percent=rng.uniform(0, 100),
+            rent=rng.choice([0.0, 120_000, 1_500_000]),
+            fixed_contrib=DEFAULT_FIXED_CONTRIB,
+            employees=rng.choice([0, 2, 5, 9]),
+            salary=rng.choice([0.0, 40_000, 120_000]),
+            fot_mode=rng.choice(["staff", "annual"]),
+            fot_annual=rng.choice([0.0, 2_000_000]),
+            other_mode=rng.choice(["percent", "amount"]),
+            other_percent=rng.uniform(0, 20),
+            other_amount=rng.choice([0.0, 300_000]),
+            transition_mode=rng.choice(["none", "vat", "stock"]),
+            accumulated_vat_credit=rng.choice([0.0, 800_000]),
+            stock_expense_amount=rng.choice([0.0, 1_200_000]),
+            patent_cost_year=rng.choice([0.0, 60_000, 400_000]),
+            purchases_month_percents=[100.0] * 12,
+            patent_pvd_period=rng.choice([0.0, 2_500_000]),
+            vat_share_cogs=rng.choice([None, 0.5, 80]),
+            vat_share_rent=rng.choice([None, 0.0, 0.3]),
+            vat_share_other=rng.choice([None, 1.0, 45]),
+        )
+        for _ in range(count)
+    ]
+
+
+def test_spec_covers_context_and_regimes():
+    assert tuple(CONTEXT) == tuple(item.name for item in fields(CalculationContext))
+    assert tuple(REGIMES) == tuple(REGIME_CALCULATORS)
+    assert REGIME_OUTPUTS == SUMMARY_FIELDS + ("available",)
+    assert all(tuple(metrics) == REGIME_OUTPUTS for metrics in REGIMES.values())
+
+
+@pytest.mark.parametrize("calc_input", random_inputs(60, seed=3))
+def test_records_match_the_summary_kernel(calc_input):
+    ctx, _ = _build_context(calc_input)
+    context = context_kernel()(calc_input)
+    for name, value in context.items():
+        assert value == pytest.approx(getattr(ctx, name), rel=1e-12, abs=1e-9), name
+
+    values = evaluate_regimes(calc_input)
+    for regime_id, calculator in REGIME_CALCULATORS.items():
+        result = calculator(calc_input, ctx)
+        assert bool(values[regime_id]["available"]) == (result is not None), regime_id
+        if result is None:
+            continue
+        for metric in SUMMARY_FIELDS:
+            assert values[regime_id][metric] == pytest.approx(result[metric], rel=1e-12, abs=1e-6), metric
+
+
+@pytest.mark.parametrize("calc_input", random_inputs(30, seed=17))
+def test_piecewise_curves_match_the_scalar_kernel(calc_input):
+    # The piecewise backend runs the same graph; splitting the revenue range
+    # at comparisons must not change a single value.
+    from dataclasses import replace
+
+    from calculator.piecewise import build_regime_curves
+
+    lo, hi = 250_000.0, 90_000_000.0
+    ctx, _ = _build_context(calc_input)
+    curves = build_regime_curves(calc_input, ctx, lo, hi, scale_expenses=True)
+    for revenue_value in (lo, 1_700_000.0, 9_000_000.0, 31_000_000.0, 59_500_000.0, hi):
+        probe = replace(calc_input, revenue=revenue_value)
+        probe_ctx, _ = _build_context(probe)
+        values = evaluate_regimes(probe)
+        for regime_id, calculator in REGIME_CALCULATORS.items():
+            result = calculator(probe, probe_ctx)
+            curve = curves.get(regime_id)
+            assert bool(values[regime_id]["available"]) == (result is not None), regime_id
+            if result is None:
+                assert curve is None or revenue_value > curve.hi, regime_id
+                continue
+            assert curve is not None, regime_id
+            for metric in ("net_profit", "total_burden"):
+                expected = values[regime_id][metric]
+                assert result[metric] == pytest.approx(expected, rel=1e-9, abs=1e-4), (regime_id, metric)
+                assert getattr(curve, metric)(revenue_value) == pytest.approx(expected, rel=1e-9, abs=1e-4), (
+                    regime_id,
+                    metric,
+                )
+
+
+def test_numpy_kernel_matches_scalar_kernel():
+    np = pytest.importorskip("numpy")
+    from calculator.batch import _prepare_columns, columns_from_inputs
+
+    inputs = random_inputs(80, seed=9)
+    data, _size = _prepare_columns(columns_from_inputs(inputs))
+    columns = regimes_kernel(BACKEND_NUMPY)(data)
+    for row, calc_input in enumerate(inputs):
+        for key, value in regimes_kernel()(calc_input).items():
+            assert columns[key].shape == (len(inputs),)
+            assert columns[key][row] == pytest.approx(value, rel=1e-12, abs=1e-9), key
+    assert np.all(columns[("patent", "vat")] == 0.0)
+
+
+def test_shared_subexpressions_are_evaluated_once():
+    assert vat_charged(var("revenue"), 22) is vat_charged(revenue, 22)
+    assert REGIMES["osno_ooo"]["vat"] is REGIMES["osno_ip"]["vat"]
+
+    source = regimes_kernel().source
+    assert source.count("data.revenue") == 1
+    lines = [line.split(" = ", 1)[1] for line in source.splitlines()[1:-1]]
+    assert len(lines) == len(set(lines))
+
+
+def test_constants_are_folded():
+    kernel = compile_kernel({"value": maximum(2.0, 3.0) * revenue})
+    assert "max(" not in kernel.source
+    assert kernel(type("Row", (), {"revenue": 10.0})())["value"] == pytest.approx(30.0)
+
+
+def test_compile_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        compile_kernel({"value": revenue}, backend="llvm")
+
+
+@pytest.mark.parametrize("calc_input", random_inputs(10, seed=23))
+def test_records_carry_every_field_of_the_spec(calc_input):
+    ctx, _ = _build_context(calc_input)
+    for regime_id, calculator in REGIME_CALCULATORS.items():
+        result = calculator(calc_input, ctx)
+        if result is None:
+            continue
+        assert set(result) == set(REGIME_RECORDS[regime_id]) - {"available"} | {"regime_id"}, regime_id
+
+
+def test_context_nodes_are_read_from_ctx():
+    kernel = record_kernel("usn_income_no_vat")
+    assert "ctx.insurance_standard" in kernel.source
+    assert "data.salary" not in kernel.source
+
+    calc_input = random_inputs(1, seed=5)[0]
+    ctx, _ = _build_context(calc_input)
+    before = kernel(calc_input, ctx)
+    ctx.total_expenses_income_regime *= 2
+    assert kernel(calc_input, ctx)["expenses"] == pytest.approx(before["expenses"] * 2)
+
+
+def test_piecewise_backend_splits_at_comparisons():
+    from calculator.piecewise import PiecewiseLinear, _Split
+
+    kernel = compile_kernel({"value": maximum(revenue - 10.0, 0.0) * 2.0, "small": revenue <= 5.0}, BACKEND_PIECEWISE)
+    row = type("Row", (), {"revenue": PiecewiseLinear.linear(0.0, 4.0)})()
+    values = kernel(row)
+    assert values["small"] is True
+    assert values["value"](3.0) == pytest.approx(0.0)
+
+    row.revenue = PiecewiseLinear.linear(0.0, 20.0)
+    with pytest.raises(_Split) as split:
+        kernel(row)
+    assert split.value.at == pytest.approx(5.0)
+
+
+def test_ausn_curve_ends_at_the_revenue_limit():
+    from calculator.piecewise import build_regime_curves
+
+    calc_input = random_inputs(1, seed=1)[0]
+    calc_input.employees = 0
+    ctx, _ = _build_context(calc_input)
+    curves = build_regime_curves(calc_input, ctx, 1_000_000.0, 2 * AUSN_REVENUE_LIMIT, scale_expenses=True)
+    assert curves["ausn_income"].hi == pytest.approx(AUSN_REVENUE_LIMIT)
+    assert curves["usn_income_no_vat"].hi == pytest.approx(2 * AUSN_REVENUE_LIMIT)
+    assert "ausn_income" not in build_regime_curves(
+        calc_input, ctx, AUSN_REVENUE_LIMIT + 1, 2 * AUSN_REVENUE_LIMIT, scale_expenses=True
+    )
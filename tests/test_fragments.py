@@ -0,0 +1,72 @@
+from pathlib import Path
+import sys
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+pytest.importorskip("flask")
+
+import app as application
+
+FORM = {"revenue": "8000000", "cost_percent": "35", "vat_purchases_percent": "60", "employees": "4", "salary": "45000"}
+
+
+@pytest.fixture
+def client():
+    for cache in (application.form_fragments, application.result_fragments, application.page_fragments):
+        cache.clear()
+    return application.app.test_client()
+
+
+def fail(*args, **kwargs):
+    raise AssertionError("rendered or calculated on a cache hit")
+
+
+def test_blank_page_is_rendered_once(client, monkeypatch):
+    first = client.get("/").data
+    assert b'<script id="calc-data"' in first
+
+    monkeypatch.setattr(application, "render_template", fail)
+    assert client.get("/").data == first
+
+
+def test_repeated_post_reuses_fragments(client, monkeypatch):
+    first = client.post("/", data=FORM).data.decode("utf-8")
+    assert 'data-regime-id="' in first
+    assert 'value="8000000' in first
+
+    monkeypatch.setattr(application.calculation_cache, "calculate", fail)
+    monkeypatch.setattr(application, "render_template", fail)
+    assert client.post("/", data=FORM).data.decode("utf-8") == first
+    # The permalink page with the same input renders its own form but shares the results.
+    monkeypatch.undo()
+    monkeypatch.setattr(application.calculation_cache, "calculate", fail)
+    permalink = first.split('href="/calc?', 1)[1].split('"', 1)[0].replace("&amp;", "&")
+    assert client.get(f"/calc?{permalink}").status_code == 200
+
+
+def test_fragment_cache_evicts_least_recently_used():
+    cache = application.FragmentCache(2)
+    cache.get_or_render("a", lambda: 1)
+    cache.get_or_render("b", lambda: 2)
+    cache.get_or_render("a", fail)
+    cache.get_or_render("c", lambda: 3)
+
+    assert len(cache) == 2
+    assert cache.get_or_render("a", fail) == 1
+    assert cache.get_or_render("b", lambda: "rendered again") == "rendered again"
+
+
+def test_errors_are_rendered_into_the_form(client):
+    body = client.post("/", data={**FORM, "revenue": "0"}).data.decode("utf-8")
+    assert 'class="error"' in body
+    assert 'data-regime-id="' not in body
+
+
+def test_templates_use_a_bytecode_cache():
+    from jinja2 import FileSystemBytecodeCache
+
+    assert isinstance(application.app.jinja_env.bytecode_cache, FileSystemBytecodeCache)
@@ -0,0 +1,129 @@
+from dataclasses import replace
+from pathlib import Path
+import sys
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from calculator import CalcInput, run_calculation
+from calculator.constants import DEFAULT_FIXED_CONTRIB, DEFAULT_PATENT_COST
+from calculator.engine import REGIME_CALCULATORS
+from calculator.incremental import (
+    CONTEXT_DEPENDENCIES,
+    CONTEXT_FIELDS,
+    REGIME_DEPENDENCIES,
+    CalculationSession,
+)
+
+
+def build_input(**overrides):
+    data = {
+        "revenue": 9_000_000,
+        "cost_percent": 40,
+        "vat_purchases_percent": 70,
+        "rent": 500_000,
+        "fixed_contrib": DEFAULT_FIXED_CONTRIB,
+        "employees": 3,
+        "salary": 50_000,
+        "fot_mode": "staff",
+        "fot_annual": 0.0,
+        "other_mode": "percent",
+        "other_percent": 10,
+        "other_amount": 0.0,
+        "transition_mode": "none",
+        "accumulated_vat_credit": 0.0,
+        "stock_expense_amount": 0.0,
+        "patent_cost_year": DEFAULT_PATENT_COST,
+        "purchases_month_percents": [100.0] * 12,
+    }
+    data.update(overrides)
+    return CalcInput(**data)
+
+
+def assert_same_summary(actual, expected):
+    assert len(actual.results) == len(expected.results)
+    for (title, payload, ok), (exp_title, exp_payload, exp_ok) in zip(actual.results, expected.results):
+        assert (title, ok) == (exp_title, exp_ok)
+        if not exp_ok:
+            assert payload is None
+            continue
+        assert payload.keys() == exp_payload.keys()
+        for key, value in exp_payload.items():
+            if isinstance(value, float):
+                assert payload[key] == pytest.approx(value, abs=1e-6), key
+            else:
+                assert payload[key] == value, key
+    assert [name for name, _ in actual.top_results] == [name for name, _ in expected.top_results]
+    assert actual.components == expected.components
+
+
+def test_dependency_tables_cover_context_and_regimes():
+    assert set(CONTEXT_DEPENDENCIES) == set(CONTEXT_FIELDS)
+    assert set(REGIME_DEPENDENCIES) == set(REGIME_CALCULATORS)
+
+
+@pytest.mark.parametrize(
+    "overrides, expected",
+    [
+        ({"patent_cost_year": 250_000}, {"patent"}),
+        ({"vat_share_rent": 0.4}, {"osno_ooo", "osno_ip"}),
+        ({"vat_purchases_percent": 20}, {"usn_income_vat_22", "usn_profit_vat_22", "osno_ooo", "osno_ip"}),
+        ({"other_amount": 700_000}, set()),
+        ({"purchases_month_percents": [50.0] * 12}, set()),
+        ({"rent": 800_000}, set(REGIME_CALCULATORS)),
+    ],
+)
+def test_session_recomputes_only_invalidated_regimes(overrides, expected):
+    session = CalculationSession()
+    base = build_input()
+    session.calculate(base)
+
+    changed = replace(base, **overrides)
+    summary = session.calculate(changed)
+
+    assert session.last_recomputed == frozenset(expected)
+    assert_same_summary(summary, run_calculation(changed))
+
+
+def test_patent_change_refreshes_all_uplift_targets():
+    session = CalculationSession()
+    base = build_input()
+    session.calculate(base)
+
+    summary = session.calculate(replace(base, patent_cost_year=30_000))
+    assert session.last_recomputed == frozenset({"patent"})
+    assert session.last_uplift_refreshed == frozenset(REGIME_CALCULATORS)
+    assert_same_summary(summary, run_calculation(replace(base, patent_cost_year=30_000)))
+
+
+def test_session_follows_a_sequence_of_edits():
+    session = CalculationSession()
+    data = build_input()
+    edits = [
+        {"fixed_contrib": 70_000},
+        {"transition_mode": "vat", "accumulated_vat_credit": 400_000},
+        {"employees": 7},
+        {"other_mode": "amount", "other_amount": 150_000},
+        {"revenue": 70_000_000},
+        {"vat_share_other": 0.25},
+        {"fot_mode": "annual", "fot_annual": 1_000_000},
+    ]
+    session.calculate(data)
+    for overrides in edits:
+        data = replace(data, **overrides)
+        assert_same_summary(session.calculate(data), run_calculation(data))
+
+
+def test_session_is_not_affected_by_caller_mutation():
+    session = CalculationSession()
+    data = build_input()
+    session.calculate(data)
+    data.purchases_month_percents[0] = 10.0
+    data.rent = 1_000_000
+
+    summary = session.calculate(data)
+    assert session.last_recomputed == frozenset(REGIME_CALCULATORS)
+    assert_same_summary(summary, run_calculation(data))
@@ -0,0 +1,165 @@
+from pathlib import Path
+import sys
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from calculator.constants import DEFAULT_FIXED_CONTRIB, DEFAULT_PATENT_COST
+from calculator.inputs import (
+    FIELDS,
+    NEGATIVE_ERROR,
+    NUMBER_ERROR,
+    REVENUE_ERROR,
+    InputError,
+    check_columns,
+    compile_row_parser,
+    parse_calc_input,
+    parse_row,
+)
+from calculator.models import CalcInput
+
+
+def build_row(**overrides):
+    data = {
+        "revenue": "8000000",
+        "cost_percent": "35",
+        "vat_purchases_percent": "60",
+        "rent": "400000",
+        "employees": "4",
+        "salary": "45000",
+        "fot_mode": "staff",
+        "other_mode": "percent",
+        "other_percent": "12",
+    }
+    data.update(overrides)
+    return data
+
+
+def test_schema_covers_every_input_field():
+    from dataclasses import fields
+
+    assert {item.name for item in FIELDS} == {item.name for item in fields(CalcInput)} - {"regime"}
+
+
+def test_parse_calc_input_applies_form_defaults():
+    calc_input = parse_calc_input(build_row(patent_cost_year="", vat_share_cogs=""))
+
+    assert calc_input.revenue == 8_000_000
+    assert calc_input.employees == 4
+    assert calc_input.fixed_contrib == DEFAULT_FIXED_CONTRIB
+    assert calc_input.patent_cost_year == DEFAULT_PATENT_COST
+    assert calc_input.vat_share_cogs is None
+    assert calc_input.transition_mode == "none"
+    assert calc_input.purchases_month_percents == [0.0] * 12
+
+
+def test_errors_are_reported_per_field_with_the_form_message_first():
+    row = parse_row(build_row(revenue="0", rent="-5", salary="много", purchases_mar="x"))
+
+    assert row.message == NUMBER_ERROR
+    assert row.errors == {
+        "revenue": "Значение должно быть больше нуля",
+        "rent": "Значение должно быть неотрицательным",
+        "salary": "Ожидается число",
+        "purchases_mar": "Ожидается число",
+    }
+    # Entered values are kept so the form can show them again.
+    assert row.values["salary"] == "много"
+    assert row.values["purchases_month_percents"][2] == "x"
+
+    with pytest.raises(InputError) as excinfo:
+        row.calc_input()
+    assert excinfo.value.fields == row.errors
+
+
+@pytest.mark.parametrize(
+    "overrides, message",
+    [
+        ({"rent": "-1"}, NEGATIVE_ERROR),
+        ({"revenue": "0"}, REVENUE_ERROR),
+        ({"revenue": "inf"}, NUMBER_ERROR),
+        ({"employees": "2.5"}, NUMBER_ERROR),
+        ({"vat_share_rent": "150"}, "vat_share_rent: Значение должно быть не больше 100"),
+        ({"fot_mode": "hourly"}, "Недопустимое значение fot_mode"),
+    ],
+)
+def test_invalid_values_are_rejected(overrides, message):
+    with pytest.raises(InputError, match=message):
+        parse_calc_input(build_row(**overrides))
+
+
+def test_unknown_transition_mode_falls_back_to_none():
+    assert parse_calc_input(build_row(transition_mode="later")).transition_mode == "none"
+
+
+def test_amount_is_read_as_absolute():
+    assert parse_calc_input(build_row(other_mode="amount")).other_mode == "absolute"
+    assert parse_calc_input(build_row(other_mode="absolute")).other_mode == "absolute"
+
+
+def test_months_accept_a_list_of_twelve():
+    months = [10.0] * 12
+    assert parse_calc_input(build_row(purchases_month_percents=months)).purchases_month_percents == months
+
+    with pytest.raises(InputError) as excinfo:
+        parse_calc_input(build_row(purchases_month_percents=[1, 2]))
+    assert set(excinfo.value.fields) == {"purchases_month_percents"}
+
+
+def test_compiled_parser_is_straight_line_code():
+    parse = compile_row_parser()
+
+    assert "for " not in parse.source
+    assert parse(build_row())[1] == {}
+
+
+def test_check_columns_names_bad_rows():
+    np = pytest.importorskip("numpy")
+    columns = {
+        "revenue": np.array([1.0, 0.0, 3.0]),
+        "rent": np.array([0.0, -1.0, np.inf]),
+        "vat_share_cogs": np.array([np.nan, 50.0, 101.0]),
+        "fot_mode": np.broadcast_to(np.array("staff", dtype=object), (3,)),
+        "other_mode": np.array(["percent", "amount", "weekly"], dtype=object),
+    }
+
+    with pytest.raises(InputError) as excinfo:
+        check_columns(columns)
+
+    assert str(excinfo.value) == NUMBER_ERROR
+    assert excinfo.value.fields == {
+        "rent": "Ожидается число (строки 2)",
+        "vat_share_cogs": "Значение должно быть не больше 100 (строки 2)",
+        "other_mode": "Допустимые значения: percent, absolute (строки 2)",
+    }
+
+
+def test_api_reports_field_errors():
+    pytest.importorskip("flask")
+    from app import app
+
+    response = app.test_client().post("/api/v1/calculate", json={"revenue": -1, "fot_mode": "hourly"})
+
+    assert response.status_code == 400
+    assert response.get_json() == {
+        "error": "Недопустимое значение fot_mode",
+        "fields": {"revenue": "Значение должно быть неотрицательным", "fot_mode": "Допустимые значения: staff, annual"},
+    }
+
+
+def test_form_keeps_entered_values_on_error():
+    pytest.importorskip("flask")
+    from app import app
+
+    response = app.test_client().post("/", data=build_row(rent="-5", salary="много"))
+
+    assert response.status_code == 200
+    html = response.data.decode("utf-8")
+    assert NUMBER_ERROR in html
+    assert 'value="много"' in html
+    assert '<div class="field-error" id="salary-error">Ожидается число</div>' in html
+    assert '<div class="field-error" id="rent-error">Значение должно быть неотрицательным</div>' in html
+    assert 'id="revenue-error"' not in html
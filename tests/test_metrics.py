@@ -0,0 +1,202 @@
+from pathlib import Path
+import multiprocessing
+import os
+import sys
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from calculator import CalcInput, run_calculation
+from calculator.constants import DEFAULT_FIXED_CONTRIB, DEFAULT_PATENT_COST
+from calculator.engine import (
+    REGIME_CALCULATORS,
+    UPLIFT_SOLVER_BISECT,
+    _build_context,
+    _find_multiplier_to_target,
+)
+from calculator.metrics import (
+    ENGINE_STAGE_SECONDS,
+    REGIME_RESULTS,
+    UPLIFT_PROBES,
+    UPLIFT_SEARCHES,
+    Counter,
+    CounterCallback,
+    GaugeCallback,
+    Histogram,
+    Registry,
+    mark_process_dead,
+)
+
+
+def build_input(**overrides) -> CalcInput:
+    data = {
+        "revenue": 8_000_000,
+        "cost_percent": 35,
+        "vat_purchases_percent": 60,
+        "rent": 400_000,
+        "fixed_contrib": DEFAULT_FIXED_CONTRIB,
+        "employees": 4,
+        "salary": 45_000,
+        "fot_mode": "staff",
+        "fot_annual": 0.0,
+        "other_mode": "percent",
+        "other_percent": 12,
+        "other_amount": 0.0,
+        "transition_mode": "none",
+        "accumulated_vat_credit": 0.0,
+        "stock_expense_amount": 0.0,
+        "patent_cost_year": DEFAULT_PATENT_COST,
+        "purchases_month_percents": [100.0] * 12,
+    }
+    data.update(overrides)
+    return CalcInput(**data)
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry(prefix="test_")
+    histogram = registry.register(Histogram("latency_seconds", "Задержка.", ("route",), buckets=(0.1, 1.0)))
+    counter = registry.register(Counter("hits_total", 'Счётчик "попаданий".', ("route",)))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, "index")
+    counter.inc("a\"b")
+
+    assert registry.render().splitlines() == [
+        "# HELP test_latency_seconds Задержка.",
+        "# TYPE test_latency_seconds histogram",
+        'test_latency_seconds_bucket{route="index",le="0.1"} 1',
+        'test_latency_seconds_bucket{route="index",le="1"} 2',
+        'test_latency_seconds_bucket{route="index",le="+Inf"} 3',
+        'test_latency_seconds_sum{route="index"} 5.55',
+        'test_latency_seconds_count{route="index"} 3',
+        '# HELP test_hits_total Счётчик "попаданий".',
+        "# TYPE test_hits_total counter",
+        'test_hits_total{route="a\\"b"} 1',
+    ]
+
+
+def shared_registry(directory):
+    registry = Registry(prefix="test_", directory=directory)
+    registry.register(Counter("hits_total", "Попадания.", ("route",)))
+    registry.register(Histogram("latency_seconds", "Задержка.", (), buckets=(0.1, 1.0)))
+    registry.register(GaugeCallback("entries", "Записей.", (), lambda: {(): 3.0}))
+    return registry
+
+
+def test_shared_registry_sums_processes(tmp_path, monkeypatch):
+    # Two workers, each with its own registry in its own memory.
+    monkeypatch.setattr(os, "getpid", lambda: 101)
+    first = shared_registry(tmp_path)
+    first.get("hits_total").inc("index")
+    first.get("latency_seconds").observe(0.05)
+    first.publish()
+    monkeypatch.setattr(os, "getpid", lambda: 102)
+    second = shared_registry(tmp_path)
+    second.get("hits_total").inc("index", amount=2)
+    second.get("latency_seconds").observe(0.5)
+
+    lines = second.render().splitlines()
+    assert first.render().splitlines() == lines
+    assert 'test_hits_total{route="index"} 3' in lines
+    assert 'test_latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'test_latency_seconds_count 2' in lines
+    assert "test_entries 6" in lines
+    assert not any("worker" in line or "pid" in line for line in lines)
+
+    # An exited worker's counts stay in the totals; its gauge is gone.
+    mark_process_dead(101, second)
+    assert not (tmp_path / "101.db").exists()
+    lines = second.render().splitlines()
+    assert 'test_hits_total{route="index"} 3' in lines
+    assert 'test_latency_seconds_count 2' in lines
+    assert "test_entries 3" in lines
+
+
+def _count_in_child(directory):
+    registry = shared_registry(directory)
+    registry.get("hits_total").inc("index", amount=5)
+
+
+def test_shared_registry_reads_a_forked_worker(tmp_path):
+    if "fork" not in multiprocessing.get_all_start_methods():
+        pytest.skip("needs the fork start method")
+    registry = shared_registry(tmp_path)
+    registry.get("hits_total").inc("index")
+
+    child = multiprocessing.get_context("fork").Process(target=_count_in_child, args=(tmp_path,))
+    child.start()
+    child.join()
+
+    assert 'test_hits_total{route="index"} 6' in registry.render().splitlines()
+    assert registry.values("hits_total") == {("index",): 6.0}
+    assert registry.get("hits_total").value("index") == 1.0
+
+
+def test_shared_counter_callback_and_reset(tmp_path):
+    registry = shared_registry(tmp_path)
+    hits = {("index",): 4.0}
+    registry.register(CounterCallback("cache_hits_total", "Попадания в кэш.", ("cache",), lambda: hits))
+    registry.get("hits_total").inc("index")
+
+    assert 'test_cache_hits_total{cache="index"} 4' in registry.render().splitlines()
+    registry.reset()
+    assert 'test_hits_total{route="index"} 0' in registry.render().splitlines()
+
+
+def test_run_calculation_records_stages_and_availability():
+    calc_input = build_input()
+    stages = {stage: ENGINE_STAGE_SECONDS.count(stage) for stage in ("context", "patent_targets", "total")}
+    available = {regime_id: REGIME_RESULTS.value(regime_id, "true") for regime_id in REGIME_CALCULATORS}
+    unavailable = {regime_id: REGIME_RESULTS.value(regime_id, "false") for regime_id in REGIME_CALCULATORS}
+
+    summary = run_calculation(calc_input)
+
+    for stage, count in stages.items():
+        assert ENGINE_STAGE_SECONDS.count(stage) == count + 1
+    for title, record, ok in summary.results:
+        if ok:
+            assert REGIME_RESULTS.value(record.regime, "true") == available[record.regime] + 1
+    assert sum(REGIME_RESULTS.value(regime_id, "false") - unavailable[regime_id] for regime_id in REGIME_CALCULATORS) == (
+        sum(1 for _title, _record, ok in summary.results if not ok)
+    )
+
+
+def test_bisection_probes_are_counted():
+    calc_input = build_input(revenue=3_000_000)
+    ctx, _ = _build_context(calc_input)
+    target = REGIME_CALCULATORS["patent"](calc_input, ctx).net_profit
+    base = REGIME_CALCULATORS["osno_ip"](calc_input, ctx).net_profit
+    probes = UPLIFT_PROBES.value(UPLIFT_SOLVER_BISECT)
+    searches = sum(UPLIFT_SEARCHES.value(UPLIFT_SOLVER_BISECT, outcome) for outcome in ("found", "unattainable"))
+
+    _find_multiplier_to_target("osno_ip", calc_input, ctx, target, base, method=UPLIFT_SOLVER_BISECT)
+
+    assert UPLIFT_PROBES.value(UPLIFT_SOLVER_BISECT) > probes
+    assert sum(UPLIFT_SEARCHES.value(UPLIFT_SOLVER_BISECT, outcome) for outcome in ("found", "unattainable")) == searches + 1
+
+
+def test_metrics_endpoint():
+    pytest.importorskip("flask")
+    import app as application
+
+    client = application.app.test_client()
+    form = {"revenue": "8000000", "cost_percent": "35", "employees": "4", "salary": "45000"}
+    client.post("/", data=form)
+    client.post("/", data=form)
+    client.get("/missing")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    text = response.data.decode("utf-8")
+    assert 'taxcalc_http_requests_total{endpoint="index",method="POST",status="200"}' in text
+    assert 'taxcalc_http_requests_total{endpoint="unmatched",method="GET",status="404"}' in text
+    assert 'taxcalc_http_request_duration_seconds_bucket{endpoint="index",le="+Inf"}' in text
+    assert 'taxcalc_template_render_seconds_count{template="partials/_results.html"}' in text
+    assert 'taxcalc_engine_stage_seconds_count{stage="calc_data"}' in text
+    for cache in ("calculation", "form", "results", "page"):
+        assert f'taxcalc_cache_hit_ratio{{cache="{cache}"}}' in text
+    assert application.result_fragments.hits >= 1
@@ -0,0 +1,150 @@
+from dataclasses import replace
+from pathlib import Path
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from calculator import CalcInput, run_calculation
+from calculator.constants import DEFAULT_FIXED_CONTRIB, DEFAULT_PATENT_COST
+from calculator.montecarlo import lognormal, normal, sample_columns, simulate, triangular, uniform
+
+DISTRIBUTIONS = {
+    "revenue": lognormal(12_000_000, 0.35),
+    "cost_percent": triangular(30, 40, 60),
+    "other_percent": uniform(5, 15),
+    "rent": normal(500_000, 100_000),
+    "payroll": normal(1_800_000, 300_000),
+}
+
+
+def build_input(**overrides):
+    data = {
+        "revenue": 12_000_000,
+        "cost_percent": 40,
+        "vat_purchases_percent": 70,
+        "rent": 500_000,
+        "fixed_contrib": DEFAULT_FIXED_CONTRIB,
+        "employees": 3,
+        "salary": 50_000,
+        "fot_mode": "staff",
+        "fot_annual": 0.0,
+        "other_mode": "percent",
+        "other_percent": 10,
+        "other_amount": 0.0,
+        "transition_mode": "none",
+        "accumulated_vat_credit": 0.0,
+        "stock_expense_amount": 0.0,
+        "patent_cost_year": DEFAULT_PATENT_COST,
+        "purchases_month_percents": [100.0] * 12,
+    }
+    data.update(overrides)
+    return CalcInput(**data)
+
+
+def sample_input(columns, row):
+    return build_input(
+        revenue=float(columns["revenue"][row]),
+        cost_percent=float(columns["cost_percent"][row]),
+        other_percent=float(columns["other_percent"][row]),
+        rent=float(columns["rent"][row]),
+        fot_mode="annual",
+        fot_annual=float(columns["fot_annual"][row]),
+    )
+
+
+def test_samples_are_seeded_and_non_negative():
+    data = build_input()
+    first = sample_columns(data, DISTRIBUTIONS, 2_000, seed=7)
+    reordered = sample_columns(data, dict(reversed(list(DISTRIBUTIONS.items()))), 2_000, seed=7)
+
+    for name in ("revenue", "cost_percent", "other_percent", "rent", "fot_annual"):
+        assert np.array_equal(first[name], reordered[name])
+        assert first[name].min() >= 0
+    assert first["revenue"].min() > 0
+    assert not np.array_equal(first["revenue"], sample_columns(data, DISTRIBUTIONS, 2_000, seed=8)["revenue"])
+
+
+def test_statistics_match_scalar_engine():
+    data = build_input()
+    samples = 300
+    columns = sample_columns(data, DISTRIBUTIONS, samples, seed=3)
+    result = simulate(data, DISTRIBUTIONS, samples, seed=3)
+
+    summaries = [run_calculation(sample_input(columns, row)) for row in range(samples)]
+    winners = [summary.top_results[0][1]["regime_id"] for summary in summaries]
+    for regime_id in result.regimes:
+        assert result.probability_best[regime_id] == pytest.approx(winners.count(regime_id) / samples)
+
+    burdens = {}
+    best = []
+    for row, summary in enumerate(summaries):
+        records = [record for _title, record, ok in summary.results if ok]
+        best.append(min(record["total_burden"] for record in records))
+        for record in records:
+            burdens.setdefault(record["regime_id"], {})[row] = record
+    for regime_id, rows in burdens.items():
+        profits = [record["net_profit"] for record in rows.values()]
+        assert result.availability[regime_id] == pytest.approx(len(rows) / samples)
+        assert result.net_profit_mean[regime_id] == pytest.approx(np.mean(profits), rel=1e-9)
+        assert np.allclose(result.net_profit_percentiles[regime_id], np.percentile(profits, result.percentiles))
+        regret = np.mean([record["total_burden"] - best[row] for row, record in rows.items()])
+        assert result.regret[regime_id] == pytest.approx(regret, rel=1e-9, abs=1e-6)
+
+
+def test_probabilities_sum_to_one_and_ranking_follows_them():
+    result = simulate(build_input(), DISTRIBUTIONS, 5_000, seed=1)
+
+    assert sum(result.probability_best.values()) == pytest.approx(1.0)
+    leader = result.ranking()[0]
+    assert result.probability_best[leader] == max(result.probability_best.values())
+    assert all(value >= 0 for value in result.regret.values())
+
+
+def test_net_profit_metric_picks_most_profitable():
+    data = build_input()
+    result = simulate(data, DISTRIBUTIONS, 200, seed=5, metric="net_profit")
+    columns = sample_columns(data, DISTRIBUTIONS, 200, seed=5)
+
+    winners = []
+    for row in range(200):
+        records = [record for _title, record, ok in run_calculation(sample_input(columns, row)).results if ok]
+        winners.append(max(records, key=lambda record: record["net_profit"])["regime_id"])
+    for regime_id in result.regimes:
+        assert result.probability_best[regime_id] == pytest.approx(winners.count(regime_id) / 200)
+
+
+def test_workers_give_identical_results():
+    data = build_input()
+    single = simulate(data, DISTRIBUTIONS, 3_000, seed=11)
+    pooled = simulate(data, DISTRIBUTIONS, 3_000, seed=11, workers=2, chunk_size=1_000)
+
+    assert single.to_dict() == pooled.to_dict()
+
+
+def test_unavailable_regime_reports_nan():
+    data = build_input(revenue=100_000_000)
+    result = simulate(data, {"revenue": uniform(90_000_000, 110_000_000)}, 500, seed=2)
+
+    assert result.availability["ausn_income"] == 0.0
+    assert result.probability_best["ausn_income"] == 0.0
+    assert np.isnan(result.regret["ausn_income"])
+    assert result.to_dict()["regimes"]["ausn_income"]["net_profit_mean"] is None
+    assert result.ranking()[-1] in ("ausn_income", "ausn_profit", "patent")
+
+
+def test_invalid_arguments():
+    data = build_input()
+    with pytest.raises(ValueError):
+        simulate(data, {"salary": uniform(1, 2)}, 10)
+    with pytest.raises(ValueError):
+        simulate(data, DISTRIBUTIONS, 10, metric="tax")
+    with pytest.raises(ValueError):
+        simulate(data, DISTRIBUTIONS, 0)
+    with pytest.raises(ValueError):
+        simulate(replace(data, other_mode="amount"), DISTRIBUTIONS, 10)
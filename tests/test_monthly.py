@@ -0,0 +1,128 @@
+from pathlib import Path
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from calculator import CalcInput, run_calculation
+from calculator.constants import DEFAULT_FIXED_CONTRIB, DEFAULT_PATENT_COST
+from calculator.engine import REGIME_CALCULATORS
+from calculator.monthly import PERIOD_MONTH, PERIOD_QUARTER, calculate_monthly, purchase_weights
+
+
+def build_input(**overrides):
+    data = {
+        "revenue": 10_000_000,
+        "cost_percent": 40,
+        "vat_purchases_percent": 70,
+        "rent": 500_000,
+        "fixed_contrib": DEFAULT_FIXED_CONTRIB,
+        "employees": 3,
+        "salary": 50_000,
+        "fot_mode": "staff",
+        "fot_annual": 0.0,
+        "other_mode": "percent",
+        "other_percent": 10,
+        "other_amount": 0.0,
+        "transition_mode": "none",
+        "accumulated_vat_credit": 0.0,
+        "stock_expense_amount": 0.0,
+        "patent_cost_year": DEFAULT_PATENT_COST,
+        "purchases_month_percents": [100.0] * 12,
+    }
+    data.update(overrides)
+    return CalcInput(**data)
+
+
+SEASONAL = [20.0, 20.0, 40.0, 60.0, 80.0, 100.0, 100.0, 120.0, 150.0, 180.0, 250.0, 280.0]
+
+
+@pytest.mark.parametrize(
+    "calc_input",
+    [
+        build_input(),
+        build_input(purchases_month_percents=SEASONAL, transition_mode="vat", accumulated_vat_credit=300_000),
+        build_input(revenue=70_000_000, other_mode="amount", other_amount=900_000, vat_share_cogs=0.5),
+        build_input(employees=0, salary=0.0, transition_mode="stock", stock_expense_amount=800_000, purchases_month_percents=[]),
+    ],
+)
+def test_year_totals_match_run_calculation(calc_input):
+    monthly = calculate_monthly(calc_input)
+    summary = run_calculation(calc_input, patent_targets=False)
+    payloads = {payload["regime_id"]: payload for _title, payload, ok in summary.results if ok and payload}
+    assert set(monthly.regimes) == set(payloads)
+    assert set(monthly.unavailable) == set(REGIME_CALCULATORS) - set(payloads)
+
+    for regime_id in monthly.regimes:
+        for metric, value in monthly.annual(regime_id).items():
+            assert value == pytest.approx(payloads[regime_id][metric], rel=1e-9, abs=1e-6), (regime_id, metric)
+        months = monthly.per_period(regime_id, "tax", PERIOD_MONTH)
+        quarters = monthly.per_period(regime_id, "tax", PERIOD_QUARTER)
+        assert months.shape == (12,) and quarters.shape == (4,)
+        assert months.sum() == pytest.approx(payloads[regime_id]["tax"], abs=1e-6)
+        assert quarters.sum() == pytest.approx(months.sum(), abs=1e-6)
+
+
+def test_uniform_months_split_evenly():
+    monthly = calculate_monthly(build_input())
+    np.testing.assert_allclose(monthly.context_per_period("revenue"), np.full(12, 10_000_000 / 12))
+    np.testing.assert_allclose(monthly.context_per_period("purchases"), np.full(12, 4_000_000 / 12))
+    np.testing.assert_allclose(monthly.per_period("usn_income_vat_22", "vat", PERIOD_QUARTER), [monthly.annual("usn_income_vat_22")["vat"] / 4] * 4)
+
+
+def test_seasonal_purchases_move_vat_between_quarters():
+    calc_input = build_input(purchases_month_percents=SEASONAL)
+    monthly = calculate_monthly(calc_input)
+
+    purchases = monthly.context_per_period("purchases")
+    np.testing.assert_allclose(purchases, 4_000_000 * np.asarray(SEASONAL) / sum(SEASONAL))
+    assert monthly.context_per_period("purchases_vat").sum() == pytest.approx(
+        4_000_000 * 0.7 * 22 / 122
+    )
+
+    vat = monthly.per_period("osno_ooo", "vat", PERIOD_QUARTER)
+    assert vat[0] > vat[3]
+    osno = next(payload for _title, payload, ok in run_calculation(calc_input).results if ok and payload["regime_id"] == "osno_ooo")
+    assert vat.sum() == pytest.approx(osno["vat"])
+
+    payable = monthly.payable("ausn_profit", "tax", PERIOD_MONTH)
+    assert np.all(payable >= 0)
+    assert payable.sum() >= monthly.annual("ausn_profit")["tax"] - 1e-6
+
+
+def test_usn_profit_minimum_tax_applies_to_the_year_only():
+    calc_input = build_input(cost_percent=85, purchases_month_percents=[100.0] + [0.0] * 11)
+    monthly = calculate_monthly(calc_input)
+
+    # All goods are bought in January, so the running profit is negative
+    # through the first quarter and no advance is due.
+    tax = monthly.cumulative("usn_profit_no_vat", "tax")
+    assert tax[2] == 0.0
+    assert monthly.per_period("usn_profit_no_vat", "tax", PERIOD_QUARTER)[0] == 0.0
+    np.testing.assert_allclose(tax[:11], monthly.context["usn_profit_regular_tax"][:11])
+    # The year pays at least 1% of revenue.
+    assert tax[-1] >= 0.01 * calc_input.revenue - 1e-6
+    running = monthly.running["usn_profit_no_vat"]
+    np.testing.assert_allclose(running["revenue"] - running["expenses"] - running["tax"], running["net_profit"])
+
+
+def test_unavailable_regimes_stay_out_of_every_month():
+    monthly = calculate_monthly(build_input(revenue=70_000_000))
+    assert "ausn_income" in monthly.unavailable and "ausn_income" not in monthly.running
+
+
+def test_purchase_weights_validation():
+    np.testing.assert_allclose(purchase_weights([]), np.full(12, 1 / 12))
+    np.testing.assert_allclose(purchase_weights([0.0] * 12), np.full(12, 1 / 12))
+    assert purchase_weights([200.0] + [0.0] * 11)[0] == 1.0
+    with pytest.raises(ValueError):
+        purchase_weights([100.0] * 11)
+    with pytest.raises(ValueError):
+        purchase_weights([-1.0] + [100.0] * 11)
+    with pytest.raises(ValueError):
+        calculate_monthly(build_input()).per_period("patent", "tax", "week")
@@ -0,0 +1,112 @@
+from dataclasses import replace
+from pathlib import Path
+import multiprocessing
+import os
+import pickle
+import sys
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from calculator import CalcInput, run_calculation
+from calculator.constants import DEFAULT_FIXED_CONTRIB, DEFAULT_PATENT_COST
+from calculator import parallel
+from calculator.parallel import ParallelCalculator, run_calculation_parallel
+
+
+def build_input(**overrides):
+    data = {
+        "revenue": 5_000_000,
+        "cost_percent": 30,
+        "vat_purchases_percent": 80,
+        "rent": 240_000,
+        "fixed_contrib": DEFAULT_FIXED_CONTRIB,
+        "employees": 1,
+        "salary": 35_000,
+        "fot_mode": "staff",
+        "fot_annual": 0.0,
+        "other_mode": "percent",
+        "other_percent": 6,
+        "other_amount": 0.0,
+        "transition_mode": "none",
+        "accumulated_vat_credit": 0.0,
+        "stock_expense_amount": 0.0,
+        "patent_cost_year": DEFAULT_PATENT_COST,
+        "purchases_month_percents": [100.0] * 12,
+    }
+    data.update(overrides)
+    return CalcInput(**data)
+
+
+def net_profits(summary):
+    return [payload["net_profit"] if payload else None for _title, payload, _ok in summary.results]
+
+
+def test_summary_survives_pickling():
+    summary = run_calculation(build_input())
+    restored = pickle.loads(pickle.dumps(summary, protocol=pickle.HIGHEST_PROTOCOL))
+    for (_t, payload, _ok), (_rt, restored_payload, _rok) in zip(summary.results, restored.results):
+        assert payload == restored_payload
+        assert payload is None or dict(payload) == dict(restored_payload)
+
+
+def test_parallel_run_keeps_input_order_and_reports_row_errors():
+    inputs = [build_input(revenue=1_000_000 * (index + 1)) for index in range(23)]
+    inputs[5] = replace(inputs[5], revenue=None)
+
+    outcomes = run_calculation_parallel(inputs, workers=2, chunk_size=4)
+
+    assert [outcome.index for outcome in outcomes] == list(range(len(inputs)))
+    assert not outcomes[5].ok and outcomes[5].summary is None
+    assert outcomes[5].error.startswith("TypeError")
+    for outcome, data in zip(outcomes, inputs):
+        if outcome.index == 5:
+            continue
+        assert outcome.ok
+        assert net_profits(outcome.summary) == pytest.approx(net_profits(run_calculation(data)))
+
+
+def test_parallel_calculator_reuses_pool_and_streams_generators():
+    with ParallelCalculator(workers=2, chunk_size=3, regimes=["patent"], patent_targets=False) as calculator:
+        first = list(calculator.map(build_input(revenue=value) for value in (2e6, 3e6, 4e6, 5e6)))
+        pool = calculator._executor
+        second = list(calculator.map(iter([build_input()])))
+        assert calculator._executor is pool
+
+    assert [len(outcome.summary.results) for outcome in first + second] == [1] * 5
+    assert calculator._executor is None
+
+
+def _exit_on_marked_row(data, **kwargs):
+    if data.revenue == 13.0:
+        os._exit(1)
+    return run_calculation(data, **kwargs)
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="the patch reaches workers only via fork")
+def test_dead_worker_fails_only_its_chunks(monkeypatch):
+    monkeypatch.setattr(parallel, "run_calculation", _exit_on_marked_row)
+    inputs = [build_input(revenue=1_000_000 * (index + 1)) for index in range(12)]
+    inputs[2] = replace(inputs[2], revenue=13.0)
+
+    with ParallelCalculator(workers=1, chunk_size=2) as calculator:
+        outcomes = list(calculator.map(inputs))
+        # Chunks in flight when the worker died: rows 2-3 and maybe 4-5.
+        assert [outcome.index for outcome in outcomes] == list(range(len(inputs)))
+        assert outcomes[2].error.startswith("BrokenProcessPool")
+        assert all(outcomes[index].ok for index in (0, 1, *range(6, 12)))
+
+        later = list(calculator.map([build_input()]))
+        assert later[0].ok
+
+
+def test_parallel_calculator_validates_options():
+    with pytest.raises(ValueError):
+        ParallelCalculator(workers=0)
+    with pytest.raises(ValueError):
+        ParallelCalculator(chunk_size=0)
+    with pytest.raises(ValueError):
+        ParallelCalculator(regimes=["usn_unknown"])
@@ -9,8 +9,7 @@ if str(ROOT) not in sys.path:
 
 from calculator import CalcInput
 from calculator.constants import DEFAULT_FIXED_CONTRIB, DEFAULT_PATENT_COST, THRESHOLD_1_PERCENT
-from calculator.engine import _build_context
-from calculator.regimes import patent
+from calculator.engine import REGIME_CALCULATORS, _build_context
 
 
 def make_input(**overrides) -> CalcInput:
@@ -40,7 +39,7 @@ def make_input(**overrides) -> CalcInput:
 
 def run_patent(calc_input: CalcInput):
     ctx, _ = _build_context(calc_input)
-    result = patent.calculate_patent(calc_input, ctx)
+    result = REGIME_CALCULATORS["patent"](calc_input, ctx)
     return result, ctx
 
 
@@ -0,0 +1,182 @@
+from pathlib import Path
+from urllib.parse import parse_qsl
+import sys
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from calculator import CalcInput
+from calculator import permalink
+from calculator.constants import DEFAULT_FIXED_CONTRIB, DEFAULT_PATENT_COST
+from calculator.inputs import InputError
+from calculator.permalink import canonical_query, etag_for, parse_query
+
+
+def build_input(**overrides):
+    data = {
+        "revenue": 8_000_000,
+        "cost_percent": 35,
+        "vat_purchases_percent": 60,
+        "rent": 400_000,
+        "fixed_contrib": DEFAULT_FIXED_CONTRIB,
+        "employees": 4,
+        "salary": 45_000,
+        "fot_mode": "staff",
+        "fot_annual": 0.0,
+        "other_mode": "percent",
+        "other_percent": 12,
+        "other_amount": 0.0,
+        "transition_mode": "none",
+        "accumulated_vat_credit": 0.0,
+        "stock_expense_amount": 0.0,
+        "patent_cost_year": DEFAULT_PATENT_COST,
+        "purchases_month_percents": [100.0] * 12,
+    }
+    data.update(overrides)
+    return CalcInput(**data)
+
+
+def round_trip(data):
+    return canonical_query(CalcInput(**parse_query(dict(parse_qsl(canonical_query(data))))))
+
+
+def test_canonical_query_omits_defaults_and_round_trips():
+    data = build_input()
+    query = canonical_query(data)
+
+    assert query == "revenue=8000000&cost_percent=35&vat_purchases_percent=60&rent=400000&salary=45000&other_percent=12&employees=4"
+    assert round_trip(data) == query
+
+    seasonal = build_input(purchases_month_percents=[50.0] * 6 + [150.0] * 6, vat_share_rent=0.5, fot_mode="annual", fot_annual=1_200_000)
+    assert "purchases_dec=150" in canonical_query(seasonal)
+    assert "vat_share_rent=0.5" in canonical_query(seasonal)
+    assert round_trip(seasonal) == canonical_query(seasonal)
+
+
+def test_equivalent_inputs_share_one_query():
+    base = build_input(fot_mode="annual", fot_annual=1_000_000)
+
+    assert canonical_query(base) == canonical_query(build_input(fot_mode="annual", fot_annual=1_000_000, salary=99_999))
+    assert canonical_query(base) == canonical_query(build_input(fot_mode="annual", fot_annual=1_000_000.0000001))
+    # Explicit shares equal to their defaults change nothing.
+    assert canonical_query(base) == canonical_query(
+        build_input(fot_mode="annual", fot_annual=1_000_000, vat_share_cogs=60, vat_share_rent=1.0)
+    )
+    assert canonical_query(base) != canonical_query(build_input(fot_mode="annual", fot_annual=1_000_001))
+
+
+def test_etag_depends_on_rule_set_version(monkeypatch):
+    query = canonical_query(build_input())
+    tag = etag_for(query)
+
+    assert tag == etag_for(query)
+    assert tag != etag_for(canonical_query(build_input(revenue=8_000_001)))
+    monkeypatch.setattr(permalink, "RULESET_VERSION", "next")
+    assert etag_for(query) != tag
+
+
+def test_etag_depends_on_the_build(tmp_path):
+    query = canonical_query(build_input())
+    templates = tmp_path / "templates"
+    (templates / "partials").mkdir(parents=True)
+    (templates / "partials" / "_form.html").write_text("<form></form>")
+    build = permalink.build_fingerprint({"app.js": "app.0123456789ab.js"}, templates)
+
+    assert build == permalink.build_fingerprint({"app.js": "app.0123456789ab.js"}, templates)
+    assert build != permalink.build_fingerprint({"app.js": "app.ba9876543210.js"}, templates)
+    assert etag_for(query, build) != etag_for(query)
+    (templates / "partials" / "_form.html").write_text("<form method=post></form>")
+    assert permalink.build_fingerprint({"app.js": "app.0123456789ab.js"}, templates) != build
+
+
+def test_parse_query_validates_like_the_form():
+    assert parse_query({"revenue": "1000"})["purchases_month_percents"] == [100.0] * 12
+    with pytest.raises(InputError):
+        parse_query({"revenue": "0"})
+    with pytest.raises(InputError):
+        parse_query({"revenue": "много"})
+
+
+def test_result_page_is_cacheable(monkeypatch):
+    pytest.importorskip("flask")
+    import app as application
+
+    client = application.app.test_client()
+    url = f"/calc?{canonical_query(build_input())}"
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert 'data-regime-id="' in response.data.decode("utf-8")
+    assert response.headers["Cache-Control"] == f"public, max-age={application.PERMALINK_MAX_AGE}"
+    etag = response.headers["ETag"]
+    assert etag.startswith('"') and not etag.startswith("W/")
+
+    def fail(*args, **kwargs):
+        raise AssertionError("calculated or rendered on a conditional hit")
+
+    monkeypatch.setattr(application.calculation_cache, "calculate", fail)
+    monkeypatch.setattr(application, "render_template", fail)
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.data == b""
+
+
+def test_new_asset_manifest_invalidates_cached_pages(monkeypatch):
+    pytest.importorskip("flask")
+    import app as application
+
+    client = application.app.test_client()
+    url = f"/calc?{canonical_query(build_input())}"
+    etag = client.get(url).headers["ETag"]
+
+    # What a deploy with rebuilt bundles starts with.
+    manifest = {**application.asset_manifest, "app.js": "app.0123456789ab.js"}
+    monkeypatch.setattr(application, "asset_manifest", manifest)
+    monkeypatch.setattr(application, "build_id", permalink.build_fingerprint(manifest, application.TEMPLATE_DIR))
+
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_result_page_restores_the_form_state():
+    pytest.importorskip("flask")
+    import re
+
+    from app import app
+
+    query = canonical_query(build_input(other_mode="amount", other_amount=250_000))
+    assert "other_amount=250000" in query and query.endswith("other_mode=absolute")
+
+    client = app.test_client()
+    html = client.get(f"/calc?{query}").data.decode("utf-8")
+    checked = re.findall(r'name="other_mode" value="(\w+)"\s+checked', html)
+    assert checked == ["absolute"]
+    assert re.search(r'id="other_percent"[^>]*readonly', html)
+    assert re.search(r'id="other_amount"[^>]*value="250000.0"\s*>', html)
+
+    # Links written with the older spelling lead to the same page.
+    legacy = client.get(f"/calc?{query.replace('absolute', 'amount')}")
+    assert legacy.status_code == 301
+    assert legacy.headers["Location"].endswith(f"/calc?{query}")
+
+
+def test_result_page_redirects_to_canonical_query_and_rejects_bad_input():
+    pytest.importorskip("flask")
+    from app import app
+
+    client = app.test_client()
+    response = client.get("/calc?employees=4&revenue=8e6&salary=45000&cost_percent=35.0&fot_annual=5")
+    assert response.status_code == 301
+    assert response.headers["Location"].endswith("/calc?revenue=8000000&cost_percent=35&salary=45000&employees=4")
+
+    response = client.get("/calc?revenue=0")
+    assert response.status_code == 400
+    assert "ETag" not in response.headers
+
+    response = client.post("/", data={"revenue": "8000000", "cost_percent": "35"})
+    assert 'href="/calc?revenue=8000000&amp;cost_percent=35' in response.data.decode("utf-8")
@@ -0,0 +1,159 @@
+from pathlib import Path
+import random
+import sys
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from calculator import CalcInput, run_calculation
+from calculator.constants import DEFAULT_FIXED_CONTRIB, DEFAULT_PATENT_COST
+from calculator.engine import (
+    REGIME_CALCULATORS,
+    UPLIFT_SOLVER_BISECT,
+    UPLIFT_SOLVER_EXACT,
+    _apply_patent_targets,
+    _build_context,
+    _clone_input_for_multiplier,
+    _find_multiplier_to_target,
+)
+from calculator.piecewise import PiecewiseLinear, build_regime_curves
+
+
+def make_input(**overrides) -> CalcInput:
+    data = {
+        "revenue": 6_000_000,
+        "cost_percent": 35,
+        "vat_purchases_percent": 60,
+        "rent": 400_000,
+        "fixed_contrib": DEFAULT_FIXED_CONTRIB,
+        "employees": 2,
+        "salary": 45_000,
+        "fot_mode": "staff",
+        "fot_annual": 0.0,
+        "other_mode": "percent",
+        "other_percent": 8,
+        "other_amount": 0.0,
+        "transition_mode": "none",
+        "accumulated_vat_credit": 0.0,
+        "stock_expense_amount": 0.0,
+        "patent_cost_year": DEFAULT_PATENT_COST,
+        "purchases_month_percents": [100.0] * 12,
+    }
+    data.update(overrides)
+    return CalcInput(**data)
+
+
+def random_inputs(count, seed=11):
+    rng = random.Random(seed)
+    return [
+        make_input(
+            revenue=rng.choice([400_000, 2_500_000, 9_000_000, 35_000_000, 140_000_000]),
+            cost_percent=rng.uniform(0, 90),
+            vat_purchases_percent=rng.uniform(0, 100),
+            rent=rng.choice([0.0, 250_000, 2_000_000]),
+            employees=rng.choice([0, 3, 8]),
+            salary=rng.choice([0.0, 60_000]),
+            other_mode=rng.choice(["percent", "amount"]),
+            other_percent=rng.uniform(0, 15),
+            other_amount=rng.choice([0.0, 500_000]),
+            transition_mode=rng.choice(["none", "vat", "stock"]),
+            accumulated_vat_credit=rng.choice([0.0, 1_500_000]),
+            stock_expense_amount=rng.choice([0.0, 900_000]),
+            patent_cost_year=rng.choice([30_000, 250_000, 1_200_000]),
+            vat_share_rent=rng.choice([None, 0.4]),
+        )
+        for _ in range(count)
+    ]
+
+
+def test_piecewise_maximum_inserts_crossing():
+    line = PiecewiseLinear.linear(0.0, 10.0, -5.0, 1.0)
+    clamped = line.maximum(0.0)
+    assert clamped.xs == [0.0, 5.0, 10.0]
+    assert clamped(2.0) == pytest.approx(0.0)
+    assert clamped(7.5) == pytest.approx(2.5)
+    assert clamped.first_reaching(1.0) == pytest.approx(6.0)
+    assert line.roots() == [5.0]
+
+
+@pytest.mark.parametrize("calc_input", random_inputs(25))
+def test_curves_match_scalar_calculators(calc_input):
+    ctx, _ = _build_context(calc_input)
+    lo, hi = calc_input.revenue, calc_input.revenue * 3.0
+    curves = build_regime_curves(calc_input, ctx, lo, hi)
+
+    for step in range(9):
+        multiplier = 1.0 + step * 0.25
+        adjusted = _clone_input_for_multiplier(calc_input, ctx, multiplier)
+        adjusted_ctx, _ = _build_context(adjusted)
+        for regime_id, calculator in REGIME_CALCULATORS.items():
+            result = calculator(adjusted, adjusted_ctx)
+            curve = curves.get(regime_id)
+            if result is None:
+                assert curve is None or adjusted.revenue > curve.hi
+                continue
+            assert curve is not None
+            assert curve.net_profit(adjusted.revenue) == pytest.approx(result.net_profit, rel=1e-9, abs=1e-4)
+            assert curve.total_burden(adjusted.revenue) == pytest.approx(result.total_burden, rel=1e-9, abs=1e-4)
+
+
+def test_curves_scale_expenses_with_revenue():
+    calc_input = make_input()
+    ctx, _ = _build_context(calc_input)
+    curves = build_regime_curves(calc_input, ctx, 1_000_000, 20_000_000, scale_expenses=True)
+
+    probe = make_input(revenue=13_000_000)
+    probe_ctx, _ = _build_context(probe)
+    for regime_id, calculator in REGIME_CALCULATORS.items():
+        result = calculator(probe, probe_ctx)
+        assert curves[regime_id].net_profit(probe.revenue) == pytest.approx(result.net_profit, rel=1e-9)
+
+
+@pytest.mark.parametrize("calc_input", random_inputs(25, seed=5))
+def test_exact_uplift_agrees_with_bisection(calc_input):
+    ctx, _ = _build_context(calc_input)
+    target = REGIME_CALCULATORS["patent"](calc_input, ctx).net_profit
+
+    for regime_id, calculator in REGIME_CALCULATORS.items():
+        if regime_id == "patent":
+            continue
+        result = calculator(calc_input, ctx)
+        if result is None:
+            continue
+        args = (regime_id, calc_input, ctx, target, result.net_profit)
+        exact = _find_multiplier_to_target(*args, method=UPLIFT_SOLVER_EXACT)
+        bisect = _find_multiplier_to_target(*args, method=UPLIFT_SOLVER_BISECT)
+        if bisect is None:
+            assert exact is None or exact == pytest.approx(3.0, abs=1e-3)
+            continue
+        assert exact is not None
+        assert exact == pytest.approx(bisect, abs=2e-4)
+        assert exact <= bisect + 1e-12
+
+
+def test_exact_uplift_hits_target_profit():
+    calc_input = make_input(patent_cost_year=40_000, cost_percent=55)
+    summary = run_calculation(calc_input)
+    payloads = {payload["regime_id"]: payload for _title, payload, ok in summary.results if ok and payload}
+    target = payloads["patent"]["net_profit"]
+    ctx, _ = _build_context(calc_input)
+
+    for regime_id, payload in payloads.items():
+        multiplier = payload.get("price_uplift_multiplier")
+        if regime_id == "patent" or multiplier in (None, 1.0):
+            continue
+        adjusted = _clone_input_for_multiplier(calc_input, ctx, multiplier)
+        adjusted_ctx, _ = _build_context(adjusted)
+        profit = REGIME_CALCULATORS[regime_id](adjusted, adjusted_ctx).net_profit
+        assert profit == pytest.approx(target - 1.0, abs=1e-3)
+
+
+def test_apply_patent_targets_rejects_unknown_method():
+    calc_input = make_input(patent_cost_year=20_000)
+    ctx, _ = _build_context(calc_input)
+    results = {regime_id: calc(calc_input, ctx) for regime_id, calc in REGIME_CALCULATORS.items()}
+    with pytest.raises(ValueError):
+        _apply_patent_targets(calc_input, ctx, {k: v for k, v in results.items() if v}, method="newton")
@@ -0,0 +1,133 @@
+from dataclasses import replace
+from pathlib import Path
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from calculator import CalcInput, run_calculation
+from calculator.constants import DEFAULT_FIXED_CONTRIB, DEFAULT_PATENT_COST
+from calculator.engine import _build_context
+from calculator.projection import CREDIT_REGIMES, STOCK_REGIMES, calculate_projection
+
+GROWTH = (8.0, 5.0, 6.0)
+
+
+def build_input(**overrides):
+    data = {
+        "revenue": 10_000_000,
+        "cost_percent": 40,
+        "vat_purchases_percent": 70,
+        "rent": 500_000,
+        "fixed_contrib": DEFAULT_FIXED_CONTRIB,
+        "employees": 3,
+        "salary": 50_000,
+        "fot_mode": "staff",
+        "fot_annual": 0.0,
+        "other_mode": "percent",
+        "other_percent": 10,
+        "other_amount": 0.0,
+        "transition_mode": "none",
+        "accumulated_vat_credit": 0.0,
+        "stock_expense_amount": 0.0,
+        "patent_cost_year": DEFAULT_PATENT_COST,
+        "purchases_month_percents": [100.0] * 12,
+    }
+    data.update(overrides)
+    return CalcInput(**data)
+
+
+def year_input(data, year):
+    ctx, _ = _build_context(data)
+    revenue_growth, cost_growth, payroll_growth = (1 + rate / 100 for rate in GROWTH)
+    revenue = data.revenue * revenue_growth**year
+    return replace(
+        data,
+        revenue=revenue,
+        cost_percent=ctx.cost_of_goods * cost_growth**year / revenue * 100,
+        rent=data.rent * cost_growth**year,
+        other_amount=data.other_amount * cost_growth**year,
+        fot_mode="annual",
+        fot_annual=ctx.annual_fot * payroll_growth**year,
+        transition_mode="none",
+        accumulated_vat_credit=0.0,
+        stock_expense_amount=0.0,
+    )
+
+
+def payloads(data):
+    summary = run_calculation(data, patent_targets=False)
+    return {payload["regime_id"]: payload for _title, payload, ok in summary.results if ok and payload}
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        build_input(transition_mode="vat", accumulated_vat_credit=2_500_000),
+        build_input(revenue=6_000_000, transition_mode="stock", stock_expense_amount=3_000_000),
+        build_input(revenue=50_000_000, other_mode="amount", other_amount=400_000, vat_share_cogs=0.4),
+    ],
+)
+def test_projection_matches_year_by_year_simulation(data):
+    years = 6
+    projection = calculate_projection(data, years, *GROWTH)
+    mode = data.transition_mode
+    carry_regimes = {"vat": CREDIT_REGIMES, "stock": STOCK_REGIMES}.get(mode, ())
+    remaining = dict.fromkeys(carry_regimes, data.accumulated_vat_credit if mode == "vat" else data.stock_expense_amount)
+
+    for year in range(years):
+        plain = year_input(data, year)
+        base = payloads(plain)
+        for regime_id in projection.regimes:
+            if regime_id not in base:
+                assert not projection.available[regime_id][year]
+                assert np.isnan(projection.column(regime_id, "tax")[year])
+                continue
+            expected = base[regime_id]
+            if regime_id in remaining:
+                if mode == "vat":
+                    capacity = expected["vat"]
+                elif regime_id.startswith("osno"):
+                    capacity = max(base["osno_ooo"]["profit_tax_base"], 0.0)
+                else:
+                    capacity = max(expected["revenue"] - expected["expenses"], 0.0)
+                used = min(remaining[regime_id], capacity)
+                remaining[regime_id] -= used
+                amount = {"accumulated_vat_credit": used} if mode == "vat" else {"stock_expense_amount": used}
+                expected = payloads(replace(plain, transition_mode=mode, **amount))[regime_id]
+                assert projection.carryover[regime_id][year] == pytest.approx(remaining[regime_id], abs=1e-3)
+            for metric in ("tax", "vat", "insurance", "total_burden", "net_profit"):
+                assert projection.column(regime_id, metric)[year] == pytest.approx(expected[metric], rel=1e-9, abs=1e-6)
+
+
+def test_first_year_equals_run_calculation_when_carry_fits():
+    data = build_input(transition_mode="vat", accumulated_vat_credit=100_000)
+    projection = calculate_projection(data, 3, *GROWTH)
+    expected = payloads(data)
+    for regime_id, payload in expected.items():
+        assert projection.column(regime_id, "total_burden")[0] == pytest.approx(payload["total_burden"], rel=1e-9)
+    assert all(projection.carryover[regime_id][0] == 0.0 for regime_id in CREDIT_REGIMES)
+
+
+def test_credit_spreads_over_years_and_ausn_drops_out():
+    data = build_input(revenue=40_000_000, transition_mode="vat", accumulated_vat_credit=20_000_000)
+    projection = calculate_projection(data, 10, revenue_growth=[30.0] * 9)
+    leftover = projection.carryover["osno_ooo"]
+    assert np.all(np.diff(leftover) <= 0) and leftover[0] > 0
+    assert projection.available["ausn_income"][0] and not projection.available["ausn_income"][-1]
+    assert projection.best_regime_ids()[-1] is not None
+    assert projection.totals("patent")["revenue"] == pytest.approx(np.sum(40_000_000 * 1.3 ** np.arange(10)))
+
+
+def test_projection_validation():
+    with pytest.raises(ValueError):
+        calculate_projection(build_input(), 0)
+    with pytest.raises(ValueError):
+        calculate_projection(build_input(), 3, revenue_growth=[5.0])
+    with pytest.raises(ValueError):
+        calculate_projection(build_input(), 3, cost_growth=-100.0)
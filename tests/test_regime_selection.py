@@ -0,0 +1,86 @@
+from pathlib import Path
+import sys
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import calculator.engine as engine
+from calculator import CalcInput, run_calculation
+from calculator.constants import DEFAULT_FIXED_CONTRIB, DEFAULT_PATENT_COST
+
+
+def build_input(**overrides):
+    data = {
+        "revenue": 70_000_000,
+        "cost_percent": 40,
+        "vat_purchases_percent": 70,
+        "rent": 500_000,
+        "fixed_contrib": DEFAULT_FIXED_CONTRIB,
+        "employees": 3,
+        "salary": 50_000,
+        "fot_mode": "staff",
+        "fot_annual": 0.0,
+        "other_mode": "percent",
+        "other_percent": 10,
+        "other_amount": 0.0,
+        "transition_mode": "none",
+        "accumulated_vat_credit": 0.0,
+        "stock_expense_amount": 0.0,
+        "patent_cost_year": DEFAULT_PATENT_COST,
+        "purchases_month_percents": [100.0] * 12,
+    }
+    data.update(overrides)
+    return CalcInput(**data)
+
+
+def payloads(summary):
+    return {payload["regime_id"]: payload for _title, payload, ok in summary.results if ok and payload}
+
+
+def test_default_runs_every_regime_in_order():
+    summary = run_calculation(build_input())
+    assert len(summary.results) == len(engine.REGIME_CALCULATORS)
+    assert summary.results[0] == (engine.UNAVAILABLE_TITLES["ausn_income"], None, False)
+    assert list(payloads(summary)) == [rid for rid in engine.REGIME_CALCULATORS if not rid.startswith("ausn")]
+
+
+def test_subset_keeps_canonical_order_and_matches_full_run():
+    data = build_input()
+    full = payloads(run_calculation(data))
+    subset = run_calculation(data, regimes=["patent", "usn_income_no_vat"])
+
+    assert [payload["regime_id"] for _t, payload, _ok in subset.results] == ["usn_income_no_vat", "patent"]
+    for regime_id, payload in payloads(subset).items():
+        assert payload == full[regime_id]
+    assert {name for name, _payload in subset.top_results} == {"ПСН (патент)", "УСН Доходы 6%"}
+
+
+def test_patent_targets_without_patent_in_selection():
+    data = build_input(patent_cost_year=40_000)
+    summary = run_calculation(data, regimes=["usn_income_vat_22"])
+    payload = payloads(summary)["usn_income_vat_22"]
+    assert payload["price_uplift_multiplier"] == pytest.approx(
+        payloads(run_calculation(data))["usn_income_vat_22"]["price_uplift_multiplier"]
+    )
+    assert len(summary.results) == 1
+
+
+def test_patent_targets_only_run_when_requested(monkeypatch):
+    calls = []
+    original = engine._apply_patent_targets
+    monkeypatch.setattr(engine, "_apply_patent_targets", lambda *a, **k: calls.append(a) or original(*a, **k))
+
+    summary = run_calculation(build_input(), regimes=["usn_income_no_vat", "patent"], patent_targets=False)
+    assert not calls
+    assert "price_uplift_multiplier" not in payloads(summary)["usn_income_no_vat"]
+
+    run_calculation(build_input())
+    assert len(calls) == 1
+
+
+def test_unknown_regime_is_rejected():
+    with pytest.raises(ValueError):
+        run_calculation(build_input(), regimes=["usn_income_no_vat", "eshn"])
@@ -0,0 +1,96 @@
+from pathlib import Path
+import sys
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from calculator import CalcInput, run_calculation
+from calculator.constants import DEFAULT_FIXED_CONTRIB, DEFAULT_PATENT_COST
+from calculator.models import SUMMARY_FIELDS, UPLIFT_FIELDS, CalcResult
+
+
+def build_input(**overrides):
+    data = {
+        "revenue": 7_000_000,
+        "cost_percent": 45,
+        "vat_purchases_percent": 50,
+        "rent": 300_000,
+        "fixed_contrib": DEFAULT_FIXED_CONTRIB,
+        "employees": 2,
+        "salary": 40_000,
+        "fot_mode": "staff",
+        "fot_annual": 0.0,
+        "other_mode": "percent",
+        "other_percent": 5,
+        "other_amount": 0.0,
+        "transition_mode": "none",
+        "accumulated_vat_credit": 0.0,
+        "stock_expense_amount": 0.0,
+        "patent_cost_year": DEFAULT_PATENT_COST,
+        "purchases_month_percents": [100.0] * 12,
+    }
+    data.update(overrides)
+    return CalcInput(**data)
+
+
+def payloads(summary):
+    return {payload["regime_id"]: payload for _title, payload, ok in summary.results if ok and payload}
+
+
+def test_results_are_slotted_records():
+    for payload in payloads(run_calculation(build_input())).values():
+        assert isinstance(payload, CalcResult)
+        assert not hasattr(payload, "__dict__")
+        with pytest.raises(AttributeError):
+            payload.unknown_field = 1.0
+
+
+def test_record_reads_like_former_payload_dict():
+    summary = run_calculation(build_input())
+    for regime_id, payload in payloads(summary).items():
+        expected = payload.to_dict()
+        expected["regime_id"] = regime_id
+        assert dict(payload) == expected
+        assert list(payload)[: len(SUMMARY_FIELDS)] == list(SUMMARY_FIELDS)
+        assert set(UPLIFT_FIELDS) <= set(payload)
+        assert payload.get("missing") is None
+        with pytest.raises(KeyError):
+            payload["missing"]
+
+
+def test_unused_detail_fields_are_absent():
+    results = payloads(run_calculation(build_input()))
+    assert "vat_charged" not in results["usn_income_no_vat"]
+    assert "vat_charged" in results["usn_income_vat_22"]
+    assert "ausn_tax_base" not in results["ausn_income"]
+    assert "profit_tax_base" in results["osno_ooo"]
+    assert "ndfl_tax" not in results["osno_ooo"]
+    assert results["osno_ip"]["ndfl_tax"] == results["osno_ip"].tax
+
+
+def test_uplift_fields_only_after_targets():
+    summary = run_calculation(build_input(), patent_targets=False)
+    for payload in payloads(summary).values():
+        assert payload.uplift is None
+        assert "price_uplift_percent" not in payload
+        assert "price_uplift_percent" not in payload.extra
+
+
+def test_extra_keyword_is_still_accepted():
+    import pickle
+
+    from calculator.models import AusnResult
+
+    summary = dict(revenue=1.0, expenses=0.0, tax=0.0, vat=0.0, insurance=0.0, total_burden=0.0, burden_percent=0.0, net_profit=1.0)
+    plain = CalcResult(regime="custom", title="Свой режим", **summary, extra={"note_amount": 5.0})
+    assert plain["note_amount"] == 5.0
+    assert plain.to_dict()["note_amount"] == 5.0
+    assert plain.copy().extra == {"note_amount": 5.0}
+    assert pickle.loads(pickle.dumps(plain))["note_amount"] == 5.0
+
+    ausn = AusnResult(regime="ausn_income", title="АУСН", **summary, fixed_contrib=0.0, extra={"ausn_tax_base": 7.0})
+    assert ausn.ausn_tax_base == 7.0
+    assert ausn.extra == {"ausn_tax_base": 7.0, "fixed_contrib": 0.0}
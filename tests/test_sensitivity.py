@@ -0,0 +1,110 @@
+from dataclasses import replace
+from pathlib import Path
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from calculator import CalcInput, run_calculation
+from calculator.constants import DEFAULT_FIXED_CONTRIB, DEFAULT_PATENT_COST
+from calculator.inputs import InputError
+from calculator.sensitivity import Axis, sensitivity_grid
+
+
+def build_input(**overrides):
+    data = {
+        "revenue": 10_000_000,
+        "cost_percent": 40,
+        "vat_purchases_percent": 70,
+        "rent": 500_000,
+        "fixed_contrib": DEFAULT_FIXED_CONTRIB,
+        "employees": 3,
+        "salary": 50_000,
+        "fot_mode": "staff",
+        "fot_annual": 0.0,
+        "other_mode": "percent",
+        "other_percent": 10,
+        "other_amount": 0.0,
+        "transition_mode": "none",
+        "accumulated_vat_credit": 0.0,
+        "stock_expense_amount": 0.0,
+        "patent_cost_year": DEFAULT_PATENT_COST,
+        "purchases_month_percents": [100.0] * 12,
+    }
+    data.update(overrides)
+    return CalcInput(**data)
+
+
+def test_grid_cells_match_run_calculation():
+    base = build_input(vat_share_cogs=60.0)
+    grid = sensitivity_grid(base, Axis("revenue", 1_000_000, 120_000_000, 7), Axis("cost_percent", 0, 90, 5))
+    assert grid.best.shape == grid.net_profit.shape == (5, 7)
+
+    ids = grid.best_regime_ids()
+    for row, cost_percent in enumerate(grid.y_values):
+        for column, revenue in enumerate(grid.x_values):
+            summary = run_calculation(replace(base, revenue=float(revenue), cost_percent=float(cost_percent)))
+            winner = summary.top_results[0][1]
+            assert ids[row][column] == winner["regime_id"]
+            assert grid.net_profit[row, column] == pytest.approx(winner["net_profit"], rel=1e-9)
+            assert grid.burden_percent[row, column] == pytest.approx(winner["burden_percent"], rel=1e-9)
+
+
+def test_grid_accepts_other_axes_and_serializes():
+    grid = sensitivity_grid(build_input(), Axis("rent", 0, 2_000_000, 3), Axis("vat_purchases_percent", 0, 100, 2))
+    data = grid.to_dict()
+    assert data["x"] == {"field": "rent", "values": [0.0, 1_000_000.0, 2_000_000.0]}
+    assert len(data["best"]) == 2 and len(data["best"][0]) == 3
+    assert all(isinstance(value, float) for value in data["total_burden"][1])
+
+
+@pytest.mark.parametrize(
+    "x, y",
+    [
+        (Axis("revenue", 1, 10, 2), Axis("revenue", 1, 10, 2)),
+        (Axis("revenue", 1, 10, 1000), Axis("cost_percent", 0, 90, 1000)),
+    ],
+)
+def test_grid_rejects_bad_axes(x, y):
+    with pytest.raises(InputError):
+        sensitivity_grid(build_input(), x, y)
+
+
+def test_axis_validation():
+    with pytest.raises(InputError):
+        Axis("fot_mode", 0, 1, 2)
+    with pytest.raises(InputError):
+        Axis("revenue", 0, 1_000_000, 2)
+    with pytest.raises(InputError):
+        Axis("rent", -1, 1, 2)
+    with pytest.raises(InputError):
+        Axis.from_dict({"start": 1, "stop": 2}, "revenue")
+
+
+def test_sensitivity_endpoint():
+    pytest.importorskip("flask")
+    from app import app
+
+    client = app.test_client()
+    response = client.post(
+        "/api/v1/sensitivity",
+        json={
+            "input": {"cost_percent": 40, "employees": 2, "salary": 40_000},
+            "x": {"start": 1_000_000, "stop": 60_000_000, "steps": 4},
+            "y": {"start": 10, "stop": 70, "steps": 3},
+        },
+    )
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["x"]["field"] == "revenue" and data["y"]["field"] == "cost_percent"
+    assert len(data["best"]) == 3 and len(data["net_profit"][0]) == 4
+
+    response = client.post("/api/v1/sensitivity", json={"x": {"start": 0, "stop": 1, "steps": 2}, "y": {}})
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+    assert client.post("/api/v1/sensitivity", data="nope").status_code == 400
@@ -0,0 +1,101 @@
+from pathlib import Path
+import gc
+import os
+import runpy
+import sys
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+pytest.importorskip("flask")
+
+import app as application
+
+
+@pytest.fixture
+def clean_caches():
+    caches = (application.form_fragments, application.result_fragments, application.page_fragments)
+    for cache in caches:
+        cache.clear()
+    yield
+    for cache in caches:
+        cache.clear()
+
+
+def test_warm_up_fills_page_caches(clean_caches, monkeypatch):
+    application.warm_up()
+
+    assert len(application.page_fragments) == 2
+    assert len(application.result_fragments) == 2  # blank and the warm-up profile
+
+    def fail(*args, **kwargs):
+        raise AssertionError("rendered after warm-up")
+
+    monkeypatch.setattr(application, "render_template", fail)
+    client = application.app.test_client()
+    assert client.get("/").status_code == 200
+    assert client.post("/", data=application.WARM_UP_FORM).status_code == 200
+
+
+def test_warm_up_leaves_no_traffic_in_metrics(clean_caches):
+    application.warm_up()
+
+    text = application.REGISTRY.render()
+    assert "taxcalc_http_requests_total{" not in text
+    assert "taxcalc_regime_results_total{" not in text
+    assert "taxcalc_engine_stage_seconds_count{" not in text
+    assert 'taxcalc_cache_misses_total{cache="results"} 0' in text
+    assert application.calculation_cache.info().misses == 0
+    assert (application.result_fragments.hits, application.result_fragments.misses) == (0, 0)
+    # Only the counts are reset; the warmed entries stay.
+    assert len(application.result_fragments) == 2
+
+
+def test_warm_up_fails_loudly(clean_caches, monkeypatch):
+    monkeypatch.setitem(application.WARM_UP_FORM, "revenue", "-1")
+
+    with pytest.raises(RuntimeError, match="Прогрев не удался"):
+        application.warm_up()
+
+
+def test_gunicorn_settings_come_from_environment(monkeypatch):
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+    monkeypatch.setenv("GUNICORN_THREADS", "8")
+    monkeypatch.setenv("PORT", "8000")
+
+    settings = runpy.run_path(str(ROOT / "gunicorn.conf.py"))
+
+    assert settings["workers"] == 3
+    assert settings["threads"] == 8
+    assert settings["bind"] == "0.0.0.0:8000"
+    assert settings["preload_app"] is True
+
+
+def test_when_ready_freezes_the_heap():
+    settings = runpy.run_path(str(ROOT / "gunicorn.conf.py"))
+    server = type("Server", (), {"log": type("Log", (), {"info": staticmethod(lambda *args: None)})()})()
+    try:
+        settings["when_ready"](server)
+        assert gc.get_freeze_count() > 0
+    finally:
+        gc.unfreeze()
+
+
+def test_hooks_keep_metrics_of_exited_workers(tmp_path, monkeypatch):
+    from calculator import metrics
+
+    store = metrics.ProcessStore(tmp_path)
+    monkeypatch.setattr(metrics.REGISTRY, "store", store)
+    (tmp_path / "999999.db").write_bytes(b"")
+    settings = runpy.run_path(str(ROOT / "gunicorn.conf.py"))
+
+    settings["on_starting"](None)
+    assert not list(tmp_path.glob("*.db"))
+
+    store.write(metrics.CUMULATIVE, "taxcalc_hits_total", (), "", 2.0)
+    store.write(metrics.LIVE, "taxcalc_entries", (), "", 5.0)
+    settings["child_exit"](None, type("Worker", (), {"pid": os.getpid()})())
+    assert store.collect() == {"taxcalc_hits_total": {((), ""): 2.0}}
@@ -1,3 +1,5 @@
+import re
+
 import pytest
 
 pytest.importorskip("flask")
@@ -78,8 +80,12 @@ def test_index_serves_assets():
     response = client.get("/")
     assert response.status_code == 200
     html = response.data.decode("utf-8")
-    assert "css/main.css" in html
-    assert "js/app.js" in html
+    # Source files or the built bundles, depending on whether ``assets.py`` ran.
+    urls = re.findall(r'(?:src|href)="(/(?:static|assets)/[^"]+)"', html)
+    assert any(url.endswith(".css") for url in urls)
+    assert any(url.endswith(".js") for url in urls)
+    for url in urls:
+        assert client.get(url).status_code == 200, url
 
 
 def test_index_contains_calc_data_script():
@@ -116,3 +122,63 @@ def test_results_rows_have_regime_ids():
     assert response.status_code == 200
     html = response.data.decode("utf-8")
     assert 'data-regime-id="' in html
+
+
+def test_calculate_endpoint_matches_form_route():
+    from app import build_calc_data
+
+    input_data = build_input()
+    payload = {name: getattr(input_data, name) for name in input_data.__dataclass_fields__ if name != "regime"}
+    client = app.test_client()
+    response = client.post("/api/v1/calculate", json=payload)
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/json"
+    summary = run_calculation(input_data)
+    assert response.get_json() == build_calc_data(summary, summary.components, input_data)
+
+
+def test_calculate_endpoint_rejects_invalid_input():
+    client = app.test_client()
+
+    response = client.post("/api/v1/calculate", json={"revenue": 0})
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "Выручка должна быть больше нуля"
+    assert client.post("/api/v1/calculate", json={"revenue": "много"}).status_code == 400
+    assert client.post("/api/v1/calculate", json=[1, 2]).status_code == 400
+    assert client.post("/api/v1/calculate", data="revenue=1").status_code == 400
+
+
+def test_calculate_batch_streams_ndjson():
+    import json
+
+    from calculator.inputs import parse_calc_input
+
+    rows = [
+        {"id": "a", "revenue": 8_000_000, "cost_percent": 35, "employees": 4, "salary": 45_000},
+        {"id": "b", "revenue": 0},
+        {"revenue": 3_500_000, "other_mode": "amount", "other_amount": 200_000},
+    ]
+    client = app.test_client()
+
+    for body in (json.dumps(rows), "\n".join(json.dumps(row) for row in rows) + "\nnot json\n"):
+        response = client.post("/api/v1/calculate/batch", data=body, content_type="application/x-ndjson")
+        assert response.status_code == 200
+        assert response.mimetype == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.data.decode("utf-8").splitlines()]
+
+        assert [line["row"] for line in lines[:3]] == [0, 1, 2]
+        assert lines[0]["id"] == "a" and lines[0]["error"] is None
+        assert lines[1] == {
+            "row": 1,
+            "id": "b",
+            "error": "Выручка должна быть больше нуля",
+            "fields": {"revenue": "Значение должно быть больше нуля"},
+        }
+        summary = run_calculation(parse_calc_input(rows[0]))
+        assert lines[0]["top"] == [payload["regime_id"] for _title, payload in summary.top_results]
+        for _title, payload, ok in summary.results:
+            if ok:
+                assert lines[0]["regimes"][payload["regime_id"]]["net_profit"] == pytest.approx(payload["net_profit"])
+        assert "id" not in lines[2] and lines[2]["top"]
+    assert lines[3]["error"].startswith("Некорректный JSON")
@@ -0,0 +1,85 @@
+import io
+import json
+from pathlib import Path
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from calculator import run_calculation
+from calculator.inputs import InputError, parse_calc_input
+from calculator.stream import calculate_records, read_records
+
+ROWS = [
+    {"id": index, "revenue": 1_000_000 * (index + 1), "cost_percent": 30, "employees": 1, "salary": 40_000}
+    for index in range(7)
+]
+
+
+def read(body, read_size=64 * 1024):
+    return [
+        ("error", str(item)) if isinstance(item, InputError) else item
+        for item in read_records(io.BytesIO(body.encode("utf-8")), read_size)
+    ]
+
+
+@pytest.mark.parametrize("read_size", [1, 3, 17, 65_536])
+def test_read_records_across_chunk_boundaries(read_size):
+    array = json.dumps(ROWS, ensure_ascii=False, indent=1)
+    lines = "\n".join(json.dumps(row) for row in ROWS) + "\n"
+
+    assert read(array, read_size) == ROWS
+    assert read(lines, read_size) == ROWS
+    assert read('[{"name": "Ёлка"}]', read_size) == [{"name": "Ёлка"}]
+
+
+@pytest.mark.parametrize(
+    "body, expected",
+    [
+        ("", []),
+        ("  [ ]  ", []),
+        ('{"a": 1}\nnope\n[1]\n\n{"b": 2}', [{"a": 1}, "error", "error", {"b": 2}]),
+        ('[{"a": 1}, 5, {"b": 2}]', [{"a": 1}, "error", {"b": 2}]),
+        ('[{"a": 1} {"b": 2}]', [{"a": 1}, "error"]),
+        ('[{"a": 1}, {"b": ', [{"a": 1}, "error"]),
+        ("[12", ["error", "error"]),
+    ],
+)
+def test_read_records_reports_bad_records_inline(body, expected):
+    for read_size in (1, 65_536):
+        found = read(body, read_size)
+        assert [item if isinstance(item, dict) else item[0] for item in found] == expected
+
+
+def test_calculate_records_keeps_order_across_chunks():
+    records = list(ROWS)
+    records.insert(3, {"id": "bad", "revenue": -1})
+    records.insert(5, InputError("Некорректный JSON"))
+
+    results = list(calculate_records(records, chunk_size=2))
+
+    assert [result["row"] for result in results] == list(range(len(records)))
+    assert results[3] == {
+        "row": 3,
+        "id": "bad",
+        "error": "Все значения должны быть неотрицательными",
+        "fields": {"revenue": "Значение должно быть неотрицательным"},
+    }
+    assert results[5] == {"row": 5, "error": "Некорректный JSON"}
+    valid = [result for result in results if result["error"] is None]
+    assert [result["id"] for result in valid] == [row["id"] for row in ROWS]
+    for row, result in zip(ROWS, valid):
+        summary = run_calculation(parse_calc_input(row))
+        assert result["top"] == [payload["regime_id"] for _title, payload in summary.top_results]
+        for _title, payload, ok in summary.results:
+            metrics = result["regimes"][payload["regime_id"]]
+            if not ok:
+                assert metrics is None
+                continue
+            assert metrics["total_burden"] == pytest.approx(payload["total_burden"], abs=0.01)
+            assert metrics["net_profit"] == pytest.approx(payload["net_profit"], abs=0.01)
@@ -8,8 +8,8 @@ if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
 from calculator.constants import DEFAULT_FIXED_CONTRIB, DEFAULT_PATENT_COST, USN_INCOME_RATE, USN_REDUCTION_LIMIT
+from calculator.engine import REGIME_CALCULATORS
 from calculator.models import CalcInput, CalculationContext
-from calculator.regimes.usn_income import _calculate_usn_tax
 
 
 def make_calc_input(**overrides) -> CalcInput:
@@ -70,15 +70,15 @@ def test_usn_income_reduction_limited_with_employees():
         owner_extra_income=15_000,
     )
 
-    tax_data = _calculate_usn_tax(data, ctx)
+    result = REGIME_CALCULATORS["usn_income_no_vat"](data, ctx)
     tax_initial = data.revenue * USN_INCOME_RATE
     expected_limit = tax_initial * USN_REDUCTION_LIMIT
 
-    assert tax_data["reduction_base"] == pytest.approx(40_000)
-    assert tax_data["max_reduction"] == pytest.approx(expected_limit)
-    assert tax_data["tax_reduction"] == pytest.approx(expected_limit)
-    assert tax_data["reduction_from_fixed"] == pytest.approx(0.0)
-    assert tax_data["usn_tax"] == pytest.approx(tax_initial - expected_limit)
+    assert result.tax_reduction_base == pytest.approx(40_000)
+    assert result.tax_reduction_limit == pytest.approx(expected_limit)
+    assert result.tax_reduction == pytest.approx(expected_limit)
+    assert result.fixed_contrib_reduction == pytest.approx(0.0)
+    assert result.tax == pytest.approx(tax_initial - expected_limit)
 
 
 def test_usn_income_reduction_can_zero_tax_without_employees():
@@ -89,11 +89,11 @@ def test_usn_income_reduction_can_zero_tax_without_employees():
         owner_extra_income=15_000,
     )
 
-    tax_data = _calculate_usn_tax(data, ctx)
+    result = REGIME_CALCULATORS["usn_income_no_vat"](data, ctx)
     tax_initial = data.revenue * USN_INCOME_RATE
 
-    assert tax_data["reduction_base"] == pytest.approx(20_000)
-    assert tax_data["max_reduction"] == pytest.approx(tax_initial)
-    assert tax_data["tax_reduction"] == pytest.approx(tax_initial)
-    assert tax_data["usn_tax"] == pytest.approx(0.0)
-    assert tax_data["reduction_from_fixed"] == pytest.approx(tax_initial - tax_data["reduction_base"])
+    assert result.tax_reduction_base == pytest.approx(20_000)
+    assert result.tax_reduction_limit == pytest.approx(tax_initial)
+    assert result.tax_reduction == pytest.approx(tax_initial)
+    assert result.tax == pytest.approx(0.0)
+    assert result.fixed_contrib_reduction == pytest.approx(tax_initial - result.tax_reduction_base)
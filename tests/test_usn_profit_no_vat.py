@@ -9,8 +9,7 @@ if str(ROOT) not in sys.path:
 
 from calculator import CalcInput
 from calculator.constants import DEFAULT_FIXED_CONTRIB, DEFAULT_PATENT_COST, THRESHOLD_1_PERCENT
-from calculator.engine import _build_context
-from calculator.regimes import usn_profit
+from calculator.engine import REGIME_CALCULATORS, _build_context
 
 
 def make_input(**overrides):
@@ -39,7 +38,7 @@ def make_input(**overrides):
 
 def run_regime(calc_input):
     ctx, _ = _build_context(calc_input)
-    result = usn_profit.calculate_usn_profit_no_vat(calc_input, ctx)
+    result = REGIME_CALCULATORS["usn_profit_no_vat"](calc_input, ctx)
     return result, ctx
 
 
@@ -0,0 +1,130 @@
+from dataclasses import replace
+from pathlib import Path
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from calculator import CalcInput, run_calculation
+from calculator.constants import DEFAULT_FIXED_CONTRIB, DEFAULT_PATENT_COST
+from calculator.inputs import InputError
+from calculator.vat_shares import SHARE_FIELDS, pairwise_thresholds, share_grid, share_thresholds
+
+EPSILON = 1e-7
+
+
+def build_input(**overrides):
+    data = {
+        "revenue": 6_400_000,
+        "cost_percent": 86,
+        "vat_purchases_percent": 70,
+        "rent": 500_000,
+        "fixed_contrib": DEFAULT_FIXED_CONTRIB,
+        "employees": 33,
+        "salary": 50_000,
+        "fot_mode": "staff",
+        "fot_annual": 0.0,
+        "other_mode": "percent",
+        "other_percent": 10,
+        "other_amount": 0.0,
+        "transition_mode": "none",
+        "accumulated_vat_credit": 0.0,
+        "stock_expense_amount": 0.0,
+        "patent_cost_year": DEFAULT_PATENT_COST,
+        "purchases_month_percents": [100.0] * 12,
+    }
+    data.update(overrides)
+    return CalcInput(**data)
+
+
+def with_shares(data, cogs, rent, other):
+    return replace(data, vat_share_cogs=cogs, vat_share_rent=rent, vat_share_other=other, vat_purchases_percent=cogs * 100)
+
+
+def best_regime(data, metric="total_burden"):
+    if metric == "total_burden":
+        return run_calculation(data).top_results[0][1]["regime_id"]
+    records = [record for _title, record, ok in run_calculation(data).results if ok]
+    return max(records, key=lambda record: record["net_profit"])["regime_id"]
+
+
+def test_thresholds_switch_the_scalar_winner():
+    data = build_input()
+    thresholds = share_thresholds(data)
+
+    assert thresholds
+    for item in thresholds:
+        assert item.before != item.after
+        below = item.share - EPSILON
+        above = item.share + EPSILON
+        assert best_regime(with_shares(data, below, below, below)) == item.before
+        assert best_regime(with_shares(data, above, above, above)) == item.after
+
+
+def test_grid_matches_scalar_engine():
+    data = build_input()
+    grid = share_grid(data, steps=6)
+    ids = grid.best_regime_ids()
+
+    for i, j, k in [(0, 0, 0), (5, 5, 5), (2, 4, 1), (5, 0, 3), (1, 5, 5)]:
+        shares = grid.values[[i, j, k]]
+        assert ids[i][j][k] == best_regime(with_shares(data, *shares))
+
+
+def test_surface_points_separate_their_regimes():
+    data = build_input()
+    grid = share_grid(data, ("vat_share_cogs", "vat_share_rent"), steps=11, metric="net_profit")
+
+    assert grid.surfaces
+    for surface in grid.surfaces:
+        position = grid.axes.index(surface.axis)
+        for point in surface.points[:5]:
+            shares = {"vat_share_cogs": point[0], "vat_share_rent": point[1], "vat_share_other": data.vat_share_other}
+            for step, expected in ((-EPSILON, surface.before), (EPSILON, surface.after)):
+                moved = dict(shares)
+                moved[grid.axes[position]] += step
+                cogs = moved["vat_share_cogs"]
+                probe = replace(
+                    data,
+                    vat_share_cogs=cogs,
+                    vat_share_rent=moved["vat_share_rent"],
+                    vat_purchases_percent=cogs * 100,
+                )
+                assert best_regime(probe, "net_profit") == expected
+
+
+def test_pairwise_threshold_equalizes_burden():
+    data = build_input()
+    found = pairwise_thresholds(data, "osno_ooo", "patent")
+
+    assert found
+    for share in found:
+        summary = run_calculation(with_shares(data, share, share, share))
+        burden = {record["regime_id"]: record["total_burden"] for _title, record, ok in summary.results if ok}
+        assert burden["osno_ooo"] == pytest.approx(burden["patent"], abs=1.0)
+
+
+def test_shares_do_not_touch_regimes_without_deductions():
+    assert pairwise_thresholds(build_input(), "usn_income_no_vat", "usn_profit_no_vat") == []
+
+
+@pytest.mark.parametrize(
+    "call",
+    [
+        lambda data: share_grid(data, ("vat_share_cogs", "vat_share_cogs")),
+        lambda data: share_grid(data, ("all", "vat_share_rent")),
+        lambda data: share_grid(data, ("revenue",)),
+        lambda data: share_grid(data, SHARE_FIELDS, steps=1),
+        lambda data: share_grid(data, SHARE_FIELDS, steps=100),
+        lambda data: share_thresholds(data, metric="tax"),
+        lambda data: pairwise_thresholds(data, "osno_ooo", "unknown"),
+    ],
+)
+def test_invalid_arguments(call):
+    with pytest.raises(InputError):
+        call(build_input())
@@ -0,0 +1,11 @@
+"""Production entry point: ``gunicorn wsgi:app`` (settings in ``gunicorn.conf.py``).
+
+Importing this module loads the calculator and templates and warms them up.
+With ``preload_app`` that happens once in the master before workers fork.
+"""
+
+from app import app, warm_up
+
+warm_up()
+
+__all__ = ["app"]